@@ -0,0 +1,10 @@
+from django.apps import AppConfig
+
+
+class ChecksConfig(AppConfig):
+    name = "checks"
+
+    def ready(self):
+        from checks.checks import checker_registry
+
+        checker_registry.build()
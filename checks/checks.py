@@ -1,13 +1,24 @@
 import time
+from contextlib import ExitStack
+from contextlib import contextmanager
 from functools import cached_property
 from typing import Collection
 from typing import Dict
+from typing import Iterable
 from typing import Iterator
+from typing import List
 from typing import Optional
+from typing import Set
 from typing import Tuple
 from typing import Type
 from typing import TypeVar
 
+from django.apps import apps
+from django.contrib.contenttypes.models import ContentType
+from django.db.models import Count
+from django.db.models import QuerySet
+
+from checks.dependencies import record_reads
 from checks.models import TrackedModelCheck
 from checks.models import TransactionCheck
 from common.business_rules import ALL_RULES
@@ -66,12 +77,28 @@ class Checker:
         """
         raise NotImplementedError()
 
+    @classmethod
+    def applies_to_type(cls, model_type: Type[TrackedModel]) -> bool:
+        """
+        Returns False if this ``Checker`` can never apply to models of the
+        passed type, regardless of their data.
+
+        This is used to build the ``CheckerRegistry`` so that ``checkers_for``
+        is only called for types of model the ``Checker`` might apply to.
+        """
+        return True
+
     def run(self, model: TrackedModel) -> CheckResult:
         """Runs Checker-dependent logic and returns an indication of success."""
         raise NotImplementedError()
 
-    def apply(self, model: TrackedModel, context: TransactionCheck):
-        """Applies the check to the model and records success."""
+    def evaluate(
+        self,
+        model: TrackedModel,
+        context: TransactionCheck,
+    ) -> TrackedModelCheck:
+        """Runs the check against the model and returns an unsaved
+        ``TrackedModelCheck`` recording the result."""
         start_time = time.time()
         success, message = False, None
         try:
@@ -86,7 +113,7 @@ class Checker:
             )
         finally:
             elapsed_time = time.time() - start_time
-            return TrackedModelCheck.objects.create(
+            return TrackedModelCheck(
                 model=model,
                 transaction_check=context,
                 check_name=self.name,
@@ -95,6 +122,12 @@ class Checker:
                 processing_time=elapsed_time,
             )
 
+    def apply(self, model: TrackedModel, context: TransactionCheck):
+        """Applies the check to the model and records success."""
+        model_check = self.evaluate(model, context)
+        model_check.save()
+        return model_check
+
 
 class BusinessRuleChecker(Checker):
     """
@@ -154,6 +187,10 @@ class BusinessRuleChecker(Checker):
         cls._checker_cache[checker_name] = BusinessRuleCheckerOf
         return BusinessRuleCheckerOf
 
+    @classmethod
+    def applies_to_type(cls, model_type: Type[TrackedModel]) -> bool:
+        return cls.rule in model_type.business_rules
+
     @classmethod
     def checkers_for(cls: Type[Self], model: TrackedModel) -> Collection[Self]:
         """If the rule attribute on this BusinessRuleChecker matches any in the
@@ -200,6 +237,10 @@ class IndirectBusinessRuleChecker(BusinessRuleChecker):
         # each linked model needs to be checked for all checks to be complete.
         return f"{super().name}[{self.linked_model.pk}]"
 
+    @classmethod
+    def applies_to_type(cls, model_type: Type[TrackedModel]) -> bool:
+        return cls.rule in model_type.indirect_business_rules
+
     @classmethod
     def checkers_for(cls: Type[Self], model: TrackedModel) -> Collection[Self]:
         """Return a set of IndirectBusinessRuleCheckers for every model found on
@@ -233,8 +274,147 @@ def checker_types() -> Iterator[Type[Checker]]:
         yield IndirectBusinessRuleChecker.of(rule)
 
 
+class CheckerRegistry:
+    """
+    Maps each concrete TrackedModel subclass to the Checker types that could
+    apply to it.
+
+    Without the registry, finding the checkers for a model means asking every
+    Checker type returned by ``checker_types()`` – two per rule in
+    ``ALL_RULES`` – whether it applies. The registry is built once when the
+    checks app is ready (see ``checks.apps.ChecksConfig``), so that only the
+    Checker types for rules declared on the model's class need to be asked.
+
+    If the business rules declared on a model class are changed after the
+    registry has been built (e.g. in tests), ``build()`` must be called again.
+    """
+
+    def __init__(self) -> None:
+        self._checker_types: Dict[Type[TrackedModel], Tuple[Type[Checker], ...]] = {}
+
+    def build(self) -> None:
+        """Populate the registry for every installed TrackedModel subclass."""
+        self._checker_types = {
+            model_type: self._find_checker_types(model_type)
+            for model_type in apps.get_models()
+            if issubclass(model_type, TrackedModel)
+        }
+
+    @staticmethod
+    def _find_checker_types(
+        model_type: Type[TrackedModel],
+    ) -> Tuple[Type[Checker], ...]:
+        return tuple(
+            checker_type
+            for checker_type in checker_types()
+            if checker_type.applies_to_type(model_type)
+        )
+
+    def checker_types_for(
+        self,
+        model_type: Type[TrackedModel],
+    ) -> Tuple[Type[Checker], ...]:
+        """Return the Checker types that could apply to models of the passed
+        type."""
+        if model_type not in self._checker_types:
+            self._checker_types[model_type] = self._find_checker_types(model_type)
+        return self._checker_types[model_type]
+
+    def lookups_avoided(self, models: QuerySet) -> int:
+        """
+        Return how many ``checkers_for`` lookups the registry saves when finding
+        the checkers for every model in the passed queryset, compared with
+        asking every Checker type about every model.
+
+        This counts a single pass over the models – checking a transaction makes
+        one pass to run the checks and another to decide if they are complete.
+        """
+        all_checker_types = len(list(checker_types()))
+        model_type_counts = (
+            models.order_by()
+            .values("polymorphic_ctype")
+            .annotate(model_count=Count("pk"))
+            .values_list("polymorphic_ctype", "model_count")
+        )
+
+        avoided = 0
+        for content_type_id, model_count in model_type_counts:
+            model_type = ContentType.objects.get_for_id(content_type_id).model_class()
+            applicable = len(self.checker_types_for(model_type))
+            avoided += model_count * (all_checker_types - applicable)
+        return avoided
+
+
+checker_registry = CheckerRegistry()
+
+
 def applicable_to(model: TrackedModel) -> Iterator[Checker]:
     """Return instances of any Checker classes applicable to the supplied
     TrackedModel instance."""
-    for checker_type in checker_types():
+    for checker_type in checker_registry.checker_types_for(type(model)):
         yield from checker_type.checkers_for(model)
+
+
+def rules_applicable_to(
+    model_types: Iterable[Type[TrackedModel]],
+) -> Set[Type[BusinessRule]]:
+    """Returns the business rules that will be applied directly to models of any
+    of the passed types."""
+    return {
+        checker_type.rule
+        for model_type in model_types
+        for checker_type in checker_registry.checker_types_for(model_type)
+        if issubclass(checker_type, BusinessRuleChecker)
+        and not issubclass(checker_type, IndirectBusinessRuleChecker)
+    }
+
+
+@contextmanager
+def preload_rules(workbasket):
+    """Gives each business rule that will be applied to the models in the passed
+    workbasket the chance to work out its results for all of them at once, for
+    use while the workbasket is checked inside this context (see
+    ``BusinessRule.preload``)."""
+    model_types = [
+        ContentType.objects.get_for_id(content_type_id).model_class()
+        for content_type_id in workbasket.tracked_models.order_by()
+        .values_list("polymorphic_ctype", flat=True)
+        .distinct()
+    ]
+    with ExitStack() as preloads:
+        for rule in rules_applicable_to(model_types):
+            preloads.enter_context(rule.preload(workbasket))
+        yield
+
+
+def apply_checks(
+    models: Iterable[TrackedModel],
+    context: TransactionCheck,
+) -> List[TrackedModelCheck]:
+    """
+    Applies every applicable Checker to each of the passed models, skipping any
+    check already recorded against the context, and records the results with a
+    single bulk insert.
+
+    This is the batch equivalent of calling ``Checker.apply`` for each checker
+    returned by ``applicable_to``: the checks already performed are loaded once
+    as a set rather than queried per checker, and results are written in one
+    go rather than one row at a time.
+    """
+    models = list(models)
+    performed_checks = set(
+        context.model_checks.filter(model__in=models).values_list(
+            "model_id",
+            "check_name",
+        ),
+    )
+
+    model_checks = []
+    with override_current_transaction(context.transaction), record_reads() as reads:
+        for model in models:
+            for check in applicable_to(model):
+                if (model.pk, check.name) not in performed_checks:
+                    model_checks.append(check.evaluate(model, context))
+
+    context.record_reads(reads)
+    return TrackedModelCheck.objects.bulk_create(model_checks)
@@ -0,0 +1,163 @@
+import re
+import threading
+from contextlib import contextmanager
+from functools import lru_cache
+from typing import Dict
+from typing import FrozenSet
+from typing import Iterator
+from typing import Sequence
+from typing import Set
+from typing import Type
+
+from django.apps import apps
+from django.db import connection
+
+from common.models.trackedmodel import TrackedModel
+
+QUOTED_IDENTIFIER = re.compile(r'"([^"]+)"')
+
+VERSION_GROUP_CONDITION = re.compile(
+    re.escape(f'"{TrackedModel._meta.db_table}"."version_group_id"')
+    + r" (?:= %s|IN \(%s(?:, %s)*\))",
+)
+
+# Operators with which a query can match rows outside of the version groups
+# that it mentions.
+UNRESTRICTING_OPERATOR = re.compile(r"\b(?:OR|NOT)\b")
+
+# The recorders of the ``record_reads`` contexts open on this thread.
+_recording = threading.local()
+
+
+@lru_cache(maxsize=None)
+def tracked_model_tables() -> Dict[str, FrozenSet[Type[TrackedModel]]]:
+    """
+    Returns a mapping from database table name to the types of tracked model
+    whose data is stored in that table.
+
+    The ``TrackedModel`` table itself maps to every concrete type because a
+    query that reads only that table (e.g. to find out whether any version
+    exists) could be affected by new versions of any type. Tables of
+    automatically created many-to-many relations map to the model that owns the
+    relation, as those rows are written as part of that model.
+    """
+    types = frozenset(
+        model
+        for model in apps.get_models()
+        if issubclass(model, TrackedModel) and model is not TrackedModel
+    )
+    tables = {TrackedModel._meta.db_table: types}
+
+    for model in types:
+        tables[model._meta.db_table] = frozenset([model])
+
+    for model in apps.get_models(include_auto_created=True):
+        owner = model._meta.auto_created
+        if owner in types:
+            tables[model._meta.db_table] = frozenset([owner])
+
+    return tables
+
+
+def tables_in(sql: str) -> Set[str]:
+    """Returns the names of tracked model tables that appear quoted in the
+    passed SQL."""
+    tables = tracked_model_tables()
+    return {name for name in QUOTED_IDENTIFIER.findall(sql) if name in tables}
+
+
+def version_groups_in(sql: str, params: Sequence) -> Set[int]:
+    """
+    Returns the ids of the version groups that the passed query of the
+    ``TrackedModel`` table is restricted to, or an empty set if it is not
+    restricted to particular version groups.
+
+    Queries with an ``OR`` or a ``NOT`` may match rows outside of the version
+    groups they mention, so they are never treated as restricted.
+    """
+    if params is None or UNRESTRICTING_OPERATOR.search(sql):
+        return set()
+
+    match = VERSION_GROUP_CONDITION.search(sql)
+    if match is None:
+        return set()
+
+    first_param = sql[: match.start()].count("%s")
+    param_count = match.group(0).count("%s")
+    return set(params[first_param : first_param + param_count])
+
+
+class ReadRecorder:
+    """
+    Records the types of tracked model, and the version groups, read by each
+    query run on the database connection whilst it is installed.
+
+    A query that joins through the ``TrackedModel`` table to a concrete table
+    only counts as a read of the concrete type. A query that reads the
+    ``TrackedModel`` table alone only counts as a read of the version groups it
+    is restricted to (e.g. when looking up the versions of an object) or, if it
+    isn't restricted to particular version groups, of every type.
+    """
+
+    def __init__(self):
+        self.model_types: Set[Type[TrackedModel]] = set()
+        self.version_group_ids: Set[int] = set()
+
+    def __call__(self, execute, sql, params, many, context):
+        tables = tables_in(sql)
+        if TrackedModel._meta.db_table in tables and len(tables) > 1:
+            tables.discard(TrackedModel._meta.db_table)
+
+        if tables == {TrackedModel._meta.db_table} and not many:
+            version_group_ids = version_groups_in(sql, params)
+            if version_group_ids:
+                self.version_group_ids.update(version_group_ids)
+                tables = set()
+
+        mapping = tracked_model_tables()
+        for table in tables:
+            self.model_types.update(mapping[table])
+
+        return execute(sql, params, many, context)
+
+    def update(self, other: "ReadRecorder"):
+        """Adds the model types and version groups read by the passed recorder
+        to those read by this one."""
+        self.model_types.update(other.model_types)
+        self.version_group_ids.update(other.version_group_ids)
+
+
+@contextmanager
+def record_reads() -> Iterator[ReadRecorder]:
+    """
+    Records the types of tracked model and the version groups read by the
+    database queries run inside this context.
+
+    .. code:: python
+
+        with record_reads() as reads:
+            ...
+        reads.model_types  # e.g. {Measure, GoodsNomenclature}
+        reads.version_group_ids  # e.g. {1234, 5678}
+    """
+    recorder = ReadRecorder()
+    recorders = getattr(_recording, "recorders", [])
+    _recording.recorders = [*recorders, recorder]
+    try:
+        with connection.execute_wrapper(recorder):
+            yield recorder
+    finally:
+        _recording.recorders = recorders
+
+
+def add_reads(reads: ReadRecorder):
+    """
+    Adds the passed reads to those being recorded by each ``record_reads``
+    context open on this thread.
+
+    This is for results that were worked out before the context was entered
+    (e.g. by ``BusinessRule.preload``), so that the reads they depend on are
+    recorded wherever they are used.
+    """
+    for recorder in getattr(_recording, "recorders", []):
+        recorder.update(reads)
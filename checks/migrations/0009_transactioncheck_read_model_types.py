@@ -0,0 +1,38 @@
+# Generated by Django 4.2.15 on 2026-10-18 03:56
+
+from django.db import migrations
+from django.db import models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("common", "0012_user_sso_uuid"),
+        ("contenttypes", "0002_remove_content_type_name"),
+        ("checks", "0008_alter_trackedmodelcheck_processing_time"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="transactioncheck",
+            name="read_model_types",
+            field=models.ManyToManyField(
+                blank=True,
+                related_name="reading_transaction_checks",
+                to="contenttypes.contenttype",
+            ),
+        ),
+        migrations.AddField(
+            model_name="transactioncheck",
+            name="read_set_recorded",
+            field=models.BooleanField(default=False),
+        ),
+        migrations.AddField(
+            model_name="transactioncheck",
+            name="read_version_groups",
+            field=models.ManyToManyField(
+                blank=True,
+                related_name="reading_transaction_checks",
+                to="common.versiongroup",
+            ),
+        ),
+    ]
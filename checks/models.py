@@ -1,6 +1,11 @@
+from typing import Iterable
+from typing import Type
+
+from django.contrib.contenttypes.models import ContentType
 from django.db import models
 from django.db.models import fields
 
+from checks.dependencies import ReadRecorder
 from checks.querysets import TransactionCheckQueryset
 from common.models.mixins import TimestampedMixin
 from common.models.trackedmodel import TrackedModel
@@ -74,6 +79,44 @@ class TransactionCheck(TimestampedMixin):
     key. This is used to detect if the check is now stale.
     """
 
+    read_model_types = models.ManyToManyField(
+        ContentType,
+        related_name="reading_transaction_checks",
+        blank=True,
+    )
+    """
+    The types of tracked model whose data was read by the checks carried out
+    against this transaction, including when working out which checks apply.
+
+    Only newly approved versions of these types can change the result of the
+    check, so approvals of other types do not make the check out of date. See
+    ``TransactionCheckQueryset.current``.
+    """
+
+    read_version_groups = models.ManyToManyField(
+        "common.VersionGroup",
+        related_name="reading_transaction_checks",
+        blank=True,
+    )
+    """
+    The version groups whose versions were read by the checks carried out
+    against this transaction through the ``TrackedModel`` table alone, rather
+    than through the table of their type (e.g. when looking up the versions of
+    an object).
+
+    Newly approved versions in these groups can change the result of the check
+    in the same way as newly approved versions of ``read_model_types``.
+    """
+
+    read_set_recorded = fields.BooleanField(default=False)
+    """
+    True if ``read_model_types`` and ``read_version_groups`` have been recorded
+    for every check carried out against this transaction.
+
+    If not (e.g. for checks carried out before read sets were recorded) the
+    check is no longer current as soon as any new transaction is approved.
+    """
+
     model_checks: models.QuerySet["TrackedModelCheck"]
 
     objects: TransactionCheckQueryset = models.Manager.from_queryset(
@@ -93,6 +136,46 @@ class TransactionCheck(TimestampedMixin):
 
         return super().save(*args, **kwargs)
 
+    def record_read_model_types(self, model_types: Iterable[Type[TrackedModel]]):
+        """
+        Add the passed model types to the ``read_model_types`` of this check.
+
+        Model checks for the same transaction may run concurrently, so this
+        ignores types that have already been recorded rather than failing.
+        """
+        through = type(self).read_model_types.through
+        content_types = ContentType.objects.get_for_models(*model_types).values()
+        through.objects.bulk_create(
+            [
+                through(transactioncheck=self, contenttype=content_type)
+                for content_type in content_types
+            ],
+            ignore_conflicts=True,
+        )
+
+    def record_read_version_groups(self, version_group_ids: Iterable[int]):
+        """
+        Add the passed version groups to the ``read_version_groups`` of this
+        check.
+
+        As with ``record_read_model_types``, groups that have already been
+        recorded are ignored.
+        """
+        through = type(self).read_version_groups.through
+        through.objects.bulk_create(
+            [
+                through(transactioncheck=self, versiongroup_id=version_group_id)
+                for version_group_id in version_group_ids
+            ],
+            ignore_conflicts=True,
+        )
+
+    def record_reads(self, reads: ReadRecorder):
+        """Add the model types and version groups read whilst ``reads`` was
+        recording to the read set of this check."""
+        self.record_read_model_types(reads.model_types)
+        self.record_read_version_groups(reads.version_group_ids)
+
     class Meta:
         ordering = (
             "transaction__partition",
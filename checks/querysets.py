@@ -6,6 +6,7 @@ from django.db.models.aggregates import Max
 from django_cte import CTEQuerySet
 from django_cte import With
 
+from common.models.trackedmodel import TrackedModel
 from common.models.transactions import Transaction
 from common.models.transactions import TransactionPartition
 from common.models.utils import LazyTransaction
@@ -46,6 +47,51 @@ class TransactionCheckQueryset(CTEQuerySet):
         )
     )
 
+    @staticmethod
+    def read_set_filter():
+        """
+        Matches checks where the read set of the check was recorded and no new
+        versions of any of the types of model or version groups in it have been
+        approved since the check was carried out, in which case the new
+        transactions can't have changed the result.
+
+        Versions approved as part of the workbasket of the checked transaction
+        are ignored: the check already saw the earlier transactions of its own
+        workbasket, and still won't see the later ones once they are approved.
+
+        This is built on demand rather than with the other filters because it
+        queries ``TrackedModel``, which isn't loaded when this class is.
+        """
+        #    approved transactions > head_transaction from other workbaskets
+        newer_versions = TrackedModel.objects.filter(
+            models.Q(
+                transaction__partition__gt=models.OuterRef(
+                    "head_transaction__partition",
+                ),
+            )
+            | models.Q(
+                transaction__partition=models.OuterRef("head_transaction__partition"),
+                transaction__order__gt=models.OuterRef("head_transaction__order"),
+            ),
+            transaction__partition__in=TransactionPartition.approved_partitions(),
+        ).exclude(transaction__workbasket=models.OuterRef("transaction__workbasket"))
+
+        return (
+            models.Q(read_set_recorded=True)
+            & ~models.Exists(
+                newer_versions.filter(
+                    polymorphic_ctype__reading_transaction_checks=models.OuterRef(
+                        "pk",
+                    ),
+                ),
+            )
+            & ~models.Exists(
+                newer_versions.filter(
+                    version_group__reading_transaction_checks=models.OuterRef("pk"),
+                ),
+            )
+        )
+
     freshness_fields = {
         # See the field descriptions on ``TransactionCheck`` for details on
         # how these fields are populated and used to calculate freshness.
@@ -72,12 +118,15 @@ class TransactionCheckQueryset(CTEQuerySet):
         )
     )
 
-    requires_update_filter = (~freshness_filter) | (~currentness_filter)
-
-    requires_update_annotation = expressions.ExpressionWrapper(
-        expression=requires_update_filter,
-        output_field=models.fields.BooleanField(),
-    )
+    @classmethod
+    def requires_update_annotation(cls):
+        return expressions.ExpressionWrapper(
+            expression=(
+                (~cls.freshness_filter)
+                | (~(cls.currentness_filter | cls.read_set_filter()))
+            ),
+            output_field=models.fields.BooleanField(),
+        )
 
     def current(self):
         """
@@ -92,8 +141,14 @@ class TransactionCheckQueryset(CTEQuerySet):
         no transactions were approved between the check happening and the
         transaction being committed to the approved partition (but some may have
         been added after it, which can't affect its result).
+
+        In either case, if the read set of the check was recorded, newly
+        approved transactions only matter if they contain versions of one of
+        the types or version groups in it (see
+        ``TransactionCheck.read_model_types`` and
+        ``TransactionCheck.read_version_groups``).
         """
-        return self.filter(self.currentness_filter)
+        return self.filter(self.currentness_filter | self.read_set_filter())
 
     def fresh(self):
         """
@@ -139,7 +194,7 @@ class TransactionCheckQueryset(CTEQuerySet):
             self.model.objects.exclude(**ignore_filter)
             .annotate(**self.freshness_annotations)
             .annotate(
-                requires_update=self.requires_update_annotation,
+                requires_update=self.requires_update_annotation(),
             ),
             name="basic_info",
         )
@@ -1,15 +1,20 @@
 from itertools import cycle
+from typing import Sequence
 
 from celery import group
 from celery.utils.log import get_task_logger
+from django.conf import settings
 
 from checks.checks import applicable_to
+from checks.checks import apply_checks
+from checks.dependencies import record_reads
 from checks.models import TransactionCheck
 from common.celery import app
 from common.models.trackedmodel import TrackedModel
 from common.models.transactions import Transaction
 from common.models.transactions import TransactionPartition
 from common.models.utils import override_current_transaction
+from common.util import chunks
 
 # Celery logger adds the task id and status and outputs via the worker.
 logger = get_task_logger(__name__)
@@ -30,7 +35,7 @@ def check_model(trackedmodel_id: int, context_id: int):
     context: TransactionCheck = TransactionCheck.objects.get(pk=context_id)
     transaction = context.transaction
 
-    with override_current_transaction(transaction):
+    with override_current_transaction(transaction), record_reads() as reads:
         for check in applicable_to(model):
             if not context.model_checks.filter(
                 model=model,
@@ -40,6 +45,45 @@ def check_model(trackedmodel_id: int, context_id: int):
                 # not Celery ``apply`` but ``Checker.apply``).
                 check.apply(model, context)
 
+    context.record_reads(reads)
+
+
+@app.task
+def check_models(trackedmodel_ids: Sequence[int], context_id: int):
+    """
+    Runs all of the applicable checkers on the passed model IDs, and records the
+    results.
+
+    This is the batch equivalent of running ``check_model`` for each model: the
+    models are loaded with one polymorphic query, the checks already performed
+    are loaded once and all of the results are written with one bulk insert.
+    See ``settings.CHECKS_BATCH_SIZE``.
+    """
+
+    models = TrackedModel.objects.filter(pk__in=trackedmodel_ids).order_by("pk")
+    context: TransactionCheck = TransactionCheck.objects.select_related(
+        "transaction",
+    ).get(pk=context_id)
+
+    apply_checks(models, context)
+
+
+def model_check_tasks(model_ids: Sequence[int], context_id: int):
+    """
+    Returns the tasks that will check the passed model IDs.
+
+    If ``settings.CHECKS_BATCH_SIZE`` is set, the models are checked by
+    ``check_models`` in slices of that size, otherwise each model is checked by
+    its own ``check_model`` task.
+    """
+    if settings.CHECKS_BATCH_SIZE:
+        return [
+            check_models.si(batch, context_id)
+            for batch in chunks(model_ids, settings.CHECKS_BATCH_SIZE)
+        ]
+
+    return [check_model.si(*args) for args in zip(model_ids, cycle([context_id]))]
+
 
 @app.task
 def is_transaction_check_complete(check_id: int) -> bool:
@@ -77,20 +121,22 @@ def setup_or_resume_transaction_check(transaction: Transaction):
 
     head_transaction = Transaction.approved.last()
 
-    existing_checks = TransactionCheck.objects.filter(
-        transaction=transaction,
-        head_transaction=head_transaction,
-    )
+    # A check against an earlier head transaction can still be reused if none
+    # of the types of model it read have been approved since.
+    existing_checks = TransactionCheck.objects.filter(transaction=transaction)
 
-    up_to_date_check = existing_checks.requires_update(False).filter(completed=True)
-    if up_to_date_check.exists():
-        return up_to_date_check.get(), []
+    up_to_date_check = (
+        existing_checks.requires_update(False).filter(completed=True).last()
+    )
+    if up_to_date_check is not None:
+        return up_to_date_check, []
 
     context = existing_checks.requires_update(False).filter(completed=False).last()
     if context is None:
         context = TransactionCheck(
             transaction=transaction,
             head_transaction=head_transaction,
+            read_set_recorded=True,
         )
         context.save()
 
@@ -117,7 +163,7 @@ def check_transaction(self, transaction_id: int):
     # then once they are all done see if the transaction check is now complete.
     logger.info("Beginning check of %s", transaction.summary)
     workflow = group(
-        check_model.si(*args) for args in zip(model_ids, cycle([check.pk]))
+        model_check_tasks(model_ids, check.pk),
     ) | is_transaction_check_complete.si(check.pk)
 
     # Execute the workflow by replacing this task with it.
@@ -140,8 +186,12 @@ def check_transaction_sync(transaction: Transaction):
         )
     else:
         logger.info("Beginning synchronous check of %s", transaction.summary)
-        for model_id in model_ids:
-            check_model(model_id, check.pk)
+        if settings.CHECKS_BATCH_SIZE:
+            for batch in chunks(model_ids, settings.CHECKS_BATCH_SIZE):
+                check_models(batch, check.pk)
+        else:
+            for model_id in model_ids:
+                check_model(model_id, check.pk)
         is_transaction_check_complete(check.pk)
 
 
@@ -0,0 +1,61 @@
+import pytest
+
+from checks import tasks
+from checks.models import TransactionCheck
+from common.tests import factories
+from common.tests.util import QueryCounter
+from common.tests.util import time_best_of
+
+pytestmark = [pytest.mark.django_db, pytest.mark.benchmark]
+
+MODELS = 100
+
+
+@pytest.fixture
+def footnote_transaction(benchmark_scale):
+    """
+    Returns a draft transaction containing footnotes and their descriptions.
+
+    Use ``--benchmark-scale`` to grow the number of footnotes.
+    """
+    factories.ApprovedTransactionFactory.create()
+    transaction = factories.UnapprovedTransactionFactory.create()
+    for _ in range(MODELS * benchmark_scale):
+        factories.FootnoteDescriptionFactory.create(transaction=transaction)
+    return transaction
+
+
+def test_batch_transaction_checking(footnote_transaction, record_property):
+    """Compare checking every model in a transaction with one task per model
+    against checking them all in a single batch."""
+    model_ids = list(footnote_transaction.tracked_models.values_list("pk", flat=True))
+
+    def check_per_model():
+        context = TransactionCheck.objects.create(transaction=footnote_transaction)
+        for model_id in model_ids:
+            tasks.check_model(model_id, context.pk)
+        return context
+
+    def check_in_batch():
+        context = TransactionCheck.objects.create(transaction=footnote_transaction)
+        tasks.check_models(model_ids, context.pk)
+        return context
+
+    with QueryCounter() as per_model_queries:
+        per_model = check_per_model()
+    with QueryCounter() as batch_queries:
+        batch = check_in_batch()
+
+    assert set(
+        per_model.model_checks.values_list("model_id", "check_name", "successful"),
+    ) == set(batch.model_checks.values_list("model_id", "check_name", "successful"))
+
+    per_model_seconds = time_best_of(check_per_model)
+    batch_seconds = time_best_of(check_in_batch)
+
+    record_property("models", len(model_ids))
+    record_property("per_model_queries", per_model_queries.count)
+    record_property("batch_queries", batch_queries.count)
+    record_property("per_model_seconds", per_model_seconds)
+    record_property("batch_seconds", batch_seconds)
+    record_property("speedup", per_model_seconds / batch_seconds)
@@ -1,12 +1,20 @@
 from itertools import chain
+from unittest import mock
 from unittest.mock import call
 
 import pytest
 
 import checks.tests.factories
 from checks.checks import BusinessRuleChecker
+from checks.checks import CheckerRegistry
 from checks.checks import IndirectBusinessRuleChecker
+from checks.checks import applicable_to
+from checks.checks import apply_checks
+from checks.checks import checker_registry
 from checks.checks import checker_types
+from checks.checks import preload_rules
+from checks.models import TrackedModelCheck
+from common.models.trackedmodel import TrackedModel
 from common.models.transactions import Transaction
 from common.models.utils import override_current_transaction
 from common.tests import factories
@@ -26,6 +34,51 @@ def test_all_business_rules_have_a_checker(trackedmodel_factory):
     assert checkers.intersection(model_rules) == model_rules
 
 
+def test_checker_registry_holds_rules_declared_on_model(trackedmodel_factory):
+    """Verify that the registry maps each model type to the checkers for the
+    business rules declared on it, and no others."""
+    model_type = trackedmodel_factory._meta.model
+    registered = checker_registry.checker_types_for(model_type)
+
+    assert {
+        checker.rule
+        for checker in registered
+        if not issubclass(checker, IndirectBusinessRuleChecker)
+    } == set(model_type.business_rules)
+    assert {
+        checker.rule
+        for checker in registered
+        if issubclass(checker, IndirectBusinessRuleChecker)
+    } == set(model_type.indirect_business_rules)
+
+
+def test_applicable_to_matches_all_checker_types(trackedmodel_factory):
+    """Verify that using the registry finds the same checkers as asking every
+    checker type."""
+    model = trackedmodel_factory.create()
+
+    with override_current_transaction(model.transaction):
+        expected = {
+            checker.name
+            for checker_type in checker_types()
+            for checker in checker_type.checkers_for(model)
+        }
+        assert {checker.name for checker in applicable_to(model)} == expected
+
+
+def test_checker_registry_lookups_avoided():
+    models = factories.TestModel1Factory.create_batch(2)
+    registry = CheckerRegistry()
+
+    with add_business_rules(type(models[0]), TestRule):
+        registry.build()
+        avoided = registry.lookups_avoided(
+            TrackedModel.objects.filter(pk__in=[model.pk for model in models]),
+        )
+
+    assert avoided == 2 * (len(list(checker_types())) - 1)
+
+
 def test_business_rules_validation():
     """Verify that ``Checker.apply`` calls ``validate`` on it's matching
     BusinessRule."""
@@ -91,3 +144,74 @@ def test_indirect_business_rule_validation():
                 call(model),
             ],
         )
+
+
+def test_apply_checks_records_only_unperformed_checks():
+    """Verify that ``apply_checks`` records one result per model for each
+    applicable checker, skipping checks already recorded against the context."""
+    models = factories.TestModel1Factory.create_batch(3)
+    check = checks.tests.factories.TransactionCheckFactory(
+        transaction=models[0].transaction,
+        incomplete=True,
+    )
+    checks.tests.factories.TrackedModelCheckFactory.create(
+        model=models[0],
+        transaction_check=check,
+        check_name="passes",
+    )
+    checkers = [
+        checks.tests.factories.DummyChecker(name="passes"),
+        checks.tests.factories.DummyChecker(name="fails", success=False),
+    ]
+
+    with mock.patch("checks.checks.applicable_to", new=lambda m: checkers):
+        recorded = apply_checks(models, check)
+
+    assert len(recorded) == 5
+    assert check.model_checks.count() == 6
+    assert set(
+        check.model_checks.values_list("model_id", "check_name", "successful"),
+    ) == {
+        (model.pk, checker.name, checker.success)
+        for model in models
+        for checker in checkers
+    }
+
+
+def test_evaluate_does_not_record_result():
+    model = factories.TestModel1Factory.create()
+    check = checks.tests.factories.TransactionCheckFactory(
+        transaction=model.transaction,
+    )
+
+    model_check = checks.tests.factories.DummyChecker(
+        name="fails",
+        success=False,
+    ).evaluate(model, check)
+
+    assert model_check.pk is None
+    assert model_check.successful is False
+    assert not TrackedModelCheck.objects.filter(check_name="fails").exists()
+
+
+def test_preload_rules_preloads_rules_applied_to_workbasket():
+    """Verify that ``preload_rules`` gives each rule applied directly to the
+    models in the workbasket the chance to preload its results."""
+    model = factories.TestModel1Factory.create()
+
+    with (
+        mock.patch.object(TestRule, "preload") as preload,
+        add_business_rules(
+            type(model),
+            TestRule,
+        ),
+    ):
+        checker_registry.build()
+        try:
+            with preload_rules(model.transaction.workbasket):
+                preload.return_value.__enter__.assert_called_once()
+        finally:
+            checker_registry.build()
+
+    preload.assert_called_once_with(model.transaction.workbasket)
+    preload.return_value.__exit__.assert_called_once()
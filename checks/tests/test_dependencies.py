@@ -0,0 +1,80 @@
+import pytest
+
+from checks.dependencies import ReadRecorder
+from checks.dependencies import add_reads
+from checks.dependencies import record_reads
+from checks.dependencies import tracked_model_tables
+from common.models.trackedmodel import TrackedModel
+from common.tests import factories
+from common.tests.models import TestModel1
+from common.tests.models import TestModel2
+from quotas.models import QuotaOrderNumber
+
+pytestmark = pytest.mark.django_db
+
+
+def test_tracked_model_tables_include_owned_relations():
+    tables = tracked_model_tables()
+
+    assert tables[TestModel1._meta.db_table] == {TestModel1}
+    assert tables[TrackedModel._meta.db_table] >= {TestModel1, TestModel2}
+
+    through = QuotaOrderNumber.required_certificates.through
+    assert tables[through._meta.db_table] == {QuotaOrderNumber}
+
+
+def test_record_reads_of_concrete_types():
+    model = factories.TestModel1Factory.create()
+    factories.TestModel2Factory.create()
+
+    with record_reads() as reads:
+        list(TestModel1.objects.filter(sid=model.sid))
+
+    assert reads.model_types == {TestModel1}
+
+
+def test_record_reads_of_tracked_model_table_alone_reads_all_types():
+    factories.TestModel1Factory.create()
+
+    with record_reads() as reads:
+        TrackedModel.objects.non_polymorphic().exists()
+
+    assert reads.model_types == tracked_model_tables()[TrackedModel._meta.db_table]
+
+
+def test_record_reads_of_version_groups():
+    model = factories.TestModel1Factory.create()
+
+    with record_reads() as reads:
+        TrackedModel.objects.non_polymorphic().filter(
+            version_group=model.version_group,
+        ).exists()
+
+    assert reads.model_types == set()
+    assert reads.version_group_ids == {model.version_group_id}
+
+
+def test_record_reads_excluding_version_groups_reads_all_types():
+    model = factories.TestModel1Factory.create()
+
+    with record_reads() as reads:
+        TrackedModel.objects.non_polymorphic().exclude(
+            version_group=model.version_group,
+        ).exists()
+
+    assert reads.version_group_ids == set()
+    assert reads.model_types == tracked_model_tables()[TrackedModel._meta.db_table]
+
+
+def test_add_reads_to_open_recorders():
+    earlier = ReadRecorder()
+    earlier.model_types.add(TestModel1)
+    earlier.version_group_ids.add(1234)
+
+    with record_reads() as outer, record_reads() as inner:
+        add_reads(earlier)
+    add_reads(ReadRecorder())
+
+    for reads in (outer, inner):
+        assert reads.model_types == {TestModel1}
+        assert reads.version_group_ids == {1234}
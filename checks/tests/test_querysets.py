@@ -6,6 +6,7 @@ from checks.tests.util import assert_fresh
 from checks.tests.util import assert_requires_update
 from common.models.transactions import Transaction
 from common.tests import factories as common_factories
+from common.validators import UpdateType
 
 pytestmark = pytest.mark.django_db
 
@@ -165,3 +166,87 @@ def test_check_with_no_models_does_not_require_update():
     assert_fresh(check)
     assert_current(check)
     assert_requires_update(check, False)
+
+
+@pytest.mark.parametrize(
+    ("read_set_recorded", "approved_type_read", "expect_current"),
+    (
+        (True, False, True),
+        (True, True, False),
+        (False, False, False),
+    ),
+    ids=(
+        "check with read set and approval of unread type",
+        "check with read set and approval of read type",
+        "check without read set and approval of unread type",
+    ),
+)
+def test_current_queryset_uses_read_model_types(
+    read_set_recorded,
+    approved_type_read,
+    expect_current,
+):
+    check = factories.TransactionCheckFactory.create(
+        read_set_recorded=read_set_recorded,
+    )
+    check.record_read_model_types([common_factories.TestModel1Factory._meta.model])
+
+    approved_factory = (
+        common_factories.TestModel1Factory
+        if approved_type_read
+        else common_factories.TestModel2Factory
+    )
+    approved_factory.create(transaction=common_factories.ApprovedTransactionFactory())
+    assert Transaction.approved.last() != check.head_transaction
+
+    assert_current(check, expect_current)
+    assert_requires_update(check, not expect_current)
+
+
+@pytest.mark.parametrize(
+    ("approved_in_read_group", "expect_current"),
+    (
+        (False, True),
+        (True, False),
+    ),
+    ids=(
+        "check with read set and approval in unread version group",
+        "check with read set and approval in read version group",
+    ),
+)
+def test_current_queryset_uses_read_version_groups(
+    approved_in_read_group,
+    expect_current,
+):
+    read = common_factories.TestModel1Factory.create()
+    check = factories.TransactionCheckFactory.create(read_set_recorded=True)
+    check.record_read_version_groups([read.version_group_id])
+
+    approved_transaction = common_factories.ApprovedTransactionFactory.create()
+    common_factories.TestModel1Factory.create(
+        transaction=approved_transaction,
+        update_type=UpdateType.UPDATE if approved_in_read_group else UpdateType.CREATE,
+        version_group=(
+            read.version_group
+            if approved_in_read_group
+            else common_factories.VersionGroupFactory.create()
+        ),
+    )
+
+    assert_current(check, expect_current)
+    assert_requires_update(check, not expect_current)
+
+
+def test_current_queryset_ignores_approval_of_own_workbasket():
+    check = factories.TransactionCheckFactory.create(read_set_recorded=True)
+    check.record_read_model_types([common_factories.TestModel1Factory._meta.model])
+
+    common_factories.TestModel1Factory.create(
+        transaction=common_factories.ApprovedTransactionFactory.create(
+            workbasket=check.transaction.workbasket,
+        ),
+    )
+    assert Transaction.approved.last() != check.head_transaction
+
+    assert_current(check)
+    assert_requires_update(check, False)
@@ -1,3 +1,4 @@
+from dataclasses import dataclass
 from itertools import repeat
 from itertools import zip_longest
 from unittest import mock
@@ -11,6 +12,7 @@ from checks.tests import factories
 from checks.tests.util import assert_requires_update
 from common.models.transactions import TransactionPartition
 from common.tests import factories as common_factories
+from common.tests.models import TestModel2
 from workbaskets.validators import WorkflowStatus
 
 pytestmark = pytest.mark.django_db
@@ -91,6 +93,20 @@ def test_model_checking(check):
     assert check.model_checks.filter(successful=True).count() == num_successful
 
 
+def test_batch_model_checking(check):
+    check, num_checks, num_completed, num_successful = check
+
+    model = check.transaction.tracked_models.first()
+    if model is None:
+        pytest.skip("No model to check")
+
+    with mock.patch("checks.checks.applicable_to", new=tasks.applicable_to):
+        tasks.check_models([model.id], check.id)
+
+    assert check.model_checks.count() == num_checks
+    assert check.model_checks.filter(successful=True).count() == num_successful
+
+
 def test_completion_of_transaction_checks(check):
     check, num_checks, num_completed, num_successful = check
     expect_completed = num_completed == num_checks
@@ -217,3 +233,72 @@ def test_archived_workbasket_checks(include_archived, transaction_partition):
         assert checks_require_update.get().pk == transaction_check.pk
     else:
         assert checks_require_update.count() == 0
+
+
+def test_checking_of_transaction_in_batches(settings):
+    settings.CHECKS_BATCH_SIZE = 2
+    common_factories.ApprovedTransactionFactory.create()
+    transaction = common_factories.UnapprovedTransactionFactory.create()
+    common_factories.TestModel1Factory.create_batch(5, transaction=transaction)
+
+    with mock.patch("celery.app.task.Task.replace", new=lambda _, t: t):
+        workflow = tasks.check_transaction(transaction.id)  # type: ignore
+
+    check = TransactionCheck.objects.filter(transaction=transaction).get()
+    assert [len(task.args[0]) for task in workflow.tasks] == [2, 2, 1]
+
+    model_ids = set(transaction.tracked_models.values_list("id", flat=True))
+    for task in workflow.tasks:
+        batch, context_id = task.args
+        model_ids.difference_update(batch)
+        assert task.task == tasks.check_models.name
+        assert context_id == check.id
+
+    assert not model_ids
+    assert workflow.body.task == tasks.is_transaction_check_complete.name
+
+
+@dataclass(frozen=True)
+class OverlapChecker(factories.DummyChecker):
+    def run(self, model):
+        overlaps = TestModel2.objects.filter(
+            valid_between__overlap=model.valid_between,
+        )
+        return not overlaps.exists(), None
+
+
+@pytest.mark.parametrize(
+    ("approved_factory", "expect_reused"),
+    (
+        (common_factories.TestModel1Factory, True),
+        (common_factories.TestModel2Factory, False),
+    ),
+    ids=(
+        "approval of unread type reuses check",
+        "approval of read type rechecks",
+    ),
+)
+def test_checking_of_transaction_records_read_model_types(
+    approved_factory,
+    expect_reused,
+):
+    common_factories.ApprovedTransactionFactory.create()
+    transaction = common_factories.UnapprovedTransactionFactory.create()
+    common_factories.TestModel1Factory.create(transaction=transaction)
+    checker = OverlapChecker(name="reads TestModel2")
+
+    with mock.patch("checks.tasks.applicable_to", new=lambda m: [checker]):
+        tasks.check_transaction_sync(transaction)
+        check = TransactionCheck.objects.get(transaction=transaction)
+        assert check.read_set_recorded
+        assert set(ct.model_class() for ct in check.read_model_types.all()) == {
+            TestModel2,
+        }
+
+        approved_factory.create(
+            transaction=common_factories.ApprovedTransactionFactory.create(),
+        )
+        tasks.check_transaction_sync(transaction)
+
+    checks = TransactionCheck.objects.filter(transaction=transaction)
+    assert checks.count() == (1 if expect_reused else 2)
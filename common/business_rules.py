@@ -3,10 +3,12 @@
 from __future__ import annotations
 
 import logging
+from contextlib import nullcontext
 from datetime import date
 from datetime import datetime
 from functools import wraps
 from typing import Any
+from typing import ContextManager
 from typing import Dict
 from typing import Iterable
 from typing import Iterator
@@ -155,6 +157,18 @@ class BusinessRule(metaclass=BusinessRuleBase):
                         # skip running business rules against deleted things.
                         continue
 
+    @classmethod
+    def preload(cls, workbasket) -> ContextManager:
+        """
+        Returns a context manager inside which validating the models in the
+        passed workbasket may use results that were worked out for all of them
+        at once.
+
+        By default nothing is preloaded. Rules which are expensive to evaluate
+        one model at a time can override this (see ``measures.business_rules.ME32``).
+        """
+        return nullcontext()
+
     def validate(self, *args):
         """
         Perform business rule validation.
@@ -0,0 +1,220 @@
+"""
+A cache of the TARIC XML rendered for each TrackedModel when serializing
+envelopes.
+
+Approved versions of TrackedModels are not changed, so the XML rendered for
+them only changes if the templates do. Rather than serializing and rendering
+the same records every time an envelope is generated, the XML of each record is
+rendered once with placeholders in place of its message ids, record sequence
+numbers and transaction id, and the placeholders are filled in each time the
+record is written to an envelope.
+
+Fragments are kept in process memory up to ``settings.ENVELOPE_FRAGMENT_CACHE_SIZE``
+bytes, evicting the least recently used first. A size of 0 disables the cache.
+"""
+
+import hashlib
+import re
+import sys
+import threading
+from collections import OrderedDict
+from functools import lru_cache
+from typing import Callable
+from typing import Dict
+from typing import Hashable
+from typing import Iterable
+from typing import List
+from typing import NamedTuple
+from typing import Optional
+from typing import Tuple
+
+from django.conf import settings
+from django.template import engines
+from django.template.loader import render_to_string
+
+from common.models import TrackedModel
+from common.models import Transaction
+from common.renderers import Counter
+
+# The templates that the XML of records is rendered from.
+RECORD_TEMPLATE = "workbaskets/taric/record.xml"
+RECORD_TEMPLATE_PREFIXES = ("taric/", "macros/", RECORD_TEMPLATE)
+
+PLACEHOLDER = re.compile("\x00(T|\\d+)\x00")
+TRANSACTION_ID_PLACEHOLDER = "\x00T\x00"
+
+MESSAGE = "message"
+SEQUENCE = "sequence"
+
+
+@lru_cache(maxsize=None)
+def template_version() -> str:
+    """Returns a hash of the sources of the templates that records are rendered
+    from, which changes whenever the XML of a record might."""
+    environment = engines["jinja2"].env
+    digest = hashlib.sha256()
+    for name in sorted(environment.loader.list_templates()):
+        if name.startswith(RECORD_TEMPLATE_PREFIXES):
+            source, _, _ = environment.loader.get_source(environment, name)
+            digest.update(name.encode())
+            digest.update(source.encode())
+    return digest.hexdigest()
+
+
+class RecordFragment(NamedTuple):
+    """
+    The XML of a record, with placeholders in place of its transaction id and of
+    the value of each call its template made to a counter.
+
+    :param xml: The rendered XML.
+    :param counters: The counter, MESSAGE or SEQUENCE, of each call in the order
+        the calls were made.
+    """
+
+    xml: str
+    counters: Tuple[str, ...]
+
+    def fill(self, transaction_id: int, counters: Dict[str, Counter]) -> str:
+        """Returns the XML with its placeholders filled in, taking the next
+        value from each counter in the order the template called them."""
+        values = [counters[counter]() for counter in self.counters]
+        return PLACEHOLDER.sub(
+            lambda match: str(
+                transaction_id if match[1] == "T" else values[int(match[1])],
+            ),
+            self.xml,
+        )
+
+
+def render_record_fragment(record: dict) -> RecordFragment:
+    """Renders the serialized data of a TrackedModel to a RecordFragment."""
+    counters: List[str] = []
+
+    def placeholder_counter(counter: str) -> Counter:
+        def placeholder():
+            counters.append(counter)
+            return f"\x00{len(counters) - 1}\x00"
+
+        return placeholder
+
+    xml = render_to_string(
+        template_name=RECORD_TEMPLATE,
+        context={
+            "record": record,
+            "transaction_id": TRANSACTION_ID_PLACEHOLDER,
+            "counter_generator": placeholder_counter(SEQUENCE),
+            "message_counter": placeholder_counter(MESSAGE),
+        },
+    )
+    return RecordFragment(xml, tuple(counters))
+
+
+class RecordFragmentCache:
+    """
+    A least recently used cache of RecordFragments, keyed by TrackedModel
+    version, the format they were serialized to and the template version.
+
+    Only versions in approved transactions are cached. The instance in this
+    module is shared by the whole process.
+    """
+
+    def __init__(self):
+        self._fragments: "OrderedDict[Hashable, RecordFragment]" = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+
+    @property
+    def max_size(self) -> int:
+        return settings.ENVELOPE_FRAGMENT_CACHE_SIZE
+
+    @staticmethod
+    def key(model: TrackedModel, format: str) -> Hashable:
+        return (model.pk, model.updated_at, format, template_version())
+
+    @staticmethod
+    def size_of(fragment: RecordFragment) -> int:
+        return sys.getsizeof(fragment.xml) + sys.getsizeof(fragment.counters)
+
+    def __len__(self) -> int:
+        return len(self._fragments)
+
+    def get(self, model: TrackedModel, format: str) -> Optional[RecordFragment]:
+        if not self.max_size:
+            return None
+
+        key = self.key(model, format)
+        with self._lock:
+            fragment = self._fragments.get(key)
+            if fragment is not None:
+                self._fragments.move_to_end(key)
+            return fragment
+
+    def put_many(
+        self,
+        fragments: Iterable[Tuple[TrackedModel, RecordFragment]],
+        format: str,
+    ):
+        """Caches the fragments of the models that are in approved
+        transactions."""
+        if not self.max_size:
+            return
+
+        fragments = list(fragments)
+        approved = set(
+            Transaction.objects.approved()
+            .filter(pk__in={model.transaction_id for model, _ in fragments})
+            .values_list("pk", flat=True),
+        )
+
+        with self._lock:
+            for model, fragment in fragments:
+                if model.transaction_id not in approved:
+                    continue
+
+                key = self.key(model, format)
+                if key in self._fragments:
+                    continue
+                self._fragments[key] = fragment
+                self._size += self.size_of(fragment)
+
+            while self._size > self.max_size and self._fragments:
+                _, evicted = self._fragments.popitem(last=False)
+                self._size -= self.size_of(evicted)
+
+    def clear(self):
+        with self._lock:
+            self._fragments.clear()
+            self._size = 0
+
+
+record_fragments = RecordFragmentCache()
+
+
+def render_records(
+    models: Iterable[TrackedModel],
+    format: str,
+    serialize: Callable[[List[TrackedModel]], List[dict]],
+) -> List[RecordFragment]:
+    """
+    Returns the RecordFragment of each model, in order, from the cache where
+    possible.
+
+    The models that are not cached are serialized together with `serialize`,
+    and their fragments are added to the cache.
+    """
+    models = list(models)
+    fragments = [record_fragments.get(model, format) for model in models]
+    missing = [
+        (index, model)
+        for index, (model, fragment) in enumerate(zip(models, fragments))
+        if fragment is None
+    ]
+    if missing:
+        records = serialize([model for _, model in missing])
+        for (index, _), record in zip(missing, records):
+            fragments[index] = render_record_fragment(record)
+        record_fragments.put_many(
+            ((model, fragments[index]) for index, model in missing),
+            format,
+        )
+    return fragments
@@ -1,16 +1,22 @@
 from __future__ import annotations
 
+from typing import Iterable
 from typing import List
 
+from django.conf import settings
+from django.db import connections
 from django.db.models import Case
 from django.db.models import CharField
+from django.db.models import Exists
 from django.db.models import F
 from django.db.models import Max
+from django.db.models import OuterRef
 from django.db.models import Q
 from django.db.models import Value
 from django.db.models import When
 from django.db.models.fields import Field
 from django.db.models.query_utils import DeferredAttribute
+from django.db.transaction import atomic
 from django_cte import CTEQuerySet
 from polymorphic.query import PolymorphicQuerySet
 
@@ -20,6 +26,7 @@ from common.models.utils import LazyTransaction
 from common.models.utils import get_current_transaction
 from common.querysets import TransactionPartitionQuerySet
 from common.querysets import ValidityQuerySet
+from common.util import chunks
 from common.util import resolve_path
 from common.validators import UpdateType
 
@@ -78,10 +85,32 @@ class TrackedModelQuerySet(
         given transaction.
 
         Excludes versions of the model that have been marked as deleted (`UpdateType.DELETE`).
+
+        The visible version of each version group is resolved with an indexed
+        anti-join (see `_approved_up_to_transaction_seek`) unless
+        ``settings.USE_INDEXED_VERSION_RESOLUTION`` is disabled, in which case
+        the original grouped aggregate is used.
         """
         if not transaction:
             return self.latest_approved()
 
+        if settings.USE_INDEXED_VERSION_RESOLUTION:
+            return self._approved_up_to_transaction_seek(transaction)
+
+        return self._approved_up_to_transaction_aggregate(transaction)
+
+    def _approved_up_to_transaction_aggregate(
+        self,
+        transaction,
+    ) -> TrackedModelQuerySet:
+        """
+        Resolve the visible version of each version group by annotating every
+        row with the highest visible version id in its version group and keeping
+        only the rows that match.
+
+        This requires the database to join each row to all of its versions and
+        group the result, which is expensive on large tables.
+        """
         return (
             self.annotate(
                 latest=Max(
@@ -98,6 +127,130 @@ class TrackedModelQuerySet(
             )
         )
 
+    def _approved_up_to_transaction_seek(self, transaction) -> TrackedModelQuerySet:
+        """
+        Resolve the visible version of each version group with an anti-join.
+
+        A version is visible as of `transaction` if it passes
+        `as_at_transaction_filter` and no later version in the same version
+        group also passes it. The later versions are found via the index on
+        `version_group_id`, so the database seeks straight to the (typically
+        few) siblings of each row instead of grouping every row against all of
+        its versions.
+
+        Results are identical to `_approved_up_to_transaction_aggregate`, and
+        `transaction` may be a `LazyTransaction`.
+        """
+        from common.models.trackedmodel import TrackedModel
+
+        as_at_transaction = self.as_at_transaction_filter(transaction)
+        later_versions = TrackedModel.objects.filter(
+            as_at_transaction,
+            version_group_id=OuterRef("version_group_id"),
+            pk__gt=OuterRef("pk"),
+        )
+
+        return (
+            self.filter(as_at_transaction)
+            .filter(~Exists(later_versions))
+            .exclude(
+                update_type=UpdateType.DELETE,
+            )
+        )
+
+    def bulk_create_versions(self, objs: Iterable) -> List:
+        """
+        Save new, unsaved versions of this queryset's model using a few
+        statements per batch of objects, rather than a few per object.
+
+        ``bulk_create`` does not support the multi-table inheritance that
+        TrackedModels use, so the rows are inserted into the TrackedModel table
+        and then into the model's own table. As with ``save``, objects that are
+        not yet in a version group are put in a new one, and objects saved into
+        an approved workbasket become the current version of their group.
+
+        This bypasses ``save`` and model signals, so must only be used for
+        models where ``can_bulk_create_versions()`` is true. If saving fails,
+        nothing is saved and the objects are left as they were.
+
+        The rows are inserted with ``QuerySet._insert``, which is private to
+        Django and may change between releases, so check this still works (see
+        ``test_bulk_create_versions``) whenever Django is upgraded.
+        """
+        from common.models.trackedmodel import TrackedModel
+        from common.models.trackedmodel import VersionGroup
+        from workbaskets.validators import WorkflowStatus
+
+        objs = list(objs)
+        if not objs:
+            return objs
+
+        ops = connections[self.db].ops
+        parent_fields = [
+            field
+            for field in TrackedModel._meta.local_concrete_fields
+            if not field.primary_key
+        ]
+        child_fields = self.model._meta.local_concrete_fields
+        ungrouped = [obj for obj in objs if obj.version_group_id is None]
+
+        try:
+            with atomic(using=self.db):
+                version_groups = VersionGroup.objects.using(self.db).bulk_create(
+                    [VersionGroup() for _ in ungrouped],
+                )
+                for obj, version_group in zip(ungrouped, version_groups):
+                    obj.version_group = version_group
+
+                for obj in objs:
+                    obj.pre_save_polymorphic(using=self.db)
+
+                # Django has no public API for inserting many rows into one
+                # table of a multi-table model, so use the same method that
+                # ``bulk_create`` and ``save`` insert rows with.
+                for batch in chunks(objs, ops.bulk_batch_size(parent_fields, objs)):
+                    rows = TrackedModel._base_manager.using(self.db)._insert(
+                        batch,
+                        fields=parent_fields,
+                        returning_fields=[TrackedModel._meta.pk],
+                        using=self.db,
+                    )
+                    for obj, (pk,) in zip(batch, rows):
+                        obj.id = obj.pk = pk
+
+                for batch in chunks(objs, ops.bulk_batch_size(child_fields, objs)):
+                    self.model._base_manager.using(self.db)._insert(
+                        batch,
+                        fields=child_fields,
+                        using=self.db,
+                    )
+
+                approved = [
+                    obj
+                    for obj in objs
+                    if obj.transaction.workbasket.status
+                    in WorkflowStatus.approved_statuses()
+                ]
+                for obj in approved:
+                    obj.version_group.current_version = obj
+                VersionGroup.objects.using(self.db).bulk_update(
+                    [obj.version_group for obj in approved],
+                    ["current_version"],
+                )
+        except Exception:
+            for obj in objs:
+                obj.id = obj.pk = None
+            for obj in ungrouped:
+                obj.version_group_id = None
+                obj._state.fields_cache.pop("version_group", None)
+            raise
+
+        for obj in objs:
+            obj._state.adding = False
+            obj._state.db = self.db
+
+        return objs
+
     def latest_deleted(self) -> TrackedModelQuerySet:
         """
         Get all the latest versions of the model being queried which have been
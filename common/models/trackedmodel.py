@@ -169,6 +169,43 @@ class TrackedModel(PolymorphicModel, TimestampedMixin):
 
         `update_type` must be UPDATE or DELETE, with UPDATE as the default.
         """
+        new_object = self.build_new_version(
+            workbasket,
+            transaction=transaction,
+            update_type=update_type,
+            **overrides,
+        )
+        new_object.save()
+
+        deferred_kwargs = {
+            field.name: field.value_from_object(self)
+            for field in get_deferred_set_fields(self)
+        }
+        deferred_overrides = {
+            name: value
+            for name, value in overrides.items()
+            if name in [f.name for f in get_deferred_set_fields(self)]
+        }
+        deferred_kwargs.update(deferred_overrides)
+        for field in deferred_kwargs:
+            getattr(new_object, field).set(deferred_kwargs[field])
+
+        return new_object
+
+    def build_new_version(
+        self: Cls,
+        workbasket,
+        transaction=None,
+        update_type: UpdateType = UpdateType.UPDATE,
+        **overrides,
+    ) -> Cls:
+        """
+        Return a new, unsaved version of the object, as :meth:`new_version`
+        would create.
+
+        Many-to-many fields are not set, as they can only be set once the new
+        version has been saved.
+        """
         if update_type not in (
             validators.UpdateType.UPDATE,
             validators.UpdateType.DELETE,
@@ -177,19 +214,24 @@ class TrackedModel(PolymorphicModel, TimestampedMixin):
 
         cls = self.__class__
 
-        new_object_kwargs = {
-            field.name: getattr(self, field.name)
-            for field in self._meta.fields
-            if field is self._meta.get_field("version_group")
-            or field.name not in self.system_set_field_names
-        }
-
         new_object_overrides = {
             name: value
             for name, value in overrides.items()
             if name not in [f.name for f in get_deferred_set_fields(self)]
         }
 
+        # Related objects are copied by their keys, so that they don't have to
+        # be fetched if they have not been already.
+        new_object_kwargs = {
+            field.attname: getattr(self, field.attname)
+            for field in self._meta.fields
+            if (
+                field is self._meta.get_field("version_group")
+                or field.name not in self.system_set_field_names
+            )
+            and field.name not in new_object_overrides
+        }
+
         new_object_kwargs["update_type"] = update_type
         new_object_kwargs.update(new_object_overrides)
 
@@ -197,23 +239,7 @@ class TrackedModel(PolymorphicModel, TimestampedMixin):
             transaction = workbasket.new_transaction()
         new_object_kwargs["transaction"] = transaction
 
-        new_object = cls(**new_object_kwargs)
-        new_object.save()
-
-        deferred_kwargs = {
-            field.name: field.value_from_object(self)
-            for field in get_deferred_set_fields(self)
-        }
-        deferred_overrides = {
-            name: value
-            for name, value in overrides.items()
-            if name in [f.name for f in get_deferred_set_fields(self)]
-        }
-        deferred_kwargs.update(deferred_overrides)
-        for field in deferred_kwargs:
-            getattr(new_object, field).set(deferred_kwargs[field])
-
-        return new_object
+        return cls(**new_object_kwargs)
 
     def get_versions(self):
         """Find all versions of this model."""
@@ -381,6 +407,25 @@ class TrackedModel(PolymorphicModel, TimestampedMixin):
             if isinstance(f, (SignedIntSID, NumericSID))
         }
 
+    @classmethod
+    def can_bulk_create_versions(cls) -> bool:
+        """
+        Returns whether new versions of this model can be saved with
+        ``TrackedModelQuerySet.bulk_create_versions``.
+
+        Bulk creation bypasses ``save`` and model signals, so it is only
+        possible for models that inherit directly from TrackedModel, do not
+        override ``save``, have no save signal receivers and have no many-to-
+        many fields that would need setting afterwards.
+        """
+        return (
+            cls.save is TrackedModel.save
+            and list(cls._meta.parents) == [TrackedModel]
+            and not get_deferred_set_fields(cls)
+            and not models.signals.pre_save.has_listeners(cls)
+            and not models.signals.post_save.has_listeners(cls)
+        )
+
     # Fields that we don't want to copy from one object to a new one, either
     # because they will be set by the system automatically or because we will
     # always want to override them.
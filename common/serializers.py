@@ -7,23 +7,28 @@ from typing import IO
 from typing import List
 from typing import Optional
 
-from django.conf import settings
 from django.contrib.auth import get_user_model
 from django.contrib.auth.models import Group
+from django.template import engines
 from django.template.loader import render_to_string
+from django.utils.safestring import mark_safe
 from drf_extra_fields.fields import DateRangeField
 from lxml import etree
 from rest_flex_fields import FlexFieldsModelSerializer
 from rest_framework import serializers
 from rest_polymorphic.serializers import PolymorphicSerializer
 
+from common.fragments import MESSAGE
+from common.fragments import SEQUENCE
+from common.fragments import RecordFragment
+from common.fragments import render_records
 from common.models import TrackedModel
 from common.models import Transaction
 from common.renderers import Counter
 from common.renderers import counter_generator
 from common.util import TaricDateRange
 from common.util import get_taric_template
-from common.util import parse_xml
+from common.util import validate_envelope_stream
 
 User = get_user_model()
 
@@ -197,6 +202,8 @@ class EnvelopeSerializer:
 
     MIN_ENVELOPE_SIZE = 4096  # 4k is arbitrary - the size is chosen for template size + min size of records.
 
+    transaction_template = "workbaskets/taric/transaction_fragments.xml"
+
     def __init__(
         self,
         output: IO,
@@ -276,26 +283,98 @@ class EnvelopeSerializer:
             context={"envelope_id": self.envelope_id},
         )
 
+    def render_fragments(self, models: List[TrackedModel]) -> List[RecordFragment]:
+        """
+        Returns the RecordFragment of each of `models`.
+
+        The XML of each record is taken from the record fragment cache where
+        possible (see :mod:`common.fragments`) and only the records that are
+        not cached are serialized.
+        """
+        return render_records(
+            models,
+            self.format,
+            lambda missing: TrackedModelSerializer(
+                missing,
+                many=True,
+                read_only=True,
+                context={"format": self.format},
+            ).data,
+        )
+
+    def fragments_context(
+        self,
+        fragments: List[RecordFragment],
+        transaction_id: int,
+    ) -> dict:
+        """
+        The template context of the transaction holding the records of
+        `fragments`.
+
+        The message ids and record sequence numbers of the records are taken
+        from the serializer's counters.
+        """
+        counters = {
+            MESSAGE: self.message_counter,
+            SEQUENCE: self.sequence_counter,
+        }
+        return {
+            "fragments": [
+                mark_safe(fragment.fill(transaction_id, counters))
+                for fragment in fragments
+            ],
+            "transaction_id": transaction_id,
+        }
+
+    def envelope_body_context(
+        self,
+        models: List[TrackedModel],
+        transaction_id: int,
+    ) -> dict:
+        """The template context of the transaction holding `models`."""
+        return self.fragments_context(self.render_fragments(models), transaction_id)
+
     def render_envelope_body(
         self,
         models: List[TrackedModel],
         transaction_id: int,
     ) -> str:
+        """Render the transaction holding `models`."""
         return render_to_string(
-            template_name="workbaskets/taric/transaction.xml",
-            context={
-                "tracked_models": TrackedModelSerializer(
-                    models,
-                    many=True,
-                    read_only=True,
-                    context={"format": self.format},
-                ).data,
-                "transaction_id": transaction_id,
-                "counter_generator": self.sequence_counter,
-                "message_counter": self.message_counter,
-            },
+            template_name=self.transaction_template,
+            context=self.envelope_body_context(models, transaction_id),
         )
 
+    def encode_fragments(
+        self,
+        fragments: List[RecordFragment],
+        transaction_id: int,
+    ) -> List[bytes]:
+        """
+        Render the transaction holding the records of `fragments` as a list of
+        encoded chunks.
+
+        Each chunk of the template output is encoded once as it is rendered, so
+        the size of the transaction can be found and the transaction written
+        without joining it into one string.
+        """
+        template = engines["jinja2"].get_template(self.transaction_template)
+        return [
+            chunk.encode()
+            for chunk in template.template.generate(
+                self.fragments_context(fragments, transaction_id),
+            )
+        ]
+
+    def encode_envelope_body(
+        self,
+        models: List[TrackedModel],
+        transaction_id: int,
+    ) -> List[bytes]:
+        """Render the transaction holding `models` as a list of encoded chunks
+        (see ``encode_fragments``)."""
+        return self.encode_fragments(self.render_fragments(models), transaction_id)
+
     def render_envelope_end(self) -> str:
         """Output the envelope end."""
         return render_to_string(template_name="common/taric/end_envelope.xml")
@@ -314,12 +393,18 @@ class EnvelopeSerializer:
                 self.output.write("\n")
         else:
             # Binary mode
-            bytes_data = string_data.encode()
-            self.envelope_size += len(bytes_data)
-            self.output.write(bytes_data)
-            if self.newline:
-                self.envelope_size += 1
-                self.output.write(b"\n")
+            self.write_encoded([string_data.encode()])
+
+    def write_encoded(self, chunks: List[bytes]) -> None:
+        """Write chunks of encoded data, counting their size as they are
+        written."""
+        text_mode = isinstance(self.output, io.TextIOBase)
+        for chunk in chunks:
+            self.envelope_size += len(chunk)
+            self.output.write(chunk.decode() if text_mode else chunk)
+        if self.newline:
+            self.envelope_size += 1
+            self.output.write("\n" if text_mode else b"\n")
 
     def can_fit_one_envelope(self, total_size) -> bool:
         """Return True If total_size bytes would fit inside a single
@@ -339,14 +424,14 @@ class EnvelopeSerializer:
     ) -> None:
         """Render TrackedModels, splitting to a new Envelope if over-size."""
         if models:
-            envelope_body = self.render_envelope_body(models, transaction_id)
+            envelope_body = self.encode_envelope_body(models, transaction_id)
 
-            if self.is_envelope_full(len(envelope_body.encode())):
+            if self.is_envelope_full(sum(map(len, envelope_body))):
                 self.write(self.render_envelope_end())
                 self.start_next_envelope()
                 self.write(self.render_envelope_start())
 
-            self.write(envelope_body)
+            self.write_encoded(envelope_body)
 
 
 class TaricDataAssertionError(AssertionError):
@@ -357,29 +442,28 @@ def validate_envelope(envelope_file, skip_declaration=False):
     """
     Validate envelope content for XML issues and data order issues.
 
+    The envelope is validated as it is parsed, see
+    :func:`common.util.validate_envelope_stream`.
+
     raises DocumentInvalid | TaricDataAssertionError
     """
     xml_declaration = '<?xml version="1.0" encoding="UTF-8"?>\n'
 
-    with open(settings.PATH_XSD_TARIC) as xsd_file:
-        if skip_declaration:
-            pos = envelope_file.tell()
-            xml_declaration = envelope_file.read(len(xml_declaration))
-            if xml_declaration != xml_declaration:
-                logger.warning(
-                    "Expected XML declaration first line of envelope to be XML encoding declaration, but found: ",
-                    xml_declaration,
-                )
-                envelope_file.seek(pos, os.SEEK_SET)
-
-        schema = etree.XMLSchema(parse_xml(xsd_file))
-        xml = parse_xml(envelope_file)
-
-        try:
-            schema.assertValid(xml)
-        except etree.DocumentInvalid as e:
-            logger.error("Envelope did not validate against XSD: %s", str(e.error_log))
-            raise
+    if skip_declaration:
+        pos = envelope_file.tell()
+        xml_declaration = envelope_file.read(len(xml_declaration))
+        if xml_declaration != xml_declaration:
+            logger.warning(
+                "Expected XML declaration first line of envelope to be XML encoding declaration, but found: ",
+                xml_declaration,
+            )
+            envelope_file.seek(pos, os.SEEK_SET)
+
+    try:
+        validate_envelope_stream(envelope_file)
+    except etree.DocumentInvalid as e:
+        logger.error("Envelope did not validate against XSD: %s", str(e))
+        raise
 
 
 class AutoCompleteSerializer(serializers.BaseSerializer):
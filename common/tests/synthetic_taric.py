@@ -0,0 +1,264 @@
+"""Generates synthetic TARIC3 envelopes of any size, for benchmarking the
+importers."""
+
+from dataclasses import dataclass
+from datetime import date
+from typing import IO
+from typing import Iterator
+from typing import List
+from typing import Tuple
+
+from django.template.loader import render_to_string
+
+from commodities.models import FootnoteAssociationGoodsNomenclature
+from commodities.models import GoodsNomenclature
+from commodities.models import GoodsNomenclatureDescription
+from commodities.models import GoodsNomenclatureIndent
+from common.renderers import counter_generator
+from common.validators import UpdateType
+from footnotes.models import Footnote
+from footnotes.models import FootnoteDescription
+from footnotes.models import FootnoteType
+from geo_areas.models import GeographicalArea
+from measures.models import Measure
+from measures.models import MeasureType
+from regulations.models import Regulation
+
+# Each heading and chapter holds at most this many children, so that item ids
+# stay within their two digits.
+CHILDREN_PER_PARENT = 99
+
+
+@dataclass
+class SyntheticTaricReferences:
+    """Existing objects that the generated records refer to, which must be in
+    the database before the envelope is imported."""
+
+    footnote_type: FootnoteType
+    measure_type: MeasureType
+    geographical_area: GeographicalArea
+    regulation: Regulation
+
+
+@dataclass
+class SyntheticTaricCounts:
+    """The number of objects of each kind to generate."""
+
+    commodities: int
+    measures_per_commodity: int = 1
+    footnotes: int = 0
+    footnote_associations_per_commodity: int = 0
+
+
+class SyntheticTaricEnvelope:
+    """
+    Writes an envelope of synthetic TARIC3 data using the templates that the
+    exporter uses, so that the envelope is valid against the TARIC3 schema.
+
+    The envelope holds, in order:
+
+    - one transaction for each footnote, with its description
+    - one transaction for each chapter and heading needed to hold the
+      commodities, with their indents and descriptions
+    - one transaction for each commodity, with its indent, description,
+      footnote associations and measures
+
+    Measures end on ``measure_end_date`` and are justified by the regulation
+    that generates them, as TaricImporter requires a justification regulation.
+
+    At most 90,900 footnotes can be generated. Footnote associations cycle
+    through the generated footnotes, so
+    ``footnotes`` must be non-zero if ``footnote_associations_per_commodity``
+    is.
+    """
+
+    def __init__(
+        self,
+        counts: SyntheticTaricCounts,
+        references: SyntheticTaricReferences,
+        envelope_id: int = 1,
+        first_sid: int = 1_000_000,
+        start_date: date = date(2021, 1, 1),
+        measure_end_date: date = date(2021, 12, 31),
+    ):
+        if counts.footnote_associations_per_commodity and not counts.footnotes:
+            raise ValueError("Footnote associations need at least one footnote.")
+
+        self.counts = counts
+        self.references = references
+        self.envelope_id = envelope_id
+        self.first_sid = first_sid
+        self.next_sid = first_sid
+        self.start_date = f"{start_date:%Y-%m-%d}"
+        self.measure_end_date = f"{measure_end_date:%Y-%m-%d}"
+        self.message_count = 0
+        self.footnotes = []
+
+    def sid(self) -> int:
+        sid = self.next_sid
+        self.next_sid += 1
+        return sid
+
+    def record(self, model, template: str, **data) -> dict:
+        return {
+            "record_code": model.record_code,
+            "subrecord_code": model.subrecord_code,
+            "update_type": UpdateType.CREATE,
+            "taric_template": template,
+            "start_date": self.start_date,
+            **data,
+        }
+
+    @staticmethod
+    def footnote_id(index: int) -> str:
+        """
+        Returns the id of the footnote with the given (one-based) index.
+
+        Ids have no leading zeros, as TaricImporter reads the footnote ids of
+        goods nomenclature footnote associations as numbers.
+        """
+        if index <= 900:
+            return str(99 + index)
+        return str(9099 + index)
+
+    def footnote(self, index: int) -> List[dict]:
+        footnote = {
+            "footnote_type": self.references.footnote_type,
+            "footnote_id": self.footnote_id(index),
+        }
+        self.footnotes.append(footnote)
+        return [
+            self.record(Footnote, "taric/footnote.xml", **footnote),
+            self.record(
+                FootnoteDescription,
+                "taric/footnote_description.xml",
+                period_record_code=FootnoteDescription.period_record_code,
+                period_subrecord_code=FootnoteDescription.period_subrecord_code,
+                sid=self.sid(),
+                described_footnote=footnote,
+                description=f"Synthetic footnote {index}",
+            ),
+        ]
+
+    def goods_nomenclature(
+        self,
+        item_id: str,
+        indent: int,
+    ) -> Tuple[dict, List[dict]]:
+        goods_nomenclature = {
+            "sid": self.sid(),
+            "item_id": item_id,
+            "suffix": "80",
+        }
+        records = [
+            self.record(
+                GoodsNomenclature,
+                "taric/goods_nomenclature.xml",
+                statistical=False,
+                **goods_nomenclature,
+            ),
+            self.record(
+                GoodsNomenclatureIndent,
+                "taric/goods_nomenclature_indent.xml",
+                sid=self.sid(),
+                indented_goods_nomenclature=goods_nomenclature,
+                indent=indent,
+            ),
+            self.record(
+                GoodsNomenclatureDescription,
+                "taric/goods_nomenclature_description.xml",
+                period_record_code=GoodsNomenclatureDescription.period_record_code,
+                period_subrecord_code=GoodsNomenclatureDescription.period_subrecord_code,
+                sid=self.sid(),
+                described_goods_nomenclature=goods_nomenclature,
+                description=f"Synthetic goods {item_id}",
+            ),
+        ]
+        return goods_nomenclature, records
+
+    def commodity(self, index: int, item_id: str) -> List[dict]:
+        goods_nomenclature, records = self.goods_nomenclature(item_id, indent=1)
+
+        for association in range(self.counts.footnote_associations_per_commodity):
+            footnote = self.footnotes[
+                (index * self.counts.footnote_associations_per_commodity + association)
+                % len(self.footnotes)
+            ]
+            records.append(
+                self.record(
+                    FootnoteAssociationGoodsNomenclature,
+                    "taric/footnote_association_goods_nomenclature.xml",
+                    goods_nomenclature=goods_nomenclature,
+                    associated_footnote=footnote,
+                ),
+            )
+
+        for _ in range(self.counts.measures_per_commodity):
+            records.append(
+                self.record(
+                    Measure,
+                    "taric/measure.xml",
+                    sid=self.sid(),
+                    measure_type=self.references.measure_type,
+                    geographical_area=self.references.geographical_area,
+                    goods_nomenclature=goods_nomenclature,
+                    generating_regulation=self.references.regulation,
+                    terminating_regulation=self.references.regulation,
+                    end_date=self.measure_end_date,
+                    stopped=False,
+                ),
+            )
+
+        return records
+
+    def transactions(self) -> Iterator[List[dict]]:
+        """Yields the records of each transaction in the envelope."""
+        for index in range(1, self.counts.footnotes + 1):
+            yield self.footnote(index)
+
+        for index in range(self.counts.commodities):
+            heading_index, commodity = divmod(index, CHILDREN_PER_PARENT)
+            chapter, heading = divmod(heading_index, CHILDREN_PER_PARENT)
+            chapter_id = f"{chapter + 1:02}"
+            heading_id = f"{chapter_id}{heading + 1:02}"
+
+            if heading == 0 and commodity == 0:
+                yield self.goods_nomenclature(f"{chapter_id}00000000", indent=0)[1]
+            if commodity == 0:
+                yield self.goods_nomenclature(f"{heading_id}000000", indent=0)[1]
+
+            yield self.commodity(index, f"{heading_id}{commodity + 1:02}0000")
+
+    def write(self, output: IO[str]) -> int:
+        """
+        Writes the envelope to a text stream.
+
+        Returns:
+            int, the number of messages written
+        """
+        message_counter = counter_generator()
+        sequence_counter = counter_generator()
+
+        output.write(render_to_string("common/taric/start_file.xml"))
+        output.write(
+            render_to_string(
+                "common/taric/start_envelope.xml",
+                {"envelope_id": self.envelope_id},
+            ),
+        )
+        for transaction_id, records in enumerate(self.transactions(), start=1):
+            output.write(
+                render_to_string(
+                    "workbaskets/taric/transaction.xml",
+                    {
+                        "tracked_models": records,
+                        "transaction_id": transaction_id,
+                        "message_counter": message_counter,
+                        "counter_generator": sequence_counter,
+                    },
+                ),
+            )
+        output.write(render_to_string("common/taric/end_envelope.xml"))
+
+        self.message_count = message_counter() - 1
+        return self.message_count
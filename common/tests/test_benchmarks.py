@@ -0,0 +1,114 @@
+import io
+
+import pytest
+
+from common.fragments import record_fragments
+from common.serializers import EnvelopeSerializer
+from common.tests import factories
+from common.tests.models import TestModel1
+from common.tests.util import time_best_of
+from common.validators import UpdateType
+
+pytestmark = [pytest.mark.django_db, pytest.mark.benchmark]
+
+VERSION_GROUPS = 2000
+APPROVED_VERSIONS = 3
+DRAFT_EVERY = 10
+
+
+@pytest.fixture
+def draft_transaction_over_history(benchmark_scale):
+    """
+    Builds a history of approved versions and returns a draft transaction whose
+    workbasket updates one in ten of the versioned models.
+
+    Use ``--benchmark-scale`` to grow the number of version groups.
+    """
+    approved_transactions = factories.ApprovedTransactionFactory.create_batch(
+        APPROVED_VERSIONS,
+    )
+    first_versions = [
+        factories.TestModel1Factory.create(transaction=approved_transactions[0])
+        for _ in range(VERSION_GROUPS * benchmark_scale)
+    ]
+    for transaction in approved_transactions[1:]:
+        for model in first_versions:
+            factories.TestModel1Factory.create(
+                transaction=transaction,
+                version_group=model.version_group,
+                sid=model.sid,
+                update_type=UpdateType.UPDATE,
+            )
+
+    draft_transaction = factories.WorkBasketFactory.create().new_transaction()
+    for model in first_versions[::DRAFT_EVERY]:
+        factories.TestModel1Factory.create(
+            transaction=draft_transaction,
+            version_group=model.version_group,
+            sid=model.sid,
+            update_type=UpdateType.UPDATE,
+        )
+
+    return draft_transaction
+
+
+def test_version_resolution(draft_transaction_over_history, record_property):
+    """Compare resolving versions as at a draft transaction with the indexed
+    anti-join against the grouped aggregate."""
+
+    def resolve(method):
+        return lambda: set(
+            getattr(TestModel1.objects.all(), method)(
+                draft_transaction_over_history,
+            ).values_list("pk", flat=True),
+        )
+
+    aggregate = resolve("_approved_up_to_transaction_aggregate")
+    seek = resolve("_approved_up_to_transaction_seek")
+    assert seek() == aggregate()
+
+    aggregate_seconds = time_best_of(aggregate)
+    seek_seconds = time_best_of(seek)
+
+    record_property("version_groups", TestModel1.objects.latest_approved().count())
+    record_property("aggregate_seconds", aggregate_seconds)
+    record_property("seek_seconds", seek_seconds)
+    record_property("speedup", aggregate_seconds / seek_seconds)
+
+
+ENVELOPE_RECORDS = 10_000
+
+
+def test_envelope_fragment_cache(benchmark_scale, record_property, settings):
+    """Compare rendering a workbasket of approved records to an envelope with
+    every record serialized and rendered, and with every record's XML taken from
+    the fragment cache."""
+    transaction = factories.ApprovedTransactionFactory.create()
+    factories.FootnoteTypeFactory.create_batch(
+        ENVELOPE_RECORDS * benchmark_scale,
+        transaction=transaction,
+    )
+    models = list(transaction.tracked_models.all())
+
+    def render():
+        output = io.BytesIO()
+        with EnvelopeSerializer(output, envelope_id=1) as envelope:
+            envelope.render_transaction(models, transaction.order)
+        return output.getvalue()
+
+    settings.ENVELOPE_FRAGMENT_CACHE_SIZE = 0
+    uncached = render()
+    uncached_seconds = time_best_of(render)
+
+    settings.ENVELOPE_FRAGMENT_CACHE_SIZE = 1024 * 1024 * 1024
+    record_fragments.clear()
+    cold_seconds = time_best_of(render, repeat=1)
+    assert render() == uncached
+    cached_seconds = time_best_of(render)
+    record_fragments.clear()
+
+    record_property("records", len(models))
+    record_property("uncached_seconds", uncached_seconds)
+    record_property("cold_cache_seconds", cold_seconds)
+    record_property("cached_seconds", cached_seconds)
+    record_property("speedup", uncached_seconds / cached_seconds)
@@ -0,0 +1,120 @@
+import pytest
+from django.template.loader import render_to_string
+
+from common.fragments import record_fragments
+from common.fragments import render_records
+from common.renderers import counter_generator
+from common.serializers import EnvelopeSerializer
+from common.serializers import TrackedModelSerializer
+from common.tests import factories
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture(autouse=True)
+def empty_fragment_cache():
+    record_fragments.clear()
+    yield
+    record_fragments.clear()
+
+
+def serialize(models):
+    return TrackedModelSerializer(
+        models,
+        many=True,
+        read_only=True,
+        context={"format": "xml"},
+    ).data
+
+
+def render_uncached(models, transaction_id, message_start=1, sequence_start=1):
+    return render_to_string(
+        template_name="workbaskets/taric/transaction.xml",
+        context={
+            "tracked_models": serialize(models),
+            "transaction_id": transaction_id,
+            "counter_generator": counter_generator(start=sequence_start),
+            "message_counter": counter_generator(start=message_start),
+        },
+    )
+
+
+def render_cached(models, transaction_id, message_start=1, sequence_start=1):
+    serializer = EnvelopeSerializer(
+        None,
+        envelope_id=1,
+        sequence_counter=counter_generator(start=sequence_start),
+        message_counter=counter_generator(start=message_start),
+    )
+    return serializer.render_envelope_body(models, transaction_id)
+
+
+def test_cached_render_matches_uncached_render(approved_transaction):
+    """The XML stitched together from fragments should be the same as the XML of
+    the records rendered in one go, each time the fragments are reused."""
+    factories.FootnoteFactory.create(transaction=approved_transaction)
+    factories.CertificateFactory.create(transaction=approved_transaction)
+    models = list(approved_transaction.tracked_models.all())
+
+    first = render_cached(models, approved_transaction.order)
+    assert len(record_fragments) == len(models)
+    assert first == render_uncached(models, approved_transaction.order)
+
+    second = render_cached(models, 42, message_start=7, sequence_start=11)
+    assert second == render_uncached(
+        models,
+        42,
+        message_start=7,
+        sequence_start=11,
+    )
+
+
+def test_only_approved_versions_are_cached(
+    approved_transaction,
+    unapproved_transaction,
+):
+    approved = factories.FootnoteTypeFactory.create(transaction=approved_transaction)
+    draft = factories.FootnoteTypeFactory.create(transaction=unapproved_transaction)
+
+    render_records([approved, draft], "xml", serialize)
+
+    assert record_fragments.get(approved, "xml") is not None
+    assert record_fragments.get(draft, "xml") is None
+
+
+def test_cached_fragments_are_reused(approved_transaction, django_assert_num_queries):
+    model = factories.FootnoteTypeFactory.create(transaction=approved_transaction)
+    [fragment] = render_records([model], "xml", serialize)
+
+    def fail(models):
+        pytest.fail(f"{models} were serialized again")
+
+    with django_assert_num_queries(0):
+        assert render_records([model], "xml", fail) == [fragment]
+
+
+def test_cache_size_is_bounded(approved_transaction, settings):
+    models = factories.FootnoteTypeFactory.create_batch(
+        5,
+        transaction=approved_transaction,
+    )
+    fragments = render_records(models[:1], "xml", serialize)
+    settings.ENVELOPE_FRAGMENT_CACHE_SIZE = 2 * record_fragments.size_of(
+        fragments[0],
+    )
+    record_fragments.clear()
+
+    render_records(models, "xml", serialize)
+
+    assert len(record_fragments) == 2
+    assert record_fragments.get(models[0], "xml") is None
+    assert record_fragments.get(models[-1], "xml") is not None
+
+
+def test_cache_can_be_disabled(approved_transaction, settings):
+    settings.ENVELOPE_FRAGMENT_CACHE_SIZE = 0
+    model = factories.FootnoteTypeFactory.create(transaction=approved_transaction)
+
+    render_records([model], "xml", serialize)
+
+    assert len(record_fragments) == 0
@@ -3,6 +3,7 @@ from urllib.parse import urlparse
 import factory
 import freezegun
 import pytest
+from django.db import IntegrityError
 from pytest_django.asserts import assertQuerysetEqual  # type: ignore
 
 import common.exceptions
@@ -24,7 +25,9 @@ from common.tests.models import TestModel2
 from common.tests.models import TestModel3
 from common.tests.util import assert_transaction_order
 from common.validators import UpdateType
+from footnotes.models import FootnoteDescription
 from footnotes.models import FootnoteType
+from measures.models import Measure
 from measures.models import MeasureCondition
 from measures.models import MeasureExcludedGeographicalArea
 from regulations.models import Group
@@ -300,6 +303,84 @@ def test_new_version_retains_related_objects(sample_model):
     assert new_model.descriptions.get() == description
 
 
+def test_build_new_version_is_unsaved(sample_model):
+    new_model = sample_model.build_new_version(
+        sample_model.transaction.workbasket,
+        update_type=UpdateType.DELETE,
+    )
+
+    assert new_model.pk is None
+    assert new_model.update_type == UpdateType.DELETE
+    assert new_model.version_group == sample_model.version_group
+    assert new_model.sid == sample_model.sid
+
+
+def test_can_bulk_create_versions():
+    assert TestModel2.can_bulk_create_versions()
+    assert FootnoteType.can_bulk_create_versions()
+    # Overrides save.
+    assert not FootnoteDescription.can_bulk_create_versions()
+    # Has pre_save signal receivers.
+    assert not Measure.can_bulk_create_versions()
+
+
+@pytest.mark.parametrize("approved", (True, False))
+def test_bulk_create_versions(approved, sample_model):
+    transaction = (
+        factories.ApprovedTransactionFactory
+        if approved
+        else factories.UnapprovedTransactionFactory
+    ).create()
+    created = [
+        TestModel2(
+            transaction=transaction,
+            update_type=UpdateType.CREATE,
+            custom_sid=sid,
+            valid_between=sample_model.valid_between,
+        )
+        for sid in range(3)
+    ]
+    updated = sample_model.build_new_version(
+        transaction.workbasket,
+        transaction=transaction,
+        name="updated",
+    )
+
+    TestModel2.objects.bulk_create_versions(created)
+    TestModel1.objects.bulk_create_versions([updated])
+
+    for obj in created:
+        saved = TestModel2.objects.get(pk=obj.pk)
+        assert isinstance(TrackedModel.objects.get(pk=obj.pk), TestModel2)
+        assert saved.custom_sid == obj.custom_sid
+        assert saved.transaction == transaction
+        assert list(saved.version_group.versions.all()) == [saved]
+        assert (saved.version_group.current_version == saved) == approved
+    assert len({obj.version_group_id for obj in created}) == 3
+
+    saved = TestModel1.objects.get(pk=updated.pk)
+    assert saved.name == "updated"
+    assert saved.version_group == sample_model.version_group
+    assert not saved._state.adding
+
+
+def test_bulk_create_versions_leaves_objects_unsaved_on_error(sample_model):
+    transaction = factories.UnapprovedTransactionFactory.create()
+    obj = TestModel2(
+        transaction=transaction,
+        update_type=UpdateType.CREATE,
+        custom_sid=None,
+        valid_between=sample_model.valid_between,
+    )
+
+    with pytest.raises(IntegrityError):
+        TestModel2.objects.bulk_create_versions([obj])
+
+    assert obj.pk is None
+    assert obj.version_group_id is None
+    assert not TestModel2.objects.exists()
+
+
 def test_current_as_of(sample_model):
     transaction = factories.UnapprovedTransactionFactory.create()
 
@@ -316,6 +397,41 @@ def test_current_as_of(sample_model):
     )
 
 
+def test_approved_up_to_transaction_resolution_engines_agree(model1_with_history):
+    """Ensure that resolving versions with the indexed anti-join returns the
+    same versions as the grouped aggregate, for approved and draft transactions
+    and when the transaction is lazily evaluated."""
+    updated, deleted = factories.TestModel1Factory.create_batch(2)
+    workbasket = factories.WorkBasketFactory.create()
+    updated.new_version(workbasket)
+    deleted.new_version(workbasket, update_type=UpdateType.DELETE)
+    factories.TestModel1Factory.create(transaction=workbasket.new_transaction())
+    updated.new_version(workbasket)
+    model1_with_history.active_model.new_version(factories.WorkBasketFactory.create())
+
+    for transaction in Transaction.objects.all():
+        aggregate = set(
+            TestModel1.objects.all()
+            ._approved_up_to_transaction_aggregate(
+                transaction,
+            )
+            .values_list("pk", flat=True),
+        )
+        seek = set(
+            TestModel1.objects.all()
+            ._approved_up_to_transaction_seek(
+                transaction,
+            )
+            .values_list("pk", flat=True),
+        )
+        assert seek == aggregate
+
+        with override_current_transaction(transaction):
+            assert set(TestModel1.objects.current().values_list("pk", flat=True)) == (
+                aggregate
+            )
+
+
 def test_create_with_description():
     """Tests that when calling ``create`` on a described object, an associated
     description is created with the correct data."""
@@ -8,6 +8,7 @@ from bs4 import BeautifulSoup
 from lxml import etree
 from pytest_django.asserts import assertQuerysetEqual  # noqa
 
+from common.fragments import record_fragments
 from common.models import Transaction
 from common.serializers import EnvelopeSerializer
 from common.serializers import deserialize_date
@@ -18,6 +19,7 @@ from common.tests.factories import QueuedWorkBasketFactory
 from common.tests.util import taric_xml_record_codes
 from exporter.serializers import MultiFileEnvelopeTransactionSerializer
 from exporter.serializers import RenderedTransactions
+from exporter.serializers import TransactionChanged
 from exporter.util import dit_file_generator
 from taric.models import Envelope
 from workbaskets.models import WorkBasket
@@ -276,6 +278,97 @@ def test_transaction_envelope_serializer_counters(queued_workbasket):
         expected_id_2 += 1
 
 
+def test_encoded_envelope_body_matches_rendered_body(approved_transaction):
+    factories.FootnoteFactory.create(transaction=approved_transaction)
+    models = approved_transaction.tracked_models.record_ordering()
+
+    rendered = EnvelopeSerializer(None, 1).render_envelope_body(
+        models,
+        approved_transaction.order,
+    )
+    encoded = EnvelopeSerializer(None, 1).encode_envelope_body(
+        models,
+        approved_transaction.order,
+    )
+
+    assert b"".join(encoded) == rendered.encode()
+
+
+def test_render_range_raises_if_a_transaction_changed(approved_transaction):
+    factories.FootnoteTypeFactory.create(transaction=approved_transaction)
+    approved_transaction.record_count = 2
+    serializer = MultiFileEnvelopeTransactionSerializer(io.BytesIO, envelope_id=1)
+
+    with pytest.raises(TransactionChanged):
+        serializer._render_range([approved_transaction])
+
+
+def test_split_render_transactions_skips_empty_transactions():
+    workbasket = QueuedWorkBasketFactory.create()
+    empty = ApprovedTransactionFactory.create(workbasket=workbasket)
+    with ApprovedTransactionFactory.create(workbasket=workbasket) as populated:
+        factories.FootnoteTypeFactory.create()
+
+    output = io.BytesIO()
+    serializer = MultiFileEnvelopeTransactionSerializer(
+        lambda: output,
+        envelope_id=int(Envelope.next_envelope_id()),
+    )
+    [rendered_envelope] = serializer.split_render_transactions(
+        Transaction.objects.filter(pk__in=[empty.pk, populated.pk]),
+    )
+
+    assert rendered_envelope.transactions == [populated]
+    assert output.tell() == serializer.envelope_size
+
+
+@pytest.mark.django_db(transaction=True)
+@pytest.mark.parametrize("max_envelope_size", [None, 7000])
+def test_parallel_rendering_matches_serial_rendering(max_envelope_size):
+    """
+    Rendering ranges of transactions in worker threads should write the same
+    bytes to the same envelopes as rendering them one after another.
+
+    The data is committed so that the workers, which each use their own database
+    connection, can read it.
+    """
+    workbasket = QueuedWorkBasketFactory.create()
+    for _ in range(6):
+        with ApprovedTransactionFactory.create(workbasket=workbasket):
+            factories.FootnoteFactory.create()
+            factories.RegulationFactory.create(regulation_group=None)
+    ApprovedTransactionFactory.create(workbasket=workbasket)
+    transactions = WorkBasket.objects.filter(
+        pk=workbasket.pk,
+    ).ordered_transactions()
+
+    def render(workers):
+        record_fragments.clear()
+        outputs = []
+
+        def output_constructor():
+            outputs.append(io.BytesIO())
+            return outputs[-1]
+
+        serializer = MultiFileEnvelopeTransactionSerializer(
+            output_constructor,
+            envelope_id=230001,
+            max_envelope_size=max_envelope_size,
+            workers=workers,
+            range_size=2,
+        )
+        envelopes = [
+            (envelope.envelope_id, [tx.pk for tx in envelope.transactions])
+            for envelope in serializer.split_render_transactions(transactions)
+        ]
+        return envelopes, [output.getvalue() for output in outputs]
+
+    serial = render(workers=1)
+    assert render(workers=3) == serial
+    if max_envelope_size:
+        assert len(serial[0]) > 1
+
+
 @pytest.mark.parametrize(
     "test_date, serialized_truthiness",
     [
@@ -0,0 +1,61 @@
+import io
+
+import pytest
+from lxml import etree
+
+from common.tests import factories
+from common.tests.synthetic_taric import SyntheticTaricCounts
+from common.tests.synthetic_taric import SyntheticTaricEnvelope
+from common.tests.synthetic_taric import SyntheticTaricReferences
+from common.util import parse_xml
+from importer.namespaces import xsd_schema_paths
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture
+def references():
+    return SyntheticTaricReferences(
+        footnote_type=factories.FootnoteTypeFactory.create(),
+        measure_type=factories.MeasureTypeFactory.create(),
+        geographical_area=factories.GeographicalAreaFactory.create(),
+        regulation=factories.RegulationFactory.create(),
+    )
+
+
+def test_synthetic_envelope_is_valid(references):
+    counts = SyntheticTaricCounts(
+        commodities=120,
+        measures_per_commodity=2,
+        footnotes=3,
+        footnote_associations_per_commodity=2,
+    )
+    output = io.StringIO()
+
+    message_count = SyntheticTaricEnvelope(counts, references).write(output)
+
+    with open(dict(xsd_schema_paths)["oub"]) as xsd_file:
+        schema = etree.XMLSchema(parse_xml(xsd_file))
+    envelope = parse_xml(io.BytesIO(output.getvalue().encode()))
+    schema.assertValid(envelope)
+
+    messages = envelope.findall(".//{*}app.message")
+    # Two headings and a chapter are needed to hold 120 commodities.
+    goods = 120 + 3
+    assert message_count == len(messages)
+    assert len(messages) == 3 * 3 + goods * 4 + 120 * (2 + 2)
+    item_ids = [
+        element.text
+        for element in envelope.iterfind(".//{*}goods.nomenclature.item.id")
+    ]
+    assert "0100000000" in item_ids
+    assert "0102000000" in item_ids
+    assert "0102210000" in item_ids
+
+
+def test_footnote_associations_need_footnotes(references):
+    with pytest.raises(ValueError):
+        SyntheticTaricEnvelope(
+            SyntheticTaricCounts(commodities=1, footnote_associations_per_commodity=1),
+            references,
+        )
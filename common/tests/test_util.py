@@ -1,15 +1,19 @@
+import io
 import os
 from unittest import mock
 
 import pytest
 from defusedxml.common import DTDForbidden
+from lxml.etree import DocumentInvalid
 from lxml.etree import XMLSyntaxError
 
 from common import util
+from common.serializers import EnvelopeSerializer
 from common.tests import factories
 from common.tests import models
 from common.tests.util import Dates
 from common.tests.util import wrap_numbers_over_max_digits
+from common.xml.namespaces import nsmap
 
 pytestmark = pytest.mark.django_db
 
@@ -86,6 +90,19 @@ def test_maybe_max(values, expected):
     assert util.maybe_max(*values) is expected
 
 
+@pytest.mark.parametrize(
+    "iterable, size, expected",
+    [
+        ([], 2, []),
+        (range(4), 2, [[0, 1], [2, 3]]),
+        (range(5), 2, [[0, 1], [2, 3], [4]]),
+        (iter(range(3)), 5, [[0, 1, 2]]),
+    ],
+)
+def test_chunks(iterable, size, expected):
+    assert list(util.chunks(iterable, size)) == expected
+
+
 @pytest.mark.parametrize(
     "overall,contained,expected",
     [
@@ -320,3 +337,55 @@ def test_xml_fromstring_vulnerabilities(file_name):
     string = open(file).read()
     with pytest.raises((XMLSyntaxError, DTDForbidden)):
         util.xml_fromstring(string)
+
+
+@pytest.fixture
+def rendered_envelope(approved_transaction) -> bytes:
+    factories.FootnoteFactory.create(transaction=approved_transaction)
+    factories.RegulationFactory.create(
+        transaction=approved_transaction,
+        regulation_group=None,
+    )
+    output = io.BytesIO()
+    with EnvelopeSerializer(output, envelope_id=1) as envelope:
+        envelope.render_transaction(
+            approved_transaction.tracked_models.record_ordering(),
+            approved_transaction.order,
+        )
+    return output.getvalue()
+
+
+def test_validate_envelope_stream_counts_contents(rendered_envelope):
+    tree = util.parse_xml(io.BytesIO(rendered_envelope))
+    util.get_taric_schema().assertValid(tree)
+
+    contents = util.validate_envelope_stream(io.BytesIO(rendered_envelope))
+
+    assert contents == util.EnvelopeContents(
+        transactions=len(tree.findall(".//env:transaction", namespaces=nsmap)),
+        records=len(tree.findall(".//oub:record", namespaces=nsmap)),
+    )
+
+
+def test_validate_envelope_stream_stops_at_first_schema_error(rendered_envelope):
+    invalid = rendered_envelope.replace(
+        b"<oub:update.type>",
+        b"<oub:unexpected/><oub:update.type>",
+    )
+
+    with pytest.raises(DocumentInvalid) as e:
+        util.validate_envelope_stream(io.BytesIO(invalid))
+
+    first_line = invalid[: invalid.index(b"<oub:unexpected/>")].count(b"\n") + 1
+    assert str(e.value).startswith(f"Line {first_line}, column ")
+    assert "unexpected" in str(e.value)
+
+
+def test_envelope_validator_counts_contents_fed_in_chunks(rendered_envelope):
+    validator = util.EnvelopeValidator()
+    for offset in range(0, len(rendered_envelope), 100):
+        validator.feed(rendered_envelope[offset : offset + 100])
+
+    assert validator.close() == util.validate_envelope_stream(
+        io.BytesIO(rendered_envelope),
+    )
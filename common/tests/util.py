@@ -2,6 +2,10 @@ import contextlib
 import importlib
 import json
 import os
+import resource
+import sys
+import time
+import tracemalloc
 from datetime import date
 from datetime import datetime
 from functools import lru_cache
@@ -23,6 +27,7 @@ from dateutil.relativedelta import relativedelta
 from django import forms
 from django.conf import settings
 from django.core.exceptions import ValidationError
+from django.db import connection
 from django.db.models.base import ModelBase
 from django.template.loader import render_to_string
 from django.urls import get_resolver
@@ -985,3 +990,98 @@ def queue_workbasket_for_test(workbasket_id):
         .partition
         == 2
     )
+
+
+def time_best_of(func: Callable[[], Any], repeat: int = 3) -> float:
+    """Returns the fastest wall-clock time, in seconds, taken by ``repeat``
+    calls to ``func``."""
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def peak_memory_of(func: Callable[[], Any]) -> int:
+    """
+    Returns the peak size, in bytes, of memory allocated by Python while calling
+    ``func``.
+
+    Memory allocated outside of the Python allocator, for instance by C
+    extensions, is not counted.
+    """
+    tracemalloc.start()
+    try:
+        func()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return peak
+
+
+def peak_rss() -> int:
+    """
+    Returns the peak resident set size of this process, in bytes.
+
+    This is a high-water mark for the life of the process, so it only measures a
+    workload that is run on its own, e.g. by selecting a single benchmark.
+    """
+    max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes.
+    return max_rss if sys.platform == "darwin" else max_rss * 1024
+
+
+def peak_rss_of(func: Callable[[], Any]) -> int:
+    """
+    Returns how far, in bytes, the resident set size of this process peaks above
+    its size before calling ``func``.
+
+    Unlike ``peak_memory_of`` this counts memory allocated by C extensions such
+    as lxml. ``func`` is called in a forked child process so that the high-water
+    mark covers it alone, which means that anything it changes is discarded.
+    """
+    read_fd, write_fd = os.pipe()
+    pid = os.fork()
+    if pid == 0:
+        status = 1
+        try:
+            os.close(read_fd)
+            before = peak_rss()
+            func()
+            os.write(write_fd, str(peak_rss() - before).encode())
+            status = 0
+        finally:
+            os._exit(status)
+
+    os.close(write_fd)
+    with os.fdopen(read_fd) as pipe:
+        result = pipe.read()
+    _, status = os.waitpid(pid, 0)
+    if status != 0:
+        raise RuntimeError(f"Measuring the peak RSS of {func!r} failed.")
+    return int(result)
+
+
+class QueryCounter:
+    """
+    Context manager that counts the database queries executed within it.
+
+    Unlike ``CaptureQueriesContext``, this is not limited by the size of the
+    connection's query log, so it can be used around very large workloads.
+    """
+
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        self.count += 1
+        return execute(sql, params, many, context)
+
+    def __enter__(self):
+        self._wrapper = connection.execute_wrapper(self)
+        self._wrapper.__enter__()
+        return self
+
+    def __exit__(self, *exc_info):
+        self._wrapper.__exit__(*exc_info)
@@ -10,11 +10,15 @@ from datetime import datetime
 from datetime import timedelta
 from functools import lru_cache
 from functools import partial
+from itertools import islice
 from pathlib import Path
 from platform import python_version_tuple
 from typing import IO
 from typing import Any
 from typing import Dict
+from typing import Iterable
+from typing import Iterator
+from typing import List
 from typing import Optional
 from typing import Sequence
 from typing import Tuple
@@ -51,6 +55,8 @@ from lxml import etree
 from psycopg.types.range import DateRange
 from psycopg.types.range import TimestampRange
 
+from common.xml.namespaces import nsmap
+
 major, minor, patch = python_version_tuple()
 
 
@@ -108,6 +114,18 @@ def maybe_max(*objs: Optional[T]) -> Optional[T]:
         return None
 
 
+def chunks(iterable: Iterable[T], size: int) -> Iterator[List[T]]:
+    """
+    Split an iterable into lists of at most `size` items, preserving order.
+
+    >>> list(chunks(range(5), 2))
+    [[0, 1], [2, 3], [4]]
+    """
+    iterator = iter(iterable)
+    while chunk := list(islice(iterator, size)):
+        yield chunk
+
+
 def get_accessor(field: Union[Field, ForeignObjectRel]) -> str:
     """Return the attribute name used to access the field on the model."""
     if isinstance(field, ForeignObjectRel):
@@ -568,6 +586,129 @@ def xml_fromstring(text, forbid_dtd=True):
     return rootelement
 
 
+@lru_cache(maxsize=None)
+def get_taric_schema() -> etree.XMLSchema:
+    """Returns the TARIC3 XML schema, which is only parsed once per process."""
+    with open(settings.PATH_XSD_TARIC) as xsd_file:
+        return etree.XMLSchema(parse_xml(xsd_file))
+
+
+# The size of the chunks in which envelopes are read to be validated.
+ENVELOPE_READ_SIZE = 64 * 1024
+
+
+class EnvelopeContents(typing.NamedTuple):
+    """The number of transactions and records in a TARIC3 envelope."""
+
+    transactions: int
+    records: int
+
+
+class EnvelopeValidator:
+    """
+    Validates a TARIC3 envelope against the TARIC3 schema from the chunks of it
+    that are fed to it, counting the transactions and records in it.
+
+    This allows an envelope to be validated as it is written, without reading
+    it back. Each transaction is discarded once it has been parsed, so the
+    whole envelope is never held in memory. Chunks fed after the first schema
+    violation are ignored, and the violation is raised by :meth:`close` as
+    DocumentInvalid with its line and column.
+    """
+
+    TRANSACTION_TAG = f"{{{nsmap['env']}}}transaction"
+    RECORD_TAG = f"{{{nsmap['oub']}}}record"
+
+    def __init__(self, forbid_dtd=True):
+        self.forbid_dtd = forbid_dtd
+        self.transactions = 0
+        self.records = 0
+        self.error: Optional[Exception] = None
+        self._checked_docinfo = False
+        self._parser = etree.XMLPullParser(
+            events=("end",),
+            tag=(self.TRANSACTION_TAG, self.RECORD_TAG),
+            schema=get_taric_schema(),
+            resolve_entities=False,
+        )
+
+    def feed(self, data: bytes) -> None:
+        if self.error is not None:
+            return
+        try:
+            self._parser.feed(data)
+            self._read_events()
+        except (etree.XMLSyntaxError, DTDForbidden) as e:
+            self.error = e
+
+    def close(self) -> EnvelopeContents:
+        """Finishes parsing the envelope, and returns the number of transactions
+        and records in it."""
+        if self.error is None:
+            try:
+                root = self._parser.close()
+                self._read_events()
+                if not self._checked_docinfo and root is not None:
+                    check_docinfo(root.getroottree(), forbid_dtd=self.forbid_dtd)
+            except (etree.XMLSyntaxError, DTDForbidden) as e:
+                self.error = e
+
+        if isinstance(self.error, etree.XMLSyntaxError):
+            schema_errors = self.error.error_log.filter_domains(
+                etree.ErrorDomains.SCHEMASV,
+            )
+            if schema_errors:
+                error = schema_errors[0]
+                raise etree.DocumentInvalid(
+                    f"Line {error.line}, column {error.column}: {error.message}",
+                    schema_errors,
+                ) from self.error
+        if self.error is not None:
+            raise self.error
+
+        return EnvelopeContents(self.transactions, self.records)
+
+    def _read_events(self) -> None:
+        for _, element in self._parser.read_events():
+            if not self._checked_docinfo:
+                check_docinfo(element.getroottree(), forbid_dtd=self.forbid_dtd)
+                self._checked_docinfo = True
+
+            if element.tag == self.RECORD_TAG:
+                self.records += 1
+                continue
+
+            self.transactions += 1
+            element.clear(keep_tail=True)
+            while element.getprevious() is not None:
+                del element.getparent()[0]
+
+
+def validate_envelope_stream(
+    source: Union[str, Path, IO],
+    forbid_dtd=True,
+) -> EnvelopeContents:
+    """
+    Validates a TARIC3 envelope against the TARIC3 schema as it is read, and
+    returns the number of transactions and records in it.
+
+    Reading stops at the first schema violation, which is raised as
+    DocumentInvalid with its line and column. See :class:`EnvelopeValidator`.
+    """
+    if isinstance(source, (str, Path)):
+        with open(source, "rb") as envelope_file:
+            return validate_envelope_stream(envelope_file, forbid_dtd=forbid_dtd)
+
+    validator = EnvelopeValidator(forbid_dtd=forbid_dtd)
+    while validator.error is None:
+        chunk = source.read(ENVELOPE_READ_SIZE)
+        if not chunk:
+            break
+        validator.feed(chunk.encode() if isinstance(chunk, str) else chunk)
+
+    return validator.close()
+
+
 def get_mime_type(file):
     """Get MIME type of the file by inspecting and infering its type from its
     first 2048 bytes."""
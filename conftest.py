@@ -82,6 +82,18 @@ def pytest_addoption(parser):
         action="store_true",
         help="Test will call the live HMRC Sandbox API and not mock the request.",
     )
+    parser.addoption(
+        "--benchmark",
+        action="store_true",
+        help="Run benchmark tests, which build large fixtures and are slow.",
+    )
+    parser.addoption(
+        "--benchmark-scale",
+        action="store",
+        type=int,
+        default=1,
+        help="Multiplier applied to the size of benchmark fixtures.",
+    )
 
 
 def pytest_configure(config):
@@ -97,6 +109,15 @@ def pytest_runtest_setup(item):
     ):
         pytest.skip("Not calling live HMRC Sandbox API. Use --hmrc-live-api to do so.")
 
+    if "benchmark" in item.keywords and not item.config.getoption("--benchmark"):
+        pytest.skip("Not running benchmarks. Use --benchmark to do so.")
+
+
+@pytest.fixture(scope="session")
+def benchmark_scale(request) -> int:
+    """Multiplier for the size of fixtures built by benchmark tests."""
+    return request.config.getoption("--benchmark-scale")
+
 
 def pytest_bdd_apply_tag(tag, function):
     if tag == "todo":
@@ -1180,6 +1201,27 @@ def importer_storage(s3):
     return storage
 
 
+@pytest.fixture
+def importer_chunk_storage(s3, settings, monkeypatch):
+    """Patch the storage of ImporterXMLChunk payloads with moto so that nothing
+    is really uploaded to s3, and store new chunk payloads in it."""
+    from importer.models import ImporterXMLChunk
+    from importer.storages import ImporterChunkStorage
+
+    storage = make_storage_mock(
+        s3,
+        ImporterChunkStorage,
+        bucket_name=settings.IMPORTER_STORAGE_BUCKET_NAME,
+    )
+    monkeypatch.setattr(
+        ImporterXMLChunk._meta.get_field("chunk_file"),
+        "storage",
+        storage,
+    )
+    settings.IMPORTER_CHUNKS_IN_OBJECT_STORAGE = True
+    return storage
+
+
 @pytest.fixture(
     params=(
         (make_duplicate_record, True),
@@ -1601,6 +1643,10 @@ def pytest_configure(config):
         "markers",
         "s: mark test as needing global capturing disabled to run",
     )
+    config.addinivalue_line(
+        "markers",
+        "benchmark: mark test as a performance benchmark",
+    )
 
 
 def pytest_collection_modifyitems(config, items):
@@ -37,13 +37,37 @@ class Command(BaseCommand):
             ),
             dest="DIRECTORY_PATH",
         )
+        parser.add_argument(
+            "--incremental",
+            action="store_const",
+            help=(
+                "Make the snapshot from the previous snapshot, adding only the "
+                "transactions published since it was made."
+            ),
+            const=True,
+        )
+        parser.add_argument(
+            "--delta",
+            action="store_const",
+            help=(
+                "Also save a delta database holding only what has been "
+                "published since the previous snapshot."
+            ),
+            const=True,
+        )
         return super().add_arguments(parser)
 
     def handle(self, *args: Any, **options: Any) -> Optional[str]:
         logger.info(f"Triggering tariff database export to SQLite")
 
         local_path = options["DIRECTORY_PATH"]
+        # Options that aren't given are left to default to their settings.
+        export_options = {
+            name: options[name]
+            for name in ("incremental", "delta")
+            if options[name] is not None
+        }
         if options["asynchronous"]:
-            export_and_upload_sqlite.delay(local_path)
+            export_and_upload_sqlite.delay(local_path, **export_options)
         else:
-            export_and_upload_sqlite(local_path)
+            export_and_upload_sqlite(local_path, **export_options)
@@ -1,4 +1,3 @@
-import os
 import sys
 
 from django.conf import settings
@@ -6,11 +5,15 @@ from django.core.management import BaseCommand
 from django.db.transaction import atomic
 from lxml import etree
 
+from exporter.outputs import COMPRESSION_SUFFIXES
+from exporter.outputs import envelope_output_generator
+from exporter.outputs import local_file_opener
+from exporter.outputs import s3_object_opener
 from exporter.serializers import MultiFileEnvelopeTransactionSerializer
-from exporter.util import dit_file_generator
 from exporter.util import item_timer
+from publishing.storages import EnvelopeStorage
 from publishing.util import TaricDataAssertionError
-from publishing.util import validate_envelope
+from publishing.util import validate_taric_xml_records
 from taric.models import Envelope
 from workbaskets.models import WorkBasket
 from workbaskets.validators import WorkflowStatus
@@ -24,6 +27,11 @@ class Command(BaseCommand):
     Dump envelope to file or stdout.
 
     Invalid envelopes are output but with error level set.
+
+    Envelopes may be compressed with gzip or zstd, and uploaded straight to the
+    HMRC packaging bucket instead of being written to local files. Either way,
+    each envelope is validated and its md5 checksum is worked out as it is
+    written, so that it is never read back.
     """
 
     help = "Dump transactions ready for export to a directory."
@@ -43,7 +51,28 @@ class Command(BaseCommand):
             "--dir",
             dest="directory",
             default=".",
-            help="Directory to output to, defaults to the current directory.",
+            help=(
+                "Directory to output to, defaults to the current directory. "
+                "With --s3, the prefix of the keys to upload to."
+            ),
+        )
+
+        parser.add_argument(
+            "--compress",
+            help="Compress envelopes with gzip or zstd as they are written.",
+            choices=sorted(COMPRESSION_SUFFIXES),
+            default=None,
+            action="store",
+        )
+
+        parser.add_argument(
+            "--s3",
+            help=(
+                "Upload envelopes to settings.HMRC_PACKAGING_STORAGE_BUCKET_NAME "
+                "as they are written, instead of writing them to local files."
+            ),
+            default=False,
+            action="store_true",
         )
 
         parser.add_argument(
@@ -137,8 +166,16 @@ class Command(BaseCommand):
         )
 
         directory = options.get("directory", ".")
+        if options.get("s3"):
+            open_sink = s3_object_opener(EnvelopeStorage().bucket, directory)
+        else:
+            open_sink = local_file_opener(directory)
 
-        output_file_constructor = dit_file_generator(directory, envelope_id)
+        output_file_constructor = envelope_output_generator(
+            open_sink,
+            envelope_id,
+            compression=options.get("compress"),
+        )
         serializer = MultiFileEnvelopeTransactionSerializer(
             output_file_constructor,
             envelope_id=envelope_id,
@@ -147,32 +184,44 @@ class Command(BaseCommand):
         errors = False
 
         # Here's where it seriaizes the transactions, and kicks off making the envelope!!!
-        for time_to_render, rendered_envelope in item_timer(
-            serializer.split_render_transactions(transactions),
-        ):
-            envelope_file = rendered_envelope.output
-            if not rendered_envelope.transactions:
-                self.stdout.write(
-                    f"{envelope_file.name} {WARNING_SIGN_EMOJI}  is empty !",
-                )
-                errors = True
-            else:
-                envelope_file.seek(0, os.SEEK_SET)
+        try:
+            for time_to_render, rendered_envelope in item_timer(
+                serializer.split_render_transactions(transactions),
+            ):
+                envelope_file = rendered_envelope.output
+                envelope_file.close()
+                if not rendered_envelope.transactions:
+                    self.stdout.write(
+                        f"{envelope_file.name} {WARNING_SIGN_EMOJI}  is empty !",
+                    )
+                    errors = True
+                    continue
+
                 try:
                     # Check will fail for multiple workbaskets spread over multiple envelopes
-                    validate_envelope(envelope_file, workbaskets)
-                except etree.DocumentInvalid:
+                    validate_taric_xml_records(envelope_file.validate(), workbaskets)
+                except etree.DocumentInvalid as e:
                     self.stdout.write(
-                        f"{envelope_file.name} {WARNING_SIGN_EMOJI}️ Envelope invalid!",
+                        f"{envelope_file.name} {WARNING_SIGN_EMOJI}️ Envelope invalid! {e}",
                     )
-                except TaricDataAssertionError:
+                except TaricDataAssertionError as e:
                     self.stdout.write(
-                        f"{envelope_file.name} {WARNING_SIGN_EMOJI}️ Taric Envelope invalid!",
+                        f"{envelope_file.name} {WARNING_SIGN_EMOJI}️ Taric Envelope invalid! {e}",
                     )
                 else:
                     total_transactions = len(rendered_envelope.transactions)
+                    compressed = (
+                        f" ({envelope_file.compressed_size} compressed)"
+                        if options.get("compress")
+                        else ""
+                    )
                     self.stdout.write(
-                        f"{envelope_file.name} \N{WHITE HEAVY CHECK MARK}  XML valid. {total_transactions} transactions, serialized in {time_to_render:.2f} seconds using {envelope_file.tell()} bytes.",
+                        f"{envelope_file.name} \N{WHITE HEAVY CHECK MARK}  XML valid. {total_transactions} transactions, serialized in {time_to_render:.2f} seconds using {envelope_file.tell()} bytes{compressed}, md5 {envelope_file.checksum}.",
                     )
+        except BaseException:
+            # Abandon the envelope being written, rather than uploading part of it.
+            serializer.output.abort()
+            raise
+
         if errors:
             sys.exit(1)
@@ -0,0 +1,22 @@
+import logging
+from typing import Any
+from typing import Optional
+
+from django.core.management import BaseCommand
+
+from exporter.sqlite import schema
+
+logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    help = (
+        "Generate and cache the SQLite schema used by SQLite snapshots, if it "
+        "has not already been cached for the current migrations and models. "
+        "Run this when building read-only deployments so that snapshots don't "
+        "need to run migrations to create their schema."
+    )
+
+    def handle(self, *args: Any, **options: Any) -> Optional[str]:
+        schema.get_schema()
+        self.stdout.write(str(schema.schema_cache_path()))
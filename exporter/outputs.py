@@ -0,0 +1,242 @@
+"""
+Outputs that envelopes can be dumped to, which compress, checksum and validate
+envelopes as they are written.
+
+An :class:`EnvelopeOutput` passes the XML written to it through gzip or zstd
+before writing it to a local file or, with :class:`MultipartUpload`, straight
+to S3. The md5 checksum of the XML and its validity against the TARIC3 schema
+are worked out from the same writes, so that the envelope is never read back.
+"""
+
+import gzip
+import hashlib
+import io
+from pathlib import Path
+from pathlib import PurePosixPath
+from typing import BinaryIO
+from typing import Callable
+from typing import Optional
+
+from common.util import EnvelopeContents
+from common.util import EnvelopeValidator
+from exporter.util import MULTIPART_CHUNK_SIZE
+from exporter.util import ZSTD_LEVEL
+from exporter.util import dit_filename_generator
+
+# The suffixes of files written with each type of compression.
+COMPRESSION_SUFFIXES = {
+    "gzip": ".gz",
+    "zstd": ".zst",
+}
+
+
+class MultipartUpload(io.RawIOBase):
+    """
+    A writable file object which uploads what is written to it to an S3 object,
+    in parts of `chunk_size` bytes, so that at most one part is held in memory.
+
+    The upload is completed when the file is closed, or abandoned by
+    :meth:`abort`.
+
+    :param s3_object: A boto3 ``s3.Object`` resource.
+    """
+
+    def __init__(self, s3_object, chunk_size: int = MULTIPART_CHUNK_SIZE):
+        self.s3_object = s3_object
+        self.chunk_size = chunk_size
+        self.size = 0
+        self._buffer = bytearray()
+        self._parts = []
+        self._upload = s3_object.initiate_multipart_upload()
+
+    @property
+    def name(self) -> str:
+        return f"s3://{self.s3_object.bucket_name}/{self.s3_object.key}"
+
+    def writable(self) -> bool:
+        return True
+
+    def tell(self) -> int:
+        return self.size
+
+    def write(self, data: bytes) -> int:
+        self._buffer += data
+        self.size += len(data)
+        while len(self._buffer) >= self.chunk_size:
+            self._upload_part(self._buffer[: self.chunk_size])
+            del self._buffer[: self.chunk_size]
+        return len(data)
+
+    def _upload_part(self, data: bytes) -> None:
+        part_number = len(self._parts) + 1
+        part = self._upload.Part(part_number).upload(Body=bytes(data))
+        self._parts.append({"PartNumber": part_number, "ETag": part["ETag"]})
+
+    def close(self) -> None:
+        if self.closed:
+            return
+        try:
+            # An upload needs at least one part, which may be empty.
+            if self._buffer or not self._parts:
+                self._upload_part(self._buffer)
+            self._upload.complete(MultipartUpload={"Parts": self._parts})
+        except BaseException:
+            self._upload.abort()
+            raise
+        finally:
+            self._buffer = bytearray()
+            super().close()
+
+    def abort(self) -> None:
+        if self.closed:
+            return
+        try:
+            self._upload.abort()
+        finally:
+            super().close()
+
+
+class EnvelopeOutput(io.RawIOBase):
+    """
+    A writable file object for envelope XML which compresses it, works out its
+    md5 checksum and, optionally, validates it against the TARIC3 schema as it
+    is written.
+
+    `tell()` returns the number of bytes of XML written, as with an
+    uncompressed file, so that envelopes are split at the same points whether
+    or not they are compressed.
+
+    :param sink: The binary file object the compressed XML is written to,
+        which is closed with this output.
+    :param compression: One of `COMPRESSION_SUFFIXES`, or None to write
+        uncompressed XML.
+    :param validate: If True, validate the XML as it is written, see
+        :meth:`validate`.
+    """
+
+    def __init__(
+        self,
+        sink: BinaryIO,
+        compression: Optional[str] = None,
+        validate: bool = True,
+    ):
+        self.sink = sink
+        self.name = sink.name
+        self.size = 0
+        self.compressed_size: Optional[int] = None
+        self._md5 = hashlib.md5()
+        self._validator = EnvelopeValidator() if validate else None
+        self._stream = self.compressor(sink, compression)
+
+    @staticmethod
+    def compressor(sink: BinaryIO, compression: Optional[str]) -> BinaryIO:
+        """Returns a file object that writes data compressed with `compression`
+        to `sink`, without closing it."""
+        if compression is None:
+            return sink
+        if compression == "gzip":
+            return gzip.GzipFile(fileobj=sink, mode="wb")
+        if compression == "zstd":
+            import zstandard
+
+            return zstandard.ZstdCompressor(level=ZSTD_LEVEL).stream_writer(
+                sink,
+                closefd=False,
+            )
+        raise ValueError(f"Unknown compression {compression!r}")
+
+    @property
+    def checksum(self) -> str:
+        """The md5 hex digest of the XML written, as recorded on an Upload."""
+        return self._md5.hexdigest()
+
+    def writable(self) -> bool:
+        return True
+
+    def tell(self) -> int:
+        return self.size
+
+    def write(self, data: bytes) -> int:
+        self._md5.update(data)
+        self.size += len(data)
+        if self._validator is not None:
+            self._validator.feed(data)
+        self._stream.write(data)
+        return len(data)
+
+    def close(self) -> None:
+        """Finishes compressing the XML and closes the sink, recording the
+        compressed size."""
+        if self.closed:
+            return
+        try:
+            if self._stream is not self.sink:
+                self._stream.close()
+            self.compressed_size = self.sink.tell()
+            self.sink.close()
+        finally:
+            super().close()
+
+    def abort(self) -> None:
+        """Closes the output after a failure, abandoning it if it is being
+        uploaded."""
+        if self.closed:
+            return
+        try:
+            if hasattr(self.sink, "abort"):
+                self.sink.abort()
+            else:
+                self.sink.close()
+        finally:
+            super().close()
+
+    def validate(self) -> EnvelopeContents:
+        """
+        Returns the number of transactions and records in the envelope, once it
+        has been written.
+
+        Raises DocumentInvalid if the XML was not valid against the TARIC3
+        schema.
+        """
+        if self._validator is None:
+            raise ValueError(f"{self.name} was not validated as it was written.")
+        return self._validator.close()
+
+
+def envelope_output_generator(
+    open_sink: Callable[[str], BinaryIO],
+    start: int = 1,
+    compression: Optional[str] = None,
+    validate: bool = True,
+) -> Callable[[], EnvelopeOutput]:
+    """
+    Returns a callable which returns an EnvelopeOutput for each DIT named
+    envelope in turn, for MultiFileEnvelopeTransactionSerializer.
+
+    :param open_sink: Opens the binary file object to write the envelope with
+        the given filename to.
+    """
+    suffix = COMPRESSION_SUFFIXES[compression] if compression else ""
+    filenames = dit_filename_generator(start)
+
+    def next_output() -> EnvelopeOutput:
+        return EnvelopeOutput(
+            open_sink(next(filenames) + suffix),
+            compression=compression,
+            validate=validate,
+        )
+
+    return next_output
+
+
+def local_file_opener(directory: str) -> Callable[[str], BinaryIO]:
+    """Returns a callable which opens files in `directory` for writing."""
+    return lambda filename: open(Path(directory) / filename, "wb")
+
+
+def s3_object_opener(bucket, prefix: str = "") -> Callable[[str], BinaryIO]:
+    """Returns a callable which starts a multipart upload to the S3 object named
+    by `prefix` and a filename in `bucket`, a boto3 ``s3.Bucket``."""
+    return lambda filename: MultipartUpload(
+        bucket.Object(str(PurePosixPath(prefix) / filename)),
+    )
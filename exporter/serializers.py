@@ -1,13 +1,28 @@
 import logging
 import os
 from collections import defaultdict
+from collections import deque
 from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from itertools import islice
 from typing import Dict
+from typing import Iterable
+from typing import Iterator
 from typing import List
+from typing import Optional
 from typing import Sequence
+from typing import Tuple
 
+from django.conf import settings
+from django.db import connection
+from django.db.models import Count
+from django.db.models import OuterRef
+from django.db.models import Subquery
 from lxml import etree
 
+from common.fragments import RecordFragment
+from common.models import TrackedModel
+from common.models import Transaction
 from common.serializers import EnvelopeSerializer
 from common.serializers import TaricDataAssertionError
 from common.serializers import validate_envelope
@@ -41,21 +56,31 @@ class MultiFileEnvelopeTransactionSerializer(EnvelopeSerializer):
     stream from outputs is selected new envelope output starts.
     """
 
+    # The number of ranges of transactions that may be rendered ahead of the one
+    # being written, for each worker.
+    QUEUED_RANGES_PER_WORKER = 2
+
     def __init__(
         self,
         output_constructor: callable,
         envelope_id=1,
         benchmark=False,
         *args,
+        workers: Optional[int] = None,
+        range_size: Optional[int] = None,
         **kwargs,
     ) -> None:
         """
         :param output_constructor: callable that returns a file like object to write to, called each time a new envelope is started.
         :param envelope_id: Envelope ID, to use later, when creating Envelope objects in the database.
+        :param workers: The number of threads rendering ranges of transactions, defaults to settings.ENVELOPE_RENDER_WORKERS.
+        :param range_size: The number of records in each range of transactions, defaults to settings.ENVELOPE_RENDER_RANGE_SIZE.
         :param args: Passed through to EnvelopeSerializer.
         :param kwargs: Passed through to EnvelopeSerializer.
         """
         self.output_constructor = output_constructor
+        self.workers = workers or settings.ENVELOPE_RENDER_WORKERS
+        self.range_size = range_size or settings.ENVELOPE_RENDER_RANGE_SIZE
         EnvelopeSerializer.__init__(
             self,
             self.output_constructor(),
@@ -83,23 +108,28 @@ class MultiFileEnvelopeTransactionSerializer(EnvelopeSerializer):
 
         # Transactions written to the current output
         current_transactions = []
-        for transaction in transactions.all():
-            tracked_models = transaction.tracked_models.record_ordering()
-            if not tracked_models.count():
-                # Transactions with no tracked models can occur if a workbasket
-                # is created and then populated, these are filtered as an empty
-                # transaction will cause an XSD validation error later on.
-                #
-                # Django bug 2361  https://code.djangoproject.com/ticket/2361
-                #   Queryset.filter(m2mfield__isnull=False) may duplicate records,
-                #   so cannot be used, instead the count() of each tracked_models
-                #   resultset is checked.
-                #
-                #
-                continue
-
-            envelope_body = self.render_envelope_body(tracked_models, transaction.order)
-            envelope_body_size = len(envelope_body.encode())
+        # Transactions with no tracked models can occur if a workbasket is
+        # created and then populated, these are filtered as an empty
+        # transaction will cause an XSD validation error later on.
+        #
+        # Django bug 2361  https://code.djangoproject.com/ticket/2361
+        #   Queryset.filter(m2mfield__isnull=False) may duplicate records, so
+        #   the tracked models are counted in a subquery instead.
+        populated_transactions = transactions.annotate(
+            record_count=Subquery(
+                TrackedModel.objects.filter(transaction=OuterRef("pk"))
+                .order_by()
+                .values("transaction")
+                .annotate(count=Count("pk"))
+                .values("count"),
+            ),
+        ).filter(record_count__gt=0)
+
+        for transaction, fragments in self.render_transaction_fragments(
+            populated_transactions,
+        ):
+            envelope_body = self.encode_fragments(fragments, transaction.order)
+            envelope_body_size = sum(map(len, envelope_body))
             if self.is_envelope_full(envelope_body_size):
                 oversize = not self.can_fit_one_envelope(
                     envelope_body_size + envelope_extra_size,
@@ -124,7 +154,7 @@ class MultiFileEnvelopeTransactionSerializer(EnvelopeSerializer):
 
             current_transactions.append(transaction)
 
-            self.write(envelope_body)
+            self.write_encoded(envelope_body)
 
         self.write(self.render_envelope_end())
         yield RenderedTransactions(
@@ -135,11 +165,130 @@ class MultiFileEnvelopeTransactionSerializer(EnvelopeSerializer):
             max_envelope_size=self.max_envelope_size,
         )
 
+    def render_transaction_fragments(
+        self,
+        transactions: Iterable[Transaction],
+    ) -> Iterator[Tuple[Transaction, List[RecordFragment]]]:
+        """
+        Yields each transaction, in order, with the RecordFragments of its
+        tracked models.
+
+        Serializing and rendering the records is most of the work of writing an
+        envelope, so large workbaskets are split into ranges of consecutive
+        transactions of about `range_size` records, which are rendered by up to
+        `workers` threads. Placeholders are only filled in once the fragments
+        are written, in order, so the output is the same as rendering the
+        transactions one after another.
+
+        Each worker thread reads from its own database connection and so only
+        sees committed data. Workbaskets are rendered serially if they fit in
+        one range.
+
+        :param transactions: Transactions annotated with their `record_count`.
+        """
+        ranges = self.transaction_ranges(transactions)
+        if self.workers <= 1 or len(ranges) <= 1:
+            for transaction_range in ranges:
+                yield from self._render_range(transaction_range)
+            return
+
+        with ThreadPoolExecutor(
+            max_workers=self.workers,
+            thread_name_prefix="envelope-render",
+        ) as executor:
+            # Ranges are submitted QUEUED_RANGES_PER_WORKER ahead of the one
+            # being written, so only a bounded number of rendered ranges are
+            # held in memory at a time.
+            remaining = iter(ranges)
+            pending = deque(
+                executor.submit(self._render_range_in_worker, transaction_range)
+                for transaction_range in islice(
+                    remaining,
+                    self.workers * self.QUEUED_RANGES_PER_WORKER,
+                )
+            )
+            try:
+                while pending:
+                    rendered = pending.popleft().result()
+                    transaction_range = next(remaining, None)
+                    if transaction_range is not None:
+                        pending.append(
+                            executor.submit(
+                                self._render_range_in_worker,
+                                transaction_range,
+                            ),
+                        )
+                    yield from rendered
+            finally:
+                for future in pending:
+                    future.cancel()
+
+    def transaction_ranges(
+        self,
+        transactions: Iterable[Transaction],
+    ) -> List[List[Transaction]]:
+        """Splits transactions, annotated with their `record_count`, into lists
+        of consecutive transactions of at least `range_size` records, apart from
+        the last."""
+        ranges = []
+        current_range = []
+        records = 0
+        for transaction in transactions:
+            current_range.append(transaction)
+            records += transaction.record_count
+            if records >= self.range_size:
+                ranges.append(current_range)
+                current_range = []
+                records = 0
+        if current_range:
+            ranges.append(current_range)
+        return ranges
+
+    def _render_range(
+        self,
+        transactions: List[Transaction],
+    ) -> List[Tuple[Transaction, List[RecordFragment]]]:
+        """
+        Returns the fragments of the records of each of `transactions`.
+
+        Raises TransactionChanged if a transaction does not have the number of
+        records it was annotated with when the ranges were planned, as its
+        records were then changed while the envelope was being rendered.
+        """
+        rendered = []
+        for transaction in transactions:
+            fragments = self.render_fragments(
+                list(transaction.tracked_models.record_ordering()),
+            )
+            if len(fragments) != transaction.record_count:
+                raise TransactionChanged(
+                    f"Transaction {transaction.pk} has {len(fragments)} records, "
+                    f"but had {transaction.record_count} when the envelope was "
+                    f"started.",
+                )
+            rendered.append((transaction, fragments))
+        return rendered
+
+    def _render_range_in_worker(
+        self,
+        transactions: List[Transaction],
+    ) -> List[Tuple[Transaction, List[RecordFragment]]]:
+        try:
+            return self._render_range(transactions)
+        finally:
+            # Each worker thread has its own connection, which would otherwise
+            # be left open once the thread has finished.
+            connection.close()
+
 
 class EnvelopeTooLarge(Exception):
     """Envelope was bigger than max_envelope_size."""
 
 
+class TransactionChanged(Exception):
+    """The records of a transaction changed while it was being rendered."""
+
+
 def validate_rendered_envelopes(
     rendered_envelopes: Sequence[RenderedTransactions],
 ) -> Dict[int, List[Exception]]:
@@ -7,12 +7,22 @@ a newly created SQLite database and upload the file to an S3 bucket.
 
 The general process is:
 
-1. Create a new, blank SQLite database with the correct schema by running Django
-   migrations.
+1. Create a new, blank SQLite database with the correct schema, derived from
+   Django migrations and cached for each version of them (see
+   :mod:`exporter.sqlite.schema`).
 2. Produce a set of operations to copy data into the new database.
-3. Run the SQL operations using the ``sqlite3`` library.
+3. Run the SQL operations using the ``apsw`` library, reading the data for
+   several tables at the same time on separate database connections and
+   inserting it from a single writer, then create the indexes.
 4. Upload the final file to S3.
 
+Once a snapshot has been exported, the next can be made incrementally: the
+previous snapshot is copied and only the transactions published since it was
+made are added to it, along with the versions of tracked models published in
+them. Models that are not tracked are copied in full, replacing their previous
+rows. A delta database, holding only what an incremental export adds to the
+previous snapshot, can also be made for downstream consumers.
+
 This process has been chosen to optimise for:
 
 - Minimal overhead on future development: any future changes that are made to
@@ -24,24 +34,45 @@ when building the SQLite schema and instead are replaced by simple start and end
 date fields, and any other Postgres-specific features are ignored.
 """
 
+import logging
+from contextlib import contextmanager
 from itertools import chain
-from pathlib import Path
-from tempfile import NamedTemporaryFile
+from typing import Collection
+from typing import Dict
+from typing import Iterator
+from typing import List
+from typing import Optional
+from typing import Tuple
+from typing import Type
 
 import apsw
 from django.apps import apps
 from django.conf import settings
+from django.db.models import Model
 
+from common.models.transactions import Transaction
 from exporter.sqlite import plan
 from exporter.sqlite import runner
+from exporter.sqlite import schema
 from exporter.sqlite import tasks  # noqa
 
+logger = logging.getLogger(__name__)
+
 SKIPPED_MODELS = {
     "QuotaEvent",
 }
 
 
-def make_export_plan(sqlite_runner: runner.Runner) -> plan.Plan:
+class SchemaChanged(Exception):
+    """Raised when the schema of a previous export no longer matches the schema
+    that would be exported now."""
+
+
+def exported_tables(
+    sqlite_runner: runner.Runner,
+) -> Iterator[Tuple[str, str, Type[Model]]]:
+    """Yields the name, `CREATE TABLE` statement and model of each table in
+    `sqlite_runner`'s database that is exported."""
     app_names = (
         name.split(".")[0]
         for name in settings.DOMAIN_APPS
@@ -50,32 +81,162 @@ def make_export_plan(sqlite_runner: runner.Runner) -> plan.Plan:
     all_models = chain(*[apps.get_app_config(name).get_models() for name in app_names])
     models_by_table = {model._meta.db_table: model for model in all_models}
 
-    import_script = plan.Plan()
     for table, create_table_statement in sqlite_runner.tables:
         model = models_by_table.get(table)
         if model is None or model.__name__ in SKIPPED_MODELS:
             continue
-
+        yield table, create_table_statement, model
+
+
+def export_indexes(sqlite_runner: runner.Runner, table: str) -> List[str]:
+    """Returns the SQL `CREATE INDEX` statement of each index that is exported
+    for `table`: its indexes in `sqlite_runner`'s database and its lookup
+    indexes."""
+    return [
+        *sqlite_runner.read_indexes(table),
+        *plan.lookup_indexes(table, sqlite_runner.read_column_order(table)),
+    ]
+
+
+def make_export_plan(
+    sqlite_runner: runner.Runner,
+    transactions: Optional[Collection[int]] = None,
+    create_schema: bool = True,
+) -> plan.Plan:
+    """
+    Returns a plan to export the data of each table in `sqlite_runner`'s
+    database, creating the tables and their indexes if `create_schema` is True.
+
+    If `transactions` is given, only those transactions and the versions
+    published in them are exported, along with the full contents of the tables
+    of models that are not tracked.
+    """
+    import_script = plan.Plan()
+    for table, create_table_statement, model in exported_tables(sqlite_runner):
         columns = list(sqlite_runner.read_column_order(model._meta.db_table))
-        import_script.add_schema(create_table_statement)
-        import_script.add_data(model, columns)
+        if create_schema:
+            import_script.add_schema(create_table_statement)
+        import_script.add_data(model, columns, transactions)
+        if create_schema:
+            for create_index_statement in export_indexes(sqlite_runner, table):
+                import_script.add_index(create_index_statement)
 
     return import_script
 
 
-def make_export(connection: apsw.Connection):
-    with NamedTemporaryFile() as temp_sqlite_db:
-        # Create Runner instance with its SQLite file name pointing at a path on
-        # the local file system. This is only required temporarily in order to
-        # create an in-memory plan that can be run against a target database
-        # object.
-        plan_runner = runner.Runner.make_tamato_database(
-            Path(temp_sqlite_db.name),
+def schema_matches(template: runner.Runner, previous: runner.Runner) -> bool:
+    """Returns whether each table that would be exported from `template` has the
+    same definition and indexes in the `previous` export."""
+    previous_tables = dict(previous.tables)
+    previous_indexes = {sql for _, sql in previous.indexes}
+    return all(
+        previous_tables.get(table) == create_table_statement
+        and previous_indexes.issuperset(export_indexes(template, table))
+        for table, create_table_statement, _ in exported_tables(template)
+    )
+
+
+def published_since(previous: runner.Runner) -> List[int]:
+    """
+    Returns the primary keys of the transactions that have been published since
+    the `previous` export was made.
+
+    Transactions are compared by primary key, rather than by order, because
+    transactions are ordered when they are approved, and so may be published
+    after later ordered transactions.
+    """
+    cursor = previous.database.cursor()
+    exported = {pk for (pk,) in cursor.execute("SELECT id FROM common_transaction")}
+    return [
+        pk
+        for pk in Transaction.objects.published()
+        .order_by("pk")
+        .values_list("pk", flat=True)
+        .iterator(chunk_size=settings.SQLITE_EXPORT_BATCH_SIZE)
+        if pk not in exported
+    ]
+
+
+@contextmanager
+def tamato_database_template() -> Iterator[runner.Runner]:
+    """Provides a new and empty in-memory SQLite database with the TaMaTo
+    schema, created from the cached schema."""
+    template = runner.Runner.from_schema(schema.get_schema())
+    try:
+        yield template
+    finally:
+        template.database.close()
+
+
+def run_export_plan(
+    connection: apsw.Connection,
+    export_plan: plan.Plan,
+) -> Dict[str, runner.TableLoad]:
+    export_runner = runner.ParallelRunner(connection)
+    loads = export_runner.run_plan(export_plan)
+    for table, load in loads.items():
+        logger.info(
+            f"Exported {load.rows} rows of {table} in {load.seconds:.2f}s "
+            f"({load.rows_per_second:.0f} rows/s).",
+        )
+    return loads
+
+
+def make_export(
+    connection: apsw.Connection,
+    previous: Optional[apsw.Connection] = None,
+):
+    """
+    Exports the latest published data to the SQLite database `connection`.
+
+    If the `previous` export is given, the export is made incrementally, by
+    copying it and adding the transactions published since it was made. If
+    the schema has changed since the previous export, a full export is made.
+    """
+    with tamato_database_template() as template:
+        transactions = None
+        if previous is not None:
+            if schema_matches(template, runner.Runner(previous)):
+                transactions = published_since(runner.Runner(previous))
+                logger.info(
+                    f"Exporting {len(transactions)} transactions published "
+                    f"since the previous export.",
+                )
+            else:
+                logger.info(
+                    "The schema has changed since the previous export, so "
+                    "making a full export.",
+                )
+
+        export_plan = make_export_plan(
+            template,
+            transactions,
+            create_schema=transactions is None,
+        )
+
+    if transactions is not None:
+        with connection.backup("main", previous, "main") as backup:
+            backup.step()
+
+    run_export_plan(connection, export_plan)
+
+
+def make_delta_export(connection: apsw.Connection, previous: apsw.Connection):
+    """
+    Exports the transactions published since the `previous` export was made, and
+    the versions of tracked models published in them, to the new SQLite database
+    `connection`. Models that are not tracked are exported in full.
+
+    Raises SchemaChanged if the schema has changed since the previous export.
+    """
+    with tamato_database_template() as template:
+        if not schema_matches(template, runner.Runner(previous)):
+            raise SchemaChanged(
+                "The schema has changed since the previous export.",
+            )
+        export_plan = make_export_plan(
+            template,
+            published_since(runner.Runner(previous)),
         )
-        plan = make_export_plan(plan_runner)
-        # make_tamato_database() creates a Connection instance that needs
-        # closing once an in-memory plan has been created from it.
-        plan_runner.database.close()
 
-    export_runner = runner.Runner(connection)
-    export_runner.run_operations(plan.operations)
+    run_export_plan(connection, export_plan)
@@ -0,0 +1,87 @@
+"""
+Compaction and compression of finished SQLite exports.
+
+Exports are written in bulk with journalling switched off, which can leave
+free and partly filled pages, particularly when an incremental export replaces
+the contents of tables. Before an export is saved it is copied into a compact
+file using ``VACUUM INTO``, and, if ``settings.SQLITE_EXPORT_COMPRESS`` is
+True, a zstd compressed copy is saved alongside it.
+
+Compression uses the ``zstandard`` package, which is only imported when
+compression is used.
+"""
+
+import logging
+import os
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import BinaryIO
+from typing import Callable
+from typing import Optional
+
+import apsw
+
+from exporter.util import ZSTD_LEVEL
+
+logger = logging.getLogger(__name__)
+
+COMPRESSED_SUFFIX = ".zst"
+
+
+@dataclass
+class CompactionReport:
+    """The sizes, in bytes, of an export as written, compacted and compressed,
+    and the time taken to compact and compress it."""
+
+    size: int
+    compacted_size: int
+    compaction_seconds: float
+    compressed_size: Optional[int] = None
+    compression_seconds: Optional[float] = None
+
+    def log(self, filename: str):
+        logger.info(
+            f"Compacted {filename} from {self.size} to {self.compacted_size} "
+            f"bytes in {self.compaction_seconds:.2f}s.",
+        )
+        if self.compressed_size is not None:
+            logger.info(
+                f"Compressed {filename} to {self.compressed_size} bytes in "
+                f"{self.compression_seconds:.2f}s.",
+            )
+
+
+def compact(connection: apsw.Connection, sqlite_file: Path) -> CompactionReport:
+    """Copies the database of `connection` into a compact file at `sqlite_file`,
+    which must not exist or be empty."""
+    size = os.path.getsize(connection.filename)
+    started = time.perf_counter()
+    connection.cursor().execute("VACUUM INTO ?", (str(sqlite_file),))
+    return CompactionReport(
+        size=size,
+        compacted_size=os.path.getsize(sqlite_file),
+        compaction_seconds=time.perf_counter() - started,
+    )
+
+
+def compress(
+    source: BinaryIO,
+    write: Callable[[BinaryIO], None],
+    report: CompactionReport,
+):
+    """
+    Compresses `source` with zstd, passing a stream of the compressed data to
+    `write`, and records the compressed size and the time taken in `report`.
+
+    The compressed data is streamed so that it never needs to be held in memory
+    or on disk in full.
+    """
+    import zstandard
+
+    started = time.perf_counter()
+    compressor = zstandard.ZstdCompressor(level=ZSTD_LEVEL, threads=-1)
+    with compressor.stream_reader(source, closefd=False) as reader:
+        write(reader)
+        report.compressed_size = reader.tell()
+    report.compression_seconds = time.perf_counter() - started
@@ -1,9 +1,15 @@
 from typing import Any
+from typing import Collection
 from typing import Iterable
+from typing import Iterator
+from typing import List
+from typing import NamedTuple
+from typing import Optional
 from typing import Tuple
 from typing import Type
 from typing import Union
 
+from django.conf import settings
 from django.core.exceptions import FieldDoesNotExist
 from django.db.models.base import Model
 from django.db.models.expressions import Expression
@@ -15,6 +21,8 @@ from django.db.models.functions import Cast
 from django.db.models.query import QuerySet
 
 from common.models.mixins.validity import ValidityMixin
+from common.models.trackedmodel import TrackedModel
+from common.models.transactions import Transaction
 from common.util import EndDate
 from common.util import StartDate
 
@@ -57,6 +65,45 @@ def add_column_to_queryset(column: str, queryset: QuerySet) -> Tuple[QuerySet, s
         return queryset, column
 
 
+LOOKUP_INDEXES = (
+    ("item_id", "suffix"),
+    ("sid",),
+    ("validity_start", "validity_end"),
+)
+"""The columns of common lookups, for each of which a covering index is created
+on every table that has all of the columns."""
+
+VALIDITY_COLUMNS = ("validity_start", "validity_end")
+
+
+def lookup_indexes(table: str, columns: Iterable[str]) -> Iterator[str]:
+    """
+    Yields the SQL `CREATE INDEX` statement of each lookup index for a table
+    with the given columns.
+
+    Each index is over the lookup's columns followed by the table's validity
+    columns, so that lookups that only need an object's validity period can be
+    answered from the index alone.
+    """
+    columns = list(columns)
+    for lookup in LOOKUP_INDEXES:
+        if not all(column in columns for column in lookup):
+            continue
+        indexed = [
+            *lookup,
+            *(
+                column
+                for column in VALIDITY_COLUMNS
+                if column in columns and column not in lookup
+            ),
+        ]
+        yield 'CREATE INDEX "{0}_{1}_lookup" ON "{0}" ({2})'.format(
+            table,
+            "_".join(lookup),
+            ", ".join(f'"{column}"' for column in indexed),
+        )
+
+
 Operation = Tuple[str, Iterable[Iterable[Any]]]
 """
 Structure representing an SQL operation to be run against an SQLite database.
@@ -71,6 +118,20 @@ value, and the SQL will be run for every value returned by the queryset.
 """
 
 
+class TableData(NamedTuple):
+    """The data to be copied into one table of an SQLite database."""
+
+    table: str
+    """The name of the table."""
+
+    sql: str
+    """An SQL insert statement with a placeholder question mark for each
+    column."""
+
+    queryset: QuerySet
+    """A queryset of the rows to insert, as tuples of column values."""
+
+
 class Plan:
     """
     A set of operations that can be applied to an SQLite database to import data
@@ -78,17 +139,25 @@ class Plan:
 
     By default, the plan will just set up and finalize the database. Tables
     can be added and the data for them will be queried when the plan is
-    executed.
+    executed. Indexes are created once all of the data has been inserted, as it
+    is quicker to build an index over a full table than to update it on every
+    insert. Finally, statistics about the tables and indexes are gathered for
+    the query planner of the database's users.
 
     Once the plan is finished, access the operations using the ``operations``
-    property and run them using a :class:`~exporter.sqlite.runner.Runner`.
+    property and run them using a :class:`~exporter.sqlite.runner.Runner`, or
+    run the plan using a :class:`~exporter.sqlite.runner.ParallelRunner`.
     """
 
     def __init__(self) -> None:
         self._operations = []
+        self._data: List[TableData] = []
+        self._indexes = []
 
     @property
-    def operations(self) -> Iterable[Operation]:
+    def setup_operations(self) -> Iterable[Operation]:
+        """The operations that set up the database and create its tables, to be
+        run before any data is inserted."""
         return [
             ("PRAGMA locking_mode=EXCLUSIVE", [[]]),
             ("PRAGMA page_size=65536", [[]]),
@@ -96,15 +165,63 @@ class Plan:
             ("PRAGMA journal_mode=OFF", [[]]),
             ("BEGIN", [[]]),
             *self._operations,
+        ]
+
+    @property
+    def data(self) -> List[TableData]:
+        """The data to be inserted into each table."""
+        return list(self._data)
+
+    @property
+    def finish_operations(self) -> Iterable[Operation]:
+        """The operations that create indexes and finalize the database, to be
+        run once all data has been inserted."""
+        return [
+            *((sql, [[]]) for sql in self._indexes),
+            ("ANALYZE", [[]]),
             ("COMMIT", [[]]),
         ]
 
+    @property
+    def operations(self) -> Iterable[Operation]:
+        return [
+            *self.setup_operations,
+            *(
+                (
+                    table_data.sql,
+                    table_data.queryset.iterator(
+                        chunk_size=settings.SQLITE_EXPORT_BATCH_SIZE,
+                    ),
+                )
+                for table_data in self._data
+            ),
+            *self.finish_operations,
+        ]
+
     def add_schema(self, sql: str):
         """Add sql schema (table) creation statements to this Plan instance."""
         self._operations.append((sql, [[]]))
 
-    def add_data(self, model: Type[Model], columns: Iterable[str]):
-        """Add data insert statements to this Plan instance."""
+    def add_index(self, sql: str):
+        """Add an sql index creation statement to this Plan instance, to be run
+        after the data has been inserted."""
+        self._indexes.append(sql)
+
+    def add_data(
+        self,
+        model: Type[Model],
+        columns: Iterable[str],
+        transactions: Optional[Collection[int]] = None,
+    ):
+        """
+        Add data insert statements to this Plan instance.
+
+        If `transactions` is given, only the transactions with those primary
+        keys, and the versions of tracked models published in them, are
+        inserted. Other models don't record the transaction that their rows were
+        published in, so all of their rows are inserted, replacing any already
+        in the table.
+        """
         queryset = model.objects
         output_columns = []
         for column in columns:
@@ -114,12 +231,23 @@ class Plan:
         if hasattr(queryset, "published"):
             queryset = queryset.published()
 
-        queryset = queryset.values_list(*output_columns).iterator()
-        operation = (
-            "INSERT INTO {0} VALUES ({1})".format(
+        if transactions is not None:
+            if issubclass(model, Transaction):
+                queryset = queryset.filter(pk__in=transactions)
+            elif issubclass(model, TrackedModel):
+                queryset = queryset.filter(transaction_id__in=transactions)
+            else:
+                self._operations.append(
+                    (f"DELETE FROM {model._meta.db_table}", [[]]),
+                )
+
+        self._data.append(
+            TableData(
                 model._meta.db_table,
-                ", ".join(["?"] * len(output_columns)),
+                "INSERT INTO {0} VALUES ({1})".format(
+                    model._meta.db_table,
+                    ", ".join(["?"] * len(output_columns)),
+                ),
+                queryset.values_list(*output_columns),
             ),
-            queryset,
         )
-        self._operations.append(operation)
@@ -1,17 +1,30 @@
 import json
 import logging
 import os
+import queue
 import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
 from pathlib import Path
 from subprocess import run
+from typing import Dict
 from typing import Iterable
 from typing import Iterator
+from typing import List
+from typing import NamedTuple
+from typing import Optional
 from typing import Tuple
 
 import apsw
 from django.conf import settings
+from django.db import connection
+from django.db import transaction
 
 from exporter.sqlite.plan import Operation
+from exporter.sqlite.plan import Plan
+from exporter.sqlite.plan import TableData
 
 logger = logging.getLogger(__name__)
 
@@ -91,6 +104,24 @@ class Runner:
             ):
                 file.unlink()
 
+    @classmethod
+    def from_schema(cls, schema: str, sqlite_file: str = ":memory:") -> "Runner":
+        """Create a new and empty SQLite database at `sqlite_file` by executing
+        `schema`, an SQL script such as that returned by `dump_schema`."""
+        database = apsw.Connection(sqlite_file)
+        database.cursor().execute(schema)
+        return cls(database)
+
+    def dump_schema(self) -> str:
+        """Returns an SQL script that creates the tables, indexes, views and
+        triggers of the SQLite database."""
+        statements = [
+            sql
+            for type in ("table", "index", "view", "trigger")
+            for _, sql in self.read_schema(type)
+        ]
+        return "".join(f"{sql};\n" for sql in statements)
+
     def read_schema(self, type: str) -> Iterator[Tuple[str, str]]:
         """
         Generator yielding a tuple of 'name' and 'sql' column values from
@@ -129,6 +160,28 @@ class Runner:
         the SQL `CREATE_INDEX` statement that can be used to create it."""
         yield from self.read_schema("index")
 
+    def read_indexes(self, table: str) -> Iterator[str]:
+        """Generator yielding the SQL `CREATE INDEX` statement of each index on
+        `table`, excluding those that SQLite creates for the table's own
+        constraints."""
+        cursor = self.database.cursor()
+        cursor.execute(
+            """
+            SELECT
+                sql
+            FROM
+                sqlite_master
+            WHERE
+                sql IS NOT NULL
+                AND type = 'index'
+                AND tbl_name = ?
+                AND name NOT LIKE 'sqlite_%'
+            """,
+            (table,),
+        )
+        for (sql,) in cursor.fetchall():
+            yield sql
+
     def read_column_order(self, table: str) -> Iterator[str]:
         """
         Returns the name of `table`'s columns in the order they are defined in
@@ -153,3 +206,217 @@ class Runner:
                 cursor.executemany(*operation)
             except apsw.SQLError as e:
                 logger.error(e)
+
+
+class TableLoad(NamedTuple):
+    """The number of rows inserted into a table by a ParallelRunner, and the
+    time taken from starting to read the table to inserting its last row."""
+
+    rows: int
+    seconds: float
+
+    @property
+    def rows_per_second(self) -> float:
+        return self.rows / self.seconds if self.seconds else 0.0
+
+
+class ParallelRunner(Runner):
+    """
+    Runs a :class:`~exporter.sqlite.plan.Plan` on an SQLite database, reading
+    the data for several tables at the same time.
+
+    Each table is read by a worker thread on its own database connection, using
+    a server-side cursor that fetches ``batch_size`` rows at a time. The
+    workers pass batches of rows through a bounded queue to the calling thread,
+    which is the only one to write to the SQLite database, and inserts each
+    batch with a single ``executemany``.
+
+    On PostgreSQL, the workers all read from a snapshot exported by the calling
+    thread's connection, so that the tables are consistent with each other even
+    if data is published during the export.
+    """
+
+    # The number of batches that may be waiting to be written for each worker.
+    QUEUED_BATCHES_PER_WORKER = 2
+
+    # How long, in seconds, workers wait to queue a batch before checking
+    # whether the export has been stopped.
+    QUEUE_TIMEOUT = 0.1
+
+    def __init__(
+        self,
+        database: apsw.Connection,
+        workers: Optional[int] = None,
+        batch_size: Optional[int] = None,
+    ) -> None:
+        super().__init__(database)
+        self.workers = workers or settings.SQLITE_EXPORT_WORKERS
+        self.batch_size = batch_size or settings.SQLITE_EXPORT_BATCH_SIZE
+
+    def run_plan(self, plan: Plan) -> Dict[str, TableLoad]:
+        """
+        Runs the plan's setup operations, inserts its data and then runs its
+        finishing operations, which create the indexes.
+
+        Returns:
+            dict of table name to the TableLoad of its data
+        """
+        self.run_operations(plan.setup_operations)
+        if self.workers > 1:
+            loads = self.load_in_parallel(plan.data)
+        else:
+            loads = self.load_in_sequence(plan.data)
+        self.run_operations(plan.finish_operations)
+        return loads
+
+    def read_batches(self, table_data: TableData) -> Iterator[List[Tuple]]:
+        """Yields the rows of a table in lists of up to batch_size rows."""
+        batch = []
+        for row in table_data.queryset.iterator(chunk_size=self.batch_size):
+            batch.append(row)
+            if len(batch) >= self.batch_size:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
+
+    def write_batch(self, table_data: TableData, batch: List[Tuple]):
+        logger.debug("%s: %s (%d rows)", self.database, table_data.sql, len(batch))
+        try:
+            self.database.cursor().executemany(table_data.sql, batch)
+        except apsw.SQLError as e:
+            logger.error(e)
+
+    def load_in_sequence(self, data: Iterable[TableData]) -> Dict[str, TableLoad]:
+        """Reads and inserts the data for each table in turn, using the calling
+        thread's database connection."""
+        loads = {}
+        for table_data in data:
+            started = time.perf_counter()
+            rows = 0
+            for batch in self.read_batches(table_data):
+                self.write_batch(table_data, batch)
+                rows += len(batch)
+            loads[table_data.table] = TableLoad(rows, time.perf_counter() - started)
+        return loads
+
+    @contextmanager
+    def exported_snapshot(self) -> Iterator[Optional[str]]:
+        """
+        Exports a snapshot of the database for the workers to read from, which
+        remains usable until the context is exited.
+
+        Yields None if the database doesn't support exporting snapshots, or if
+        the calling thread is already in a transaction, from which PostgreSQL
+        can't export one.
+        """
+        if connection.vendor != "postgresql" or connection.in_atomic_block:
+            yield None
+            return
+
+        with transaction.atomic(), connection.cursor() as cursor:
+            cursor.execute("SELECT pg_export_snapshot()")
+            (snapshot,) = cursor.fetchone()
+            yield snapshot
+
+    def load_in_parallel(self, data: Iterable[TableData]) -> Dict[str, TableLoad]:
+        """Reads the data for up to `workers` tables at a time in worker
+        threads, inserting the batches they read as they arrive."""
+        data = list(data)
+        tables = queue.SimpleQueue()
+        for table_data in data:
+            tables.put(table_data)
+        batches = queue.Queue(maxsize=self.workers * self.QUEUED_BATCHES_PER_WORKER)
+        stopped = threading.Event()
+        started = {}
+        rows = {table_data.table: 0 for table_data in data}
+        loads = {}
+
+        with (
+            self.exported_snapshot() as snapshot,
+            ThreadPoolExecutor(
+                max_workers=self.workers,
+                thread_name_prefix="sqlite-export",
+            ) as executor,
+        ):
+            for _ in range(min(self.workers, len(data))):
+                executor.submit(
+                    self._read_tables,
+                    tables,
+                    snapshot,
+                    batches,
+                    stopped,
+                    started,
+                )
+            try:
+                while len(loads) < len(data):
+                    table_data, batch = batches.get()
+                    if table_data is None:
+                        # A worker failed, and the batch is its exception.
+                        raise batch
+                    if batch is None:
+                        loads[table_data.table] = TableLoad(
+                            rows[table_data.table],
+                            time.perf_counter() - started[table_data.table],
+                        )
+                        continue
+                    self.write_batch(table_data, batch)
+                    rows[table_data.table] += len(batch)
+            finally:
+                stopped.set()
+
+        return loads
+
+    def _read_tables(
+        self,
+        tables: queue.SimpleQueue,
+        snapshot: Optional[str],
+        batches: queue.Queue,
+        stopped: threading.Event,
+        started: Dict[str, float],
+    ):
+        """
+        Reads tables in a worker thread until there are none left, queueing the
+        rows of each table in batches followed by a None batch once it has been
+        read.
+
+        If reading fails, the exception is queued in place of a table so that
+        the writer can raise it.
+        """
+        try:
+            with transaction.atomic():
+                if snapshot:
+                    with connection.cursor() as cursor:
+                        cursor.execute(
+                            "SET TRANSACTION ISOLATION LEVEL REPEATABLE READ",
+                        )
+                        cursor.execute("SET TRANSACTION SNAPSHOT %s", [snapshot])
+
+                while not stopped.is_set():
+                    try:
+                        table_data = tables.get_nowait()
+                    except queue.Empty:
+                        return
+
+                    started[table_data.table] = time.perf_counter()
+                    for batch in self.read_batches(table_data):
+                        if not self._queue(batches, (table_data, batch), stopped):
+                            return
+                    self._queue(batches, (table_data, None), stopped)
+        except Exception as e:
+            self._queue(batches, (None, e), stopped)
+        finally:
+            # Each worker thread has its own connection, which would otherwise
+            # be left open once the thread has finished.
+            connection.close()
+
+    def _queue(self, batches: queue.Queue, item, stopped: threading.Event) -> bool:
+        """Queues an item, waiting for space in the queue unless the export is
+        stopped, and returns whether the item was queued."""
+        while not stopped.is_set():
+            try:
+                batches.put(item, timeout=self.QUEUE_TIMEOUT)
+                return True
+            except queue.Full:
+                continue
+        return False
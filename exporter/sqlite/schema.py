@@ -0,0 +1,96 @@
+"""
+The SQLite schema of exports is derived from TaMaTo's models by running Django
+migrations against a new SQLite database, which is slow and writes temporary
+migration files into the source tree.
+
+To avoid doing so for every export, the schema is generated once for each
+version of the migrations and models and cached as an SQL script in
+``settings.SQLITE_SCHEMA_CACHE_DIRECTORY``. The cache can be populated ahead of
+time, for instance when building a read-only container image, using the
+``make_sqlite_schema`` management command.
+"""
+
+import hashlib
+import inspect
+import logging
+import os
+from pathlib import Path
+from tempfile import NamedTemporaryFile
+from typing import Iterator
+from typing import Tuple
+
+import django
+from django.apps import apps
+from django.conf import settings
+
+from exporter.sqlite import runner
+
+logger = logging.getLogger(__name__)
+
+
+def schema_sources() -> Iterator[Tuple[str, Path]]:
+    """Yields a name and path for each file that the SQLite schema is derived
+    from: the migrations of each installed app, and the modules that define
+    each model and the classes of its fields."""
+    for app_config in apps.get_app_configs():
+        migrations = Path(app_config.path) / "migrations"
+        for migration in migrations.glob("*.py"):
+            yield f"{app_config.label}.migrations.{migration.stem}", migration
+
+    for model in apps.get_models():
+        for cls in (model, *(type(field) for field in model._meta.get_fields())):
+            source = inspect.getsourcefile(cls)
+            if source:
+                yield cls.__module__, Path(source)
+
+
+def schema_cache_key() -> str:
+    """Returns a hash of the Django version and of the files that the SQLite
+    schema is derived from, which changes whenever the schema might."""
+    digest = hashlib.sha256(django.get_version().encode())
+    for name, path in sorted(set(schema_sources())):
+        digest.update(name.encode())
+        digest.update(path.read_bytes())
+    return digest.hexdigest()
+
+
+def schema_cache_path() -> Path:
+    return Path(settings.SQLITE_SCHEMA_CACHE_DIRECTORY) / f"{schema_cache_key()}.sql"
+
+
+def generate_schema() -> str:
+    """Generates the SQLite schema by running migrations against a new
+    database."""
+    with NamedTemporaryFile() as temp_sqlite_db:
+        template = runner.Runner.make_tamato_database(Path(temp_sqlite_db.name))
+        try:
+            return template.dump_schema()
+        finally:
+            template.database.close()
+
+
+def get_schema() -> str:
+    """
+    Returns the SQLite schema of the current migrations and models, from the
+    cache if it has been generated before.
+
+    A newly generated schema is written to the cache. If the cache directory
+    can't be written to, the schema is still returned.
+    """
+    cache_path = schema_cache_path()
+    if cache_path.exists():
+        logger.info(f"Using cached SQLite schema {cache_path}.")
+        return cache_path.read_text()
+
+    logger.info(f"Generating SQLite schema {cache_path}.")
+    schema = generate_schema()
+    try:
+        cache_path.parent.mkdir(parents=True, exist_ok=True)
+        # Write to a temporary file first so that other processes never read
+        # a partly written schema.
+        temp_path = cache_path.with_suffix(f".{os.getpid()}.tmp")
+        temp_path.write_text(schema)
+        temp_path.replace(cache_path)
+    except OSError as e:
+        logger.warning(f"Unable to cache SQLite schema {cache_path}: {e}")
+    return schema
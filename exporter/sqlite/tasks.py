@@ -1,13 +1,23 @@
 import logging
 import os
+import re
+from typing import Iterable
+from typing import Optional
+from typing import Tuple
+
+from django.conf import settings
 
 from common.celery import app
 from common.models.transactions import Transaction
 from common.models.transactions import TransactionPartition
+from exporter import sqlite
 from exporter import storages
 
 logger = logging.getLogger(__name__)
 
+# Matches the names of full exports, capturing their seed_ prefix and order.
+EXPORT_FILENAME = re.compile(r"^(seed_)?(\d{9})\.db$")
+
 
 def normalised_order(order):
     """Return a transaction's normalised order value - left-padded with zeroes
@@ -29,8 +39,40 @@ def get_output_filename():
     return f"seed_{normalised_order(order)}.db"
 
 
+def get_delta_filename(filename: str) -> str:
+    """Returns the name of the delta database for the export named
+    `filename`."""
+    return re.sub(r"\.db$", "_delta.db", filename)
+
+
+def export_sort_key(filename: str) -> Tuple[int, int]:
+    """Returns a key ordering export file names as the transactions that they
+    are named after are ordered, with seed file exports first."""
+    seed, order = EXPORT_FILENAME.match(filename).groups()
+    return (0 if seed else 1, int(order))
+
+
+def get_previous_filename(filenames: Iterable[str], filename: str) -> Optional[str]:
+    """Returns the name of the latest full export in `filenames` that precedes
+    the export named `filename`, or None if there is none."""
+    return max(
+        (
+            name
+            for name in filenames
+            if EXPORT_FILENAME.match(name)
+            and export_sort_key(name) < export_sort_key(filename)
+        ),
+        key=export_sort_key,
+        default=None,
+    )
+
+
 @app.task
-def export_and_upload_sqlite(local_path: str = None) -> bool:
+def export_and_upload_sqlite(
+    local_path: str = None,
+    incremental: bool = None,
+    delta: bool = None,
+) -> bool:
     """
     Generates an export of latest published data from the primary database to a
     portable SQLite database file. The most recently published Transaction's
@@ -43,7 +85,19 @@ def export_and_upload_sqlite(local_path: str = None) -> bool:
 
     If `local_path` is not provided, then the SQLite database file will be saved
     to the configured S3 bucket.
+
+    If `incremental` is True, the database is made from the latest previous
+    export in the storage, adding only the transactions published since it was
+    made. If `delta` is True, a delta database holding only those additions is
+    also saved, named after the export with a `_delta` suffix. Both default to
+    their settings, `SQLITE_EXPORT_INCREMENTAL` and `SQLITE_EXPORT_DELTA`, and
+    both fall back to a full export alone if there is no previous export.
     """
+    if incremental is None:
+        incremental = settings.SQLITE_EXPORT_INCREMENTAL
+    if delta is None:
+        delta = settings.SQLITE_EXPORT_DELTA
+
     db_name = get_output_filename()
 
     if local_path:
@@ -63,7 +117,36 @@ def export_and_upload_sqlite(local_path: str = None) -> bool:
         )
         return False
 
+    previous_filename = None
+    if incremental or delta:
+        previous_name = get_previous_filename(storage.list_databases(), db_name)
+        if previous_name:
+            previous_filename = storage.generate_filename(previous_name)
+            logger.info(f"Found previous export {previous_filename}.")
+        else:
+            logger.info("No previous export found, making a full export.")
+
     logger.info(f"Generating SQLite database export {export_filename}.")
-    storage.export_database(export_filename)
+    storage.export_database(
+        export_filename,
+        previous=previous_filename if incremental else None,
+    )
     logger.info(f"SQLite database export {export_filename} complete.")
+
+    if delta and previous_filename:
+        delta_filename = storage.generate_filename(get_delta_filename(db_name))
+        logger.info(f"Generating SQLite delta database {delta_filename}.")
+        try:
+            storage.export_database(
+                delta_filename,
+                previous=previous_filename,
+                delta=True,
+            )
+        except sqlite.SchemaChanged as e:
+            logger.warning(f"{e} Not saving delta database {delta_filename}.")
+            if storage.exists(delta_filename):
+                storage.delete(delta_filename)
+        else:
+            logger.info(f"SQLite delta database {delta_filename} complete.")
+
     return True
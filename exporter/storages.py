@@ -1,16 +1,24 @@
 import logging
+import shutil
+from contextlib import contextmanager
 from functools import cached_property
 from os import path
 from pathlib import Path
 from tempfile import NamedTemporaryFile
+from typing import Iterator
+from typing import List
+from typing import Optional
 
 import apsw
+from boto3.s3.transfer import TransferConfig
 from django.core.files.storage import Storage
 from sqlite_s3vfs import S3VFS
 from storages.backends.s3boto3 import S3Boto3Storage
 
 from common.util import log_timing
 from exporter import sqlite
+from exporter.sqlite import compaction
+from exporter.util import MULTIPART_CHUNK_SIZE
 
 logger = logging.getLogger(__name__)
 
@@ -37,11 +45,56 @@ class SQLiteExportMixin:
     """Mixin class used to define a common export API among SQLite Storage
     subclasses."""
 
-    def export_database(self, filename: str):
-        """Export Tamato's primary database to an SQLite file format, saving to
-        Storage's backing store (S3, local file system, etc)."""
+    def export_database(
+        self,
+        filename: str,
+        previous: Optional[str] = None,
+        delta: bool = False,
+    ):
+        """
+        Export Tamato's primary database to an SQLite file format, saving to
+        Storage's backing store (S3, local file system, etc).
+
+        If `previous` names an earlier export in the storage, the export is
+        made incrementally from it. If `delta` is True, only the changes since
+        the `previous` export are exported.
+        """
         raise NotImplementedError
 
+    @contextmanager
+    def open_database(self, filename: str) -> Iterator[apsw.Connection]:
+        """Provides a connection to a local copy of an export in the storage."""
+        with NamedTemporaryFile() as local_copy:
+            with self.open(filename, "rb") as remote_file:
+                shutil.copyfileobj(remote_file, local_copy)
+            local_copy.flush()
+            connection = apsw.Connection(local_copy.name)
+            try:
+                yield connection
+            finally:
+                connection.close()
+
+    def make_export(
+        self,
+        connection: apsw.Connection,
+        previous: Optional[str] = None,
+        delta: bool = False,
+    ):
+        """Exports to `connection`, incrementally or as a delta database if the
+        `previous` export is given."""
+        if previous is None:
+            if delta:
+                raise ValueError("A delta export needs a previous export.")
+            sqlite.make_export(connection)
+            return
+
+        logger.info(f"Reading previous export {previous}.")
+        with self.open_database(previous) as previous_connection:
+            if delta:
+                sqlite.make_delta_export(connection, previous_connection)
+            else:
+                sqlite.make_export(connection, previous_connection)
+
 
 class SQLiteS3StorageBase(S3Boto3Storage):
     """Storage base class used for remotely storing SQLite database files to an
@@ -68,6 +121,13 @@ class SQLiteS3StorageBase(S3Boto3Storage):
         )
         return super().generate_filename(filename)
 
+    def list_databases(self) -> List[str]:
+        """Returns the names of the files in the export directory."""
+        from django.conf import settings
+
+        _, files = self.listdir(settings.SQLITE_STORAGE_DIRECTORY)
+        return files
+
 
 class SQLiteS3VFSStorage(SQLiteExportMixin, SQLiteS3StorageBase):
     """
@@ -88,9 +148,14 @@ class SQLiteS3VFSStorage(SQLiteExportMixin, SQLiteS3StorageBase):
         return S3VFS(bucket=self.bucket, block_size=65536)
 
     @log_timing(logger_function=logger.info)
-    def export_database(self, filename: str):
+    def export_database(
+        self,
+        filename: str,
+        previous: Optional[str] = None,
+        delta: bool = False,
+    ):
         connection = apsw.Connection(filename, vfs=self.vfs.name)
-        sqlite.make_export(connection)
+        self.make_export(connection, previous, delta)
         connection.close()
         logger.info(f"Serializing {filename} to S3 storage.")
         vfs_fileobj = self.vfs.serialize_fileobj(key_prefix=filename)
@@ -107,13 +172,39 @@ class SQLiteS3Storage(SQLiteExportMixin, SQLiteS3StorageBase):
     """
 
     @log_timing(logger_function=logger.info)
-    def export_database(self, filename: str):
-        with NamedTemporaryFile() as temp_sqlite_db:
+    def export_database(
+        self,
+        filename: str,
+        previous: Optional[str] = None,
+        delta: bool = False,
+    ):
+        from django.conf import settings
+
+        with NamedTemporaryFile() as temp_sqlite_db, NamedTemporaryFile() as compact_db:
             connection = apsw.Connection(temp_sqlite_db.name)
-            sqlite.make_export(connection)
+            self.make_export(connection, previous, delta)
+            report = compaction.compact(connection, Path(compact_db.name))
             connection.close()
             logger.info(f"Saving {filename} to S3 storage.")
-            self.save(filename, temp_sqlite_db.file)
+            self.save(filename, compact_db.file)
+
+            if settings.SQLITE_EXPORT_COMPRESS:
+                compressed_filename = filename + compaction.COMPRESSED_SUFFIX
+                logger.info(f"Saving {compressed_filename} to S3 storage.")
+                compact_db.file.seek(0)
+                compaction.compress(
+                    compact_db.file,
+                    lambda compressed: self.bucket.Object(
+                        compressed_filename,
+                    ).upload_fileobj(
+                        compressed,
+                        Config=TransferConfig(
+                            multipart_chunksize=MULTIPART_CHUNK_SIZE,
+                        ),
+                    ),
+                    report,
+                )
+            report.log(filename)
 
 
 class SQLiteLocalStorage(SQLiteExportMixin, Storage):
@@ -132,9 +223,56 @@ class SQLiteLocalStorage(SQLiteExportMixin, Storage):
     def exists(self, name: str) -> bool:
         return Path(self.path(name)).exists()
 
+    def delete(self, name: str):
+        Path(self.path(name)).unlink(missing_ok=True)
+
+    def list_databases(self) -> List[str]:
+        """Returns the names of the files in the export directory."""
+        return [file.name for file in self._location.iterdir() if file.is_file()]
+
+    @contextmanager
+    def open_database(self, filename: str) -> Iterator[apsw.Connection]:
+        connection = apsw.Connection(
+            self.path(filename),
+            flags=apsw.SQLITE_OPEN_READONLY,
+        )
+        try:
+            yield connection
+        finally:
+            connection.close()
+
     @log_timing(logger_function=logger.info)
-    def export_database(self, filename: str):
-        connection = apsw.Connection(self.path(filename))
-        logger.info(f"Saving {filename} to local file system storage.")
-        sqlite.make_export(connection)
-        connection.close()
+    def export_database(
+        self,
+        filename: str,
+        previous: Optional[str] = None,
+        delta: bool = False,
+    ):
+        from django.conf import settings
+
+        # The export is built in a temporary file in the same directory and
+        # then compacted into place.
+        with NamedTemporaryFile(dir=self._location) as temp_sqlite_db:
+            connection = apsw.Connection(temp_sqlite_db.name)
+            self.make_export(connection, previous, delta)
+            logger.info(f"Saving {filename} to local file system storage.")
+            self.delete(filename)
+            report = compaction.compact(connection, Path(self.path(filename)))
+            connection.close()
+
+        if settings.SQLITE_EXPORT_COMPRESS:
+            compressed_path = self.path(filename + compaction.COMPRESSED_SUFFIX)
+            logger.info(f"Saving {compressed_path} to local file system storage.")
+            with (
+                open(self.path(filename), "rb") as source,
+                open(
+                    compressed_path,
+                    "wb",
+                ) as destination,
+            ):
+                compaction.compress(
+                    source,
+                    lambda compressed: shutil.copyfileobj(compressed, destination),
+                    report,
+                )
+        report.log(filename)
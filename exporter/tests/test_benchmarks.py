@@ -0,0 +1,62 @@
+import tempfile
+from pathlib import Path
+
+import apsw
+import pytest
+
+from common.tests import factories
+from common.tests.util import time_best_of
+from exporter.sqlite import make_export_plan
+from exporter.sqlite.runner import ParallelRunner
+from exporter.sqlite.runner import Runner
+from workbaskets.models import WorkBasket
+from workbaskets.validators import WorkflowStatus
+
+pytestmark = pytest.mark.benchmark
+
+# The number of measures created for the export benchmark, before scaling. Each
+# measure also creates rows in the tables of the objects it refers to.
+MEASURES = 200
+
+
+@pytest.mark.django_db(transaction=True)
+def test_sqlite_export_throughput(benchmark_scale, tmp_path, record_property):
+    """
+    Compare the time taken to export the database to SQLite by running the
+    export plan's operations one after another and with a ParallelRunner, and
+    measure the rows per second exported for each table by the ParallelRunner.
+
+    The data is committed so that the ParallelRunner's workers, which each use
+    their own database connection, can read it.
+    """
+    factories.MeasureFactory.create_batch(MEASURES * benchmark_scale)
+    WorkBasket.objects.update(status=WorkflowStatus.PUBLISHED)
+
+    with tempfile.TemporaryDirectory() as template_dir:
+        template = Runner.make_tamato_database(Path(template_dir) / "template.db")
+        export_plan = make_export_plan(template)
+        template.database.close()
+
+    def export(run):
+        database_path = tmp_path / "export.db"
+        database_path.unlink(missing_ok=True)
+        database = apsw.Connection(str(database_path))
+        try:
+            return run(database)
+        finally:
+            database.close()
+
+    def sequential(database):
+        Runner(database).run_operations(export_plan.operations)
+
+    def parallel(database):
+        return ParallelRunner(database, workers=4).run_plan(export_plan)
+
+    record_property("sequential_seconds", time_best_of(lambda: export(sequential)))
+    record_property("parallel_seconds", time_best_of(lambda: export(parallel)))
+
+    loads = export(parallel)
+    record_property("rows", sum(load.rows for load in loads.values()))
+    for table, load in sorted(loads.items()):
+        if load.rows:
+            record_property(f"{table}_rows_per_second", round(load.rows_per_second))
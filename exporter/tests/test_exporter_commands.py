@@ -1,3 +1,5 @@
+import gzip
+from hashlib import md5
 from io import StringIO
 from unittest import mock
 from unittest.mock import MagicMock
@@ -49,6 +51,21 @@ def test_dump_sqlite_command(asynchronous_flag, save_local_flag_value):
             mock_export_and_upload_sqlite.delay.assert_not_called()
 
 
+def test_make_sqlite_schema_command(settings, tmp_path):
+    settings.SQLITE_SCHEMA_CACHE_DIRECTORY = str(tmp_path)
+    output = StringIO()
+
+    with mock.patch(
+        "exporter.sqlite.schema.generate_schema",
+        return_value="CREATE TABLE example (id integer);\n",
+    ):
+        call_command("make_sqlite_schema", stdout=output)
+
+    (schema_file,) = tmp_path.iterdir()
+    assert output.getvalue().strip() == str(schema_file)
+    assert schema_file.read_text() == "CREATE TABLE example (id integer);\n"
+
+
 @pytest.mark.skip()
 def test_upload_command_uploads_queued_workbasket_to_s3(
     approved_transaction,
@@ -140,3 +157,24 @@ def test_dump_command_exits_on_unchecked_workbasket():
         "does not guarantee complete and successful business rule checks"
         in out.getvalue()
     )
+
+
+def test_dump_command_writes_compressed_envelopes(queued_workbasket_factory, tmp_path):
+    workbasket = queued_workbasket_factory()
+    out = StringIO()
+
+    call_command(
+        "dump_transactions",
+        "230001",
+        f"{workbasket.pk}",
+        "--dir",
+        str(tmp_path),
+        "--compress",
+        "gzip",
+        stdout=out,
+    )
+
+    envelope_file = tmp_path / "DIT230001.xml.gz"
+    xml = gzip.decompress(envelope_file.read_bytes())
+    assert f"{envelope_file} \N{WHITE HEAVY CHECK MARK}  XML valid." in out.getvalue()
+    assert f"md5 {md5(xml).hexdigest()}." in out.getvalue()
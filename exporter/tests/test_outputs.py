@@ -0,0 +1,97 @@
+import gzip
+import io
+from hashlib import md5
+
+import pytest
+import zstandard
+from lxml.etree import DocumentInvalid
+
+from common.serializers import EnvelopeSerializer
+from common.tests import factories
+from common.util import validate_envelope_stream
+from exporter.outputs import EnvelopeOutput
+from exporter.outputs import MultipartUpload
+from exporter.outputs import envelope_output_generator
+from exporter.outputs import local_file_opener
+
+pytestmark = pytest.mark.django_db
+
+
+def zstd_decompress(data: bytes) -> bytes:
+    return zstandard.ZstdDecompressor().decompressobj().decompress(data)
+
+
+@pytest.mark.parametrize(
+    ("compression", "decompress", "filename"),
+    (
+        (None, bytes, "DIT000001.xml"),
+        ("gzip", gzip.decompress, "DIT000001.xml.gz"),
+        ("zstd", zstd_decompress, "DIT000001.xml.zst"),
+    ),
+)
+def test_envelope_output_compresses_and_checksums_xml(
+    approved_transaction,
+    tmp_path,
+    compression,
+    decompress,
+    filename,
+):
+    factories.FootnoteFactory.create(transaction=approved_transaction)
+    output = envelope_output_generator(
+        local_file_opener(tmp_path),
+        compression=compression,
+    )()
+
+    with EnvelopeSerializer(output, envelope_id=1) as envelope:
+        envelope.render_transaction(
+            approved_transaction.tracked_models.record_ordering(),
+            approved_transaction.order,
+        )
+    output.close()
+
+    written = (tmp_path / filename).read_bytes()
+    xml = decompress(written)
+    assert output.name == str(tmp_path / filename)
+    assert output.tell() == len(xml)
+    assert output.compressed_size == len(written)
+    assert output.checksum == md5(xml).hexdigest()
+    assert output.validate() == validate_envelope_stream(io.BytesIO(xml))
+
+
+def test_envelope_output_raises_schema_errors_on_validation(tmp_path):
+    output = EnvelopeOutput(open(tmp_path / "DIT000001.xml", "wb"))
+    output.write(b'<?xml version="1.0" encoding="UTF-8"?>\n<unexpected/>\n')
+    output.close()
+
+    with pytest.raises(DocumentInvalid):
+        output.validate()
+
+
+@pytest.fixture
+def s3_bucket(s3_resource):
+    return s3_resource.create_bucket(Bucket="test-dumps")
+
+
+def test_multipart_upload_uploads_in_parts(s3_bucket):
+    # S3 requires every part apart from the last to be at least 5MiB.
+    chunk_size = 5 * 1024 * 1024
+    data = bytes(range(256)) * (chunk_size // 128 + 1)
+    upload = MultipartUpload(s3_bucket.Object("dumps/DIT000001.xml"), chunk_size)
+
+    for offset in range(0, len(data), 1024 * 1024):
+        upload.write(data[offset : offset + 1024 * 1024])
+    upload.close()
+
+    assert upload.name == "s3://test-dumps/dumps/DIT000001.xml"
+    assert upload.tell() == len(data)
+    assert len(upload._parts) == 3
+    assert s3_bucket.Object("dumps/DIT000001.xml").get()["Body"].read() == data
+
+
+def test_aborted_multipart_upload_is_not_saved(s3_bucket):
+    upload = MultipartUpload(s3_bucket.Object("DIT000001.xml"))
+    upload.write(b"<partial")
+    upload.abort()
+
+    assert list(s3_bucket.objects.all()) == []
+    assert list(s3_bucket.multipart_uploads.all()) == []
@@ -1,4 +1,5 @@
 import tempfile
+from contextlib import nullcontext
 from io import BytesIO
 from os import path
 from pathlib import Path
@@ -10,9 +11,19 @@ import pytest
 
 from common.models.transactions import TransactionPartition
 from common.tests import factories
+from common.validators import UpdateType
+from exporter.sqlite import SchemaChanged
+from exporter.sqlite import compaction
+from exporter.sqlite import export_indexes
+from exporter.sqlite import make_delta_export
+from exporter.sqlite import make_export
+from exporter.sqlite import make_export_plan
 from exporter.sqlite import plan
+from exporter.sqlite import schema
 from exporter.sqlite import tasks
+from exporter.sqlite.runner import ParallelRunner
 from exporter.sqlite.runner import Runner
+from workbaskets.models import WorkBasket
 from workbaskets.validators import WorkflowStatus
 
 pytestmark = pytest.mark.django_db
@@ -42,6 +53,66 @@ def sqlite_database(sqlite_template: Runner) -> Iterator[Runner]:
     yield Runner(in_memory_database)
 
 
+@pytest.fixture
+def schema_cache(settings, tmp_path) -> Path:
+    settings.SQLITE_SCHEMA_CACHE_DIRECTORY = str(tmp_path / "schema")
+    return tmp_path / "schema"
+
+
+def test_dumped_schema_creates_the_migrated_schema(sqlite_template: Runner):
+    """A database created from a dumped schema should have the same tables,
+    columns and indexes as the migrated database."""
+    database = Runner.from_schema(sqlite_template.dump_schema())
+
+    assert list(database.tables) == list(sqlite_template.tables)
+    assert list(database.indexes) == list(sqlite_template.indexes)
+    for table, _ in database.tables:
+        assert list(database.read_column_order(table)) == list(
+            sqlite_template.read_column_order(table),
+        )
+
+
+def test_schema_is_generated_once(schema_cache, sqlite_template: Runner):
+    with mock.patch(
+        "exporter.sqlite.schema.generate_schema",
+        return_value=sqlite_template.dump_schema(),
+    ) as generate_schema:
+        first = schema.get_schema()
+        second = schema.get_schema()
+
+    generate_schema.assert_called_once()
+    assert first == second == sqlite_template.dump_schema()
+    assert [path.name for path in schema_cache.iterdir()] == [
+        f"{schema.schema_cache_key()}.sql",
+    ]
+
+
+def test_schema_is_returned_if_it_cannot_be_cached(settings, tmp_path):
+    (tmp_path / "file").write_text("")
+    settings.SQLITE_SCHEMA_CACHE_DIRECTORY = str(tmp_path / "file" / "schema")
+
+    with mock.patch(
+        "exporter.sqlite.schema.generate_schema",
+        return_value="CREATE TABLE example (id integer);\n",
+    ):
+        assert schema.get_schema() == "CREATE TABLE example (id integer);\n"
+
+
+def test_schema_cache_key_changes_with_sources(tmp_path):
+    source = tmp_path / "0001_initial.py"
+    source.write_text("operations = []")
+
+    with mock.patch(
+        "exporter.sqlite.schema.schema_sources",
+        side_effect=lambda: iter([("example.migrations.0001_initial", source)]),
+    ):
+        key = schema.schema_cache_key()
+        assert schema.schema_cache_key() == key
+
+        source.write_text("operations = [migrations.CreateModel('Example', [])]")
+        assert schema.schema_cache_key() != key
+
+
 FACTORIES_EXPORTED = [
     factory
     for factory in factories.TrackedModelMixin.__subclasses__()
@@ -131,6 +202,309 @@ def test_valid_between_export(
         assert validity_end is None
 
 
+def test_plan_creates_indexes_after_data(sqlite_template: Runner):
+    """Indexes should only be created once all of the data has been inserted."""
+    export_plan = make_export_plan(sqlite_template)
+    indexed_tables = {
+        table_data.table
+        for table_data in export_plan.data
+        if any(sqlite_template.read_indexes(table_data.table))
+    }
+
+    assert indexed_tables
+    assert not any(
+        sql.startswith("CREATE INDEX") for sql, _ in export_plan.setup_operations
+    )
+    assert [
+        sql for sql, _ in export_plan.finish_operations if sql.startswith("CREATE")
+    ] == [
+        sql
+        for table_data in export_plan.data
+        for sql in export_indexes(sqlite_template, table_data.table)
+    ]
+    assert export_plan.finish_operations[-2][0] == "ANALYZE"
+
+
+def test_lookup_indexes_cover_validity():
+    assert list(
+        plan.lookup_indexes(
+            "measures_measure",
+            ["trackedmodel_ptr_id", "sid", "validity_start", "validity_end"],
+        ),
+    ) == [
+        'CREATE INDEX "measures_measure_sid_lookup" ON "measures_measure" '
+        '("sid", "validity_start", "validity_end")',
+        'CREATE INDEX "measures_measure_validity_start_validity_end_lookup" '
+        'ON "measures_measure" ("validity_start", "validity_end")',
+    ]
+
+
+def read_tables(database: apsw.Connection, tables) -> dict:
+    cursor = database.cursor()
+    return {
+        table: sorted(cursor.execute(f"SELECT * FROM {table}").fetchall())
+        for table in tables
+    }
+
+
+def read_index_names(database: apsw.Connection) -> set:
+    cursor = database.cursor()
+    return {
+        name
+        for (name,) in cursor.execute(
+            "SELECT name FROM sqlite_master WHERE type = 'index'",
+        )
+    }
+
+
+@pytest.mark.django_db(transaction=True)
+@pytest.mark.parametrize("workers", [1, 3])
+def test_parallel_runner_exports_published_data(workers, sqlite_template: Runner):
+    """The data and indexes exported by a ParallelRunner should match those
+    exported by running the plan's operations one after another, when reading in
+    batches from as many connections as there are workers."""
+    for _ in range(3):
+        factories.FootnoteFactory.create(
+            transaction__workbasket__status=WorkflowStatus.PUBLISHED,
+            footnote_type__transaction__workbasket__status=WorkflowStatus.PUBLISHED,
+        )
+    factories.FootnoteFactory.create(
+        transaction__workbasket__status=WorkflowStatus.EDITING,
+        transaction__partition=TransactionPartition.DRAFT,
+    )
+
+    export_plan = make_export_plan(sqlite_template)
+    tables = [table_data.table for table_data in export_plan.data]
+    sequential_database = apsw.Connection(":memory:")
+    Runner(sequential_database).run_operations(export_plan.operations)
+
+    parallel_database = apsw.Connection(":memory:")
+    loads = ParallelRunner(
+        parallel_database,
+        workers=workers,
+        batch_size=2,
+    ).run_plan(export_plan)
+
+    assert set(loads) == set(tables)
+    assert loads["footnotes_footnotetype"].rows == 3
+    assert loads["footnotes_footnote"].rows == 3
+    assert loads["footnotes_footnotedescription"].rows == 3
+    assert read_tables(parallel_database, tables) == read_tables(
+        sequential_database,
+        tables,
+    )
+    assert read_index_names(parallel_database)
+    assert read_index_names(parallel_database) == read_index_names(
+        sequential_database,
+    )
+
+
+def test_parallel_runner_raises_read_errors(sqlite_template: Runner):
+    """An error reading a table in a worker should stop the export rather than
+    leave the writer waiting for the table's data."""
+    export_plan = make_export_plan(sqlite_template)
+
+    with (
+        mock.patch.object(
+            ParallelRunner,
+            "read_batches",
+            side_effect=RuntimeError("Read failed"),
+        ),
+        pytest.raises(RuntimeError, match="Read failed"),
+    ):
+        ParallelRunner(apsw.Connection(":memory:"), workers=2).run_plan(export_plan)
+
+
+@pytest.fixture
+def export_with_template(sqlite_template: Runner, settings):
+    """Makes exports use the module's template rather than creating a new one,
+    and read the test's data on the test's own database connection."""
+    settings.SQLITE_EXPORT_WORKERS = 1
+    with mock.patch(
+        "exporter.sqlite.tamato_database_template",
+        new=lambda: nullcontext(sqlite_template),
+    ):
+        yield
+
+
+def published_transaction():
+    return factories.ApprovedTransactionFactory.create(
+        workbasket__status=WorkflowStatus.PUBLISHED,
+    )
+
+
+def full_export() -> apsw.Connection:
+    database = apsw.Connection(":memory:")
+    make_export(database)
+    return database
+
+
+@pytest.fixture
+def previous_export(export_with_template):
+    """
+    Publishes footnotes and exports them, and then publishes changes to them.
+
+    A workbasket is approved before the export but published after it, so that
+    its transaction is ordered before the transactions published after the
+    export.
+    """
+    updated, deleted = (
+        factories.FootnoteFactory.create(
+            transaction=published_transaction(),
+            footnote_type__transaction=published_transaction(),
+        )
+        for _ in range(2)
+    )
+    queued = factories.FootnoteFactory.create(
+        transaction__workbasket__status=WorkflowStatus.QUEUED,
+        footnote_type=updated.footnote_type,
+    )
+    previous = full_export()
+
+    WorkBasket.objects.filter(pk=queued.transaction.workbasket.pk).update(
+        status=WorkflowStatus.PUBLISHED,
+    )
+    transaction = published_transaction()
+    updated.new_version(transaction.workbasket, transaction=transaction)
+    transaction = published_transaction()
+    deleted.new_version(
+        transaction.workbasket,
+        transaction=transaction,
+        update_type=UpdateType.DELETE,
+    )
+    factories.FootnoteFactory.create(
+        transaction=published_transaction(),
+        footnote_type=updated.footnote_type,
+    )
+    factories.FootnoteFactory.create(
+        transaction__workbasket__status=WorkflowStatus.EDITING,
+        transaction__partition=TransactionPartition.DRAFT,
+    )
+    return previous
+
+
+def exported_table_names(database: apsw.Connection) -> list:
+    cursor = database.cursor()
+    return [
+        name
+        for (name,) in cursor.execute(
+            "SELECT name FROM sqlite_master "
+            "WHERE type = 'table' AND name NOT LIKE 'sqlite_%'",
+        )
+    ]
+
+
+def test_incremental_export_matches_full_export(previous_export):
+    """An export made incrementally from the previous export should match a full
+    export row for row."""
+    expected = full_export()
+    incremental = apsw.Connection(":memory:")
+    make_export(incremental, previous_export)
+
+    tables = exported_table_names(expected)
+    assert exported_table_names(incremental) == tables
+    assert read_tables(incremental, tables) == read_tables(expected, tables)
+    assert read_tables(incremental, tables) != read_tables(previous_export, tables)
+    assert read_index_names(incremental) == read_index_names(expected)
+
+
+def test_delta_export_holds_changes_since_previous_export(previous_export):
+    """A delta export should hold the rows that a full export has and the
+    previous export doesn't, or all of the rows of a full export for tables that
+    are replaced in full."""
+    expected = full_export()
+    delta = apsw.Connection(":memory:")
+    make_delta_export(delta, previous_export)
+
+    tables = exported_table_names(expected)
+    full_rows = read_tables(expected, tables)
+    previous_rows = read_tables(previous_export, tables)
+    delta_rows = read_tables(delta, tables)
+
+    assert len(delta_rows["common_transaction"]) == 4
+    assert len(delta_rows["footnotes_footnote"]) == 4
+    assert delta_rows["common_versiongroup"] == full_rows["common_versiongroup"]
+    for table in tables:
+        added = sorted(set(full_rows[table]) - set(previous_rows[table]))
+        assert delta_rows[table] in (added, full_rows[table])
+
+
+def test_incremental_export_falls_back_when_schema_changes(previous_export):
+    """If the schema has changed since the previous export, a full export should
+    be made instead, and a delta export should not be made."""
+    previous_export.cursor().execute(
+        "ALTER TABLE footnotes_footnote ADD COLUMN removed_column integer",
+    )
+    expected = full_export()
+    incremental = apsw.Connection(":memory:")
+    make_export(incremental, previous_export)
+
+    tables = exported_table_names(expected)
+    assert read_tables(incremental, tables) == read_tables(expected, tables)
+
+    with pytest.raises(SchemaChanged):
+        make_delta_export(apsw.Connection(":memory:"), previous_export)
+
+
+@pytest.mark.parametrize(
+    "filenames, filename, expected",
+    [
+        ([], "000000010.db", None),
+        (["000000010.db"], "000000010.db", None),
+        (
+            ["seed_000000900.db", "000000008.db", "000000009.db", "000000012.db"],
+            "000000010.db",
+            "000000009.db",
+        ),
+        (
+            ["seed_000000900.db", "000000009_delta.db"],
+            "000000010.db",
+            "seed_000000900.db",
+        ),
+        (
+            ["seed_000000900.db", "000000009.db"],
+            "seed_000000999.db",
+            "seed_000000900.db",
+        ),
+    ],
+)
+def test_get_previous_filename(filenames, filename, expected):
+    assert tasks.get_previous_filename(filenames, filename) == expected
+
+
+def test_local_export_task_saves_incremental_and_delta_exports(
+    export_with_template,
+    tmp_path,
+):
+    """An incremental export and a delta database should be saved when there is
+    a previous export."""
+    factories.SeedFileTransactionFactory.create(order="999")
+    first = published_transaction()
+    assert tasks.export_and_upload_sqlite(tmp_path)
+
+    second = published_transaction()
+    factories.FootnoteFactory.create(
+        transaction=second,
+        footnote_type__transaction=second,
+    )
+    assert tasks.export_and_upload_sqlite(tmp_path, incremental=True, delta=True)
+
+    names = [
+        f"{tasks.normalised_order(first.order)}.db",
+        f"{tasks.normalised_order(second.order)}.db",
+        f"{tasks.normalised_order(second.order)}_delta.db",
+    ]
+    assert {path.name for path in tmp_path.iterdir()} == set(names)
+
+    previous, incremental, delta = (
+        apsw.Connection(str(tmp_path / name)) for name in names
+    )
+    tables = exported_table_names(incremental)
+    assert read_tables(incremental, tables) == read_tables(full_export(), tables)
+    assert len(read_tables(delta, ["footnotes_footnote"])["footnotes_footnote"]) == 1
+    assert read_tables(previous, ["footnotes_footnote"])["footnotes_footnote"] == []
+
+
 def test_s3_export_task_does_not_reupload(sqlite_storage, s3_object_names, settings):
     """
     If a file has already been generated and uploaded to S3 for this database
@@ -256,3 +630,68 @@ def test_local_export_task_ignores_unpublished_and_unapproved_transactions(tmp_p
 
     assert tasks.export_and_upload_sqlite(tmp_path)
     assert files_before | {sqlite_file_path} == set(tmp_path.iterdir())
+
+
+def test_local_export_is_compacted_and_analysed(export_with_template, tmp_path):
+    """Local exports should be compacted, with statistics for the query planner
+    and covering indexes for common lookups."""
+    factories.SeedFileTransactionFactory.create(order="999")
+    factories.MeasureFactory.create(transaction=published_transaction())
+
+    assert tasks.export_and_upload_sqlite(tmp_path)
+
+    (sqlite_file_path,) = tmp_path.glob("*.db")
+    database = apsw.Connection(str(sqlite_file_path))
+    cursor = database.cursor()
+    assert cursor.execute("PRAGMA freelist_count").fetchall() == [(0,)]
+    assert cursor.execute("SELECT COUNT(*) FROM sqlite_stat1").fetchall() != [(0,)]
+    assert "COVERING INDEX measures_measure_sid_lookup" in " ".join(
+        detail
+        for *_, detail in cursor.execute(
+            "EXPLAIN QUERY PLAN "
+            "SELECT validity_start, validity_end FROM measures_measure WHERE sid = 1",
+        )
+    )
+
+
+def test_local_export_task_compresses_export(export_with_template, settings, tmp_path):
+    zstandard = pytest.importorskip("zstandard")
+    settings.SQLITE_EXPORT_COMPRESS = True
+    factories.SeedFileTransactionFactory.create(order="999")
+    published_transaction()
+
+    assert tasks.export_and_upload_sqlite(tmp_path)
+
+    (sqlite_file_path,) = tmp_path.glob("*.db")
+    compressed_path = Path(f"{sqlite_file_path}{compaction.COMPRESSED_SUFFIX}")
+    with open(compressed_path, "rb") as compressed:
+        decompressed = zstandard.ZstdDecompressor().stream_reader(compressed).read()
+    assert decompressed == sqlite_file_path.read_bytes()
+
+
+def test_s3_export_task_uploads_incremental_export(
+    export_with_template,
+    sqlite_storage,
+    s3_object_names,
+    settings,
+):
+    """An incremental export should read the previous export from S3 and upload
+    the new export."""
+    factories.SeedFileTransactionFactory.create(order="999")
+    published_transaction()
+
+    with mock.patch(
+        "exporter.sqlite.tasks.storages.SQLiteS3Storage",
+        new=lambda: sqlite_storage,
+    ):
+        assert tasks.export_and_upload_sqlite()
+        transaction = published_transaction()
+        assert tasks.export_and_upload_sqlite(incremental=True, delta=True)
+
+    names = s3_object_names(sqlite_storage.bucket_name)
+    for name in (
+        f"{tasks.normalised_order(transaction.order)}.db",
+        f"{tasks.normalised_order(transaction.order)}_delta.db",
+    ):
+        key = path.join(settings.SQLITE_STORAGE_DIRECTORY, name)
+        assert key in names
@@ -9,6 +9,13 @@ from typing import List
 from typing import Sequence
 from typing import Tuple
 
+# The zstd compression level of compressed envelopes and SQLite exports.
+ZSTD_LEVEL = 10
+
+# The size of the parts in which compressed envelopes and SQLite exports are
+# uploaded to S3, which must be at least 5MiB apart from the last.
+MULTIPART_CHUNK_SIZE = 16 * 1024 * 1024
+
 
 def dit_filename_generator(start=1):
     """Generate incrementing DIT filenames."""
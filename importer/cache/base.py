@@ -26,3 +26,16 @@ class BaseEngine(ABC):
     @abstractmethod
     def clear(self):
         pass
+
+    def get_many(self, keys, default=None):
+        """Gets the values for the provided keys, or default for any that are
+        not present."""
+        return [self.get(key, default) for key in keys]
+
+    def pop_many(self, keys, default=None):
+        """Gets the values for the provided keys and removes them, or default
+        for any that are not present."""
+        return [self.pop(key, default) for key in keys]
+
+    def flush(self):
+        """Writes any buffered changes to the cache."""
@@ -55,6 +55,34 @@ class ObjectCacheFacade(BaseEngine):
         """
         return self.engine.pop(key, default)
 
+    def get_many(self, keys, default=None):
+        """
+        Gets the values for the provided keys. Engines may fetch these together
+        rather than one at a time.
+
+        Args:
+          keys: The keys to return the values for
+          default: The value to return for keys that are not found
+
+        Returns:
+          list, the value for each key, or the value of default
+        """
+        return self.engine.get_many(keys, default)
+
+    def pop_many(self, keys, default=None):
+        """
+        Gets the values for the provided keys and removes them from the cache.
+        Engines may remove these together rather than one at a time.
+
+        Args:
+          keys: The keys to return the values for
+          default: The value to return for keys that are not found
+
+        Returns:
+          list, the value for each key, or the value of default
+        """
+        return self.engine.pop_many(keys, default)
+
     def put(self, key, obj):
         """
         Stores the value for the provided key. If the key already exists, it
@@ -87,6 +115,15 @@ class ObjectCacheFacade(BaseEngine):
         """
         self.engine.dump()
 
+    def flush(self):
+        """
+        Writes any changes that the engine has buffered to the cache.
+
+        Returns:
+          None
+        """
+        self.engine.flush()
+
     def clear(self):
         """
         Clears the cache, removing all keys and objects.
@@ -1,6 +1,10 @@
+import pickle
+
 from django.conf import settings
 from django.core.cache import cache
+from django_redis import get_redis_connection
 
+from common.util import chunks
 from importer.cache.base import BaseEngine
 
 
@@ -58,3 +62,224 @@ class RedisCacheEngine(BaseEngine):
             RedisCacheEngine.CACHE_PREFIX,
         )
         cache.delete(f"{prefix}*")
+
+
+class PipelinedRedisCacheEngine(BaseEngine):
+    """
+    A Redis cache engine for high-throughput imports.
+
+    Puts and the deletes of popped keys are buffered and written in a single
+    round trip when the buffer fills, when :meth:`flush` is called (at the end
+    of each imported transaction) or before any operation that needs to see
+    every key. Pops of keys that have been written are atomic, using
+    ``GETDEL``, and the engine tracks its keys in a Redis set rather than
+    scanning the keyspace with ``KEYS``.
+
+    The write buffer is shared by all instances of the engine in a process,
+    as the in-memory engines share their cache, but is not visible to other
+    processes until it has been flushed.
+    """
+
+    CACHE_PREFIX = "__IMPORTER_CACHE"
+
+    WRITE_BUFFER_SIZE = 500
+
+    _pending_puts = {}
+    _pending_deletes = set()
+
+    def __init__(self):
+        self.client = get_redis_connection("default")
+        self.prefix = getattr(
+            settings,
+            "IMPORTER_CACHE_PREFIX",
+            self.CACHE_PREFIX,
+        )
+        self.keys_key = f"{self.prefix}__keys"
+        self.write_buffer_size = getattr(
+            settings,
+            "IMPORTER_CACHE_WRITE_BUFFER_SIZE",
+            self.WRITE_BUFFER_SIZE,
+        )
+
+    def _redis_key(self, key):
+        return f"{self.prefix}__{key}"
+
+    def get(self, key, default=None):
+        """
+        Gets the value for the provided key or if not present, returns the value
+        of default.
+
+        Args:
+          key: The key to return the value for
+          default: The value to return if the key is not found
+
+        Returns:
+          object, either the value of the key provided or the value of the default argument provided
+        """
+        return self.get_many([key], default)[0]
+
+    def get_many(self, keys, default=None):
+        """
+        Gets the values for the provided keys, fetching any that are not
+        buffered with a single ``MGET``.
+
+        Args:
+          keys: The keys to return the values for
+          default: The value to return for keys that are not found
+
+        Returns:
+          list, the value for each key, or the value of default
+        """
+        keys = list(keys)
+        values = {}
+        fetch = []
+        for key in keys:
+            if key in self._pending_puts:
+                values[key] = self._pending_puts[key]
+            elif key not in self._pending_deletes:
+                fetch.append(key)
+
+        if fetch:
+            fetched = self.client.mget([self._redis_key(key) for key in fetch])
+            for key, value in zip(fetch, fetched):
+                if value is not None:
+                    values[key] = pickle.loads(value)
+
+        return [values.get(key, default) for key in keys]
+
+    def pop(self, key, default=None):
+        """
+        Gets the value for the provided key and removes key from cache or if not
+        present, returns the value of default.
+
+        Args:
+          key: The key to return the value for
+          default: The value to return if the key is not found
+
+        Returns:
+          object, either the value of the key provided or the value of the default argument provided
+        """
+        return self.pop_many([key], default)[0]
+
+    def pop_many(self, keys, default=None):
+        """
+        Gets the values for the provided keys and removes them from the cache,
+        using a single pipeline of ``GETDEL`` commands for any keys that are not
+        buffered.
+
+        Args:
+          keys: The keys to return the values for
+          default: The value to return for keys that are not found
+
+        Returns:
+          list, the value for each key, or the value of default
+        """
+        keys = list(keys)
+        values = {}
+        fetch = []
+        for key in keys:
+            if key in self._pending_puts:
+                # An earlier value may have been flushed, so delete that too.
+                values[key] = self._pending_puts.pop(key)
+                self._pending_deletes.add(key)
+            elif key not in self._pending_deletes and key not in values:
+                fetch.append(key)
+
+        if fetch:
+            with self.client.pipeline(transaction=True) as pipeline:
+                for key in fetch:
+                    pipeline.getdel(self._redis_key(key))
+                pipeline.srem(self.keys_key, *fetch)
+                fetched = pipeline.execute()[:-1]
+
+            for key, value in zip(fetch, fetched):
+                if value is not None:
+                    values[key] = pickle.loads(value)
+
+        return [values.get(key, default) for key in keys]
+
+    def put(self, key, obj):
+        """
+        Stores the value for the provided key. If the key already exists, it
+        will be overwritten.
+
+        Args:
+          key: The key to store the obj against
+          obj: The value to be stored against the provided key
+
+        Returns:
+          None
+        """
+        self._pending_deletes.discard(key)
+        self._pending_puts[key] = obj
+
+        if len(self._pending_puts) >= self.write_buffer_size:
+            self.flush()
+
+    def flush(self):
+        """
+        Writes buffered puts and deletes to Redis in a single round trip.
+
+        Returns:
+          None
+        """
+        if not self._pending_puts and not self._pending_deletes:
+            return
+
+        with self.client.pipeline(transaction=True) as pipeline:
+            if self._pending_deletes:
+                pipeline.delete(
+                    *(self._redis_key(key) for key in self._pending_deletes),
+                )
+                pipeline.srem(self.keys_key, *self._pending_deletes)
+            if self._pending_puts:
+                pipeline.mset(
+                    {
+                        self._redis_key(key): pickle.dumps(
+                            obj,
+                            protocol=pickle.HIGHEST_PROTOCOL,
+                        )
+                        for key, obj in self._pending_puts.items()
+                    },
+                )
+                pipeline.sadd(self.keys_key, *self._pending_puts)
+            pipeline.execute()
+
+        self._pending_puts.clear()
+        self._pending_deletes.clear()
+
+    def keys(self):
+        """
+        Returns a list of the keys stored in cache.
+
+        Returns:
+          list(str) : A list of keys for the cache
+        """
+        self.flush()
+        return [key.decode() for key in self.client.smembers(self.keys_key)]
+
+    def dump(self):
+        """
+        Writes any buffered changes to Redis.
+
+        Returns:
+          None
+        """
+        self.flush()
+
+    def clear(self):
+        """
+        Clears the cache, removing all keys and objects.
+
+        Returns:
+          None
+        """
+        self._pending_puts.clear()
+        self._pending_deletes.clear()
+
+        keys = self.client.smembers(self.keys_key)
+        with self.client.pipeline(transaction=True) as pipeline:
+            for batch in chunks(list(keys), self.write_buffer_size):
+                pipeline.delete(*(self._redis_key(key.decode()) for key in batch))
+            pipeline.delete(self.keys_key)
+            pipeline.execute()
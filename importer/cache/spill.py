@@ -0,0 +1,235 @@
+import logging
+import pickle
+import sqlite3
+import tempfile
+from collections import Counter
+from collections import OrderedDict
+
+from django.conf import settings
+
+from importer.cache.base import BaseEngine
+
+logger = logging.getLogger(__name__)
+
+
+class SpillingMemoryCacheEngine(BaseEngine):
+    """
+    Stores objects in process memory up to a size budget, spilling the least
+    recently used objects to an SQLite file on disk when over it.
+
+    Objects are stored pickled so that the memory they use can be measured.
+    Spilled objects are moved back into memory when they are next read with
+    ``get``, and are removed from disk when popped.
+
+    ``settings.IMPORTER_CACHE_MEMORY_LIMIT`` sets the budget in bytes, and
+    ``settings.IMPORTER_CACHE_SPILL_DIRECTORY`` the directory in which the
+    spill file is created (by default, the system temporary directory).
+
+    As with ``MemoryCacheEngine``, the cache is shared by every instance in the
+    process.
+    """
+
+    # The fraction of the memory limit that spilling brings memory use down to.
+    SPILL_TO = 0.75
+
+    CACHE = OrderedDict()
+    SPILLED = set()
+    COUNTERS = Counter()
+
+    _memory_size = 0
+    _store = None
+    _spill_file = None
+
+    @property
+    def memory_limit(self):
+        return settings.IMPORTER_CACHE_MEMORY_LIMIT
+
+    @classmethod
+    def _get_store(cls):
+        if cls._store is None:
+            spill_file = tempfile.NamedTemporaryFile(
+                prefix="importer-cache-",
+                suffix=".sqlite3",
+                dir=settings.IMPORTER_CACHE_SPILL_DIRECTORY,
+            )
+            cls._store = sqlite3.connect(spill_file.name, check_same_thread=False)
+            # Spilled objects are only needed by this process, so there is no
+            # need to make writes durable.
+            cls._store.execute("PRAGMA journal_mode = OFF")
+            cls._store.execute("PRAGMA synchronous = OFF")
+            cls._store.execute(
+                "CREATE TABLE IF NOT EXISTS entries (key TEXT PRIMARY KEY, value BLOB)",
+            )
+            # The file is removed when the process exits, as nothing is kept
+            # in it between imports.
+            cls._spill_file = spill_file
+        return cls._store
+
+    def _store_in_memory(self, key, value: bytes):
+        cls = type(self)
+        if key in cls.CACHE:
+            cls._memory_size -= len(cls.CACHE[key])
+        cls.CACHE[key] = value
+        cls.CACHE.move_to_end(key)
+        cls._memory_size += len(value)
+
+        if cls._memory_size > self.memory_limit:
+            self._spill()
+
+    def _spill(self):
+        """Moves the least recently used objects to disk until the objects in
+        memory are within ``SPILL_TO`` of the memory limit, so that objects are
+        written to disk in batches."""
+        cls = type(self)
+        target = self.memory_limit * self.SPILL_TO
+        spilled = []
+        while cls.CACHE and cls._memory_size > target:
+            key, value = cls.CACHE.popitem(last=False)
+            cls._memory_size -= len(value)
+            spilled.append((key, value))
+
+        with self._get_store() as store:
+            store.executemany(
+                "INSERT OR REPLACE INTO entries (key, value) VALUES (?, ?)",
+                spilled,
+            )
+        cls.SPILLED.update(key for key, _ in spilled)
+        cls.COUNTERS["spills"] += len(spilled)
+
+    def _take_from_disk(self, key):
+        """Removes a spilled object from disk and returns its pickled value."""
+        cls = type(self)
+        with self._get_store() as store:
+            (value,) = store.execute(
+                "SELECT value FROM entries WHERE key = ?",
+                (key,),
+            ).fetchone()
+            store.execute("DELETE FROM entries WHERE key = ?", (key,))
+        cls.SPILLED.discard(key)
+        cls.COUNTERS["faults"] += 1
+        return value
+
+    def get(self, key, default=None):
+        """
+        Gets the value for the provided key or if not present, returns the value
+        of default. Spilled values are moved back into memory.
+
+        Args:
+          key: The key to return the value for
+          default: The value to return if the key is not found
+
+        Returns:
+          object, either the value of the key provided or the value of the default argument provided
+        """
+        cls = type(self)
+        if key in cls.CACHE:
+            cls.CACHE.move_to_end(key)
+            value = cls.CACHE[key]
+        elif key in cls.SPILLED:
+            value = self._take_from_disk(key)
+            self._store_in_memory(key, value)
+        else:
+            cls.COUNTERS["misses"] += 1
+            return default
+
+        cls.COUNTERS["hits"] += 1
+        return pickle.loads(value)
+
+    def pop(self, key, default=None):
+        """
+        Gets the value for the provided key and removes key from cache or if not
+        present, returns the value of default.
+
+        Args:
+          key: The key to return the value for
+          default: The value to return if the key is not found
+
+        Returns:
+          object, either the value of the key provided or the value of the default argument provided
+        """
+        cls = type(self)
+        if key in cls.CACHE:
+            value = cls.CACHE.pop(key)
+            cls._memory_size -= len(value)
+        elif key in cls.SPILLED:
+            value = self._take_from_disk(key)
+        else:
+            cls.COUNTERS["misses"] += 1
+            return default
+
+        cls.COUNTERS["hits"] += 1
+        return pickle.loads(value)
+
+    def put(self, key, obj):
+        """
+        Stores the value for the provided key. If the key already exists, it
+        will be overwritten.
+
+        Args:
+          key: The key to store the obj against
+          obj: The value to be stored against the provided key
+
+        Returns:
+          None
+        """
+        cls = type(self)
+        if key in cls.SPILLED:
+            with self._get_store() as store:
+                store.execute("DELETE FROM entries WHERE key = ?", (key,))
+            cls.SPILLED.discard(key)
+
+        self._store_in_memory(key, pickle.dumps(obj))
+
+    def keys(self):
+        """
+        Returns the keys stored in cache, in memory or on disk.
+
+        Returns:
+          set(str) : The keys for the cache
+        """
+        return self.CACHE.keys() | self.SPILLED
+
+    def stats(self):
+        """
+        Returns counters of the cache's use since it was last cleared.
+
+        Returns:
+          dict: the number of hits, misses, spills (objects moved to disk) and
+          faults (objects read back from disk), along with the bytes and the
+          number of objects held in memory and the number held on disk
+        """
+        return {
+            "hits": self.COUNTERS["hits"],
+            "misses": self.COUNTERS["misses"],
+            "spills": self.COUNTERS["spills"],
+            "faults": self.COUNTERS["faults"],
+            "memory_bytes": type(self)._memory_size,
+            "memory_objects": len(self.CACHE),
+            "spilled_objects": len(self.SPILLED),
+        }
+
+    def dump(self):
+        """
+        Logs the cache's counters. Objects are not kept between processes.
+
+        Returns:
+          None
+        """
+        logger.info("importer cache stats: %s", self.stats())
+
+    def clear(self):
+        """
+        Clears the cache, removing all keys and objects and resetting its
+        counters.
+
+        Returns:
+          None
+        """
+        cls = type(self)
+        cls.CACHE.clear()
+        cls._memory_size = 0
+        if cls.SPILLED:
+            with self._get_store() as store:
+                store.execute("DELETE FROM entries")
+            cls.SPILLED.clear()
+        cls.COUNTERS.clear()
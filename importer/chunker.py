@@ -7,9 +7,10 @@ from typing import Optional
 from typing import Sequence
 
 from django.core.files.uploadedfile import InMemoryUploadedFile
+from django.db import transaction as db_transaction
 from django.template.loader import render_to_string
 
-from common.util import xml_fromstring
+from common.util import parse_xml
 from importer import models
 from importer.namespaces import make_schema_dataclass
 from importer.namespaces import nsmap
@@ -73,7 +74,7 @@ def close_chunk(chunk: TemporaryFile, batch: models.ImportBatch, key):
         record_code = key
         chapter_heading = None
 
-    models.ImporterXMLChunk.objects.create(
+    xml_chunk = models.ImporterXMLChunk(
         batch=batch,
         record_code=record_code,
         chapter=chapter_heading,
@@ -81,8 +82,9 @@ def close_chunk(chunk: TemporaryFile, batch: models.ImportBatch, key):
             record_code=record_code,
             chapter=chapter_heading,
         ).count(),
-        chunk_text=chunk.read().decode(),
     )
+    xml_chunk.write_payload(chunk)
+    xml_chunk.save()
     chunk.close()
 
     logger.info(
@@ -170,29 +172,45 @@ def rewrite_comm_codes(batch: models.ImportBatch, envelope_id: str, record_code=
     with the relevant record_code (400), sorts them and rewrites them in the
     expected order.
 
-    N.B. This happens entirely within memory.
+    N.B. This happens entirely within memory. The old chunks are replaced in a
+    database transaction, and their payloads are only deleted from object
+    storage once it has been committed, so that the XML is never lost.
     """
     chunks = batch.chunks.filter(record_code=record_code)
+    old_chunks = list(chunks)
 
     transactions = []
 
-    for chunk in chunks:
-        transactions.extend(xml_fromstring(chunk.chunk_text))
+    for chunk in old_chunks:
+        with chunk.open_payload() as payload:
+            transactions.extend(parse_xml(payload).getroot())
 
     logger.info("%d to sort, deleting old ones", len(transactions))
 
-    chunks.delete()
-
     transactions = sort_commodity_codes(transactions)
 
-    chunks_in_progress = {}
+    with db_transaction.atomic():
+        chunks.delete()
 
-    for transaction in transactions:
-        transaction[:] = sorted(transaction, key=sort_comm_code_messages)
-        write_transaction_to_chunk(transaction, chunks_in_progress, batch, envelope_id)
+        chunks_in_progress = {}
 
-    for key, chunk in chunks_in_progress.items():
-        close_chunk(chunk, batch, key)
+        for transaction in transactions:
+            transaction[:] = sorted(transaction, key=sort_comm_code_messages)
+            write_transaction_to_chunk(
+                transaction,
+                chunks_in_progress,
+                batch,
+                envelope_id,
+            )
+
+        for key, chunk in chunks_in_progress.items():
+            close_chunk(chunk, batch, key)
+
+        def delete_old_payloads():
+            for old_chunk in old_chunks:
+                old_chunk.delete_payload()
+
+        db_transaction.on_commit(delete_old_payloads)
 
 
 def get_record_code(transaction: ET.Element) -> str:
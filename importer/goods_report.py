@@ -1,19 +1,25 @@
 import csv
 import logging
 import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
 from dataclasses import dataclass
 from io import BytesIO
 from io import StringIO
+from typing import BinaryIO
 from typing import Generator
+from typing import Iterator
 from typing import List
 from typing import TextIO
 from typing import Tuple
 from xml.etree import ElementTree as ET
 
 from openpyxl import Workbook
+from openpyxl.cell import WriteOnlyCell
 from openpyxl.styles import Font
 from tabulate import tabulate
 
+from common.util import chunks
 from common.validators import UpdateType
 
 logger = logging.getLogger(__name__)
@@ -25,6 +31,14 @@ TARIC3_NAMESPACES = {
 }
 """XML namespaces used in valid XML envelopes."""
 
+TRANSACTION_TAG = f"{{{TARIC3_NAMESPACES['env']}}}transaction"
+"""Fully qualified XML tag name of transaction elements, as reported by
+`ElementTree.iterparse()`."""
+
+TRANSACTIONS_PER_TASK = 200
+"""The number of transactions sent to a worker process at a time when a report
+is built using more than one process."""
+
 
 # Goods Nomenclature XML tag names.
 GOODS_NOMENCLATURE_TAG = "oub:goods.nomenclature"
@@ -359,11 +373,21 @@ class GoodsReport:
 
 
 class GoodsReporter:
-    """Parses a TARIC3 XML file in order to then build a goods report (an
-    instance of `GoodsReport`)."""
+    """
+    Parses a TARIC3 XML file in order to then build a goods report (an instance
+    of `GoodsReport`), or to write the report straight to a csv or xlsx file.
+
+    The file is parsed one transaction at a time. Reports written with
+    `write_csv()` or `write_xlsx()` are streamed to their output as the file is
+    parsed, so the memory they use doesn't grow with the size of the file.
 
-    def __init__(self, goods_file: TextIO) -> None:
+    If `processes` is more than 1, streamed report rows are built from batches
+    of transactions in that many worker processes, and written in file order.
+    """
+
+    def __init__(self, goods_file: TextIO, processes: int = 1) -> None:
         self.goods_file = goods_file
+        self.processes = processes
 
     def create_report(self) -> GoodsReport:
         """Create an instance of GoodsReport by parsing a TARIC3 XML file,
@@ -374,28 +398,102 @@ class GoodsReporter:
         logger.debug(f"Begin generating report object for {base_filename}.")
 
         goods_report = GoodsReport()
+        goods_report.report_lines.extend(self.iter_report_lines())
+
+        logger.debug(f"Finished generating report object for {base_filename}.")
+
+        return goods_report
+
+    def iter_report_lines(self) -> Generator[GoodsReportLine, None, None]:
+        """Generator yielding a `GoodsReportLine` for each goods-related record
+        in the TARIC3 XML file, in the order they appear in the file."""
         record_count = 0
+        report_line_count = 0
 
         for transaction_id, message_id, record_element in self._iter_records():
             record_count += 1
 
             if self._is_reportable(record_element):
-                report_line = GoodsReportLine(
+                report_line_count += 1
+                yield GoodsReportLine(
                     transaction_id,
                     message_id,
                     record_element,
                 )
-                goods_report.report_lines.append(report_line)
 
         logger.debug(
-            f"Found {len(goods_report.report_lines)} goods-related "
+            f"Found {report_line_count} goods-related "
             f"records from a total of {record_count} records.",
         )
-        logger.debug(f"Finished generating report object for {base_filename}.")
 
-        return goods_report
+    def iter_rows(self) -> Iterator[List[str]]:
+        """Generator yielding the columns of each report line (see
+        `GoodsReportLine.as_list()`), in the order they appear in the file."""
+        if self.processes > 1:
+            yield from self._iter_rows_in_parallel()
+        else:
+            for report_line in self.iter_report_lines():
+                yield report_line.as_list()
+
+    def write_csv(
+        self,
+        output: TextIO,
+        delimiter: str = ",",
+        include_column_names: bool = True,
+    ) -> None:
+        """Write the report to a text stream, output, in csv format, one line at
+        a time as the file is parsed."""
+        writer = csv.writer(output, delimiter=delimiter)
+        if include_column_names:
+            writer.writerow(GoodsReportLine.COLUMN_NAMES)
+        writer.writerows(self.iter_rows())
+
+    def write_xlsx(
+        self,
+        xlsx_io: BinaryIO,
+        include_column_names: bool = True,
+    ) -> None:
+        """Write the report to a binary stream, xlsx_io, in Excel (xlsx) file
+        format, using a write-only workbook so that rows are not kept in
+        memory."""
+        workbook = Workbook(write_only=True)
+        sheet = workbook.create_sheet()
+
+        if include_column_names:
+            column_names = []
+            for column_name in GoodsReportLine.COLUMN_NAMES:
+                cell = WriteOnlyCell(sheet, value=column_name)
+                cell.font = Font(bold=True)
+                column_names.append(cell)
+            sheet.append(column_names)
+
+        for row in self.iter_rows():
+            sheet.append(row)
+
+        workbook.save(xlsx_io)
 
-    def _is_reportable(self, record_element: ET.Element) -> bool:
+    def _iter_rows_in_parallel(self) -> Iterator[List[str]]:
+        """
+        Build report rows from batches of `TRANSACTIONS_PER_TASK` transactions
+        in a pool of worker processes, yielding them in file order.
+
+        At most two batches per process are in flight at once.
+        """
+        batches = chunks(
+            (ET.tostring(transaction) for transaction in self._iter_transactions()),
+            TRANSACTIONS_PER_TASK,
+        )
+        with ProcessPoolExecutor(max_workers=self.processes) as executor:
+            pending = deque()
+            for batch in batches:
+                pending.append(executor.submit(_report_rows, batch))
+                if len(pending) >= self.processes * 2:
+                    yield from pending.popleft().result()
+            while pending:
+                yield from pending.popleft().result()
+
+    @staticmethod
+    def _is_reportable(record_element: ET.Element) -> bool:
         """Returns True if record is a match by record code and subrecord code
         for those records that are to be included in the generated report, False
         otherwise."""
@@ -415,6 +513,22 @@ class GoodsReporter:
             in RECORD_CODE_TO_RECORD_INFO_MAP.keys()
         )
 
+    def _iter_transactions(self) -> Generator[ET.Element, None, None]:
+        """
+        Generator yielding each transaction element in the goods file as soon as
+        it has been parsed.
+
+        Transactions are removed from the parsed tree once the next has been
+        requested, so only one is held at a time.
+        """
+        context = ET.iterparse(self.goods_file, events=("start", "end"))
+        _, root = next(context)
+
+        for event, element in context:
+            if event == "end" and element.tag == TRANSACTION_TAG:
+                yield element
+                root.clear()
+
     def _iter_records(self) -> Generator[Tuple[str, str, ET.Element], None, None]:
         """
         Generator yielding each record in the parsed goods file, along with the
@@ -440,23 +554,47 @@ class GoodsReporter:
                 ...
             </env:envelope>
         """
-        tree = ET.parse(self.goods_file)
-        root = tree.getroot()
+        for transaction in self._iter_transactions():
+            yield from _iter_transaction_records(transaction)
+
 
-        for transaction in root.iterfind(
-            "./env:transaction",
+def _iter_transaction_records(
+    transaction: ET.Element,
+) -> Generator[Tuple[str, str, ET.Element], None, None]:
+    """Generator yielding each record in a transaction element, along with the
+    ID of the transaction and the ID of its containing message, as a tuple."""
+    transaction_id = transaction.attrib.get("id", "")
+
+    for message in transaction.iterfind(
+        "./env:app.message",
+        namespaces=TARIC3_NAMESPACES,
+    ):
+        message_id = message.attrib.get("id", "")
+
+        for record in message.iterfind(
+            "./oub:transmission/oub:record",
             namespaces=TARIC3_NAMESPACES,
         ):
-            transaction_id = transaction.attrib.get("id", "")
-
-            for message in transaction.iterfind(
-                "./env:app.message",
-                namespaces=TARIC3_NAMESPACES,
-            ):
-                message_id = message.attrib.get("id", "")
-
-                for record in message.iterfind(
-                    "./oub:transmission/oub:record",
-                    namespaces=TARIC3_NAMESPACES,
-                ):
-                    yield transaction_id, message_id, record
+            yield transaction_id, message_id, record
+
+
+def _report_rows(transactions: List[bytes]) -> List[List[str]]:
+    """
+    Return the report rows of the goods-related records in a batch of serialised
+    transaction elements.
+
+    Run in worker processes by `GoodsReporter.iter_rows()`.
+    """
+    rows = []
+    for transaction in transactions:
+        for transaction_id, message_id, record_element in _iter_transaction_records(
+            ET.fromstring(transaction),
+        ):
+            if GoodsReporter._is_reportable(record_element):
+                report_line = GoodsReportLine(
+                    transaction_id,
+                    message_id,
+                    record_element,
+                )
+                rows.append(report_line.as_list())
+    return rows
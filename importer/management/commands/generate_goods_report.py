@@ -62,6 +62,17 @@ class Command(BaseCommand):
             ),
             type=str,
         )
+        parser.add_argument(
+            "--processes",
+            help=(
+                "The number of processes used to build csv and xlsx-file "
+                "reports. Transactions are shared between processes in "
+                "batches, and the report is written in file order. One process "
+                "is used by default."
+            ),
+            type=int,
+            default=1,
+        )
 
     def get_output_base_filename(self) -> str:
         """Return the base output filename without any leading path or file
@@ -127,20 +138,19 @@ class Command(BaseCommand):
 
         self.validate_taric_file_source()
         taric_file = self.get_taric_file()
-        reporter = GoodsReporter(taric_file)
-        goods_report = reporter.create_report()
+        reporter = GoodsReporter(taric_file, processes=self.options["processes"])
 
         output_format = self.options.get("output_format")
         if output_format == "csv":
-            self.stdout.write(goods_report.csv(delimiter=","))
+            reporter.write_csv(self.stdout, delimiter=",")
         elif output_format == "md":
-            self.stdout.write(goods_report.markdown())
+            self.stdout.write(reporter.create_report().markdown())
         else:
             directory = self.get_output_directory()
             filename = self.get_output_base_filename()
             filepath = f"{directory}{filename}.xlsx"
-            with open(filepath, "w+") as report_file:
-                goods_report.xlsx_file(report_file)
+            with open(filepath, "wb") as report_file:
+                reporter.write_xlsx(report_file)
             self.stdout.write(
                 self.style.SUCCESS(f"Generated report file {filepath}"),
             )
@@ -0,0 +1,41 @@
+# Generated by Django 4.2.15 on 2026-10-18 05:58
+
+from django.db import migrations
+from django.db import models
+
+import importer.storages
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("importer", "0013_alter_importbatch_status"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="importerxmlchunk",
+            name="chunk_file",
+            field=models.FileField(
+                blank=True,
+                default="",
+                storage=importer.storages.ImporterChunkStorage,
+                upload_to="",
+            ),
+        ),
+        migrations.AddField(
+            model_name="importerxmlchunk",
+            name="compressed_size",
+            field=models.PositiveBigIntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name="importerxmlchunk",
+            name="uncompressed_size",
+            field=models.PositiveBigIntegerField(blank=True, null=True),
+        ),
+        migrations.AlterField(
+            model_name="importerxmlchunk",
+            name="chunk_text",
+            field=models.TextField(blank=True, default=""),
+        ),
+    ]
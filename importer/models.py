@@ -1,6 +1,14 @@
+import gzip
+import shutil
+from contextlib import contextmanager
+from io import BytesIO
 from logging import getLogger
+from tempfile import SpooledTemporaryFile
+from typing import BinaryIO
+from typing import Iterator
 
 from django.conf import settings
+from django.core.files import File
 from django.db import models
 from django.db.models import Q
 from django.db.models import QuerySet
@@ -11,6 +19,7 @@ from django_fsm import transition
 from common import validators
 from common.models import TimestampedMixin
 from importer.storages import CommodityImporterStorage
+from importer.storages import ImporterChunkStorage
 from importer.validators import ImportIssueType
 from taric_parsers.importer_issue import ImportIssueReportItem
 from workbaskets.util import clear_workbasket
@@ -334,7 +343,14 @@ class BatchImportError(TimestampedMixin):
 
 
 class ImporterXMLChunk(TimestampedMixin):
-    """A chunk of TARIC XML."""
+    """
+    A chunk of TARIC XML.
+
+    The XML is either held in ``chunk_text`` or, when
+    ``settings.IMPORTER_CHUNKS_IN_OBJECT_STORAGE`` is set, gzip compressed in
+    ``chunk_file``. Use ``open_payload`` or ``read_payload`` to read it
+    regardless of where it is stored.
+    """
 
     batch = models.ForeignKey(
         ImportBatch,
@@ -345,7 +361,14 @@ class ImporterXMLChunk(TimestampedMixin):
     chapter = models.CharField(max_length=2, null=True, blank=True, default=None)
 
     chunk_number = models.PositiveSmallIntegerField()
-    chunk_text = models.TextField(blank=False, null=False)
+    chunk_text = models.TextField(blank=True, null=False, default="")
+    chunk_file = models.FileField(
+        storage=ImporterChunkStorage,
+        default="",
+        blank=True,
+    )
+    uncompressed_size = models.PositiveBigIntegerField(null=True, blank=True)
+    compressed_size = models.PositiveBigIntegerField(null=True, blank=True)
 
     status = models.PositiveSmallIntegerField(
         choices=ImporterChunkStatus.choices,
@@ -361,6 +384,61 @@ class ImporterXMLChunk(TimestampedMixin):
         name += f" {self.chunk_number} - {self.get_status_display()} for {self.batch}"
         return name
 
+    @property
+    def payload_name(self) -> str:
+        name = f"{self.record_code or 'chunk'}"
+        if self.chapter:
+            name += f"-{self.chapter}"
+        return f"{self.batch_id}/{name}-{self.chunk_number}.xml.gz"
+
+    def write_payload(self, source: BinaryIO) -> None:
+        """
+        Set the XML of this chunk from a binary file, read from its current
+        position.
+
+        If ``settings.IMPORTER_CHUNKS_IN_OBJECT_STORAGE`` is set the XML is
+        streamed through gzip into ``chunk_file``, otherwise it is stored in
+        ``chunk_text``. The chunk itself is not saved.
+        """
+        if not settings.IMPORTER_CHUNKS_IN_OBJECT_STORAGE:
+            self.chunk_text = source.read().decode()
+            self.uncompressed_size = len(self.chunk_text.encode())
+            self.compressed_size = None
+            return
+
+        start = source.tell()
+        with SpooledTemporaryFile(max_size=settings.MAX_IMPORT_FILE_SIZE) as payload:
+            with gzip.GzipFile(fileobj=payload, mode="wb") as compressor:
+                shutil.copyfileobj(source, compressor)
+            self.uncompressed_size = source.tell() - start
+            self.compressed_size = payload.tell()
+            payload.seek(0)
+            self.chunk_file.save(self.payload_name, File(payload), save=False)
+        self.chunk_text = ""
+
+    @contextmanager
+    def open_payload(self) -> Iterator[BinaryIO]:
+        """Context manager providing a binary file from which the XML of this
+        chunk can be streamed, decompressing it if it is stored compressed."""
+        if not self.chunk_file:
+            yield BytesIO(self.chunk_text.encode())
+            return
+
+        with self.chunk_file.open("rb") as stored:
+            with gzip.GzipFile(fileobj=stored, mode="rb") as payload:
+                yield payload
+
+    def read_payload(self) -> str:
+        """Returns the XML of this chunk."""
+        with self.open_payload() as payload:
+            return payload.read().decode()
+
+    def delete_payload(self) -> None:
+        """Deletes the stored file holding the XML of this chunk, if there is
+        one."""
+        if self.chunk_file:
+            self.chunk_file.delete(save=False)
+
 
 class BatchDependencies(models.Model):
     dependent_batch = models.ForeignKey(
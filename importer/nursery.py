@@ -81,8 +81,7 @@ class TariffObjectNursery:
             if not result:
                 self._cache_handler(handler)
             else:
-                for key in result:
-                    self.cache.pop(key)
+                self.cache.pop_many(result)
         except InvalidIndentError:
             logger.warning("Parent not found for %s, caching indent", obj)
             self._cache_handler(handler)
@@ -139,8 +138,7 @@ class TariffObjectNursery:
                 if not result:
                     self._cache_handler(handler)
                 else:
-                    for key in result:
-                        self.cache.pop(key)
+                    self.cache.pop_many(result)
             except InvalidIndentError:
                 self._cache_handler(handler)
 
@@ -39,3 +39,22 @@ class CommodityImporterStorage(S3Boto3Storage):
             {"ContentDisposition": f"attachment; filename={path.basename(name)}"},
         )
         return super().get_object_parameters(name)
+
+
+class ImporterChunkStorage(S3Boto3Storage):
+    """Storage for the compressed payloads of ImporterXMLChunk instances."""
+
+    def get_default_settings(self):
+        from django.conf import settings
+
+        return dict(
+            super().get_default_settings(),
+            bucket_name=settings.IMPORTER_STORAGE_BUCKET_NAME,
+            access_key=settings.IMPORTER_S3_ACCESS_KEY_ID,
+            secret_key=settings.IMPORTER_S3_SECRET_ACCESS_KEY,
+            endpoint_url=settings.S3_ENDPOINT_URL,
+            region_name=settings.IMPORTER_S3_REGION_NAME,
+            location=settings.IMPORTER_CHUNK_STORAGE_DIRECTORY,
+            default_acl="private",
+            file_overwrite=False,
+        )
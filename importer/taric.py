@@ -197,6 +197,7 @@ class TransactionParser(ElementParser):
                     self.data,
                     envelope=self.parent.envelope,
                 )
+            get_nursery().cache.flush()
             return True
 
     def _has_commodity_changes(self, data: Mapping[str, Any]) -> bool:
@@ -1,12 +1,16 @@
-import random
-import time
-from io import BytesIO
 from logging import getLogger
+from typing import Any
+from typing import Dict
+from typing import List
 from typing import Optional
 from typing import Sequence
 
+from django.conf import settings
+from django.db.transaction import atomic
+
 from common.celery import app
 from importer.models import ImportBatch
+from importer.models import ImportBatchStatus
 from importer.models import ImporterChunkStatus
 from importer.models import ImporterXMLChunk
 from importer.taric import process_taric_xml_stream
@@ -34,7 +38,17 @@ def import_chunk(
     """
 
     partition_scheme = get_partition_scheme(partition_scheme_setting)
-    chunk = ImporterXMLChunk.objects.get(pk=chunk_pk)
+
+    with atomic():
+        chunk = ImporterXMLChunk.objects.select_for_update().get(pk=chunk_pk)
+        if chunk.status == ImporterChunkStatus.DONE:
+            # The task has been delivered again after the chunk was imported.
+            logger.info("Chunk %s has already been imported", chunk)
+            return
+
+        chunk.status = ImporterChunkStatus.RUNNING
+        chunk.save()
+
     batch = chunk.batch
 
     logger.info(
@@ -45,44 +59,53 @@ def import_chunk(
         chunk.chunk_number,
     )
 
-    chunk.status = ImporterChunkStatus.RUNNING
-    chunk.save()
-
     try:
-        process_taric_xml_stream(
-            BytesIO(chunk.chunk_text.encode()),
-            workbasket_id,
-            workbasket_status,
-            partition_scheme,
-            username,
-            record_group=record_group,
-        )
+        with chunk.open_payload() as payload:
+            process_taric_xml_stream(
+                payload,
+                workbasket_id,
+                workbasket_status,
+                partition_scheme,
+                username,
+                record_group=record_group,
+            )
     except Exception as e:
         # A single errored chunk puts its parent ImportBatch instance into an
         # errored state.
-        batch.failed()
-        batch.save()
-
-        chunk.status = ImporterChunkStatus.ERRORED
-        chunk.save()
+        with atomic():
+            batch = lock_batch(batch)
+            if batch.status == ImportBatchStatus.IMPORTING:
+                batch.failed()
+                batch.save()
+
+            chunk.status = ImporterChunkStatus.ERRORED
+            chunk.save()
         raise e
 
-    chunk.status = ImporterChunkStatus.DONE
-    chunk.save()
+    # Chunks of a batch can finish at the same time, so the batch is locked
+    # while deciding whether this was its last chunk.
+    with atomic():
+        batch = lock_batch(batch)
 
-    batch_errored_chunks = batch.chunks.filter(
-        status=ImporterChunkStatus.ERRORED,
-    )
-    if not batch.ready_chunks.exists():
-        if not batch_errored_chunks:
-            # This was batch's last chunk requiring processing and it has no
-            # chunks with status ERRORED, so transition batch to SUCCEEDED.
-            batch.succeeded()
-        else:
-            # This was batch's last chunk requiring processing and it did have
-            # chunks with status ERRORED, so transition batch to ERRORED.
-            batch.failed()
-        batch.save()
+        chunk.status = ImporterChunkStatus.DONE
+        chunk.save()
+
+        batch_errored_chunks = batch.chunks.filter(
+            status=ImporterChunkStatus.ERRORED,
+        )
+        if (
+            not batch.ready_chunks.exists()
+            and batch.status == ImportBatchStatus.IMPORTING
+        ):
+            if not batch_errored_chunks.exists():
+                # This was batch's last chunk requiring processing and it has no
+                # chunks with status ERRORED, so transition batch to SUCCEEDED.
+                batch.succeeded()
+            else:
+                # This was batch's last chunk requiring processing and it did have
+                # chunks with status ERRORED, so transition batch to ERRORED.
+                batch.failed()
+            batch.save()
 
     find_and_run_next_batch_chunks(
         chunk.batch,
@@ -93,6 +116,18 @@ def import_chunk(
     )
 
 
+def lock_batch(batch: ImportBatch) -> ImportBatch:
+    """
+    Lock the batch's row until the end of the current database transaction,
+    returning a fresh copy of the batch.
+
+    Changes to the status of a batch and its chunks that depend on the status of
+    other chunks are made while holding this lock, so that tasks running
+    concurrently on other workers see each other's changes.
+    """
+    return ImportBatch.objects.select_for_update().get(pk=batch.pk)
+
+
 def setup_chunk_task(
     batch: ImportBatch,
     workbasket_id: str,
@@ -110,6 +145,11 @@ def setup_chunk_task(
     this the system checks the chunk status. If the status is `RUNNING`,
     `ERRORED` or `DONE` the task is not setup. If the status is `WAITING` then
     the status is updated to `RUNNING` and the task is setup.
+
+    The check and update are made while holding a lock on the batch, so
+    concurrent calls cannot set up the same chunk twice. No chunk is set up if
+    the batch already has :data:`settings.IMPORTER_MAX_RUNNING_CHUNKS` chunks
+    running.
     """
 
     # Call get_partition_scheme before invoking celery so that it can raise ImproperlyConfigured if
@@ -117,24 +157,30 @@ def setup_chunk_task(
 
     get_partition_scheme(partition_scheme_setting)
 
-    if batch.ready_chunks.filter(
-        record_code=record_code,
-        status=ImporterChunkStatus.RUNNING,
-        **kwargs,
-    ).exists():
-        return
+    with atomic():
+        batch = lock_batch(batch)
+        running_chunks = batch.chunks.filter(status=ImporterChunkStatus.RUNNING)
 
-    chunk = (
-        batch.ready_chunks.filter(record_code=record_code, **kwargs)
-        .order_by("chunk_number")
-        .first()
-    )
+        if running_chunks.filter(record_code=record_code, **kwargs).exists():
+            return
 
-    if not chunk:
-        return
+        max_running_chunks = settings.IMPORTER_MAX_RUNNING_CHUNKS
+        if max_running_chunks and running_chunks.count() >= max_running_chunks:
+            logger.debug("Batch %s is running its maximum number of chunks", batch)
+            return
+
+        chunk = (
+            batch.ready_chunks.filter(record_code=record_code, **kwargs)
+            .order_by("chunk_number")
+            .first()
+        )
+
+        if not chunk:
+            return
+
+        chunk.status = ImporterChunkStatus.RUNNING
+        chunk.save()
 
-    chunk.status = ImporterChunkStatus.RUNNING
-    chunk.save()
     import_chunk.delay(
         chunk.pk,
         workbasket_id,
@@ -145,6 +191,70 @@ def setup_chunk_task(
     )
 
 
+def get_unblocked_chunk_filters(batch: ImportBatch) -> List[Dict[str, Any]]:
+    """
+    Find the groups of chunks in a split batch that can be run now, returning a
+    filter for the chunks of each group.
+
+    Chunks are grouped by record code and chapter heading. A group is blocked
+    while any group of a record code that it depends on (see
+    :func:`~importer.utils.build_dependency_tree`) has chunks that are not
+    done, unless both groups have chapter headings and they are different –
+    so, for instance, the measures in one chapter can run as soon as the
+    commodities in that chapter are done.
+
+    The chunks in a group are run in chunk order, apart from measures, which
+    are assumed to be able to run in any order.
+    """
+    dependency_tree = build_dependency_tree()
+
+    unfinished_groups = set(
+        batch.chunks.exclude(status=ImporterChunkStatus.DONE)
+        .filter(record_code__in=dependency_tree.keys())
+        .values_list("record_code", "chapter")
+        .distinct(),
+    )
+
+    def blocks(group, other_group):
+        record_code, chapter = group
+        other_record_code, other_chapter = other_group
+        return other_record_code in dependency_tree[record_code] and (
+            chapter is None or other_chapter is None or chapter == other_chapter
+        )
+
+    unblocked_groups = sorted(
+        (
+            group
+            for group in unfinished_groups
+            if not any(blocks(group, other) for other in unfinished_groups)
+        ),
+        key=lambda group: (group[0], group[1] or ""),
+    )
+
+    logger.debug("groups left %s", unfinished_groups)
+    logger.debug("unblocked groups %s", unblocked_groups)
+
+    filters = []
+    for record_code, chapter in unblocked_groups:
+        # Special case: measures when split can run entirely async
+        if record_code == "430":
+            filters.extend(
+                {
+                    "record_code": record_code,
+                    "chapter": chapter,
+                    "chunk_number": chunk_number,
+                }
+                for chunk_number in batch.ready_chunks.filter(
+                    record_code=record_code,
+                    chapter=chapter,
+                ).values_list("chunk_number", flat=True)
+            )
+        else:
+            filters.append({"record_code": record_code, "chapter": chapter})
+
+    return filters
+
+
 def find_and_run_next_batch_chunks(
     batch: ImportBatch,
     workbasket_id: str,
@@ -164,14 +274,19 @@ def find_and_run_next_batch_chunks(
     have run (or never existed) within a batch, build a dependency tree to then
     figure out which record codes therefore are now "unblocked" and can start
     running. Unblocked in this case meaning all the record codes the chunk may
-    be dependent on have run.
+    be dependent on have run. Chunks of unblocked record codes run concurrently,
+    up to :data:`settings.IMPORTER_MAX_RUNNING_CHUNKS` at a time.
 
     Record codes for split jobs are run in chunk order excluding two cases:
 
-    1) Commodity codes can be split and run by chapter heading as well.
+    1) Commodity codes and measures can be split and run by chapter heading as
+    well, and the measures in a chapter only wait for the commodities in the
+    same chapter.
 
     2) Measures from split files are assumed to be able to run completely
     asynchronously and so all chunks are setup as tasks once unblocked.
+
+    See :func:`get_unblocked_chunk_filters`.
     """
 
     if batch.dependencies.still_running().exists():
@@ -217,66 +332,13 @@ def find_and_run_next_batch_chunks(
         return
 
     # If the job is a split job (should only be used for seed files) the following logic applies.
-    dependency_tree = build_dependency_tree()
-
-    record_codes = set(
-        batch.chunks.exclude(status=ImporterChunkStatus.DONE)
-        .values_list("record_code", flat=True)
-        .distinct(),
-    )
-
-    for key in list(dependency_tree.keys()):
-        if key not in record_codes:
-            dependency_tree.pop(key)
-
-    unblocked_codes = [
-        key
-        for key, value in dependency_tree.items()
-        if not value & dependency_tree.keys()
-    ]
-
-    logger.debug("records left %s", dependency_tree.keys())
-    logger.debug("unblocked records %s", unblocked_codes)
-
-    # HACK: reduce the possibility of early race conditions
-    time.sleep(random.choice([x * 0.05 for x in range(0, 200)]))
-
-    for code in unblocked_codes:
-        # Special case: commodities can be split on chapter heading as well
-        chunk_query = batch.ready_chunks.filter(record_code=code)
-        if code == "400":
-            for chapter in chunk_query.values_list("chapter", flat=True).distinct():
-                setup_chunk_task(
-                    batch,
-                    workbasket_id,
-                    workbasket_status,
-                    partition_scheme_setting,
-                    username,
-                    record_code=code,
-                    record_group=record_group,
-                    chapter=chapter,
-                )
-        # Special case: measures when split can run entirely async
-        elif code == "430":
-            for chunk in chunk_query:
-                setup_chunk_task(
-                    batch,
-                    workbasket_id,
-                    workbasket_status,
-                    partition_scheme_setting,
-                    username,
-                    record_code=code,
-                    record_group=record_group,
-                    chapter=chunk.chapter,
-                    chunk_number=chunk.chunk_number,
-                )
-        else:
-            setup_chunk_task(
-                batch,
-                workbasket_id,
-                workbasket_status,
-                partition_scheme_setting,
-                username,
-                record_code=code,
-                record_group=record_group,
-            )
+    for chunk_filter in get_unblocked_chunk_filters(batch):
+        setup_chunk_task(
+            batch,
+            workbasket_id,
+            workbasket_status,
+            partition_scheme_setting,
+            username,
+            record_group=record_group,
+            **chunk_filter,
+        )
@@ -3,12 +3,14 @@ import pytest
 from importer.cache import cache
 from importer.cache import memory
 from importer.cache import pickle
+from importer.cache import spill
 
 
 @pytest.fixture(autouse=True)
 def clear_cache():
     cache.ObjectCacheFacade().clear()
     memory.MemoryCacheEngine().clear()
+    spill.SpillingMemoryCacheEngine().clear()
     pickle_cache = pickle.PickleCacheEngine()
     pickle_cache.clear()
     pickle_cache.dump()
@@ -20,6 +22,7 @@ test_data = [
     cache.ObjectCacheFacade,
     memory.MemoryCacheEngine,
     pickle.PickleCacheEngine,
+    spill.SpillingMemoryCacheEngine,
 ]
 
 
@@ -86,3 +86,87 @@ def test_clear_returns_correctly():
     assert object_cache.keys() == {"test": ""}.keys()
     object_cache.clear()
     assert object_cache.keys() == {}.keys()
+
+
+@pytest.fixture
+def pipelined_cache():
+    object_cache = redis.PipelinedRedisCacheEngine()
+    object_cache.clear()
+    yield object_cache
+    object_cache.clear()
+
+
+def test_pipelined_put_is_visible_before_flush(pipelined_cache):
+    pipelined_cache.put("test", {"a": 1})
+
+    assert pipelined_cache.client.get(pipelined_cache._redis_key("test")) is None
+    assert pipelined_cache.get("test") == {"a": 1}
+    assert redis.PipelinedRedisCacheEngine().get("test") == {"a": 1}
+
+
+def test_pipelined_flush_writes_values_and_keys(pipelined_cache):
+    pipelined_cache.put("test", 123)
+    pipelined_cache.put("other", 456)
+    pipelined_cache.flush()
+
+    assert pipelined_cache.client.get(pipelined_cache._redis_key("test"))
+    assert sorted(pipelined_cache.keys()) == ["other", "test"]
+    assert pipelined_cache.get_many(["test", "zzz", "other"]) == [123, None, 456]
+
+
+def test_pipelined_put_flushes_when_buffer_is_full(pipelined_cache, settings):
+    settings.IMPORTER_CACHE_WRITE_BUFFER_SIZE = 2
+    object_cache = redis.PipelinedRedisCacheEngine()
+
+    object_cache.put("one", 1)
+    assert not object_cache.client.smembers(object_cache.keys_key)
+
+    object_cache.put("two", 2)
+    assert len(object_cache.client.smembers(object_cache.keys_key)) == 2
+
+
+@pytest.mark.parametrize("flush", [True, False])
+def test_pipelined_pop_removes_and_returns_value(pipelined_cache, flush):
+    pipelined_cache.put("test", 123)
+    if flush:
+        pipelined_cache.flush()
+
+    assert pipelined_cache.pop("test") == 123
+    assert pipelined_cache.pop("test") is None
+    assert pipelined_cache.keys() == []
+    assert pipelined_cache.client.get(pipelined_cache._redis_key("test")) is None
+
+
+def test_pipelined_pop_of_buffered_value_removes_flushed_value(pipelined_cache):
+    pipelined_cache.put("test", 123)
+    pipelined_cache.flush()
+    pipelined_cache.put("test", 456)
+
+    assert pipelined_cache.pop("test") == 456
+    assert pipelined_cache.get("test") is None
+    assert pipelined_cache.keys() == []
+
+
+def test_pipelined_pop_many(pipelined_cache):
+    pipelined_cache.put("flushed", 1)
+    pipelined_cache.flush()
+    pipelined_cache.put("buffered", 2)
+
+    assert pipelined_cache.pop_many(["flushed", "missing", "buffered"], 0) == [
+        1,
+        0,
+        2,
+    ]
+    assert pipelined_cache.keys() == []
+
+
+def test_pipelined_clear(pipelined_cache):
+    pipelined_cache.put("flushed", 1)
+    pipelined_cache.flush()
+    pipelined_cache.put("buffered", 2)
+
+    pipelined_cache.clear()
+
+    assert pipelined_cache.keys() == []
+    assert pipelined_cache.get("flushed") is None
+    assert pipelined_cache.get("buffered") is None
@@ -0,0 +1,88 @@
+import pytest
+
+from importer.cache import ObjectCacheFacade
+from importer.cache import spill
+
+
+@pytest.fixture
+def object_cache(settings, tmp_path):
+    settings.IMPORTER_CACHE_MEMORY_LIMIT = 300
+    settings.IMPORTER_CACHE_SPILL_DIRECTORY = str(tmp_path)
+    object_cache = spill.SpillingMemoryCacheEngine()
+    object_cache.clear()
+    yield object_cache
+    object_cache.clear()
+
+
+def value(index):
+    return {"tag": "record", "data": {"sid": index, "description": "x" * 20}}
+
+
+def test_spills_least_recently_used_objects(object_cache):
+    for index in range(5):
+        object_cache.put(f"key_{index}", value(index))
+    # Reading the oldest object makes it the most recently used.
+    object_cache.get("key_0")
+    object_cache.put("key_5", value(5))
+
+    stats = object_cache.stats()
+    assert stats["memory_bytes"] <= 300
+    assert stats["spills"] > 0
+    assert "key_0" in object_cache.CACHE
+    assert "key_1" in object_cache.SPILLED
+    assert object_cache.keys() == {f"key_{index}" for index in range(6)}
+
+
+def test_faults_spilled_objects_back_in(object_cache):
+    for index in range(6):
+        object_cache.put(f"key_{index}", value(index))
+    assert "key_0" in object_cache.SPILLED
+
+    assert object_cache.get("key_0") == value(0)
+    assert "key_0" in object_cache.CACHE
+    assert "key_0" not in object_cache.SPILLED
+    assert object_cache.stats()["faults"] == 1
+
+
+def test_pop_removes_spilled_objects(object_cache):
+    for index in range(6):
+        object_cache.put(f"key_{index}", value(index))
+
+    assert object_cache.pop_many(["key_0", "key_5"]) == [value(0), value(5)]
+    assert object_cache.pop("key_0") is None
+    assert object_cache.keys() == {f"key_{index}" for index in range(1, 5)}
+
+    stats = object_cache.stats()
+    assert stats["hits"] == 2
+    assert stats["misses"] == 1
+
+
+def test_put_replaces_spilled_object(object_cache):
+    for index in range(6):
+        object_cache.put(f"key_{index}", value(index))
+    assert "key_0" in object_cache.SPILLED
+
+    object_cache.put("key_0", value(10))
+
+    assert object_cache.get("key_0") == value(10)
+    assert sorted(object_cache.keys()) == [f"key_{index}" for index in range(6)]
+
+
+def test_clear_removes_spilled_objects(object_cache):
+    for index in range(6):
+        object_cache.put(f"key_{index}", value(index))
+
+    object_cache.clear()
+
+    assert object_cache.keys() == set()
+    assert object_cache.get("key_0") is None
+    assert object_cache.stats()["spills"] == 0
+
+
+def test_used_through_facade(object_cache):
+    facade = ObjectCacheFacade("importer.cache.spill.SpillingMemoryCacheEngine")
+    for index in range(6):
+        facade.put(f"key_{index}", value(index))
+
+    assert facade.get_many(["key_0", "key_5"]) == [value(0), value(5)]
+    assert facade.keys() == object_cache.keys()
@@ -47,7 +47,7 @@ def test_generate_goods_report_required_arguments(args, exception_type, error_ms
     [
         (
             "csv",
-            "importer.goods_report.GoodsReport.csv",
+            "importer.goods_report.GoodsReporter.write_csv",
         ),
         (
             "md",
@@ -79,7 +79,7 @@ def test_generate_goods_report_output_xlsx_file():
         return open(filename, mode)
 
     with patch(
-        "importer.goods_report.GoodsReport.xlsx_file",
+        "importer.goods_report.GoodsReporter.write_xlsx",
         return_value="",
     ) as mocked_xlsx_file:
         with patch(
@@ -0,0 +1,293 @@
+import pytest
+from django.core.cache import cache
+from redis.client import Pipeline
+from redis.client import Redis
+
+from common.tests import factories
+from common.tests.synthetic_taric import SyntheticTaricCounts
+from common.tests.synthetic_taric import SyntheticTaricEnvelope
+from common.tests.synthetic_taric import SyntheticTaricReferences
+from common.tests.util import QueryCounter
+from common.tests.util import peak_memory_of
+from common.tests.util import peak_rss
+from common.tests.util import time_best_of
+from importer.cache import ObjectCacheFacade
+from importer.goods_report import GoodsReporter
+from importer.nursery import get_nursery
+from importer.taric import process_taric_xml_stream
+from measures.models import Measure
+from taric_parsers.importer import TaricImporter
+from taric_parsers.taric_xml_source import TaricXMLFileSource
+from workbaskets.models import get_partition_scheme
+from workbaskets.validators import WorkflowStatus
+
+pytestmark = pytest.mark.benchmark
+
+OBJECTS = 5000
+OBJECTS_PER_TRANSACTION = 10
+OBJECTS_PER_BUILD = 3
+
+# The shape of the synthetic envelope imported by the throughput benchmark,
+# before scaling. The default is a little under 1,000 messages.
+IMPORT_COUNTS = SyntheticTaricCounts(
+    commodities=100,
+    measures_per_commodity=3,
+    footnotes=20,
+    footnote_associations_per_commodity=1,
+)
+
+# The number of commodities in the envelope reported on by the goods report
+# benchmark, before scaling.
+GOODS_REPORT_COMMODITIES = 2000
+
+ENGINES = {
+    "redis": "importer.cache.redis.RedisCacheEngine",
+    "pipelined": "importer.cache.redis.PipelinedRedisCacheEngine",
+}
+
+
+class RoundTripCounter:
+    """Counts the commands and pipelines sent to Redis while patched in."""
+
+    def __init__(self, monkeypatch):
+        self.count = 0
+        execute_command = Redis.execute_command
+        execute = Pipeline.execute
+
+        def counted_execute_command(client, *args, **kwargs):
+            if not isinstance(client, Pipeline):
+                self.count += 1
+            return execute_command(client, *args, **kwargs)
+
+        def counted_execute(pipeline, *args, **kwargs):
+            self.count += 1
+            return execute(pipeline, *args, **kwargs)
+
+        monkeypatch.setattr(Redis, "execute_command", counted_execute_command)
+        monkeypatch.setattr(Pipeline, "execute", counted_execute)
+
+
+def nursery_workload(object_cache, object_count):
+    """
+    Uses the cache as the nursery does during an import: each object is cached
+    until it can be built, then it and the other objects built with it are
+    popped, with a flush at the end of each transaction.
+    """
+    keys = []
+    for index in range(object_count):
+        key = f"handler_{index}"
+        object_cache.put(key, {"tag": "record", "data": {"sid": index}})
+        keys.append(key)
+
+        if len(keys) == OBJECTS_PER_BUILD:
+            object_cache.get(keys[0])
+            object_cache.pop_many(keys)
+            keys = []
+
+        if index % OBJECTS_PER_TRANSACTION == 0:
+            object_cache.flush()
+
+    object_cache.keys()
+    object_cache.pop_many(keys)
+
+
+def test_nursery_cache_throughput(benchmark_scale, monkeypatch, record_property):
+    """Compare the time and Redis round trips taken by the nursery's use of each
+    Redis cache engine."""
+    object_count = OBJECTS * benchmark_scale
+    record_property("objects", object_count)
+
+    for name, engine in ENGINES.items():
+        object_cache = ObjectCacheFacade(engine)
+
+        def workload():
+            nursery_workload(object_cache, object_count)
+            cache.delete_pattern("*")
+
+        with monkeypatch.context() as patch:
+            round_trips = RoundTripCounter(patch)
+            nursery_workload(object_cache, object_count)
+        cache.delete_pattern("*")
+
+        record_property(f"{name}_round_trips", round_trips.count)
+        record_property(f"{name}_seconds", time_best_of(workload))
+
+
+def dangling_workload(object_cache, object_count):
+    """
+    Uses the cache as the nursery does for objects whose parents arrive late:
+    every object is cached and looked up once before any can be built, and
+    then they are popped as they are built.
+    """
+    keys = [f"handler_{index}" for index in range(object_count)]
+    for index, key in enumerate(keys):
+        object_cache.put(
+            key,
+            {"tag": "record", "data": {"sid": index, "description": "x" * 200}},
+        )
+    for key in keys:
+        object_cache.get(key)
+    for index in range(0, object_count, OBJECTS_PER_BUILD):
+        object_cache.pop_many(keys[index : index + OBJECTS_PER_BUILD])
+
+
+def test_dangling_object_memory(benchmark_scale, settings, tmp_path, record_property):
+    """Compare the peak memory and time taken by the in-memory and spilling
+    cache engines while holding many dangling objects."""
+    object_count = OBJECTS * benchmark_scale
+    settings.IMPORTER_CACHE_MEMORY_LIMIT = 256 * 1024
+    settings.IMPORTER_CACHE_SPILL_DIRECTORY = str(tmp_path)
+    record_property("objects", object_count)
+
+    for name, engine in {
+        "memory": "importer.cache.memory.MemoryCacheEngine",
+        "spilling": "importer.cache.spill.SpillingMemoryCacheEngine",
+    }.items():
+        object_cache = ObjectCacheFacade(engine)
+        object_cache.clear()
+
+        def workload():
+            dangling_workload(object_cache, object_count)
+
+        record_property(f"{name}_peak_bytes", peak_memory_of(workload))
+        record_property(f"{name}_seconds", time_best_of(workload))
+        if name == "spilling":
+            record_property(f"{name}_stats", object_cache.engine.stats())
+        object_cache.clear()
+
+
+def write_synthetic_envelope(counts, path):
+    """Writes a synthetic envelope with the given counts to path, returning it
+    once its path has been set."""
+    envelope = SyntheticTaricEnvelope(
+        counts,
+        SyntheticTaricReferences(
+            # TaricImporter reads the footnote types of goods nomenclature
+            # footnote associations as numbers.
+            footnote_type=factories.FootnoteTypeFactory.create(footnote_type_id="7"),
+            measure_type=factories.MeasureTypeFactory.create(),
+            geographical_area=factories.GeographicalAreaFactory.create(),
+            regulation=factories.RegulationFactory.create(),
+        ),
+    )
+    envelope.path = path
+    with open(envelope.path, "w") as output:
+        envelope.write(output)
+    return envelope
+
+
+@pytest.fixture
+def synthetic_envelope(benchmark_scale, tmp_path):
+    """Writes a synthetic envelope of commodities, footnotes and measures."""
+    return write_synthetic_envelope(
+        SyntheticTaricCounts(
+            commodities=IMPORT_COUNTS.commodities * benchmark_scale,
+            measures_per_commodity=IMPORT_COUNTS.measures_per_commodity,
+            footnotes=IMPORT_COUNTS.footnotes * benchmark_scale,
+            footnote_associations_per_commodity=(
+                IMPORT_COUNTS.footnote_associations_per_commodity
+            ),
+        ),
+        tmp_path / "envelope.xml",
+    )
+
+
+def import_with_handlers(envelope, user):
+    """Imports an envelope with the importer package's handlers and nursery."""
+    get_nursery().cache.clear()
+    with open(envelope.path, "rb") as stream:
+        process_taric_xml_stream(
+            stream,
+            workbasket_id=None,
+            workbasket_status=WorkflowStatus.EDITING,
+            partition_scheme=get_partition_scheme(),
+            username=user.username,
+        )
+
+
+def import_with_taric_parsers(envelope, user):
+    """Imports an envelope with taric_parsers.importer.TaricImporter."""
+    workbasket = factories.WorkBasketFactory.create(status=WorkflowStatus.EDITING)
+    importer = TaricImporter(
+        import_batch=factories.ImportBatchFactory.create(workbasket=workbasket),
+        taric_xml_source=TaricXMLFileSource(str(envelope.path)),
+    )
+    importer.process_and_save_if_valid(workbasket)
+    assert importer.issues() == []
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize(
+    "import_envelope",
+    [import_with_handlers, import_with_taric_parsers],
+    ids=["handlers", "taric_parsers"],
+)
+def test_import_throughput(
+    import_envelope,
+    synthetic_envelope,
+    valid_user,
+    record_property,
+):
+    """
+    Measure the messages imported per second, queries per message and peak
+    memory of importing a synthetic envelope with each importer.
+
+    Peak RSS is the high-water mark of the whole test process, so select a
+    single importer with ``-k`` to measure it on its own.
+    """
+    with QueryCounter() as queries:
+        seconds = time_best_of(
+            lambda: import_envelope(synthetic_envelope, valid_user),
+            repeat=1,
+        )
+
+    assert Measure.objects.filter(sid__gte=synthetic_envelope.first_sid).count() == (
+        synthetic_envelope.counts.commodities
+        * synthetic_envelope.counts.measures_per_commodity
+    )
+
+    messages = synthetic_envelope.message_count
+    record_property("messages", messages)
+    record_property("seconds", seconds)
+    record_property("messages_per_second", messages / seconds)
+    record_property("queries", queries.count)
+    record_property("queries_per_message", queries.count / messages)
+    record_property("peak_rss_bytes", peak_rss())
+
+
+@pytest.mark.django_db
+def test_goods_report_memory(benchmark_scale, tmp_path, record_property):
+    """Compare the peak memory and time taken to write an xlsx goods report from
+    a report built in memory, streamed, and streamed using worker processes."""
+    envelope = write_synthetic_envelope(
+        SyntheticTaricCounts(
+            commodities=GOODS_REPORT_COMMODITIES * benchmark_scale,
+            measures_per_commodity=0,
+        ),
+        tmp_path / "goods.xml",
+    )
+    record_property("messages", envelope.message_count)
+
+    def in_memory():
+        with open(envelope.path, "rb") as goods_file:
+            goods_report = GoodsReporter(goods_file).create_report()
+        with open(tmp_path / "report.xlsx", "wb") as report_file:
+            goods_report.xlsx_file(report_file)
+
+    def streamed(processes):
+        with (
+            open(envelope.path, "rb") as goods_file,
+            open(
+                tmp_path / "report.xlsx",
+                "wb",
+            ) as report_file,
+        ):
+            GoodsReporter(goods_file, processes=processes).write_xlsx(report_file)
+
+    for name, workload in {
+        "in_memory": in_memory,
+        "streamed": lambda: streamed(processes=1),
+        "parallel": lambda: streamed(processes=4),
+    }.items():
+        record_property(f"{name}_peak_bytes", peak_memory_of(workload))
+        record_property(f"{name}_seconds", time_best_of(workload))
@@ -1,3 +1,4 @@
+import gzip
 import xml.etree.ElementTree as ET
 from io import BytesIO
 from os import path
@@ -101,6 +102,92 @@ def test_close_chunk():
     )
 
 
+def test_close_chunk_in_object_storage(importer_chunk_storage):
+    """Asserts that chunks are compressed into object storage when it is
+    enabled, leaving only a reference and the sizes in the database."""
+    batch = factories.ImportBatchFactory.create()
+    chunk = BytesIO()
+    chunk.write(get_chunk_opener("1"))
+
+    chunker.close_chunk(chunk, batch, ("400", "01"))
+
+    xml_chunk = batch.chunks.get()
+    expected = get_basic_chunk_text("1")
+    assert xml_chunk.chunk_text == ""
+    assert importer_chunk_storage.exists(xml_chunk.chunk_file.name)
+    assert xml_chunk.uncompressed_size == len(expected)
+    assert xml_chunk.compressed_size == importer_chunk_storage.size(
+        xml_chunk.chunk_file.name,
+    )
+    with importer_chunk_storage.open(xml_chunk.chunk_file.name) as stored:
+        assert gzip.decompress(stored.read()) == expected
+    assert xml_chunk.read_payload() == expected.decode()
+
+
+def test_read_payload_of_chunk_stored_in_database():
+    """Asserts that chunks stored as text in the database are still read."""
+    xml_chunk = factories.ImporterXMLChunkFactory.create()
+
+    with xml_chunk.open_payload() as payload:
+        assert payload.read() == xml_chunk.chunk_text.encode()
+    assert xml_chunk.read_payload() == xml_chunk.chunk_text
+
+
+def test_rewrite_comm_codes_in_object_storage(
+    importer_chunk_storage,
+    example_goods_taric_file_location,
+    django_capture_on_commit_callbacks,
+):
+    """Asserts that the payloads of rewritten commodity code chunks are removed
+    from object storage along with the chunks."""
+    with open(f"{example_goods_taric_file_location}", "rb") as f:
+        content = f.read()
+    taric_file = SimpleUploadedFile("goods.xml", content, content_type="text/xml")
+    batch = factories.ImportBatchFactory.create(split_job=True)
+
+    with django_capture_on_commit_callbacks(execute=True):
+        chunk_taric(taric_file, batch)
+
+    _, stored_names = importer_chunk_storage.listdir(str(batch.pk))
+    chunks = batch.chunks.filter(record_code="400")
+    assert chunks.exists()
+    assert sorted(f"{batch.pk}/{name}" for name in stored_names) == sorted(
+        chunk.chunk_file.name for chunk in batch.chunks.all()
+    )
+    for chunk in chunks:
+        assert chunk.read_payload()
+
+
+def test_rewrite_comm_codes_keeps_old_chunks_if_rewrite_fails(
+    importer_chunk_storage,
+    example_goods_taric_file_location,
+    django_capture_on_commit_callbacks,
+):
+    """Asserts that the old commodity code chunks and their payloads are kept if
+    the sorted chunks can't be saved."""
+    with open(f"{example_goods_taric_file_location}", "rb") as f:
+        content = f.read()
+    taric_file = SimpleUploadedFile("goods.xml", content, content_type="text/xml")
+    batch = factories.ImportBatchFactory.create(split_job=True)
+    with django_capture_on_commit_callbacks(execute=True):
+        chunk_taric(taric_file, batch)
+    payloads = {
+        chunk.pk: chunk.read_payload()
+        for chunk in batch.chunks.filter(record_code="400")
+    }
+
+    with django_capture_on_commit_callbacks(execute=True) as callbacks:
+        with mock.patch.object(chunker, "close_chunk", side_effect=OSError):
+            with pytest.raises(OSError):
+                chunker.rewrite_comm_codes(batch, "000001")
+
+    assert callbacks == []
+    assert {
+        chunk.pk: chunk.read_payload()
+        for chunk in batch.chunks.filter(record_code="400")
+    } == payloads
+
+
 def test_filter_transaction_records_positive(
     taric_schema_tags,
     record_group,
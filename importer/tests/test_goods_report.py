@@ -1,9 +1,12 @@
+from io import BytesIO
+from io import StringIO
 from os import path
 from tempfile import NamedTemporaryFile
 from typing import List
 from xml.etree import ElementTree as ET
 
 import pytest
+from openpyxl import load_workbook
 
 from common.validators import UpdateType
 from importer.goods_report import TARIC3_NAMESPACES
@@ -446,3 +449,68 @@ def test_goods_report_markdown():
         goods_report = goods_reporter.create_report()
     with open(f"{TEST_FILES_PATH}/goods_xml_report.md", "rt") as md_file:
         assert goods_report.markdown() == md_file.read()
+
+
+@pytest.fixture()
+def many_transactions_goods_file(tmp_path) -> str:
+    """Returns the path of a TARIC3 XML file holding the transaction in
+    goods.xml many times over, each with a distinct transaction ID."""
+    with open(f"{TEST_FILES_PATH}/goods.xml", "rt") as taric_file:
+        header, transaction = taric_file.read().split("    <env:transaction", 1)
+    transaction, footer = transaction.split("</env:transaction>\n", 1)
+
+    goods_file = tmp_path / "many_transactions.xml"
+    with open(goods_file, "wt") as output:
+        output.write(header)
+        for transaction_id in range(1, 501):
+            output.write(
+                f"    <env:transaction"
+                f"{transaction.replace('19282658', str(transaction_id))}"
+                f"</env:transaction>\n",
+            )
+        output.write(footer)
+    return str(goods_file)
+
+
+def test_goods_reporter_write_csv():
+    """Test that `GoodsReporter.write_csv()` streams the same csv as
+    `GoodsReport.csv()`."""
+    with open(f"{TEST_FILES_PATH}/goods.xml", "rb") as taric_file:
+        expected = GoodsReporter(taric_file).create_report().csv()
+    with open(f"{TEST_FILES_PATH}/goods.xml", "rb") as taric_file:
+        output = StringIO()
+        GoodsReporter(taric_file).write_csv(output)
+
+    assert output.getvalue() == expected
+
+
+def test_goods_reporter_write_xlsx():
+    """Test that `GoodsReporter.write_xlsx()` writes a workbook with a bold
+    header row followed by a row for each report line."""
+    with open(f"{TEST_FILES_PATH}/goods.xml", "rb") as taric_file:
+        report_lines = GoodsReporter(taric_file).create_report().report_lines
+    with open(f"{TEST_FILES_PATH}/goods.xml", "rb") as taric_file:
+        xlsx_io = BytesIO()
+        GoodsReporter(taric_file).write_xlsx(xlsx_io)
+
+    sheet = load_workbook(xlsx_io).active
+    rows = list(sheet.iter_rows())
+
+    assert [cell.value for cell in rows[0]] == GoodsReportLine.COLUMN_NAMES
+    assert all(cell.font.bold for cell in rows[0])
+    assert [[cell.value or "" for cell in row] for row in rows[1:]] == [
+        line.as_list() for line in report_lines
+    ]
+
+
+def test_goods_reporter_iter_rows_in_parallel(many_transactions_goods_file):
+    """Test that report rows built by more than one process are the same, and in
+    the same order, as those built by one."""
+    with open(many_transactions_goods_file, "rb") as taric_file:
+        expected = list(GoodsReporter(taric_file).iter_rows())
+    with open(many_transactions_goods_file, "rb") as taric_file:
+        rows = list(GoodsReporter(taric_file, processes=2).iter_rows())
+
+    assert len(rows) == 500
+    assert [row[-2] for row in rows] == [str(id) for id in range(1, 501)]
+    assert rows == expected
@@ -1,9 +1,11 @@
+from io import BytesIO
 from unittest import mock
 
 import pytest
 
 from common.tests import factories
 from importer import tasks
+from importer.models import ImportBatchStatus
 from importer.models import ImporterChunkStatus
 
 pytestmark = pytest.mark.django_db
@@ -35,6 +37,36 @@ def test_import_chunk(
     )
 
 
+@mock.patch("importer.tasks.process_taric_xml_stream")
+def test_import_chunk_streams_compressed_payload(
+    mock_process_taric_xml_stream,
+    valid_user,
+    importer_chunk_storage,
+):
+    xml_chunk = factories.ImporterXMLChunkFactory.build(
+        batch=factories.ImportBatchFactory.create(),
+    )
+    expected = xml_chunk.chunk_text.encode()
+    xml_chunk.write_payload(BytesIO(expected))
+    xml_chunk.save()
+
+    streamed = []
+    mock_process_taric_xml_stream.side_effect = lambda stream, *args, **kwargs: (
+        streamed.append(stream.read())
+    )
+
+    tasks.import_chunk(
+        xml_chunk.pk,
+        None,
+        "PUBLISHED",
+        "REVISION_ONLY",
+        valid_user.username,
+    )
+
+    assert xml_chunk.chunk_text == ""
+    assert streamed == [expected]
+
+
 @mock.patch("importer.tasks.process_taric_xml_stream", side_effect=KeyError("test"))
 def test_import_chunk_failed(valid_user, chunk):
     try:
@@ -189,3 +221,166 @@ def test_find_and_run_next_batch_chunks(mock_import_chunk, batch, valid_user):
         valid_user.username,
         record_group=None,
     )
+
+
+@mock.patch("importer.tasks.import_chunk")
+def test_setup_chunk_task_limits_running_chunks(
+    mock_import_chunk,
+    batch,
+    valid_user,
+    settings,
+):
+    """Assert that no chunk is set to run if the batch is already running the
+    maximum number of chunks."""
+    settings.IMPORTER_MAX_RUNNING_CHUNKS = 1
+    factories.ImporterXMLChunkFactory.create(
+        batch=batch,
+        record_code="200",
+        status=ImporterChunkStatus.RUNNING,
+    )
+    chunk = factories.ImporterXMLChunkFactory.create(batch=batch, record_code="205")
+
+    tasks.setup_chunk_task(
+        batch,
+        None,
+        "PUBLISHED",
+        "REVISION_ONLY",
+        valid_user.username,
+        record_code="205",
+    )
+
+    chunk.refresh_from_db()
+    assert chunk.status == ImporterChunkStatus.WAITING
+    mock_import_chunk.delay.assert_not_called()
+
+    settings.IMPORTER_MAX_RUNNING_CHUNKS = 2
+    tasks.setup_chunk_task(
+        batch,
+        None,
+        "PUBLISHED",
+        "REVISION_ONLY",
+        valid_user.username,
+        record_code="205",
+    )
+
+    chunk.refresh_from_db()
+    assert chunk.status == ImporterChunkStatus.RUNNING
+    mock_import_chunk.delay.assert_called_once()
+
+
+def test_get_unblocked_chunk_filters(batch):
+    """Assert that record codes and chapters run once the record codes and
+    chapters they depend on are done."""
+    batch.split_job = True
+    batch.save()
+    for record_code, chapter, chunk_number, status in [
+        ("200", None, 1, ImporterChunkStatus.DONE),
+        ("205", None, 1, ImporterChunkStatus.WAITING),
+        ("400", "01", 1, ImporterChunkStatus.WAITING),
+        ("400", "02", 1, ImporterChunkStatus.DONE),
+        ("430", "01", 1, ImporterChunkStatus.WAITING),
+        ("430", "02", 1, ImporterChunkStatus.WAITING),
+        ("430", "02", 2, ImporterChunkStatus.WAITING),
+    ]:
+        factories.ImporterXMLChunkFactory.create(
+            batch=batch,
+            record_code=record_code,
+            chapter=chapter,
+            chunk_number=chunk_number,
+            status=status,
+        )
+
+    assert tasks.get_unblocked_chunk_filters(batch) == [
+        {"record_code": "205", "chapter": None},
+        {"record_code": "400", "chapter": "01"},
+    ]
+
+    batch.chunks.filter(record_code="205").update(status=ImporterChunkStatus.DONE)
+
+    assert tasks.get_unblocked_chunk_filters(batch) == [
+        {"record_code": "400", "chapter": "01"},
+        {"record_code": "430", "chapter": "02", "chunk_number": 1},
+        {"record_code": "430", "chapter": "02", "chunk_number": 2},
+    ]
+
+
+@mock.patch("importer.tasks.import_chunk")
+def test_find_and_run_next_batch_chunks_split_job(mock_import_chunk, batch, valid_user):
+    """Assert that a split batch sets every unblocked group of chunks to run,
+    one chunk at a time per group."""
+    batch.split_job = True
+    batch.save()
+    for record_code, chunk_number in [("200", 1), ("200", 2), ("205", 1)]:
+        factories.ImporterXMLChunkFactory.create(
+            batch=batch,
+            record_code=record_code,
+            chunk_number=chunk_number,
+        )
+
+    tasks.find_and_run_next_batch_chunks(
+        batch,
+        None,
+        "PUBLISHED",
+        "REVISION_ONLY",
+        valid_user.username,
+    )
+
+    assert sorted(
+        batch.chunks.values_list("record_code", "chunk_number", "status"),
+    ) == [
+        ("200", 1, ImporterChunkStatus.RUNNING),
+        ("200", 2, ImporterChunkStatus.WAITING),
+        ("205", 1, ImporterChunkStatus.RUNNING),
+    ]
+    assert mock_import_chunk.delay.call_count == 2
+
+
+@mock.patch("importer.tasks.process_taric_xml_stream")
+def test_import_chunk_skips_imported_chunk(
+    mock_process_taric_xml_stream,
+    valid_user,
+    chunk,
+):
+    chunk.status = ImporterChunkStatus.DONE
+    chunk.save()
+
+    tasks.import_chunk(
+        chunk.pk,
+        None,
+        "PUBLISHED",
+        "REVISION_ONLY",
+        valid_user.username,
+    )
+
+    mock_process_taric_xml_stream.assert_not_called()
+
+
+@mock.patch("importer.tasks.find_and_run_next_batch_chunks")
+def test_import_chunk_after_batch_failed(
+    mock_find_and_run: mock.MagicMock,
+    valid_user,
+    chunk,
+    object_nursery,
+):
+    """Assert that a chunk finishing after another chunk of its batch failed
+    leaves the batch failed."""
+    factories.ImporterXMLChunkFactory.create(
+        batch=chunk.batch,
+        chunk_number=2,
+        status=ImporterChunkStatus.ERRORED,
+    )
+    chunk.batch.failed()
+    chunk.batch.save()
+
+    tasks.import_chunk(
+        chunk.pk,
+        None,
+        "PUBLISHED",
+        "REVISION_ONLY",
+        valid_user.username,
+    )
+
+    chunk.refresh_from_db()
+    chunk.batch.refresh_from_db()
+    assert chunk.status == ImporterChunkStatus.DONE
+    assert chunk.batch.status == ImportBatchStatus.FAILED
@@ -1,3 +1,5 @@
+import graphlib
+
 import pytest
 
 from importer import utils
@@ -52,3 +54,15 @@ def test_get_subrecords():
 )
 def test_col(label, index):
     assert utils.col(label) == index
+
+
+def test_build_dependency_tree_has_no_cycles():
+    """Asserts that the record codes in the dependency tree can be put in an
+    order where every record code comes after the codes it depends on."""
+    dependency_tree = utils.build_dependency_tree()
+
+    order = list(graphlib.TopologicalSorter(dependency_tree).static_order())
+
+    assert order.index("400") < order.index("430")
+    assert "400" in dependency_tree["430"]
+    assert "430" not in dependency_tree["400"]
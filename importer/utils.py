@@ -12,7 +12,7 @@ from typing import TypedDict
 from django.db.models.query_utils import DeferredAttribute
 
 from common.models import TrackedModel
-from common.models.tracked_utils import get_relations
+from common.models.tracked_utils import get_models_linked_to
 
 
 def col(label: str) -> int:
@@ -109,8 +109,9 @@ def build_dependency_tree(use_subrecord_codes: bool = False) -> Dict[str, Set[st
     The return value is a dictionary, mapped by record code, where the mapped values
     are sets listing all the other record codes the mapped record code depends on.
 
-    A dependency is defined as any foreign key relationship to another record code.
-    An example output is given below.
+    A dependency is defined as any foreign key on the model to another record
+    code. Reverse relations are not dependencies, so that two record codes
+    never depend on each other. An example output is given below.
 
     .. code:: python
 
@@ -132,7 +133,7 @@ def build_dependency_tree(use_subrecord_codes: bool = False) -> Dict[str, Set[st
             if record_code not in dependency_map:
                 dependency_map[record_code] = set()
 
-            for relation in get_relations(subclass).values():
+            for relation in get_models_linked_to(subclass).values():
                 relation_codes = get_record_codes(relation)
 
                 for relation_code in relation_codes:
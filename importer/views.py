@@ -263,8 +263,8 @@ class DownloadGoodsReportMixin:
 
         with NamedTemporaryFile(suffix=".xlsx") as tmp:
             reporter = GoodsReporter(import_batch.taric_file)
-            goods_report = reporter.create_report()
-            goods_report.xlsx_file(tmp)
+            reporter.write_xlsx(tmp)
+            tmp.seek(0)
             file_content = tmp.read()
 
         response = HttpResponse(file_content)
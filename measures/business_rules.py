@@ -1,13 +1,26 @@
 """Business rules for measures."""
 
+import threading
+from contextlib import contextmanager
 from datetime import date
+from datetime import timedelta
+from typing import Dict
+from typing import Iterable
+from typing import List
 from typing import Mapping
+from typing import NamedTuple
 from typing import Optional
+from typing import Tuple
 
 from dateutil.relativedelta import relativedelta
+from django.conf import settings
+from django.contrib.contenttypes.models import ContentType
 from django.db.models import Q
 from django.db.utils import DataError
 
+from checks.dependencies import ReadRecorder
+from checks.dependencies import add_reads
+from checks.dependencies import record_reads
 from common.business_rules import BusinessRule
 from common.business_rules import ExclusionMembership
 from common.business_rules import FootnoteApplicability
@@ -20,13 +33,27 @@ from common.business_rules import only_applicable_after
 from common.business_rules import skip_when_deleted
 from common.models.utils import override_current_transaction
 from common.util import TaricDateRange
+from common.util import maybe_max
+from common.util import maybe_min
 from common.util import validity_range_contains_range
 from common.validators import ApplicabilityCode
+from common.validators import UpdateType
 from geo_areas.validators import AreaCode
 from measures.querysets import MeasuresQuerySet
 from quotas.models import QuotaOrderNumberOrigin
 from quotas.validators import AdministrationMechanism
 
+# The ME32 clashes worked out for the workbasket being checked by this thread.
+# See ``ME32.preload``.
+_preloaded = threading.local()
+
+
+class PreloadedClashes(NamedTuple):
+    workbasket_id: int
+    clashes: Dict[int, List]
+    reads: ReadRecorder
+
+
 # 140 - MEASURE TYPE SERIES
 
 
@@ -378,6 +405,58 @@ class ME32(BusinessRule):
 
         return query
 
+    related_fields = (
+        "measure_type",
+        "geographical_area",
+        "order_number",
+        "additional_code",
+        "goods_nomenclature",
+    )
+    """The relations compared when matching measures in memory, which are loaded
+    up front by ``clashes_in_bulk``."""
+
+    @staticmethod
+    def matches(measure, other) -> bool:
+        """
+        Returns True if `other` would be found by filtering with the query built
+        by ``compile_query(measure)``.
+
+        This is the in-memory equivalent of ``compile_query`` used by
+        ``clashes_in_bulk``.
+        """
+
+        def sid(obj):
+            return obj.sid if obj is not None else None
+
+        if (
+            other.measure_type.sid != measure.measure_type.sid
+            or other.geographical_area.sid != measure.geographical_area.sid
+            or other.reduction != measure.reduction
+        ):
+            return False
+
+        if measure.order_number is not None:
+            if sid(other.order_number) != measure.order_number.sid:
+                return False
+        elif measure.dead_order_number is not None:
+            if other.dead_order_number != measure.dead_order_number:
+                return False
+        elif other.order_number is not None or other.dead_order_number is not None:
+            return False
+
+        if measure.additional_code is not None:
+            if sid(other.additional_code) != measure.additional_code.sid:
+                return False
+        elif measure.dead_additional_code is not None:
+            if other.dead_additional_code != measure.dead_additional_code:
+                return False
+        elif (
+            other.additional_code is not None or other.dead_additional_code is not None
+        ):
+            return False
+
+        return True
+
     def clashing_measures(self, measure) -> MeasuresQuerySet:
         """
         Returns all of the measures that clash with the passed measure over its
@@ -399,13 +478,233 @@ class ME32(BusinessRule):
 
         return clashing_measures
 
+    def clashes_in_bulk(self, measures: Iterable) -> Dict[int, List]:
+        """
+        Returns the measures that clash with each of the passed measures, keyed
+        by the primary key of the passed measure.
+
+        This finds the same clashes as calling ``clashing_measures`` on each
+        measure in turn. But rather than querying for the overlapping measures
+        of each measure separately, each commodity tree is loaded once, the
+        measures on the branches of all of the measures sharing that tree are
+        loaded with one query, and the clashes are then found in memory.
+        """
+        from measures.models import Measure
+        from measures.snapshots import CommodityTreeCache
+        from measures.snapshots import MeasureSnapshot
+
+        measures = list(
+            Measure.objects.with_validity_field()
+            .filter(pk__in=[measure.pk for measure in measures])
+            .select_related(*self.related_fields)
+            .order_by("pk"),
+        )
+
+        # Work out which snapshots each measure needs, and which branch of the
+        # commodity tree in each snapshot could hold clashing measures.
+        trees = CommodityTreeCache(self.transaction)
+        snapshots: Dict[int, MeasureSnapshot] = {}
+        branches: Dict[int, List[Tuple[object, List, List]]] = {}
+        clashes: Dict[int, List[List]] = {}
+        for measure in measures:
+            clashes[measure.pk] = []
+            for snapshot in MeasureSnapshot.get_snapshots(
+                measure,
+                self.transaction,
+                trees,
+            ):
+                found: List = []
+                clashes[measure.pk].append(found)
+
+                commodity = snapshot.tree.get_commodity(
+                    measure.goods_nomenclature.item_id,
+                    measure.goods_nomenclature.suffix,
+                )
+                if not commodity:
+                    continue
+
+                branch = [
+                    commodity,
+                    *snapshot.tree.get_ancestors(commodity),
+                    *snapshot.tree.get_descendants(commodity),
+                ]
+                snapshots.setdefault(id(snapshot.tree), snapshot)
+                branches.setdefault(id(snapshot.tree), []).append(
+                    (measure, found, branch),
+                )
+
+        for key, snapshot in snapshots.items():
+            commodities = {
+                commodity for _, _, branch in branches[key] for commodity in branch
+            }
+            candidates_by_sid: Dict[int, List] = {}
+            for candidate in (
+                snapshot.get_measures(*commodities)
+                .with_effective_valid_between()
+                .select_related(*self.related_fields, "transaction")
+            ):
+                candidates_by_sid.setdefault(
+                    candidate.goods_nomenclature.sid,
+                    [],
+                ).append(candidate)
+
+            for measure, found, branch in branches[key]:
+                valid_between = measure.effective_valid_between
+                for commodity in branch:
+                    found.extend(
+                        candidate
+                        for candidate in candidates_by_sid.get(commodity.obj.sid, [])
+                        if candidate.version_group_id != measure.version_group_id
+                        and _date_ranges_overlap(
+                            candidate.db_effective_valid_between,
+                            valid_between,
+                        )
+                        and self.matches(measure, candidate)
+                    )
+
+        return {
+            pk: [clash for found in per_snapshot for clash in found]
+            for pk, per_snapshot in clashes.items()
+        }
+
+    @classmethod
+    def clashes_in_workbasket(cls, workbasket) -> Dict[int, List]:
+        """
+        Returns the measures that clash with the measures in the passed
+        workbasket, keyed by the primary key of the measure in the workbasket,
+        using one call to ``clashes_in_bulk`` for the whole workbasket.
+
+        The clashes are found as at the last transaction of the workbasket, and
+        those in later transactions of the workbasket than each measure are then
+        left out, which gives the same result as checking each measure as at its
+        own transaction so long as nothing but new measures follow it. Measures
+        that are followed by any other change (e.g. an update to a measure or a
+        commodity) are not included, and need to be checked on their own.
+        """
+        from measures.models import FootnoteAssociationMeasure
+        from measures.models import Measure
+        from measures.models import MeasureComponent
+        from measures.models import MeasureCondition
+        from measures.models import MeasureConditionComponent
+        from measures.models import MeasureExcludedGeographicalArea
+
+        last_transaction = workbasket.transactions.last()
+        if last_transaction is None:
+            return {}
+
+        new_measure_types = ContentType.objects.get_for_models(
+            Measure,
+            MeasureComponent,
+            MeasureCondition,
+            MeasureConditionComponent,
+            MeasureExcludedGeographicalArea,
+            FootnoteAssociationMeasure,
+        ).values()
+        last_other_change = (
+            workbasket.tracked_models.exclude(
+                update_type=UpdateType.CREATE,
+                polymorphic_ctype__in=new_measure_types,
+            )
+            .order_by("transaction__partition", "transaction__order")
+            .values_list("transaction__partition", "transaction__order")
+            .last()
+        )
+
+        measures = (
+            Measure.objects.filter(transaction__workbasket=workbasket)
+            .exclude(update_type=UpdateType.DELETE)
+            .exclude(goods_nomenclature__isnull=True)
+            .select_related("transaction")
+        )
+        if last_other_change is not None:
+            partition, order = last_other_change
+            measures = measures.filter(
+                Q(transaction__partition__gt=partition)
+                | Q(transaction__partition=partition, transaction__order__gte=order),
+            )
+        measures = list(measures)
+        if not measures:
+            return {}
+
+        with override_current_transaction(last_transaction):
+            found = cls(last_transaction).clashes_in_bulk(measures)
+
+        def position(transaction):
+            return transaction.partition, transaction.order
+
+        return {
+            measure.pk: [
+                clash
+                for clash in found[measure.pk]
+                if clash.transaction.workbasket_id != workbasket.pk
+                or position(clash.transaction) <= position(measure.transaction)
+            ]
+            for measure in measures
+        }
+
+    @classmethod
+    @contextmanager
+    def preload(cls, workbasket):
+        """
+        Works out the clashes for the measures in the passed workbasket at once
+        using ``clashes_in_workbasket``, so that validating them while checking
+        the workbasket inside this context doesn't need to query for the clashes
+        of each measure separately.
+
+        The reads made while working out the clashes are recorded, and are
+        added to the reads of any check that uses them (see
+        ``checks.dependencies.add_reads``), so that the check is invalidated
+        by changes to the measures and commodities they depend on.
+
+        Nothing is preloaded unless the workbasket has at least
+        ``settings.ME32_BULK_THRESHOLD`` measures.
+        """
+        from measures.models import Measure
+
+        if (
+            not settings.ME32_BULK_THRESHOLD
+            or Measure.objects.filter(transaction__workbasket=workbasket).count()
+            < settings.ME32_BULK_THRESHOLD
+        ):
+            yield
+            return
+
+        with record_reads() as reads:
+            clashes = cls.clashes_in_workbasket(workbasket)
+
+        previous = getattr(_preloaded, "clashes", None)
+        _preloaded.clashes = PreloadedClashes(workbasket.pk, clashes, reads)
+        try:
+            yield
+        finally:
+            _preloaded.clashes = previous
+
+    def preloaded_clashes(self, measure) -> Optional[List]:
+        """Returns the clashes of the passed measure worked out by ``preload``
+        for the workbasket being checked, or None if there are none, recording
+        the reads they depend on if they are used."""
+        preloaded = getattr(_preloaded, "clashes", None)
+        if preloaded is None or preloaded.workbasket_id != getattr(
+            self.transaction,
+            "workbasket_id",
+            None,
+        ):
+            return None
+
+        clashes = preloaded.clashes.get(measure.pk)
+        if clashes is not None:
+            add_reads(preloaded.reads)
+        return clashes
+
     def validate(self, measure):
         if measure.goods_nomenclature is None:
             return
 
-        clashing_measures = self.clashing_measures(measure)
+        clashing_measures = self.preloaded_clashes(measure)
+        if clashing_measures is None:
+            clashing_measures = self.clashing_measures(measure)
 
-        if clashing_measures.exists():
+        if any(clashing_measures):
             message = self.violation(measure).default_message() + " \n"
 
             for clashing_measure in clashing_measures:
@@ -414,6 +713,32 @@ class ME32(BusinessRule):
             raise self.violation(measure, message)
 
 
+def _date_ranges_overlap(a, b) -> bool:
+    """
+    Returns True if two date ranges have at least one day in common.
+
+    Unlike ``common.util.date_ranges_overlap`` this respects the bounds of each
+    range, as ranges loaded from the database have exclusive upper bounds.
+    """
+
+    def inclusive_bounds(date_range):
+        lower, upper = date_range.lower, date_range.upper
+        if lower is not None and not date_range.lower_inc:
+            lower += timedelta(days=1)
+        if upper is not None and not date_range.upper_inc:
+            upper -= timedelta(days=1)
+        return lower, upper
+
+    if a.isempty or b.isempty:
+        return False
+
+    a_lower, a_upper = inclusive_bounds(a)
+    b_lower, b_upper = inclusive_bounds(b)
+    lower = maybe_max(a_lower, b_lower)
+    upper = maybe_min(a_upper, b_upper)
+    return lower is None or upper is None or lower <= upper
+
+
 # -- Ceiling/quota definition existence
 
 
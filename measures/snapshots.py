@@ -1,7 +1,12 @@
 from dataclasses import dataclass
+from datetime import date
 from datetime import timedelta
+from typing import Dict
+from typing import Optional
+from typing import Tuple
 
 from commodities.models.dc import Commodity
+from commodities.models.dc import CommodityCollection
 from commodities.models.dc import CommodityCollectionLoader
 from commodities.models.dc import CommodityTreeSnapshot
 from commodities.models.dc import SnapshotMoment
@@ -10,6 +15,36 @@ from measures.models import Measure
 from measures.querysets import MeasuresQuerySet
 
 
+class CommodityTreeCache:
+    """
+    Loads the commodity collection for each chapter, and each snapshot of the
+    commodity tree taken from it, at most once as at the passed transaction.
+
+    Sharing one cache between calls to ``MeasureSnapshot.get_snapshots`` for
+    many measures means measures on the same chapter don't each reload it.
+    """
+
+    def __init__(self, transaction: Transaction):
+        self.transaction = transaction
+        self._collections: Dict[str, CommodityCollection] = {}
+        self._trees: Dict[Tuple[str, date], CommodityTreeSnapshot] = {}
+
+    def get_snapshot(self, chapter: str, snapshot_date: date) -> CommodityTreeSnapshot:
+        key = (chapter, snapshot_date)
+        if key not in self._trees:
+            if chapter not in self._collections:
+                self._collections[chapter] = CommodityCollectionLoader(
+                    prefix=chapter,
+                ).load()
+
+            self._trees[key] = self._collections[chapter].get_snapshot(
+                self.transaction,
+                snapshot_date,
+            )
+
+        return self._trees[key]
+
+
 @dataclass
 class MeasureSnapshot:
     """Represents a set of measures that apply to a part of the commodity tree
@@ -71,6 +106,7 @@ class MeasureSnapshot:
         cls,
         measure: Measure,
         transaction: Transaction,
+        trees: Optional[CommodityTreeCache] = None,
     ) -> "MeasureSnapshot":
         """
         Generator that yields a MeasureSnapshot for each commodity tree that
@@ -79,12 +115,15 @@ class MeasureSnapshot:
         It is possible for the commodity tree to change over the lifetime of the
         measure, so this method will yield a snapshot for each of the commodity
         trees that existed over that lifetime.
+
+        A ``CommodityTreeCache`` for the same transaction can be passed to reuse
+        commodity trees already loaded for other measures.
         """
 
-        collection = CommodityCollectionLoader(
-            prefix=measure.goods_nomenclature.code.chapter,
-        ).load()
+        if trees is None:
+            trees = CommodityTreeCache(transaction)
 
+        chapter = measure.goods_nomenclature.code.chapter
         snapshot_date = measure.effective_valid_between.lower
 
         while True:
@@ -92,7 +131,7 @@ class MeasureSnapshot:
             # since measure date ranges are used to filter the comm code tree.
             snapshot = MeasureSnapshot(
                 SnapshotMoment(transaction, None),
-                collection.get_snapshot(transaction, snapshot_date),
+                trees.get_snapshot(chapter, snapshot_date),
             )
 
             yield snapshot
@@ -0,0 +1,79 @@
+import pytest
+
+from common.tests import factories
+from common.tests.util import QueryCounter
+from common.tests.util import time_best_of
+from measures.business_rules import ME32
+
+pytestmark = [pytest.mark.django_db, pytest.mark.benchmark]
+
+MEASURES = 20
+
+
+@pytest.fixture
+def measures_on_one_chapter(benchmark_scale, date_ranges):
+    """
+    Returns draft measures on commodities in the same chapter, each of which
+    shares its commodity with an approved measure that it may clash with.
+
+    Use ``--benchmark-scale`` to grow the number of measures.
+    """
+    transaction = factories.UnapprovedTransactionFactory.create()
+    measures = []
+    for i in range(MEASURES * benchmark_scale):
+        approved = factories.MeasureFactory.create(
+            goods_nomenclature__item_id=f"01{i:06d}00",
+            goods_nomenclature__valid_between=date_ranges.big,
+            valid_between=date_ranges.normal,
+        )
+        measures.append(
+            factories.MeasureFactory.create(
+                transaction=transaction,
+                goods_nomenclature=approved.goods_nomenclature,
+                measure_type=approved.measure_type,
+                geographical_area=approved.geographical_area,
+                order_number=approved.order_number,
+                additional_code=approved.additional_code,
+                reduction=approved.reduction,
+                # Only every other measure overlaps its approved measure.
+                valid_between=(
+                    date_ranges.overlap_normal if i % 2 else date_ranges.later
+                ),
+            ),
+        )
+    return transaction, measures
+
+
+def test_me32_bulk_evaluation(measures_on_one_chapter, record_property):
+    """Compare finding ME32 clashes one measure at a time against finding them
+    for every measure in a single pass."""
+    transaction, measures = measures_on_one_chapter
+    rule = ME32(transaction)
+
+    def per_measure():
+        return {
+            measure.pk: sorted(clash.pk for clash in rule.clashing_measures(measure))
+            for measure in measures
+        }
+
+    def in_bulk():
+        return {
+            pk: sorted(clash.pk for clash in clashes)
+            for pk, clashes in rule.clashes_in_bulk(measures).items()
+        }
+
+    with QueryCounter() as per_measure_queries:
+        expected = per_measure()
+    with QueryCounter() as bulk_queries:
+        assert in_bulk() == expected
+    assert any(expected.values())
+
+    per_measure_seconds = time_best_of(per_measure)
+    bulk_seconds = time_best_of(in_bulk)
+
+    record_property("measures", len(measures))
+    record_property("per_measure_queries", per_measure_queries.count)
+    record_property("bulk_queries", bulk_queries.count)
+    record_property("per_measure_seconds", per_measure_seconds)
+    record_property("bulk_seconds", bulk_seconds)
+    record_property("speedup", per_measure_seconds / bulk_seconds)
@@ -1,8 +1,10 @@
 from datetime import date
 from datetime import timedelta
+from unittest import mock
 
 import pytest
 
+from checks.models import TransactionCheck
 from commodities.models import GoodsNomenclature
 from commodities.models.dc import CommodityCollectionLoader
 from common.business_rules import BusinessRuleViolation
@@ -13,6 +15,7 @@ from common.util import TaricDateRange
 from common.validators import UpdateType
 from measures import business_rules
 from measures.models import Measure
+from workbaskets.tasks import check_workbasket_sync
 
 pytestmark = pytest.mark.django_db
 
@@ -277,3 +280,114 @@ def test_ME32_works_with_wonky_archived_measure(seed_database_with_indented_good
     assert result is None
     assert Measure.objects.all().count() == 2
     assert wonky_archived_measure.generating_regulation == old_regulation
+
+
+def test_ME32_clashes_in_bulk_match_clashing_measures(related_measure_data):
+    """The batch evaluator finds exactly the clashes that the per-measure query
+    finds."""
+    related_data, _ = related_measure_data
+    related = factories.MeasureFactory.create(**related_data)
+    others = factories.MeasureFactory.create_batch(
+        2,
+        goods_nomenclature=related.goods_nomenclature,
+        measure_type=related.measure_type,
+        geographical_area=related.geographical_area,
+        transaction=related.transaction,
+    )
+
+    rule = business_rules.ME32(related.transaction)
+    clashes = rule.clashes_in_bulk([related, *others])
+
+    for measure in (related, *others):
+        expected = sorted(m.pk for m in rule.clashing_measures(measure))
+        assert sorted(m.pk for m in clashes[measure.pk]) == expected
+
+
+def test_ME32_validates_with_preloaded_clashes(related_measure_data, settings):
+    settings.ME32_BULK_THRESHOLD = 1
+    related_data, error_expected = related_measure_data
+    related = factories.MeasureFactory.create(**related_data)
+
+    rule = business_rules.ME32(related.transaction)
+    with business_rules.ME32.preload(related.transaction.workbasket):
+        assert related.pk in business_rules._preloaded.clashes.clashes
+        with raises_if(BusinessRuleViolation, error_expected):
+            rule.validate(related)
+
+    assert business_rules._preloaded.clashes is None
+
+
+def test_ME32_preloaded_pass_is_invalidated_by_approved_indent(settings):
+    """A check that used preloaded clashes records the reads made to work them
+    out, so approving a change to the commodity tree invalidates it."""
+    settings.ME32_BULK_THRESHOLD = 1
+    factories.ApprovedTransactionFactory.create()
+    measure = factories.MeasureFactory.create(
+        transaction=factories.UnapprovedTransactionFactory.create(),
+    )
+
+    with mock.patch.object(
+        business_rules.ME32,
+        "clashing_measures",
+        side_effect=AssertionError("ME32 was not preloaded"),
+    ):
+        check_workbasket_sync(measure.transaction.workbasket)
+
+    check = TransactionCheck.objects.get(transaction=measure.transaction)
+    assert check.read_set_recorded
+    assert TransactionCheck.objects.filter(pk=check.pk).current().exists()
+
+    factories.GoodsNomenclatureIndentFactory.create(
+        indented_goods_nomenclature=measure.goods_nomenclature,
+        transaction=factories.ApprovedTransactionFactory.create(),
+    )
+
+    assert not TransactionCheck.objects.filter(pk=check.pk).current().exists()
+
+
+def test_ME32_clashes_in_workbasket_as_at_each_transaction():
+    """Measures in the workbasket only clash with those that come before them,
+    as they would when checked as at their own transaction."""
+    earlier = factories.MeasureFactory.create()
+    later = factories.MeasureFactory.create(
+        goods_nomenclature=earlier.goods_nomenclature,
+        measure_type=earlier.measure_type,
+        geographical_area=earlier.geographical_area,
+        order_number=earlier.order_number,
+        additional_code=earlier.additional_code,
+        reduction=earlier.reduction,
+        valid_between=earlier.valid_between,
+        transaction=earlier.transaction.workbasket.new_transaction(),
+    )
+
+    clashes = business_rules.ME32.clashes_in_workbasket(earlier.transaction.workbasket)
+
+    for measure in (earlier, later):
+        expected = business_rules.ME32(measure.transaction).clashing_measures(measure)
+        assert sorted(m.pk for m in clashes[measure.pk]) == sorted(
+            m.pk for m in expected
+        )
+    assert [m.pk for m in clashes[later.pk]] == [earlier.pk]
+
+
+def test_ME32_clashes_in_workbasket_skips_measures_followed_by_other_changes():
+    measure = factories.MeasureFactory.create()
+    factories.GoodsNomenclatureFactory.create(
+        transaction=measure.transaction.workbasket.new_transaction(),
+    )
+
+    clashes = business_rules.ME32.clashes_in_workbasket(measure.transaction.workbasket)
+
+    assert measure.pk not in clashes
+
+
+@pytest.mark.parametrize(
+    ("threshold", "preloaded"),
+    ((0, False), (2, False), (1, True)),
+)
+def test_ME32_preload_threshold(threshold, preloaded, settings):
+    settings.ME32_BULK_THRESHOLD = threshold
+    measure = factories.MeasureFactory.create()
+
+    with business_rules.ME32.preload(measure.transaction.workbasket):
+        assert (business_rules._preloaded.clashes is not None) == preloaded
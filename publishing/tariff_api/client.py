@@ -1,19 +1,159 @@
+import logging
+import os
+import random
+import time
+from typing import Callable
+from typing import Optional
+
 import requests
 from django.conf import settings
 from requests import Response
+from requests.adapters import HTTPAdapter
+from urllib3.exceptions import NewConnectionError
 
 from publishing.models.envelope import Envelope
 from publishing.models.envelope import EnvelopeId
 
+logger = logging.getLogger(__name__)
+
 
 class TariffAPIClient:
-    def __init__(self) -> None:
+    """
+    Calls the Tariff API through a pooled `requests.Session`, so that the
+    connection to the API is kept alive between envelopes.
+
+    GETs that time out, fail to connect or get a response in
+    `RETRY_STATUS_CODES` are retried up to
+    `settings.CROWN_DEPENDENCIES_API_REQUEST_RETRIES` times, waiting a random
+    time of up to `settings.CROWN_DEPENDENCIES_API_REQUEST_BACKOFF` seconds,
+    doubling with each attempt to at most
+    `settings.CROWN_DEPENDENCIES_API_REQUEST_BACKOFF_MAX` seconds. Posts are
+    retried in the same way only when they can't have been received, see
+    `request`.
+    """
+
+    TIMEOUT = 60
+
+    # Responses which mean the API is temporarily unable to handle a request.
+    RETRY_STATUS_CODES = frozenset({429, 502, 503, 504})
+
+    # Responses which mean the API has not acted on a request, so that it is
+    # safe to send it again.
+    NOT_HANDLED_STATUS_CODES = frozenset({429, 503})
+
+    def __init__(self, session: Optional[requests.Session] = None) -> None:
         self.api_host = settings.CROWN_DEPENDENCIES_API_HOST
         self.api_url_path = settings.CROWN_DEPENDENCIES_API_URL_PATH
 
         self.get_api_key = settings.CROWN_DEPENDENCIES_GET_API_KEY
         self.post_api_key = settings.CROWN_DEPENDENCIES_POST_API_KEY
 
+        self.max_retries = settings.CROWN_DEPENDENCIES_API_REQUEST_RETRIES
+        self.backoff = settings.CROWN_DEPENDENCIES_API_REQUEST_BACKOFF
+        self.backoff_max = settings.CROWN_DEPENDENCIES_API_REQUEST_BACKOFF_MAX
+
+        self.session = session or self.make_session()
+
+    @classmethod
+    def make_session(cls) -> requests.Session:
+        session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=2)
+        session.mount("http://", adapter)
+        session.mount("https://", adapter)
+        return session
+
+    def retry_delay(self, attempt: int) -> float:
+        """Returns how long to wait, in seconds, before retrying a request that
+        has failed `attempt` times, with full jitter."""
+        return random.uniform(0, min(self.backoff_max, self.backoff * 2**attempt))
+
+    @classmethod
+    def was_not_handled(
+        cls,
+        response: Optional[Response],
+        error: Optional[Exception],
+    ) -> bool:
+        """Returns whether a failed request can't have been acted on by the API,
+        because it was refused or no connection could be made to send it."""
+        if response is not None:
+            return response.status_code in cls.NOT_HANDLED_STATUS_CODES
+        if isinstance(error, requests.exceptions.ConnectTimeout):
+            return True
+        reason = getattr(error.args[0], "reason", None) if error.args else None
+        return isinstance(reason, NewConnectionError)
+
+    def request(
+        self,
+        method: str,
+        url: str,
+        confirm: Optional[Callable[[], Response]] = None,
+        **kwargs,
+    ) -> Response:
+        """
+        Sends a request on the session, retrying it if the API can't be reached
+        or is temporarily unavailable.
+
+        Only GETs are retried after any failure. Other requests may have been
+        acted on even though they failed, so they are retried straight away only
+        if ``was_not_handled``. After any other failure, `confirm` is called, if
+        given, to GET what the request would have created: if the API has it,
+        that response is returned in place of the failure, and if the API
+        doesn't (400 or 404) the request is retried. Otherwise the failure is
+        raised or returned as it would be without retrying.
+        """
+        attempt = 0
+        while True:
+            response = error = None
+            try:
+                response = self.session.request(
+                    method,
+                    url,
+                    timeout=self.TIMEOUT,
+                    **kwargs,
+                )
+            except (
+                requests.exceptions.ConnectionError,
+                requests.exceptions.Timeout,
+            ) as e:
+                error = e
+            else:
+                if response.status_code not in self.RETRY_STATUS_CODES:
+                    return response
+
+            if attempt >= self.max_retries:
+                return self.failed(response, error)
+
+            if method != "GET" and not self.was_not_handled(response, error):
+                if confirm is None:
+                    return self.failed(response, error)
+                confirmation = confirm()
+                if confirmation.status_code == 200:
+                    return confirmation
+                if confirmation.status_code not in (400, 404):
+                    return self.failed(response, error)
+
+            if error is not None:
+                logger.warning(
+                    f"Tariff API {method} {url} failed, attempt {attempt + 1}.",
+                    exc_info=error,
+                )
+            else:
+                logger.warning(
+                    f"Tariff API {method} {url} returned {response.status_code}, "
+                    f"attempt {attempt + 1}.",
+                )
+
+            time.sleep(self.retry_delay(attempt))
+            attempt += 1
+
+    @staticmethod
+    def failed(response: Optional[Response], error: Optional[Exception]) -> Response:
+        """Returns the response to a request that won't be retried, or raises
+        the error that it failed with."""
+        if error is not None:
+            raise error
+        return response
+
     def get_envelope(self, envelope_id: EnvelopeId) -> Response:
         """Get envelope from Tariff API production environment."""
         full_api_url = self.api_host + self.api_url_path + envelope_id
@@ -22,19 +162,40 @@ class TariffAPIClient:
             "X-API-KEY": self.get_api_key,
         }
 
-        response = requests.get(full_api_url, headers=headers, timeout=60)
-        return response
+        return self.request("GET", full_api_url, headers=headers)
+
+    def read_envelope(self, envelope: Envelope) -> bytes:
+        """Read the XML of an envelope, ready to be posted."""
+        with envelope.xml_file.open(mode="rb") as xml_file:
+            return xml_file.read()
 
-    def post_envelope(self, envelope: Envelope) -> Response:
-        """Upload envelope to Tariff API."""
+    def post_envelope(
+        self,
+        envelope: Envelope,
+        payload: Optional[bytes] = None,
+    ) -> Response:
+        """
+        Upload envelope to Tariff API.
+
+        :param payload: The XML of the envelope, as returned by `read_envelope`,
+            which is read if not given.
+        """
         full_api_url = self.api_host + self.api_url_path + envelope.envelope_id
 
+        if payload is None:
+            payload = self.read_envelope(envelope)
+
         headers = {
             "X-API-KEY": self.post_api_key,
         }
         files = {
-            "file": envelope.xml_file.open(mode="rb"),
+            "file": (os.path.basename(envelope.xml_file.name), payload),
         }
 
-        response = requests.post(full_api_url, headers=headers, files=files, timeout=60)
-        return response
+        return self.request(
+            "POST",
+            full_api_url,
+            confirm=lambda: self.get_envelope(envelope.envelope_id),
+            headers=headers,
+            files=files,
+        )
@@ -1,5 +1,6 @@
 from abc import ABC
 from abc import abstractmethod
+from typing import Optional
 
 from requests import Response
 
@@ -14,9 +15,23 @@ class TariffAPIBase(ABC):
         raise NotImplementedError
 
     @abstractmethod
-    def post_envelope(self, envelope: Envelope) -> Response:
+    def post_envelope(
+        self,
+        envelope: Envelope,
+        payload: Optional[bytes] = None,
+    ) -> Response:
         raise NotImplementedError
 
+    def prepare_envelope(self, envelope: Envelope) -> Optional[bytes]:
+        """
+        Returns the payload to post for an envelope, or None to let
+        `post_envelope` prepare it.
+
+        This is called for the next envelope to publish while the current one is
+        being posted.
+        """
+        return None
+
 
 class TariffAPIStubbed(TariffAPIBase):
     """
@@ -52,7 +67,11 @@ class TariffAPIStubbed(TariffAPIBase):
         """Get envelope from Tariff API."""
         return self.stubbed_get_response(envelope_id=envelope_id)
 
-    def post_envelope(self, envelope: Envelope = None) -> Response:
+    def post_envelope(
+        self,
+        envelope: Envelope = None,
+        payload: Optional[bytes] = None,
+    ) -> Response:
         """Upload envelope to Tariff API."""
         return self.stubbed_post_response(envelope=envelope)
 
@@ -66,6 +85,14 @@ class TariffAPI(TariffAPIBase):
         """Get envelope from Tariff API."""
         return self.client.get_envelope(envelope_id=envelope_id)
 
-    def post_envelope(self, envelope: Envelope) -> Response:
+    def prepare_envelope(self, envelope: Envelope) -> bytes:
+        """Read the envelope's XML from storage."""
+        return self.client.read_envelope(envelope)
+
+    def post_envelope(
+        self,
+        envelope: Envelope,
+        payload: Optional[bytes] = None,
+    ) -> Response:
         """Upload envelope to Tariff API."""
-        return self.client.post_envelope(envelope=envelope)
+        return self.client.post_envelope(envelope=envelope, payload=payload)
@@ -1,6 +1,12 @@
 import logging
 import time
+from concurrent.futures import ThreadPoolExecutor
 from contextlib import contextmanager
+from typing import TYPE_CHECKING
+from typing import Iterable
+from typing import Iterator
+from typing import Optional
+from typing import Tuple
 
 import requests
 from django.conf import settings
@@ -8,6 +14,10 @@ from django.core.cache import cache
 
 from common.celery import app
 
+if TYPE_CHECKING:
+    from publishing.models import PackagedWorkBasket
+    from publishing.tariff_api.interface import TariffAPIBase
+
 logger = logging.getLogger(__name__)
 
 
@@ -136,6 +146,35 @@ class CrownDependenciesException(Exception):
     pass
 
 
+def with_prepared_payloads(
+    interface: "TariffAPIBase",
+    packaged_workbaskets: Iterable["PackagedWorkBasket"],
+) -> Iterator[Tuple["PackagedWorkBasket", Optional[bytes]]]:
+    """
+    Yields each packaged workbasket, in order, with the payload of its envelope
+    from `interface.prepare_envelope`.
+
+    The payload of the next envelope is prepared in a background thread while
+    the caller publishes the current one, so envelopes are still published one
+    at a time and in order.
+    """
+    with ThreadPoolExecutor(
+        max_workers=1,
+        thread_name_prefix="tariff-api-payload",
+    ) as executor:
+        previous = None
+        for packaged_workbasket in packaged_workbaskets:
+            future = executor.submit(
+                interface.prepare_envelope,
+                packaged_workbasket.envelope,
+            )
+            if previous:
+                yield previous[0], previous[1].result()
+            previous = (packaged_workbasket, future)
+        if previous:
+            yield previous[0], previous[1].result()
+
+
 @app.task(
     default_retry_delay=settings.CROWN_DEPENDENCIES_API_DEFAULT_RETRY_DELAY,
     max_retries=settings.CROWN_DEPENDENCIES_API_MAX_RETRIES,
@@ -160,7 +199,10 @@ def publish_to_api():
 
     interface = get_tariff_api_interface()
 
-    def publish(packaged_workbasket: PackagedWorkBasket) -> requests.Response:
+    def publish(
+        packaged_workbasket: PackagedWorkBasket,
+        payload: Optional[bytes] = None,
+    ) -> requests.Response:
         """
         Publish envelope to Tariff API.
 
@@ -170,10 +212,24 @@ def publish_to_api():
         """
         logger.info(f"Publishing: {packaged_workbasket.crown_dependencies_envelope}")
 
+        started = time.perf_counter()
         try:
-            response = interface.post_envelope(envelope=packaged_workbasket.envelope)
+            response = interface.post_envelope(
+                envelope=packaged_workbasket.envelope,
+                payload=payload,
+            )
         except requests.exceptions.Timeout:
             raise CrownDependenciesException("Tariff API timed out")
+        latency = time.perf_counter() - started
+        logger.info(
+            f"Tariff API responded {response.status_code} to envelope "
+            f"{packaged_workbasket.envelope.envelope_id} in {latency:.3f}s",
+            extra={
+                "envelope_id": packaged_workbasket.envelope.envelope_id,
+                "status_code": response.status_code,
+                "latency": latency,
+            },
+        )
         if response.status_code == 200:
             logger.info(
                 f"Successfully published: {packaged_workbasket.crown_dependencies_envelope}",
@@ -291,8 +347,12 @@ def publish_to_api():
                         "Unexpected response from Tariff API.",
                     )
 
-        # Process unpublished packaged workbaskets
-        for unpublished in unpublished_packaged_workbaskets:
+        # Process unpublished packaged workbaskets, in order, reading the next
+        # envelope while the current one is being posted.
+        for unpublished, payload in with_prepared_payloads(
+            interface,
+            unpublished_packaged_workbaskets.select_related("envelope"),
+        ):
             # checks if expected sequence
             if not unpublished.next_expected_to_api():
                 message = f"""Cannot publish PackagedWorkBasket instance to tariff API,
@@ -307,7 +367,7 @@ def publish_to_api():
             unpublished.refresh_from_db()
 
             # publish to api
-            response = publish(unpublished)
+            response = publish(unpublished, payload)
             if response.status_code != 200:
                 publishing_task.error = response.text
                 publishing_task.save()
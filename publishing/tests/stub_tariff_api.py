@@ -0,0 +1,135 @@
+"""
+A local HTTP server that behaves like the Tariff API, for testing and
+benchmarking the Crown Dependencies publisher over real connections.
+
+It answers uploads with the responses of
+:class:`~publishing.tariff_api.interface.TariffAPIStubbed`, and remembers the
+envelopes uploaded to it so that they can be fetched again.
+"""
+
+import threading
+import time
+from http.server import BaseHTTPRequestHandler
+from http.server import ThreadingHTTPServer
+from typing import List
+from typing import Optional
+
+from publishing.tariff_api.interface import TariffAPIStubbed
+
+
+class StubTariffAPIHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    server: "StubTariffAPIServer"
+
+    def log_message(self, format, *args):
+        pass
+
+    @property
+    def envelope_id(self) -> str:
+        return self.path.rstrip("/").rsplit("/", 1)[-1]
+
+    def respond(self, status_code: int, reason: str):
+        body = reason.encode()
+        self.send_response(status_code)
+        self.send_header("Content-Type", "text/plain")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def respond_if_unavailable(self) -> bool:
+        """Responds with the server's `failure_status` if it has been told to
+        fail requests, and returns whether it did."""
+        time.sleep(self.server.latency)
+        if self.server.take_failure():
+            status = self.server.failure_status
+            self.respond(status, f"{status} Service Unavailable")
+            return True
+        return False
+
+    def do_GET(self):
+        self.server.connections.add(self.client_address)
+        if self.respond_if_unavailable():
+            return
+
+        if not self.envelope_id.isdigit():
+            self.respond(400, "400 Bad request [invalid seq]")
+        elif self.envelope_id not in self.server.uploaded:
+            self.respond(404, "404 Taric file does not exist")
+        else:
+            self.respond(200, "200 OK")
+
+    def do_POST(self):
+        self.server.connections.add(self.client_address)
+        body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        uploaded = b'name="file"' in body
+        if uploaded and self.server.upload_before_failing:
+            self.server.upload(self.envelope_id)
+        if self.respond_if_unavailable():
+            return
+        if uploaded and not self.server.upload_before_failing:
+            self.server.upload(self.envelope_id)
+
+        response = TariffAPIStubbed().stubbed_post_response(
+            envelope=self.envelope_id if uploaded else None,
+        )
+        self.respond(response.status_code, response.reason)
+
+
+class StubTariffAPIServer(ThreadingHTTPServer):
+    """
+    Serves the stub Tariff API on a local port in a background thread while used
+    as a context manager.
+
+    :param latency: Seconds to wait before answering each request.
+    :param failures: The number of requests to answer with `failure_status`
+        before answering normally.
+    :param failure_status: The status code of failed requests.
+    :param upload_before_failing: Whether envelopes posted in failed requests
+        are uploaded anyway, as if the failure happened after the upload.
+    """
+
+    daemon_threads = True
+
+    def __init__(
+        self,
+        latency: float = 0.0,
+        failures: int = 0,
+        failure_status: int = 503,
+        upload_before_failing: bool = False,
+    ):
+        super().__init__(("127.0.0.1", 0), StubTariffAPIHandler)
+        self.latency = latency
+        self.failures = failures
+        self.failure_status = failure_status
+        self.upload_before_failing = upload_before_failing
+        self.uploaded: List[str] = []
+        self.connections = set()
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def host(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}/"
+
+    def take_failure(self) -> bool:
+        with self._lock:
+            if self.failures:
+                self.failures -= 1
+                return True
+            return False
+
+    def upload(self, envelope_id: str):
+        with self._lock:
+            self.uploaded.append(envelope_id)
+
+    def __enter__(self) -> "StubTariffAPIServer":
+        self._thread = threading.Thread(target=self.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *args):
+        self.shutdown()
+        self._thread.join()
+        self.server_close()
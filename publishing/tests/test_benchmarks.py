@@ -0,0 +1,55 @@
+import time
+
+import pytest
+
+from publishing.models import PackagedWorkBasket
+from publishing.models.state import ApiPublishingState
+from publishing.tasks import publish_to_api
+from publishing.tests.stub_tariff_api import StubTariffAPIServer
+
+pytestmark = [pytest.mark.django_db, pytest.mark.benchmark]
+
+# The number of envelopes published by the benchmark, before scaling.
+ENVELOPES = 20
+
+# Seconds the stub Tariff API waits before answering each request.
+API_LATENCY = 0.05
+
+
+def test_publish_to_api_throughput(
+    successful_envelope_factory,
+    benchmark_scale,
+    record_property,
+    settings,
+):
+    """Measure the envelopes per second published to a local stub of the Tariff
+    API, which answers each request after API_LATENCY seconds and fails the
+    first requests with 503 as if recovering from an outage."""
+    settings.ENABLE_PACKAGING_NOTIFICATIONS = False
+    settings.TARIFF_API_INTERFACE = "publishing.tariff_api.interface.TariffAPI"
+    settings.CROWN_DEPENDENCIES_API_REQUEST_BACKOFF = 0.01
+    for _ in range(ENVELOPES * benchmark_scale):
+        successful_envelope_factory()
+    packaged_workbaskets = list(PackagedWorkBasket.objects.get_unpublished_to_api())
+
+    with StubTariffAPIServer(latency=API_LATENCY, failures=2) as server:
+        settings.CROWN_DEPENDENCIES_API_HOST = server.host
+        started = time.perf_counter()
+        publish_to_api()
+        seconds = time.perf_counter() - started
+
+    assert server.uploaded == [
+        packaged_workbasket.envelope.envelope_id
+        for packaged_workbasket in packaged_workbaskets
+    ]
+    for packaged_workbasket in packaged_workbaskets:
+        packaged_workbasket.refresh_from_db()
+        assert (
+            packaged_workbasket.crown_dependencies_envelope.publishing_state
+            == ApiPublishingState.SUCCESSFULLY_PUBLISHED
+        )
+
+    record_property("envelopes", len(packaged_workbaskets))
+    record_property("connections", len(server.connections))
+    record_property("seconds", seconds)
+    record_property("envelopes_per_second", len(packaged_workbaskets) / seconds)
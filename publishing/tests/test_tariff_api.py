@@ -0,0 +1,118 @@
+from types import SimpleNamespace
+
+import pytest
+
+from publishing.tariff_api.client import TariffAPIClient
+from publishing.tests.stub_tariff_api import StubTariffAPIServer
+
+
+@pytest.fixture
+def stub_server(settings):
+    settings.CROWN_DEPENDENCIES_API_REQUEST_RETRIES = 2
+    settings.CROWN_DEPENDENCIES_API_REQUEST_BACKOFF = 0.01
+    settings.CROWN_DEPENDENCIES_API_REQUEST_BACKOFF_MAX = 0.05
+    with StubTariffAPIServer() as server:
+        settings.CROWN_DEPENDENCIES_API_HOST = server.host
+        yield server
+
+
+def make_envelope(envelope_id):
+    return SimpleNamespace(
+        envelope_id=envelope_id,
+        xml_file=SimpleNamespace(name=f"envelope/DIT{envelope_id}.xml"),
+    )
+
+
+def test_post_envelope_uploads_payload(stub_server):
+    client = TariffAPIClient()
+
+    response = client.post_envelope(make_envelope("230001"), payload=b"<xml/>")
+
+    assert response.status_code == 200
+    assert stub_server.uploaded == ["230001"]
+    assert client.get_envelope("230001").status_code == 200
+    assert client.get_envelope("230002").status_code == 404
+
+
+def test_client_keeps_connection_alive(stub_server):
+    client = TariffAPIClient()
+
+    for envelope_id in ("230001", "230002", "230003"):
+        client.post_envelope(make_envelope(envelope_id), payload=b"<xml/>")
+        client.get_envelope(envelope_id)
+
+    assert len(stub_server.connections) == 1
+
+
+def test_client_retries_unavailable_api(stub_server):
+    stub_server.failures = 2
+
+    response = TariffAPIClient().post_envelope(
+        make_envelope("230001"),
+        payload=b"<xml/>",
+    )
+
+    assert response.status_code == 200
+    assert stub_server.failures == 0
+    assert stub_server.uploaded == ["230001"]
+
+
+def test_client_stops_retrying(stub_server):
+    stub_server.failures = 5
+
+    response = TariffAPIClient().get_envelope("230001")
+
+    assert response.status_code == 503
+    assert stub_server.failures == 2
+
+
+@pytest.mark.parametrize("attempt", range(10))
+def test_retry_delay_is_bounded(settings, attempt):
+    settings.CROWN_DEPENDENCIES_API_REQUEST_BACKOFF = 1
+    settings.CROWN_DEPENDENCIES_API_REQUEST_BACKOFF_MAX = 30
+    client = TariffAPIClient()
+
+    assert 0 <= client.retry_delay(attempt) <= min(30, 2**attempt)
+
+
+def test_client_does_not_repost_received_envelope(stub_server):
+    stub_server.failures = 1
+    stub_server.failure_status = 502
+    stub_server.upload_before_failing = True
+
+    response = TariffAPIClient().post_envelope(
+        make_envelope("230001"),
+        payload=b"<xml/>",
+    )
+
+    assert response.status_code == 200
+    assert stub_server.uploaded == ["230001"]
+
+
+def test_client_reposts_envelope_not_received(stub_server):
+    stub_server.failures = 1
+    stub_server.failure_status = 502
+
+    response = TariffAPIClient().post_envelope(
+        make_envelope("230001"),
+        payload=b"<xml/>",
+    )
+
+    assert response.status_code == 200
+    assert stub_server.failures == 0
+    assert stub_server.uploaded == ["230001"]
+
+
+def test_client_does_not_retry_post_without_confirmation(stub_server):
+    stub_server.failures = 1
+    stub_server.failure_status = 502
+    client = TariffAPIClient()
+
+    response = client.request(
+        "POST",
+        client.api_host + client.api_url_path + "230001",
+        files={"file": ("DIT230001.xml", b"<xml/>")},
+    )
+
+    assert response.status_code == 502
+    assert stub_server.uploaded == []
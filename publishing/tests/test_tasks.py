@@ -14,6 +14,7 @@ from publishing.models.state import ApiPublishingState
 from publishing.tariff_api.interface import TariffAPIStubbed
 from publishing.tasks import create_xml_envelope_file
 from publishing.tasks import publish_to_api
+from publishing.tasks import with_prepared_payloads
 
 pytestmark = pytest.mark.django_db
 
@@ -293,3 +294,18 @@ def test_publish_to_api_paused_publishing(
     publish_to_api()
 
     assert PackagedWorkBasket.objects.get_unpublished_to_api().count() == 1
+
+
+def test_with_prepared_payloads_keeps_order():
+    """Payloads are prepared ahead of the envelope being published, but are
+    yielded with their own packaged workbasket in order."""
+    interface = mock.Mock()
+    interface.prepare_envelope.side_effect = lambda envelope: f"payload {envelope}"
+    packaged_workbaskets = [
+        mock.Mock(envelope=envelope_id) for envelope_id in ("230001", "230002")
+    ]
+
+    assert list(with_prepared_payloads(interface, packaged_workbaskets)) == [
+        (packaged_workbaskets[0], "payload 230001"),
+        (packaged_workbaskets[1], "payload 230002"),
+    ]
@@ -1,11 +1,10 @@
 import logging
 import os
 
-from django.conf import settings
 from lxml import etree
 
-from common.util import parse_xml
-from common.xml.namespaces import nsmap
+from common.util import EnvelopeContents
+from common.util import validate_envelope_stream
 
 logger = logging.getLogger(__name__)
 
@@ -91,6 +90,10 @@ def validate_envelope(
     """
     Validate envelope content for XML issues and data missing & order issues.
 
+    The envelope is validated against the TARIC3 schema as it is parsed, and the
+    transactions and records it holds are counted at the same time, so the
+    envelope is never held in memory as a whole.
+
     Catches and re-raises DocumentInvalid and TaricDataAssertionError
     exceptions, although other exceptions may be possible.
     """
@@ -108,19 +111,14 @@ def validate_envelope(
 
         envelope_file.seek(position_before, os.SEEK_SET)
 
-    with open(settings.PATH_XSD_TARIC) as xsd_file:
-        schema = etree.XMLSchema(parse_xml(xsd_file))
-
-    xml = parse_xml(envelope_file)
-
     try:
-        schema.assertValid(xml)
+        contents = validate_envelope_stream(envelope_file)
     except etree.DocumentInvalid as e:
         logger.error(f"Envelope did not validate against XSD: {e}")
         raise
 
     try:
-        validate_taric_xml_records(xml, workbaskets)
+        validate_taric_xml_records(contents, workbaskets)
     except TaricDataAssertionError as e:
         logger.error(e.args[0])
         raise
@@ -137,9 +135,10 @@ def get_expected_model_taric_record_count(tracked_model):
     return expected_count
 
 
-def validate_taric_xml_records(xml, workbaskets):
+def validate_taric_xml_records(contents: EnvelopeContents, workbaskets):
     """
-    Raise AssertionError if:
+    Raise AssertionError if the transactions and records in an envelope, as
+    counted by `validate_envelope_stream`, don't match the workbaskets':
 
     - missing transactions (non-empty transactions only)
     - missing tracked_models (record)
@@ -158,15 +157,8 @@ def validate_taric_xml_records(xml, workbaskets):
                     tracked_model,
                 )
 
-    envelope_record_count = 0
-    envelope_transaction_count = 0
-
-    for transaction in xml.findall(".//env:transaction", namespaces=nsmap):
-        # Count the number of records to compare with the workbasket tracked models
-        envelope_transaction_count += 1
-        envelope_record_count += len(
-            transaction.findall(".//oub:record", namespaces=nsmap),
-        )
+    envelope_record_count = contents.records
+    envelope_transaction_count = contents.transactions
 
     if not envelope_transaction_count:
         raise TaricDataAssertionError(
@@ -4,6 +4,7 @@ import json
 import os
 import re
 import sys
+import tempfile
 import uuid
 from os.path import abspath
 from os.path import dirname
@@ -340,6 +341,12 @@ else:
 
 SQLITE = DB_URL.startswith("sqlite")
 
+# Resolve "version as at transaction" lookups (e.g. `.current()`) with an
+# indexed anti-join rather than a grouped aggregate over all versions.
+USE_INDEXED_VERSION_RESOLUTION = is_truthy(
+    os.environ.get("USE_INDEXED_VERSION_RESOLUTION", "True"),
+)
+
 # -- Cache
 
 # DBT PaaS
@@ -374,6 +381,44 @@ NURSERY_CACHE_ENGINE = os.getenv(
     "importer.cache.memory.MemoryCacheEngine",
 )
 
+# The number of puts and deletes that importer.cache.redis.PipelinedRedisCacheEngine
+# buffers before writing them to Redis in one round trip.
+IMPORTER_CACHE_WRITE_BUFFER_SIZE = int(
+    os.environ.get("IMPORTER_CACHE_WRITE_BUFFER_SIZE", "500"),
+)
+
+# The number of bytes of objects that
+# importer.cache.spill.SpillingMemoryCacheEngine keeps in memory before spilling
+# the least recently used to disk, and the directory it spills them to.
+IMPORTER_CACHE_MEMORY_LIMIT = int(
+    os.environ.get("IMPORTER_CACHE_MEMORY_LIMIT", str(256 * 1024 * 1024)),
+)
+IMPORTER_CACHE_SPILL_DIRECTORY = os.environ.get("IMPORTER_CACHE_SPILL_DIRECTORY")
+
+# Whether the TARIC importer streams envelopes a transaction at a time rather
+# than parsing the whole document into memory before importing it.
+TARIC_IMPORTER_STREAMING = is_truthy(os.getenv("TARIC_IMPORTER_STREAMING", False))
+
+# Whether the TARIC importer saves the changes in an import in bulk rather than
+# one message at a time.
+TARIC_IMPORTER_BULK_COMMIT = is_truthy(
+    os.getenv("TARIC_IMPORTER_BULK_COMMIT", False),
+)
+
+# Whether each chunk of a TARIC import is first checked with a dry run, which
+# doesn't write to the database, before it is imported.
+TARIC_IMPORTER_DRY_RUN = is_truthy(os.getenv("TARIC_IMPORTER_DRY_RUN", False))
+
+# The maximum number of chunks of an import batch that may be imported at the
+# same time, or 0 for no limit.
+IMPORTER_MAX_RUNNING_CHUNKS = int(os.environ.get("IMPORTER_MAX_RUNNING_CHUNKS", "0"))
+
+# Whether the payloads of import chunks are gzip compressed and kept in the
+# importer's S3 bucket rather than stored as text in the database.
+IMPORTER_CHUNKS_IN_OBJECT_STORAGE = is_truthy(
+    os.getenv("IMPORTER_CHUNKS_IN_OBJECT_STORAGE", False),
+)
+
 # Maximum import file size (50mb) in bytes. This is an arbitrary value extracted from the importer
 # HMRC have stipulated that exported envelopes should not exceed 40mb.
 # A typical import of 40mb may result in an envelope of 20mb or less due to
@@ -398,6 +443,23 @@ EXPORTER_DISABLE_NOTIFICATION = is_truthy(
     os.environ.get("EXPORTER_DISABLE_NOTIFICATION", "false"),
 )
 
+# The number of bytes of rendered record XML that envelope serialization keeps
+# in memory for reuse. 0 disables the cache.
+ENVELOPE_FRAGMENT_CACHE_SIZE = int(
+    os.environ.get("ENVELOPE_FRAGMENT_CACHE_SIZE", str(64 * 1024 * 1024)),
+)
+
+# The number of threads that render ranges of transactions when writing
+# envelopes, each on its own database connection, or 1 to render them one after
+# another.
+ENVELOPE_RENDER_WORKERS = int(os.environ.get("ENVELOPE_RENDER_WORKERS", "4"))
+
+# The number of records in each range of transactions rendered by a worker.
+# Workbaskets with fewer records are rendered serially.
+ENVELOPE_RENDER_RANGE_SIZE = int(
+    os.environ.get("ENVELOPE_RENDER_RANGE_SIZE", "1000"),
+)
+
 # Wrap each request in a transaction
 ATOMIC_REQUESTS = True
 
@@ -509,6 +571,11 @@ COMMODITY_IMPORTER_ENVELOPE_STORAGE_DIRECTORY = os.environ.get(
     "commodity-envelope/",
 )
 
+IMPORTER_CHUNK_STORAGE_DIRECTORY = os.environ.get(
+    "IMPORTER_CHUNK_STORAGE_DIRECTORY",
+    "chunks/",
+)
+
 # Settings about retrying uploads if the api cannot be contacted.
 # Names correspond to celery settings for retrying tasks:
 #   https://docs.celeryq.dev/en/stable/userguide/tasks.html#automatic-retry-for-known-exceptions
@@ -544,6 +611,32 @@ SQLITE_S3_ENDPOINT_URL = os.environ.get(
 )
 SQLITE_STORAGE_DIRECTORY = os.environ.get("SQLITE_STORAGE_DIRECTORY", "sqlite/")
 
+# The number of tables read at the same time by the SQLite export, each on its
+# own database connection, or 1 to read them one after another.
+SQLITE_EXPORT_WORKERS = int(os.environ.get("SQLITE_EXPORT_WORKERS", "4"))
+
+# The number of rows fetched at a time when reading a table for the SQLite
+# export, and inserted into the SQLite database at a time.
+SQLITE_EXPORT_BATCH_SIZE = int(os.environ.get("SQLITE_EXPORT_BATCH_SIZE", "10000"))
+
+# The directory in which the SQLite schema of exports is cached, for each
+# version of the migrations and models.
+SQLITE_SCHEMA_CACHE_DIRECTORY = os.environ.get(
+    "SQLITE_SCHEMA_CACHE_DIRECTORY",
+    join(tempfile.gettempdir(), "tamato-sqlite-schema"),
+)
+
+# Whether SQLite exports are made from the previous export, adding only the
+# transactions published since it was made.
+SQLITE_EXPORT_INCREMENTAL = is_truthy(os.getenv("SQLITE_EXPORT_INCREMENTAL", False))
+
+# Whether a delta database, holding only what has been published since the
+# previous export, is saved alongside each SQLite export.
+SQLITE_EXPORT_DELTA = is_truthy(os.getenv("SQLITE_EXPORT_DELTA", False))
+
+# Whether a zstd compressed copy of each SQLite export is saved alongside it.
+SQLITE_EXPORT_COMPRESS = is_truthy(os.getenv("SQLITE_EXPORT_COMPRESS", False))
+
 # Default AWS settings.
 if is_copilot():
     AWS_ACCESS_KEY_ID = None
@@ -575,6 +668,18 @@ CROWN_DEPENDENCIES_API_URL_PATH = os.environ.get(
 CROWN_DEPENDENCIES_GET_API_KEY = os.environ.get("CROWN_DEPENDENCIES_GET_API_KEY", "")
 CROWN_DEPENDENCIES_POST_API_KEY = os.environ.get("CROWN_DEPENDENCIES_POST_API_KEY", "")
 
+# Settings about retrying a single request to the Tariff API, within a
+# publishing task, before the task itself is retried.
+CROWN_DEPENDENCIES_API_REQUEST_RETRIES = int(
+    os.environ.get("CROWN_DEPENDENCIES_API_REQUEST_RETRIES", "3"),
+)
+CROWN_DEPENDENCIES_API_REQUEST_BACKOFF = float(
+    os.environ.get("CROWN_DEPENDENCIES_API_REQUEST_BACKOFF", "1"),
+)
+CROWN_DEPENDENCIES_API_REQUEST_BACKOFF_MAX = float(
+    os.environ.get("CROWN_DEPENDENCIES_API_REQUEST_BACKOFF_MAX", "30"),
+)
+
 
 if is_copilot():
     CELERY_BROKER_URL = (
@@ -857,6 +962,15 @@ SKIP_VALIDATION = is_truthy(os.getenv("SKIP_VALIDATION", False))
 SKIP_WORKBASKET_VALIDATION = is_truthy(os.getenv("SKIP_WORKBASKET_VALIDATION", False))
 USE_IMPORTER_CACHE = is_truthy(os.getenv("USE_IMPORTER_CACHE", True))
 
+# Number of models checked by each Celery task when checking a transaction.
+# When 0, each model is checked by its own task.
+CHECKS_BATCH_SIZE = int(os.environ.get("CHECKS_BATCH_SIZE", "0"))
+
+# Minimum number of measures in a workbasket for ME32 clashes to be found for the
+# whole workbasket at once when it is checked. When 0, measures are always
+# checked one at a time.
+ME32_BULK_THRESHOLD = int(os.environ.get("ME32_BULK_THRESHOLD", "20"))
+
 CRISPY_ALLOWED_TEMPLATE_PACKS = ["gds"]
 CRISPY_TEMPLATE_PACK = "gds"
 
@@ -0,0 +1,319 @@
+from __future__ import annotations
+
+from collections import defaultdict
+from functools import reduce
+from operator import or_
+from typing import TYPE_CHECKING
+from typing import Dict
+from typing import List
+from typing import Sequence
+from typing import Tuple
+
+from django.db import IntegrityError
+from django.db.models import F
+from django.db.models import Q
+from django.db.models.expressions import Expression
+
+from common import validators
+from common.models import TrackedModel
+from common.models import Transaction
+from common.util import chunks
+from importer.models import ImportIssueType
+from taric_parsers.parsers.taric_parser import MessageParser
+
+if TYPE_CHECKING:
+    from taric_parsers.importer import TaricImporter
+
+Change = Tuple[MessageParser, Transaction]
+
+# Maximum number of objects looked up by identity fields in each query.
+LOOKUP_BATCH_SIZE = 500
+
+
+class BulkCommitter:
+    """
+    Commits the changes in parsed messages to the database in bulk, producing
+    the same data and import issues as committing each message in turn with
+    ``TaricImporter.commit_changes_from_message``.
+
+    Changes are committed in import order, in runs within which no change
+    depends on an earlier change in the same run – that is, no change links to
+    an object of a model that is written earlier in the run, or updates or
+    deletes an object that is written earlier in the run. For each run, the
+    existing objects that updates and deletes apply to are fetched with one
+    query per parser class, and the new versions of each model are inserted
+    together.
+
+    Changes to models that cannot be bulk created, and the changes of any model
+    whose bulk insert fails, are saved one at a time so that database errors are
+    reported against the message that caused them.
+    """
+
+    def __init__(self, importer: TaricImporter):
+        self.importer = importer
+
+    def commit(self, changes: Sequence[Change]):
+        """
+        Commit the changes in the parsed messages, each to the database
+        transaction paired with it.
+
+        Args:
+            changes: (required) sequence of (MessageParser, Transaction), in import order
+
+        Returns:
+            None
+        """
+        run = []
+        written_models = set()
+        written_objects = set()
+
+        for message, transaction in changes:
+            parser_class = message.taric_object.__class__
+            model = parser_class.model
+
+            if not model.can_bulk_create_versions():
+                self.commit_run(run)
+                run, written_models, written_objects = [], set(), set()
+                self.importer.commit_changes_from_message(message, transaction)
+                continue
+
+            identity = self.identity_of(message)
+            depends_on_run = bool(
+                {link.model for link in parser_class.model_links} & written_models,
+            ) or (
+                message.update_type != validators.UpdateType.CREATE
+                and identity in written_objects
+            )
+
+            if depends_on_run:
+                self.commit_run(run)
+                run, written_models, written_objects = [], set(), set()
+
+            run.append((message, transaction))
+            written_models.add(model)
+            if identity is not None:
+                written_objects.add(identity)
+
+        self.commit_run(run)
+
+    def commit_run(self, run: Sequence[Change]):
+        """Commit a run of changes that are independent of each other."""
+        if not run:
+            return
+
+        existing = self.find_existing(
+            [
+                message
+                for message, _ in run
+                if message.update_type != validators.UpdateType.CREATE
+            ],
+            # Changes in the run can't see each other's writes, so every change
+            # sees the same objects as the last one in the run.
+            run[-1][1],
+        )
+
+        new_versions: Dict[type, List[Tuple[MessageParser, TrackedModel]]] = (
+            defaultdict(list)
+        )
+        # Nothing a change links to is written in the same run, so each linked
+        # object only needs looking up once per run.
+        linked_models = {}
+
+        for message, transaction in run:
+            new_version = self.build_new_version(
+                message,
+                transaction,
+                existing.get(id(message), []),
+                linked_models,
+            )
+            if new_version is not None:
+                new_versions[type(new_version)].append((message, new_version))
+
+        for model, messages_and_versions in new_versions.items():
+            self.save_new_versions(model, messages_and_versions)
+
+    def find_existing(
+        self,
+        messages: Sequence[MessageParser],
+        transaction: Transaction,
+    ) -> Dict[int, List[TrackedModel]]:
+        """
+        Find the objects matching the identity fields of each message, as at the
+        given transaction, using one query per parser class.
+
+        Returns:
+            dict of id(message) to the matching objects, in the order of the
+            model's default ordering (or primary key, if it has none)
+        """
+        messages_by_class = defaultdict(list)
+        for message in messages:
+            messages_by_class[message.taric_object.__class__].append(message)
+
+        existing = {}
+
+        for parser_class, class_messages in messages_by_class.items():
+            fields = list(class_messages[0].taric_object.model_query_parameters())
+            keys = {
+                f"import_identity_{index}": F(field)
+                for index, field in enumerate(fields)
+            }
+
+            for batch in chunks(class_messages, LOOKUP_BATCH_SIZE):
+                queryset = parser_class.model.objects.approved_up_to_transaction(
+                    transaction,
+                ).filter(
+                    reduce(
+                        or_,
+                        (
+                            Q(**message.taric_object.model_query_parameters())
+                            for message in batch
+                        ),
+                    ),
+                )
+                matches = defaultdict(list)
+                for obj in self.in_order(queryset).annotate(**keys):
+                    matches[tuple(str(getattr(obj, key)) for key in keys)].append(obj)
+
+                for message in batch:
+                    key = tuple(
+                        str(value)
+                        for value in message.taric_object.model_query_parameters().values()
+                    )
+                    existing[id(message)] = matches.get(key, [])
+
+        return existing
+
+    def build_new_version(
+        self,
+        message: MessageParser,
+        transaction: Transaction,
+        existing: List[TrackedModel],
+        linked_models: dict,
+    ):
+        """
+        Build the unsaved object that the message creates, or the unsaved new
+        version of the existing object that it updates or deletes.
+
+        Returns:
+            TrackedModel, or None if there is nothing to save
+        """
+        taric_object = message.taric_object
+        model = taric_object.__class__.model
+
+        if message.update_type == validators.UpdateType.CREATE:
+            return model(
+                transaction=transaction,
+                **taric_object.model_attributes(
+                    transaction,
+                    include_non_taric_attributes=True,
+                    linked_models=linked_models,
+                ),
+            )
+
+        if not existing or (
+            message.update_type == validators.UpdateType.DELETE and len(existing) > 1
+        ):
+            # Identity values are matched on their string form, so confirm an
+            # absence or an ambiguity with the same query as a single commit.
+            existing = list(
+                self.in_order(
+                    model.objects.approved_up_to_transaction(transaction).filter(
+                        **taric_object.model_query_parameters(),
+                    ),
+                ),
+            )
+
+        if message.update_type == validators.UpdateType.UPDATE:
+            return existing[-1].build_new_version(
+                transaction=transaction,
+                workbasket=transaction.workbasket,
+                **taric_object.model_attributes(
+                    transaction,
+                    linked_models=linked_models,
+                ),
+            )
+
+        if len(existing) == 1:
+            return existing[0].build_new_version(
+                transaction=transaction,
+                workbasket=transaction.workbasket,
+                update_type=taric_object.update_type,
+            )
+
+        if len(existing) > 1:
+            msg = "Multiple models matching query detected, please review data and correct before proceeding with this import."
+        else:
+            msg = "No matches for this model detected in published data, please verify record exists before attempting a delete of the record"
+
+        self.importer.create_import_issue(
+            message,
+            related_tag="self",
+            related_identity_keys=taric_object.model_query_parameters(),
+            issue_type=ImportIssueType.ERROR,
+            message=msg,
+        )
+        return None
+
+    def save_new_versions(
+        self,
+        model: type,
+        messages_and_versions: Sequence[Tuple[MessageParser, TrackedModel]],
+    ):
+        """Save new versions of a model together, falling back to saving them
+        one at a time if they can't all be saved."""
+        bulk, single = [], []
+        for message, new_version in messages_and_versions:
+            if self.has_automatic_values(new_version):
+                single.append((message, new_version))
+            else:
+                bulk.append((message, new_version))
+
+        try:
+            model.objects.bulk_create_versions(new_version for _, new_version in bulk)
+        except IntegrityError:
+            single = bulk + single
+
+        for message, new_version in single:
+            try:
+                new_version.save()
+            except IntegrityError as e:
+                self.importer.create_import_issue(
+                    message,
+                    "None",
+                    {},
+                    f"Database Integrity error, review related issues to determine what went wrong {e}",
+                )
+
+    @staticmethod
+    def identity_of(message: MessageParser) -> Tuple:
+        """Returns a key identifying the object that a message changes, or None
+        if the object's identity is not yet known."""
+        taric_object = message.taric_object
+        values = [
+            getattr(taric_object, field) for field in taric_object.identity_fields
+        ]
+        if any(value is None or value == "" for value in values):
+            return None
+
+        return (
+            taric_object.__class__.model,
+            tuple(str(value) for value in values),
+        )
+
+    @staticmethod
+    def in_order(queryset):
+        """Orders a queryset as ``last()`` would, so that the last object is the
+        one it would return."""
+        if queryset.ordered:
+            return queryset
+        return queryset.order_by("pk")
+
+    @staticmethod
+    def has_automatic_values(obj: TrackedModel) -> bool:
+        """Returns whether the object has fields whose values are set by the
+        database on save, which would clash if saved together."""
+        return any(
+            getattr(obj, field.attname) is None
+            or isinstance(getattr(obj, field.attname), (Expression, F))
+            for field in obj.auto_value_fields
+        )
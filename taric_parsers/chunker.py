@@ -72,7 +72,7 @@ def close_chunk(chunk: TemporaryFile, batch: models.ImportBatch, key):
         record_code = key
         chapter_heading = None
 
-    models.ImporterXMLChunk.objects.create(
+    xml_chunk = models.ImporterXMLChunk(
         batch=batch,
         record_code=record_code,
         chapter=chapter_heading,
@@ -80,8 +80,9 @@ def close_chunk(chunk: TemporaryFile, batch: models.ImportBatch, key):
             record_code=record_code,
             chapter=chapter_heading,
         ).count(),
-        chunk_text=chunk.read().decode(),
     )
+    xml_chunk.write_payload(chunk)
+    xml_chunk.save()
     chunk.close()
 
     logger.info(
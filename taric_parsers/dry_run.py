@@ -0,0 +1,376 @@
+from collections import defaultdict
+from functools import reduce
+from operator import or_
+from typing import Dict
+from typing import Iterable
+from typing import List
+from typing import Optional
+from typing import Tuple
+
+from django.db.models import F
+from django.db.models import Q
+from lxml import etree
+
+from common import validators
+from common.util import chunks
+from common.util import get_taric_schema
+from common.util import parse_xml
+from importer.models import ImportBatch
+from importer.models import ImportIssueType
+from taric_parsers.bulk_committer import LOOKUP_BATCH_SIZE
+from taric_parsers.importer import TaricImporter
+from taric_parsers.importer_issue import ImportIssueReportItem
+from taric_parsers.parsers.taric_parser import BaseTaricParser
+from taric_parsers.parsers.taric_parser import MessageParser
+from taric_parsers.parsers.taric_parser import ParserHelper
+from taric_parsers.taric_xml_source import TaricXMLSourceBase
+
+# The object type recorded against issues found by schema validation, which
+# don't relate to a single TARIC object.
+SCHEMA_ISSUE_OBJECT_TYPE = "envelope"
+
+# The maximum number of schema errors reported for a file.
+MAX_SCHEMA_ISSUES = 100
+
+
+class TaricImportDryRun(TaricImporter):
+    """
+    Reports the import issues that TaricImporter would raise for a TARIC3 file,
+    without writing any Transactions, VersionGroups or TrackedModels to the
+    database.
+
+    The file is first validated against the TARIC3 schema. If it is valid, it is
+    parsed and validated as TaricImporter does, except that the database objects
+    matching the identity keys of the parsed objects are looked up in batches,
+    one query per parser class per ``LOOKUP_BATCH_SIZE`` objects, rather than
+    with queries for each message.
+
+    Finally, if validation finds no errors, the links from each change that
+    would be saved to the objects it refers to are resolved, against objects
+    created earlier in the import and, again in batches, against the latest
+    approved data. A change with a link that can't be resolved gets the issue
+    TaricImporter raises when committing it.
+
+    Database integrity errors, which TaricImporter only finds by writing the
+    changes, are not reported.
+    """
+
+    def __init__(
+        self,
+        import_batch: ImportBatch,
+        taric_xml_source: TaricXMLSourceBase,
+        streaming: Optional[bool] = None,
+        validate_schema: bool = True,
+    ):
+        """
+        TaricImportDryRun initializer. Validates the TARIC3 XML, recording the
+        issues found.
+
+        Args:
+            import_batch: ImportBatch
+                The batch that issues are committed against by commit_issues
+            taric_xml_source: TaricXMLSourceBase
+                The XML to validate
+            streaming: bool (optional)
+                Whether to stream the XML one transaction at a time. Defaults
+                to settings.TARIC_IMPORTER_STREAMING.
+            validate_schema: bool (optional)
+                Whether to validate the XML against the TARIC3 schema. Defaults
+                to True.
+        """
+        self.taric_xml_source = taric_xml_source
+        self.schema_issues = self.validate_schema() if validate_schema else []
+        self.existing: Dict[Tuple, Tuple[Optional[int], int]] = {}
+
+        super().__init__(import_batch, taric_xml_source, streaming=streaming)
+
+    def validate_schema(self) -> List[ImportIssueReportItem]:
+        """
+        Validates the XML against the TARIC3 schema.
+
+        Returns:
+            list[ImportIssueReportItem], an error for each schema violation, up to MAX_SCHEMA_ISSUES
+        """
+        with self.taric_xml_source.open() as xml_file:
+            try:
+                xml = parse_xml(xml_file)
+            except etree.XMLSyntaxError as e:
+                return [self.schema_issue(str(e))]
+
+        schema = get_taric_schema()
+        if schema.validate(xml):
+            return []
+
+        return [
+            self.schema_issue(f"Line {error.line}: {error.message}")
+            for error in list(schema.error_log)[:MAX_SCHEMA_ISSUES]
+        ]
+
+    @staticmethod
+    def schema_issue(description: str) -> ImportIssueReportItem:
+        return ImportIssueReportItem(
+            SCHEMA_ISSUE_OBJECT_TYPE,
+            "",
+            {},
+            description[:2000],
+            issue_type=ImportIssueType.ERROR,
+        )
+
+    def process_and_save_if_valid(self, workbasket=None):
+        """Nothing is saved by a dry run, so this only returns the status the
+        import would have."""
+        return self.status
+
+    def commit_data(self):
+        """Nothing is committed by a dry run."""
+
+    def parse(self):
+        # Files that are not valid against the schema are not parsed, as the
+        # parsers rely on the structure the schema defines.
+        if self.schema_issues:
+            return
+
+        super().parse()
+
+    def validate(self):
+        """Validate the parsed import as TaricImporter does, looking up existing
+        objects in batches first, then, if the import could be saved, validate
+        the links of the changes that would be saved."""
+        self.find_existing()
+        super().validate()
+
+        if self.can_save():
+            self.validate_links()
+
+    def issues(self, filter_by_issue_type: str = None) -> List[ImportIssueReportItem]:
+        schema_issues = [
+            issue
+            for issue in self.schema_issues
+            if not filter_by_issue_type or issue.issue_type == filter_by_issue_type
+        ]
+        return schema_issues + super().issues(filter_by_issue_type)
+
+    @staticmethod
+    def existing_key(taric_object: BaseTaricParser) -> Tuple:
+        return (
+            taric_object.__class__,
+            tuple(
+                str(value) for value in taric_object.model_query_parameters().values()
+            ),
+        )
+
+    def messages_checked_against_database(self) -> Iterable[MessageParser]:
+        """Yields the messages whose identity keys validation checks against the
+        database."""
+        for parsed_transaction in self.parsed_transactions:
+            for parsed_message in parsed_transaction.parsed_messages:
+                if (
+                    parsed_message.update_type == validators.UpdateType.CREATE
+                    and parsed_message.taric_object.is_child_object()
+                ):
+                    continue
+                yield parsed_message
+
+    def find_existing(self):
+        """
+        Looks up the versions in the database of the objects matching the
+        identity keys of each parsed object, with one query per parser class per
+        LOOKUP_BATCH_SIZE objects.
+
+        For each parsed object, self.existing records the update type of the
+        last matching version and the number of latest approved, non-deleted
+        matching objects.
+        """
+        taric_objects_by_class = defaultdict(dict)
+        for parsed_message in self.messages_checked_against_database():
+            taric_object = parsed_message.taric_object
+            taric_objects_by_class[taric_object.__class__][
+                self.existing_key(taric_object)
+            ] = taric_object
+
+        for parser_class, taric_objects in taric_objects_by_class.items():
+            fields = list(
+                next(iter(taric_objects.values())).model_query_parameters(),
+            )
+            keys = {
+                f"import_identity_{index}": F(field)
+                for index, field in enumerate(fields)
+            }
+
+            for batch in chunks(list(taric_objects.items()), LOOKUP_BATCH_SIZE):
+                versions = (
+                    parser_class.model.objects.filter(
+                        reduce(
+                            or_,
+                            (
+                                Q(**taric_object.model_query_parameters())
+                                for _, taric_object in batch
+                            ),
+                        ),
+                    )
+                    .annotate(**keys)
+                    .order_by("pk")
+                    .values_list(*keys, "update_type", "is_current")
+                )
+
+                found = {key: (None, 0) for key, _ in batch}
+                for *values, update_type, is_current in versions:
+                    key = (parser_class, tuple(str(value) for value in values))
+                    _, approved_count = found[key]
+                    if (
+                        is_current is not None
+                        and update_type != validators.UpdateType.DELETE
+                    ):
+                        approved_count += 1
+                    found[key] = (update_type, approved_count)
+
+                self.existing.update(found)
+
+    def latest_approved_count(self, taric_object: BaseTaricParser) -> int:
+        key = self.existing_key(taric_object)
+        if key not in self.existing:
+            return super().latest_approved_count(taric_object)
+
+        return self.existing[key][1]
+
+    def last_update_type_in_database(self, taric_object: BaseTaricParser):
+        key = self.existing_key(taric_object)
+        if key not in self.existing:
+            return super().last_update_type_in_database(taric_object)
+
+        return self.existing[key][0]
+
+    def messages_to_save(self) -> List[MessageParser]:
+        """Returns the messages whose changes would be saved with links
+        resolved, in the order they would be saved."""
+        return [
+            parsed_message
+            for parsed_transaction in self.parsed_transactions
+            for parsed_message in parsed_transaction.parsed_messages
+            if parsed_message.taric_object.import_changes
+            and parsed_message.taric_object.can_save_to_model()
+            and parsed_message.update_type != validators.UpdateType.DELETE
+        ]
+
+    def changes_in_import(self, model, fields: Tuple[str, ...]) -> Dict:
+        """
+        Indexes the changes in the import to objects of a model by their values
+        for the given fields.
+
+        Returns:
+            dict of field values to a list of (position, update type), where position is the change's position in the import
+        """
+        changes = defaultdict(list)
+        for position, parsed_message in enumerate(
+            message
+            for parsed_transaction in self.parsed_transactions
+            for message in parsed_transaction.parsed_messages
+        ):
+            taric_object = parsed_message.taric_object
+            if (
+                taric_object.__class__.model is model
+                and not taric_object.is_child_object()
+            ):
+                values = tuple(
+                    str(getattr(taric_object, field, None)) for field in fields
+                )
+                changes[values].append((position, parsed_message.update_type))
+        return changes
+
+    def validate_links(self):
+        """
+        Raise the issue TaricImporter raises when committing a change with a
+        link to an object that doesn't exist, for each change that would be
+        saved.
+
+        A link resolves to an object created or updated earlier in the import,
+        unless it was then deleted, or otherwise to a latest approved object in
+        the database. Links resolved against the database are looked up with one
+        query per linked model per LOOKUP_BATCH_SIZE objects.
+        """
+        positions = {
+            id(message): position
+            for position, message in enumerate(
+                message
+                for parsed_transaction in self.parsed_transactions
+                for message in parsed_transaction.parsed_messages
+            )
+        }
+        import_changes = {}
+        missing = []
+        unresolved = []
+        database_lookups = defaultdict(dict)
+
+        for parsed_message in self.messages_to_save():
+            taric_object = parsed_message.taric_object
+
+            for link in taric_object.model_links:
+                if link.optional:
+                    continue
+
+                fields_and_values = {
+                    field.object_field_name: getattr(
+                        taric_object,
+                        field.parser_field_name,
+                    )
+                    for field in link.fields
+                }
+                fields = tuple(fields_and_values)
+                values = tuple(str(value) for value in fields_and_values.values())
+
+                if (link.model, fields) not in import_changes:
+                    import_changes[link.model, fields] = self.changes_in_import(
+                        link.model,
+                        fields,
+                    )
+                earlier_changes = [
+                    update_type
+                    for position, update_type in import_changes[link.model, fields].get(
+                        values,
+                        [],
+                    )
+                    if position < positions[id(parsed_message)]
+                ]
+
+                if earlier_changes:
+                    if earlier_changes[-1] == validators.UpdateType.DELETE:
+                        missing.append((parsed_message, link, fields_and_values))
+                    continue
+
+                database_lookups[link.model, fields][values] = fields_and_values
+                unresolved.append((parsed_message, link, fields_and_values))
+
+        found = set()
+        for (model, fields), lookups in database_lookups.items():
+            keys = {
+                f"link_identity_{index}": F(field) for index, field in enumerate(fields)
+            }
+            for batch in chunks(list(lookups.values()), LOOKUP_BATCH_SIZE):
+                for values in (
+                    model.objects.latest_approved()
+                    .filter(reduce(or_, (Q(**lookup) for lookup in batch)))
+                    .annotate(**keys)
+                    .values_list(*keys)
+                ):
+                    found.add((model, fields, tuple(str(value) for value in values)))
+
+        for parsed_message, link, fields_and_values in unresolved:
+            values = tuple(str(value) for value in fields_and_values.values())
+            if (link.model, tuple(fields_and_values), values) not in found:
+                missing.append((parsed_message, link, fields_and_values))
+
+        for parsed_message, link, fields_and_values in missing:
+
+            taric_object = parsed_message.taric_object
+            linked_parser_class = ParserHelper.get_parser_by_model(link.model)
+            taric_object.issues.append(
+                ImportIssueReportItem(
+                    taric_object.xml_object_tag,
+                    linked_parser_class.xml_object_tag,
+                    fields_and_values,
+                    f"Missing expected linked object {linked_parser_class.__name__}",
+                    object_update_type=taric_object.update_type,
+                    object_data={},
+                    transaction_id=taric_object.transaction_id,
+                ),
+            )
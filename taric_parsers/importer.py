@@ -1,18 +1,26 @@
+from typing import BinaryIO
 from typing import Generator
+from typing import Iterator
 from typing import List
 from typing import Optional
 
 from bs4 import BeautifulSoup
+from django.conf import settings
 from django.db import IntegrityError
 from django.db import transaction
+from lxml import etree
 
 from common import validators
 from common.models import Transaction
 from common.validators import UpdateType
+from common.xml.namespaces import ENVELOPE
+from common.xml.namespaces import nsmap
 from importer.models import BatchImportError
 from importer.models import ImportBatch
 from importer.models import ImportIssueType
 from taric.models import Envelope
+from taric_parsers.bulk_committer import BulkCommitter
+from taric_parsers.parser_index import ParserIndex
 from taric_parsers.parsers.additional_code_parsers import (  # noqa
     AdditionalCodeDescriptionParserV2,
 )
@@ -168,25 +176,67 @@ from taric_parsers.tasks import parse_and_import
 from taric_parsers.validators import ImportStatus
 
 
+def stream_xml_transactions(xml_file: BinaryIO) -> Iterator[BeautifulSoup]:
+    """
+    Yields each transaction in a TARIC 3 envelope as its own BeautifulSoup
+    document.
+
+    The envelope is read incrementally, and each transaction element is removed
+    from the partially built tree once it has been copied, so that only one
+    transaction of XML is held in memory at a time regardless of the size of the
+    envelope. What the caller keeps from each document is up to it.
+
+    Args:
+        xml_file: BinaryIO, a file object containing a TARIC 3 envelope.
+
+    Returns:
+        Iterator[BeautifulSoup], one document per env:transaction element
+    """
+    transaction_tag = f"{{{nsmap[ENVELOPE]}}}transaction"
+
+    for _, element in etree.iterparse(
+        xml_file,
+        events=("end",),
+        tag=transaction_tag,
+        huge_tree=True,
+    ):
+        xml_transaction = BeautifulSoup(etree.tostring(element), "xml")
+
+        element.clear()
+        while element.getprevious() is not None:
+            del element.getparent()[0]
+
+        yield xml_transaction
+
+
 class TaricImporter:
     """
     TARIC importer. This class is initialised with either a TARIC 3 file or a
     TARIC 3 XML string. Subsequently, the XML is parsed and objects in memory
     are created and validated.
 
+    In streaming mode the XML is read one transaction at a time, and each
+    transaction's XML is released once it has been parsed, rather than the whole
+    document being held in memory. The parsed transactions are still all kept
+    until the import has been validated and committed, as validation looks
+    across the whole import, so memory use still grows with the size of the
+    envelope, just more slowly.
+
     If issues with the import are identified, the issues are logged in the
     database against the import report. If the import has no issues the importer
     proceeds to commit the data to the database.
     """
 
-    bs_taric3_file: BeautifulSoup
-    raw_xml: str
+    bs_taric3_file: Optional[BeautifulSoup]
+    raw_xml: Optional[str]
     parsed_transactions: List[TransactionParser]
 
     def __init__(
         self,
         import_batch: ImportBatch,
         taric_xml_source: TaricXMLSourceBase,
+        streaming: Optional[bool] = None,
+        bulk_commit: Optional[bool] = None,
     ):
         """
         TaricImporter initializer. This class imports TARIC data into the TAP
@@ -197,12 +247,31 @@ class TaricImporter:
                 This object is used to link instances of ImportIssueReportItem
             taric_xml_source: TaricXMLSourceBase
                 Path to a local xml file that should be imported.
+            streaming: bool (optional)
+                Whether to stream the XML one transaction at a time. Defaults
+                to settings.TARIC_IMPORTER_STREAMING.
+            bulk_commit: bool (optional)
+                Whether to commit changes to the database in bulk. Defaults to
+                settings.TARIC_IMPORTER_BULK_COMMIT.
         """
 
-        self.parsed_transactions = []
-        self.raw_xml = taric_xml_source.get_xml_string()
+        if streaming is None:
+            streaming = settings.TARIC_IMPORTER_STREAMING
+        if bulk_commit is None:
+            bulk_commit = settings.TARIC_IMPORTER_BULK_COMMIT
 
-        self.bs_taric3_file = BeautifulSoup(self.raw_xml, "xml")
+        self.parsed_transactions = []
+        self.parser_index = ParserIndex(self.parsed_transactions)
+        self.taric_xml_source = taric_xml_source
+        self.streaming = streaming
+        self.bulk_commit = bulk_commit
+
+        if self.streaming:
+            self.raw_xml = None
+            self.bs_taric3_file = None
+        else:
+            self.raw_xml = taric_xml_source.get_xml_string()
+            self.bs_taric3_file = BeautifulSoup(self.raw_xml, "xml")
 
         self.import_batch = import_batch
         self.workbasket = None
@@ -276,30 +345,9 @@ class TaricImporter:
         if not taric_object.is_child_object():
             raise Exception(f"Only call this method on child objects")
 
-        for (
-            parsed_transaction,
-            parsed_message,
-        ) in self.ordered_transactions_and_messages():
-            possible_parent_taric_object = parsed_message.taric_object
-            if (
-                not possible_parent_taric_object.is_child_object()
-                and possible_parent_taric_object.__class__.model
-                == taric_object.__class__.model
-            ):
-                match = True
-
-                for (
-                    key,
-                    value,
-                ) in taric_object.get_identity_fields_and_values_for_parent().items():
-                    if (
-                        hasattr(possible_parent_taric_object, key)
-                        and getattr(possible_parent_taric_object, key) != value
-                    ):
-                        match = False
-
-                if match:
-                    return possible_parent_taric_object
+        parents = self.parser_index.parents_of(taric_object)
+        if parents:
+            return parents[0]
 
         raise Exception(f"No parent matched for {taric_object.__class__.__name__}")
 
@@ -346,31 +394,67 @@ class TaricImporter:
 
         envelope = Envelope.new_envelope()
 
-        transaction_order = 1
-
-        for parsed_transaction in self.parsed_transactions:
-            # create transaction
-            transaction_inst = Transaction.objects.create(
-                composite_key=f"{envelope.envelope_id}{transaction_order}",
-                workbasket=self.workbasket,
-                order=transaction_order,
-            )
+        if self.bulk_commit:
+            self.commit_data_in_bulk(envelope)
+        else:
+            transaction_order = 1
+
+            for parsed_transaction in self.parsed_transactions:
+                # create transaction
+                transaction_inst = Transaction.objects.create(
+                    composite_key=f"{envelope.envelope_id}{transaction_order}",
+                    workbasket=self.workbasket,
+                    order=transaction_order,
+                )
 
-            for message in parsed_transaction.parsed_messages:
-                if not message.taric_object.import_changes:
-                    continue
+                for message in parsed_transaction.parsed_messages:
+                    if not message.taric_object.import_changes:
+                        continue
 
-                if message.taric_object.can_save_to_model():
-                    self.commit_changes_from_message(
-                        message,
-                        transaction_inst,
-                    )
+                    if message.taric_object.can_save_to_model():
+                        self.commit_changes_from_message(
+                            message,
+                            transaction_inst,
+                        )
 
-            transaction_order += 1
+                transaction_order += 1
 
         if len(self.issues(ImportIssueType.ERROR)) > 0:
             transaction.set_rollback(True)
 
+    def commit_data_in_bulk(self, envelope: Envelope):
+        """
+        Commit the import to the database as commit_data does, but creating
+        transactions and saving changes in bulk. See BulkCommitter.
+
+        Args:
+            envelope: (required) Envelope, The envelope transaction keys are generated from.
+
+        Returns:
+            None
+        """
+        transactions = Transaction.objects.bulk_create(
+            Transaction(
+                composite_key=f"{envelope.envelope_id}{order}",
+                workbasket=self.workbasket,
+                order=order,
+            )
+            for order, _ in enumerate(self.parsed_transactions, start=1)
+        )
+
+        BulkCommitter(self).commit(
+            [
+                (message, transaction_inst)
+                for parsed_transaction, transaction_inst in zip(
+                    self.parsed_transactions,
+                    transactions,
+                )
+                for message in parsed_transaction.parsed_messages
+                if message.taric_object.import_changes
+                and message.taric_object.can_save_to_model()
+            ],
+        )
+
     def commit_changes_from_message(
         self,
         message: MessageParser,
@@ -498,10 +582,21 @@ class TaricImporter:
         Returns:
             None
         """
-        transactions = self.bs_taric3_file.find_all("env:transaction")
+        if not self.streaming:
+            transactions = self.bs_taric3_file.find_all("env:transaction")
+
+            for index, xml_transaction in enumerate(transactions):
+                self.parsed_transactions.append(
+                    TransactionParser(xml_transaction, index),
+                )
 
-        for index, xml_transaction in enumerate(transactions):
-            self.parsed_transactions.append(TransactionParser(xml_transaction, index))
+            return
+
+        with self.taric_xml_source.open() as xml_file:
+            for index, xml_transaction in enumerate(stream_xml_transactions(xml_file)):
+                parsed_transaction = TransactionParser(xml_transaction, index)
+                parsed_transaction.release_xml()
+                self.parsed_transactions.append(parsed_transaction)
 
     def find_child_objects_in_import(
         self,
@@ -519,18 +614,11 @@ class TaricImporter:
         Returns:
             list of BaseTaricParser matching parent criteria
         """
-        result = []
-
-        for (
-            parsed_transaction,
-            parsed_message,
-        ) in self.ordered_transactions_and_messages(last_transaction):
-            if isinstance(parsed_message.taric_object, child_parser_class):
-                # check identity fields
-                if parsed_message.taric_object.is_child_for(parent):
-                    result.append(parsed_message.taric_object)
-
-        return result
+        return self.parser_index.children_of(
+            parent,
+            child_parser_class,
+            up_to_transaction=last_transaction,
+        )
 
     def find_parent_in_import(
         self,
@@ -550,22 +638,14 @@ class TaricImporter:
             Parent parser or None
         """
 
-        parent = None
-        for (
-            parsed_transaction,
-            parsed_message,
-        ) in self.ordered_transactions_and_messages(up_to_transaction):
-            potential_parent = parsed_message.taric_object
-            # matching model and not child?
-            if (
-                not potential_parent.is_child_object()
-                and potential_parent.model == child_parser.model
-            ):
-                # check key fields
-                if child_parser.is_child_for(potential_parent):
-                    parent = potential_parent
+        parents = self.parser_index.parents_of(
+            child_parser,
+            up_to_transaction=up_to_transaction,
+        )
+        if parents:
+            return parents[-1]
 
-        return parent
+        return None
 
     def create_import_issue(
         self,
@@ -660,6 +740,84 @@ class TaricImporter:
                                 f"Missing expected child object {child_parser_class.__name__}",
                             )
 
+    def last_matching_message_before(
+        self,
+        parsed_message: MessageParser,
+        parsed_transaction: TransactionParser,
+    ) -> Optional[MessageParser]:
+        """
+        Finds the last message in a transaction preceding parsed_transaction
+        that changes the same object as parsed_message, matching on parser class
+        and identity fields.
+
+        Args:
+            parsed_message: MessageParser
+                The message to find a previous change for
+            parsed_transaction: TransactionParser
+                The transaction that contains parsed_message
+
+        Returns:
+            MessageParser : When a match is found
+            None : When no match is found
+        """
+        messages = self.parser_index.messages_matching(
+            parsed_message,
+            parsed_transaction,
+        )
+        if messages:
+            return messages[-1]
+
+        return None
+
+    def latest_approved_count(self, taric_object: BaseTaricParser) -> int:
+        """
+        Counts the latest approved, non-deleted objects in the database matching
+        the identity fields of a parsed object.
+
+        Args:
+            taric_object: BaseTaricParser
+                The parsed object to match
+
+        Returns:
+            int : The number of matching objects
+        """
+        return (
+            taric_object.__class__.model.objects.latest_approved()
+            .filter(
+                **taric_object.model_query_parameters(),
+            )
+            .count()
+        )
+
+    def last_update_type_in_database(
+        self,
+        taric_object: BaseTaricParser,
+    ) -> Optional[UpdateType]:
+        """
+        Finds the update type of the last version in the database, published or
+        unpublished, of the object matching the identity fields of a parsed
+        object.
+
+        Args:
+            taric_object: BaseTaricParser
+                The parsed object to match
+
+        Returns:
+            UpdateType : When a match is found
+            None : When no match is found
+        """
+        last_version = (
+            taric_object.__class__.model.objects.all()
+            .filter(
+                **taric_object.model_query_parameters(),
+            )
+            .last()
+        )
+        if last_version is None:
+            return None
+
+        return last_version.update_type
+
     def validate_update_type_update(self, parsed_message, parsed_transaction):
         """
         Validates a single parsed message that is an UPDATE to a taric object,
@@ -685,31 +843,19 @@ class TaricImporter:
             )
 
         # Check if updated, deleted object exists, else raise issue
-        model_instances = parsed_message.taric_object.__class__.model.objects.latest_approved().filter(
-            **parsed_message.taric_object.model_query_parameters(),
+        last_parsed_message_for_model = self.last_matching_message_before(
+            parsed_message,
+            parsed_transaction,
         )
 
-        last_parsed_message_for_model = None
-
-        for tmp_transaction in self.parsed_transactions:
-            if parsed_transaction.index == tmp_transaction.index:
-                break  # done, don't want to process same transaction as the object we are looking at
-
-            for message in tmp_transaction.parsed_messages:
-                # Check for match of identifying fields
-                if (
-                    message.taric_object.model_query_parameters()
-                    == parsed_message.taric_object.model_query_parameters()
-                ):
-                    if type(message.taric_object) is type(parsed_message.taric_object):
-                        # We have a match
-                        last_parsed_message_for_model = message
-
         change_valid = True
         message = ""
 
         # If there are not any entries for this model, prior to this change : not valid
-        if not last_parsed_message_for_model and model_instances.count() == 0:
+        if (
+            not last_parsed_message_for_model
+            and self.latest_approved_count(parsed_message.taric_object) == 0
+        ):
             change_valid = False
             message = (
                 f"Identity keys do not match an existing object in database or import, cant apply update to a deleted or non existent object",
@@ -816,31 +962,19 @@ class TaricImporter:
             )
 
         # Check if updated, deleted object exists, else raise issue
-        model_instances = parsed_message.taric_object.__class__.model.objects.latest_approved().filter(
-            **parsed_message.taric_object.model_query_parameters(),
+        last_parsed_message_for_model = self.last_matching_message_before(
+            parsed_message,
+            parsed_transaction,
         )
 
-        last_parsed_message_for_model = None
-
-        for tmp_transaction in self.parsed_transactions:
-            if parsed_transaction.index == tmp_transaction.index:
-                break  # done, don't want to process same transaction as the object we are looking at
-
-            for message in tmp_transaction.parsed_messages:
-                # Check for match of identifying fields
-                if (
-                    message.taric_object.model_query_parameters()
-                    == parsed_message.taric_object.model_query_parameters()
-                ):
-                    if type(message.taric_object) is type(parsed_message.taric_object):
-                        # We have a match
-                        last_parsed_message_for_model = message
-
         change_valid = True
         message = ""
 
         # If there are not any entries for this model, prior to this change : not valid
-        if not last_parsed_message_for_model and model_instances.count() == 0:
+        if (
+            not last_parsed_message_for_model
+            and self.latest_approved_count(parsed_message.taric_object) == 0
+        ):
             change_valid = False
             message = (
                 f"Identity keys do not match an existing object in database or import, cant delete non existent object",
@@ -899,38 +1033,20 @@ class TaricImporter:
 
             return None
 
-        last_parsed_message_for_model = None
-
-        for tmp_transaction in self.parsed_transactions:
-            if parsed_transaction.index == tmp_transaction.index:
-                break  # done, don't want to process same transaction as the object we are looking at
-
-            for message in tmp_transaction.parsed_messages:
-                # Check for match of identifying fields
-                if (
-                    message.taric_object.model_query_parameters()
-                    == parsed_message.taric_object.model_query_parameters()
-                ):
-                    if type(message.taric_object) is type(
-                        parsed_message.taric_object,
-                    ):
-                        # We have a match
-                        last_parsed_message_for_model = message
+        last_parsed_message_for_model = self.last_matching_message_before(
+            parsed_message,
+            parsed_transaction,
+        )
 
         # Check if record exists for identity keys
-        model_instances = (
-            parsed_message.taric_object.__class__.model.objects.all().filter(
-                **parsed_message.taric_object.model_query_parameters(),
-            )
+        last_update_type = self.last_update_type_in_database(
+            parsed_message.taric_object,
         )
 
         # check for deletes
         create_issue = False
         if not parsed_message.taric_object.skip_identity_check:
-            if (
-                model_instances.count() > 0
-                and model_instances.last().update_type != UpdateType.DELETE
-            ):
+            if last_update_type is not None and last_update_type != UpdateType.DELETE:
                 create_issue = True
             elif (
                 last_parsed_message_for_model
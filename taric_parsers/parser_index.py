@@ -0,0 +1,181 @@
+from __future__ import annotations
+
+from collections import defaultdict
+from typing import Dict
+from typing import List
+from typing import Optional
+from typing import Tuple
+from typing import Type
+
+from taric_parsers.parsers.taric_parser import BaseTaricParser
+from taric_parsers.parsers.taric_parser import MessageParser
+from taric_parsers.parsers.taric_parser import TransactionParser
+
+# The index of the transaction a parsed object is in, and the object.
+IndexedObject = Tuple[int, BaseTaricParser]
+
+
+class ParserIndex:
+    """
+    An index over the parsed objects in an import, used to find the parent and
+    child objects of a parsed object without scanning every message in the
+    import.
+
+    Parent and child objects are linked by the values of the identity fields
+    returned by ``identity_fields_for_parent`` on the child parser class. The
+    index for each kind of lookup is built the first time it is needed, from a
+    single pass over the import, after which lookups are constant-time.
+
+    Objects are always returned in the order in which they appear in the import,
+    and lookups can be limited to the transactions up to and including a given
+    transaction.
+    """
+
+    def __init__(self, parsed_transactions: List[TransactionParser]):
+        self.parsed_transactions = parsed_transactions
+        self._parents: Dict[Tuple, Dict[Tuple, List[IndexedObject]]] = {}
+        self._children: Dict[Tuple, Dict[Tuple, List[IndexedObject]]] = {}
+        self._messages: Dict[Type, Dict[Tuple, List[Tuple[int, MessageParser]]]] = {}
+
+    @staticmethod
+    def _fields_for(child_parser_class: Type[BaseTaricParser]) -> Tuple[str, ...]:
+        return tuple(child_parser_class.identity_fields_for_parent().values())
+
+    @staticmethod
+    def _values_of(taric_object: BaseTaricParser, fields: Tuple[str, ...]) -> Tuple:
+        return tuple(getattr(taric_object, field) for field in fields)
+
+    def _taric_objects(self):
+        for parsed_transaction in self.parsed_transactions:
+            for parsed_message in parsed_transaction.parsed_messages:
+                yield parsed_transaction.index, parsed_message.taric_object
+
+    @staticmethod
+    def _up_to(
+        entries: List[IndexedObject],
+        up_to_transaction: Optional[TransactionParser],
+    ) -> List[BaseTaricParser]:
+        return [
+            taric_object
+            for index, taric_object in entries
+            if up_to_transaction is None or index <= up_to_transaction.index
+        ]
+
+    def parents_of(
+        self,
+        child: BaseTaricParser,
+        up_to_transaction: Optional[TransactionParser] = None,
+    ) -> List[BaseTaricParser]:
+        """
+        Returns the objects in the import that are parents of ``child``: those
+        that are not themselves child objects, are of the same model, and have
+        the same values for the fields linking the child to its parent.
+
+        Args:
+            child: (required) BaseTaricParser, a child parser object
+            up_to_transaction: TransactionParser (optional), only objects in this transaction and those preceding it are returned
+
+        Returns:
+            list of BaseTaricParser, in import order
+        """
+        fields = self._fields_for(child.__class__)
+        key = (child.__class__.model, fields)
+
+        if key not in self._parents:
+            entries = defaultdict(list)
+            for index, taric_object in self._taric_objects():
+                if (
+                    not taric_object.is_child_object()
+                    and taric_object.__class__.model == child.__class__.model
+                ):
+                    entries[self._values_of(taric_object, fields)].append(
+                        (index, taric_object),
+                    )
+            self._parents[key] = entries
+
+        return self._up_to(
+            self._parents[key].get(self._values_of(child, fields), []),
+            up_to_transaction,
+        )
+
+    def children_of(
+        self,
+        parent: BaseTaricParser,
+        child_parser_class: Type[BaseTaricParser],
+        up_to_transaction: Optional[TransactionParser] = None,
+    ) -> List[BaseTaricParser]:
+        """
+        Returns the objects in the import that are instances of
+        ``child_parser_class`` and are children of ``parent``.
+
+        Args:
+            parent: (required) BaseTaricParser, the parent parser object
+            child_parser_class: (required) BaseTaricParser class, the type of child to find
+            up_to_transaction: TransactionParser (optional), only objects in this transaction and those preceding it are returned
+
+        Returns:
+            list of BaseTaricParser, in import order
+        """
+        if (
+            parent.is_child_object()
+            or parent.__class__.model != child_parser_class.model
+        ):
+            return []
+
+        fields = self._fields_for(child_parser_class)
+        key = (child_parser_class, fields)
+
+        if key not in self._children:
+            entries = defaultdict(list)
+            for index, taric_object in self._taric_objects():
+                if isinstance(taric_object, child_parser_class):
+                    entries[self._values_of(taric_object, fields)].append(
+                        (index, taric_object),
+                    )
+            self._children[key] = entries
+
+        return self._up_to(
+            self._children[key].get(self._values_of(parent, fields), []),
+            up_to_transaction,
+        )
+
+    def messages_matching(
+        self,
+        parsed_message: MessageParser,
+        before_transaction: TransactionParser,
+    ) -> List[MessageParser]:
+        """
+        Returns the messages for objects of the same parser class and with the
+        same identity as the object in ``parsed_message``, from transactions
+        before ``before_transaction``.
+
+        Args:
+            parsed_message: (required) MessageParser, the message to match
+            before_transaction: (required) TransactionParser, only messages in transactions preceding this one are returned
+
+        Returns:
+            list of MessageParser, in import order
+        """
+        parser_class = type(parsed_message.taric_object)
+
+        if parser_class not in self._messages:
+            entries = defaultdict(list)
+            for parsed_transaction in self.parsed_transactions:
+                for message in parsed_transaction.parsed_messages:
+                    if type(message.taric_object) is parser_class:
+                        key = self._query_key(message.taric_object)
+                        entries[key].append((parsed_transaction.index, message))
+            self._messages[parser_class] = entries
+
+        return [
+            message
+            for index, message in self._messages[parser_class].get(
+                self._query_key(parsed_message.taric_object),
+                [],
+            )
+            if index < before_transaction.index
+        ]
+
+    @staticmethod
+    def _query_key(taric_object: BaseTaricParser) -> Tuple:
+        return tuple(taric_object.model_query_parameters().items())
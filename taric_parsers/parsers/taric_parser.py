@@ -79,6 +79,19 @@ class TransactionParser:
         for message in self.parsed_messages:
             self.taric_objects.append(message.taric_object)
 
+    def release_xml(self):
+        """
+        Drops references to the XML tags this transaction was parsed from.
+
+        Parsed messages hold everything needed to validate and import them, so
+        once parsing is complete the tags can be released, allowing the XML to
+        be garbage collected.
+        """
+        self.messages_xml_tags = []
+
+        for message in self.parsed_messages:
+            message.message = None
+
 
 class MessageParser:
     """Responsible for representing a parsed TARIC message."""
@@ -598,6 +611,7 @@ class BaseTaricParser:
         raise_import_issue_if_no_match=True,
         include_non_taric_attributes=False,
         json_compatible=False,
+        linked_models=None,
     ) -> dict:
         """
         Returns a dictionary of model attributes, for use in populating database
@@ -608,6 +622,7 @@ class BaseTaricParser:
             raise_import_issue_if_no_match: (optional) bool, Flag to indicate if an import issue should be created if a related model cant be matched.
             include_non_taric_attributes: (optional) bool, flag to indicate if output should include non TARIC attributes. There are some edge cases where this is needed.
             json_compatible: (optional) bool, flat to indicate if the output should be JSON serializable
+            linked_models: (optional) dict, linked models already looked up as at the same transaction, which is updated with any new lookups
 
         Returns:
             dict, Dictionary of populated attributes for the model
@@ -642,11 +657,17 @@ class BaseTaricParser:
                     field.parser_field_name,
                 )
 
-            linked_model = self.get_linked_model(
-                fields_and_values,
-                link.model,
-                transaction,
-            )
+            linked_model_key = (link.model, tuple(fields_and_values.items()))
+            if linked_models is not None and linked_model_key in linked_models:
+                linked_model = linked_models[linked_model_key]
+            else:
+                linked_model = self.get_linked_model(
+                    fields_and_values,
+                    link.model,
+                    transaction,
+                )
+                if linked_models is not None:
+                    linked_models[linked_model_key] = linked_model
 
             if linked_model:
                 # There are cases where this will not return a value, which is fine when the linked
@@ -1,7 +1,16 @@
+import io
+from typing import BinaryIO
+
+
 class TaricXMLSourceBase:
     def get_xml_string(self):
         raise NotImplementedError("Implement on child class")
 
+    def open(self) -> BinaryIO:
+        """Returns a binary file object from which the XML can be read
+        incrementally."""
+        return io.BytesIO(self.get_xml_string().encode("utf-8"))
+
 
 class TaricXMLFileSource(TaricXMLSourceBase):
     def __init__(self, file_path: str):
@@ -11,6 +20,9 @@ class TaricXMLFileSource(TaricXMLSourceBase):
         with open(self.file_path, "r") as file:
             return file.read()
 
+    def open(self) -> BinaryIO:
+        return open(self.file_path, "rb")
+
 
 class TaricXMLStringSource(TaricXMLSourceBase):
     def __init__(self, xml_string: str):
@@ -18,3 +30,16 @@ class TaricXMLStringSource(TaricXMLSourceBase):
 
     def get_xml_string(self):
         return self.xml_string
+
+
+class TaricXMLChunkSource(TaricXMLSourceBase):
+    """The XML of an ImporterXMLChunk, wherever its payload is stored."""
+
+    def __init__(self, chunk):
+        self.chunk = chunk
+
+    def get_xml_string(self):
+        return self.chunk.read_payload()
+
+    def open(self) -> BinaryIO:
+        return self.chunk.open_payload()
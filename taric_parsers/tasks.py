@@ -1,6 +1,7 @@
 from logging import getLogger
 from typing import Sequence
 
+from django.conf import settings
 from django.contrib.auth import get_user_model
 
 import taric_parsers.importer
@@ -10,7 +11,7 @@ from importer.models import ImportBatch
 from importer.models import ImporterChunkStatus
 from importer.models import ImporterXMLChunk
 from importer.models import ImportIssueType
-from taric_parsers.taric_xml_source import TaricXMLStringSource
+from taric_parsers.taric_xml_source import TaricXMLChunkSource
 from workbaskets.models import WorkBasket
 from workbaskets.models import get_partition_scheme
 
@@ -48,10 +49,25 @@ def parse_and_import(
     chunk.save()
 
     try:
-        importer = taric_parsers.importer.TaricImporter(
-            import_batch=batch,
-            taric_xml_source=TaricXMLStringSource(chunk.chunk_text),
-        )
+        importer = None
+        if settings.TARIC_IMPORTER_DRY_RUN:
+            # Imported here as the dry run subclasses TaricImporter, whose
+            # module imports this one.
+            from taric_parsers.dry_run import TaricImportDryRun
+
+            dry_run = TaricImportDryRun(
+                import_batch=batch,
+                taric_xml_source=TaricXMLChunkSource(chunk),
+            )
+            # Only import chunks that the dry run expects to succeed.
+            if not dry_run.can_save():
+                importer = dry_run
+
+        if importer is None:
+            importer = taric_parsers.importer.TaricImporter(
+                import_batch=batch,
+                taric_xml_source=TaricXMLChunkSource(chunk),
+            )
 
         if importer.can_save():
             # at this point we can create the workbasket and have a high degree of confidence that the import will complete.
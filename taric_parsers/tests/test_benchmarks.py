@@ -0,0 +1,288 @@
+import os
+import time
+
+import pytest
+from django.db import transaction
+
+from common.tests import factories
+from common.tests.util import QueryCounter
+from common.tests.util import get_test_xml_file
+from common.tests.util import peak_rss_of
+from common.tests.util import time_best_of
+from taric_parsers.dry_run import TaricImportDryRun
+from taric_parsers.importer import TaricImporter
+from taric_parsers.parser_index import ParserIndex
+from taric_parsers.parsers.taric_parser import ParserHelper
+from taric_parsers.taric_xml_source import TaricXMLFileSource
+
+pytestmark = [pytest.mark.django_db, pytest.mark.benchmark]
+
+# Roughly 50MB of XML, the largest envelope that can be uploaded (see
+# settings.MAX_IMPORT_FILE_SIZE). Use --benchmark-scale=10 for a 500MB envelope.
+TRANSACTIONS = 15000
+
+# Each transaction in the example envelope holds three messages.
+MESSAGES = 100_000
+
+LINEAR_SAMPLE = 20
+
+# Additional codes created, then updated, by the commit benchmark.
+COMMIT_ADDITIONAL_CODES = 250
+
+
+class ParseOnlyImporter(TaricImporter):
+    """Parses an envelope without validating it against the database, so that
+    the cost of parsing can be measured on its own."""
+
+    def validate(self):
+        pass
+
+
+def write_envelope(path, transaction_count):
+    """
+    Writes an envelope made by repeating the transaction in
+    additional_code_CREATE.xml, giving the objects in each transaction their own
+    identity.
+
+    Returns the path written to.
+    """
+    with open(get_test_xml_file("additional_code_CREATE.xml", __file__)) as file:
+        example = file.read()
+
+    start = example.index("<env:transaction")
+    end = example.index("</env:transaction>") + len("</env:transaction>")
+    header, xml_transaction, footer = example[:start], example[start:end], example[end:]
+
+    with open(path, "w") as file:
+        file.write(header)
+        for index in range(transaction_count):
+            file.write(
+                xml_transaction.replace(
+                    '<env:transaction id="1">',
+                    f'<env:transaction id="{index + 1}">',
+                )
+                .replace(
+                    "<oub:additional.code.type.id>5<",
+                    f"<oub:additional.code.type.id>{index}<",
+                )
+                .replace(
+                    "<oub:additional.code.sid>1<",
+                    f"<oub:additional.code.sid>{index}<",
+                ),
+            )
+        file.write(footer)
+
+    return path
+
+
+@pytest.fixture
+def large_envelope(benchmark_scale, tmp_path):
+    return write_envelope(tmp_path / "envelope.xml", TRANSACTIONS * benchmark_scale)
+
+
+def write_commit_envelope(path, code_count):
+    """
+    Writes an envelope that starts with the transaction in
+    additional_code_CREATE.xml, followed by transactions creating and then
+    updating ``code_count`` more additional codes of the same type.
+
+    Returns the path written to.
+    """
+    with open(get_test_xml_file("additional_code_CREATE.xml", __file__)) as file:
+        example = file.read()
+
+    start = example.index("<env:transaction")
+    end = example.index("</env:transaction>") + len("</env:transaction>")
+    header, xml_transaction, footer = example[:start], example[start:end], example[end:]
+    message_start = xml_transaction.index('<env:app.message id="2">')
+    message_end = xml_transaction.index("</env:app.message>", message_start)
+    xml_message = xml_transaction[
+        message_start : message_end + len("</env:app.message>")
+    ]
+
+    def code_transaction(index, sid, update_type, start_date):
+        return (
+            f'<env:transaction id="{index}">'
+            + xml_message.replace(
+                "<oub:update.type>3<",
+                f"<oub:update.type>{update_type}<",
+            )
+            .replace(
+                "<oub:additional.code.sid>1<",
+                f"<oub:additional.code.sid>{sid}<",
+            )
+            .replace(
+                "<oub:additional.code>3<",
+                f"<oub:additional.code>{sid % 1000:03}<",
+            )
+            .replace("2021-01-01", start_date)
+            + "</env:transaction>"
+        )
+
+    with open(path, "w") as file:
+        file.write(header)
+        file.write(xml_transaction)
+        for sid in range(2, code_count + 2):
+            file.write(code_transaction(sid, sid, 3, "2021-01-01"))
+        for sid in range(2, code_count + 2):
+            file.write(code_transaction(code_count + sid, sid, 1, "2021-02-01"))
+        file.write(footer)
+
+    return path
+
+
+@pytest.fixture
+def commit_envelope(benchmark_scale, tmp_path):
+    return write_commit_envelope(
+        tmp_path / "envelope.xml",
+        COMMIT_ADDITIONAL_CODES * benchmark_scale,
+    )
+
+
+@pytest.fixture
+def many_messages(benchmark_scale, tmp_path):
+    return write_envelope(
+        tmp_path / "envelope.xml",
+        MESSAGES * benchmark_scale // 3,
+    )
+
+
+def test_streaming_parse(large_envelope, record_property):
+    """Compare the time and memory taken to parse a large envelope in one go
+    against streaming it a transaction at a time."""
+    source = TaricXMLFileSource(str(large_envelope))
+
+    def parse(streaming):
+        return lambda: ParseOnlyImporter(None, source, streaming=streaming)
+
+    in_memory = parse(streaming=False)()
+    streamed = parse(streaming=True)()
+    assert len(streamed.parsed_transactions) == len(in_memory.parsed_transactions)
+    del in_memory, streamed
+
+    record_property("envelope_bytes", os.path.getsize(large_envelope))
+    record_property("in_memory_seconds", time_best_of(parse(False), repeat=1))
+    record_property("streaming_seconds", time_best_of(parse(True), repeat=1))
+    record_property("in_memory_peak_rss_bytes", peak_rss_of(parse(False)))
+    record_property("streaming_peak_rss_bytes", peak_rss_of(parse(True)))
+
+
+def linear_parents_of(importer, child):
+    """Finds the parents of a child object by scanning the whole import, as the
+    importer did before it was indexed."""
+    return [
+        message.taric_object
+        for parsed_transaction in importer.parsed_transactions
+        for message in parsed_transaction.parsed_messages
+        if child.is_child_for(message.taric_object)
+    ]
+
+
+def test_parent_and_child_lookups(many_messages, record_property):
+    """Time the parent, child and previous change lookups that validating an
+    import makes for every message, and estimate how long the same lookups take
+    by scanning the import."""
+    importer = ParseOnlyImporter(
+        None,
+        TaricXMLFileSource(str(many_messages)),
+        streaming=True,
+    )
+    messages = [
+        (parsed_transaction, message)
+        for parsed_transaction in importer.parsed_transactions
+        for message in parsed_transaction.parsed_messages
+    ]
+    children = [
+        message.taric_object
+        for _, message in messages
+        if message.taric_object.is_child_object()
+    ]
+
+    def lookups():
+        importer.parser_index = ParserIndex(importer.parsed_transactions)
+        for parsed_transaction, message in messages:
+            taric_object = message.taric_object
+            importer.last_matching_message_before(message, parsed_transaction)
+            if taric_object.is_child_object():
+                importer.find_parent_in_import(taric_object, parsed_transaction)
+            for child_parser_class in ParserHelper.get_child_parsers(taric_object):
+                importer.find_child_objects_in_import(
+                    child_parser_class,
+                    taric_object,
+                    parsed_transaction,
+                )
+
+    indexed_seconds = time_best_of(lookups, repeat=1)
+
+    sample = children[:: max(1, len(children) // LINEAR_SAMPLE)][:LINEAR_SAMPLE]
+    start = time.perf_counter()
+    for child in sample:
+        assert linear_parents_of(importer, child) == (
+            importer.parser_index.parents_of(child)
+        )
+    linear_seconds_per_lookup = (time.perf_counter() - start) / len(sample)
+
+    record_property("messages", len(messages))
+    record_property("indexed_seconds", indexed_seconds)
+    record_property("linear_seconds_per_parent_lookup", linear_seconds_per_lookup)
+    record_property(
+        "linear_estimated_parent_lookup_seconds",
+        linear_seconds_per_lookup * len(children),
+    )
+
+
+def test_bulk_commit(commit_envelope, record_property):
+    """Compare the time and queries taken to commit an import message by message
+    against committing it in bulk."""
+    importer = ParseOnlyImporter(None, TaricXMLFileSource(str(commit_envelope)))
+
+    def commit(bulk_commit):
+        importer.bulk_commit = bulk_commit
+        with transaction.atomic():
+            importer.workbasket = factories.WorkBasketFactory.create()
+            importer.populate_parent_attributes()
+            with QueryCounter() as queries:
+                seconds = time_best_of(importer.commit_data, repeat=1)
+            assert importer.issues() == []
+            transaction.set_rollback(True)
+        return seconds, queries.count
+
+    per_message_seconds, per_message_queries = commit(bulk_commit=False)
+    bulk_seconds, bulk_queries = commit(bulk_commit=True)
+
+    record_property("transactions", len(importer.parsed_transactions))
+    record_property("per_message_queries", per_message_queries)
+    record_property("bulk_queries", bulk_queries)
+    record_property("per_message_seconds", per_message_seconds)
+    record_property("bulk_seconds", bulk_seconds)
+    record_property("speedup", per_message_seconds / bulk_seconds)
+
+
+def test_dry_run(commit_envelope, record_property):
+    """Compare the time and queries taken to validate an import as TaricImporter
+    does against a dry run, which also resolves the links that committing the
+    import would."""
+    source = TaricXMLFileSource(str(commit_envelope))
+
+    def validate(importer_class, **kwargs):
+        with QueryCounter() as queries:
+            seconds = time_best_of(
+                lambda: importer_class(None, source, **kwargs),
+                repeat=1,
+            )
+        return seconds, queries.count
+
+    importer_seconds, importer_queries = validate(TaricImporter)
+    # The example transactions are not complete enough to be valid against the
+    # schema.
+    dry_run_seconds, dry_run_queries = validate(
+        TaricImportDryRun,
+        validate_schema=False,
+    )
+    assert TaricImportDryRun(None, source, validate_schema=False).issues() == []
+
+    record_property("transactions", COMMIT_ADDITIONAL_CODES * 2 + 1)
+    record_property("importer_validation_queries", importer_queries)
+    record_property("dry_run_queries", dry_run_queries)
+    record_property("importer_validation_seconds", importer_seconds)
+    record_property("dry_run_seconds", dry_run_seconds)
@@ -0,0 +1,92 @@
+import os
+
+import pytest
+from django.db import IntegrityError
+from django.db import transaction
+
+from common.models import TrackedModel
+from common.models.tracked_qs import TrackedModelQuerySet
+from common.tests.util import preload_import
+
+pytestmark = pytest.mark.django_db
+
+ADDITIONAL_CODE_EXAMPLES = os.path.join(
+    os.path.dirname(__file__),
+    "additional_code_parsers",
+    "test_additional_code_parser.py",
+)
+
+
+def import_files(file_names):
+    """Imports each file in turn, approving the workbasket of every import but
+    the last, and returns the importer for the last."""
+    for file_name in file_names[:-1]:
+        preload_import(file_name, ADDITIONAL_CODE_EXAMPLES, True)
+    return preload_import(file_names[-1], ADDITIONAL_CODE_EXAMPLES)
+
+
+def snapshot(importer):
+    """Returns a description of the tracked models in the database, and of the
+    issues raised by the import, that does not depend on primary keys."""
+    version_groups = {}
+    models = [
+        (
+            type(obj).__name__,
+            obj.update_type,
+            tuple(str(value) for value in obj.get_identifying_fields().values()),
+            obj.transaction.order,
+            version_groups.setdefault(obj.version_group_id, len(version_groups)),
+        )
+        for obj in TrackedModel.objects.order_by("pk")
+    ]
+    # Database errors include the failing row, whose primary key will differ.
+    issues = [
+        (
+            issue.object_type,
+            issue.issue_type,
+            str(issue.description).partition("DETAIL")[0],
+        )
+        for issue in importer.issues()
+    ]
+    return models, issues
+
+
+@pytest.mark.importer_v2
+@pytest.mark.parametrize(
+    "file_names",
+    [
+        ["additional_code_CREATE.xml"],
+        ["additional_code_CREATE.xml", "additional_code_UPDATE.xml"],
+        ["additional_code_CREATE.xml", "additional_code_DELETE.xml"],
+        ["additional_code_DELETE.xml"],
+        ["additional_code_invalid_type_CREATE.xml"],
+    ],
+)
+def test_bulk_commit_matches_commit_by_message(settings, superuser, file_names):
+    settings.TARIC_IMPORTER_BULK_COMMIT = False
+    with transaction.atomic():
+        expected = snapshot(import_files(file_names))
+        transaction.set_rollback(True)
+
+    settings.TARIC_IMPORTER_BULK_COMMIT = True
+    importer = import_files(file_names)
+
+    assert importer.bulk_commit
+    assert snapshot(importer) == expected
+
+
+@pytest.mark.importer_v2
+def test_bulk_commit_falls_back_to_saving_singly(settings, superuser, monkeypatch):
+    def fail(*args, **kwargs):
+        raise IntegrityError("bulk insert failed")
+
+    settings.TARIC_IMPORTER_BULK_COMMIT = False
+    with transaction.atomic():
+        expected = snapshot(import_files(["additional_code_CREATE.xml"]))
+        transaction.set_rollback(True)
+
+    settings.TARIC_IMPORTER_BULK_COMMIT = True
+    monkeypatch.setattr(TrackedModelQuerySet, "bulk_create_versions", fail)
+    importer = import_files(["additional_code_CREATE.xml"])
+
+    assert snapshot(importer) == expected
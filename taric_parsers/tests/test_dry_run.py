@@ -0,0 +1,189 @@
+import os
+
+import pytest
+from django.db import transaction
+
+from common.models import TrackedModel
+from common.models import Transaction
+from common.models import VersionGroup
+from common.tests import factories
+from common.tests.synthetic_taric import SyntheticTaricCounts
+from common.tests.synthetic_taric import SyntheticTaricEnvelope
+from common.tests.synthetic_taric import SyntheticTaricReferences
+from common.tests.util import get_test_xml_file
+from common.tests.util import preload_import
+from importer.models import ImporterChunkStatus
+from taric_parsers.dry_run import TaricImportDryRun
+from taric_parsers.taric_xml_source import TaricXMLFileSource
+from taric_parsers.taric_xml_source import TaricXMLStringSource
+from taric_parsers.tasks import parse_and_import
+from taric_parsers.validators import ImportStatus
+from workbaskets.models import WorkBasket
+
+pytestmark = pytest.mark.django_db
+
+ADDITIONAL_CODE_EXAMPLES = os.path.join(
+    os.path.dirname(__file__),
+    "additional_code_parsers",
+    "test_additional_code_parser.py",
+)
+
+
+def issues_of(importer):
+    return [
+        (
+            issue.object_type,
+            issue.related_object_type,
+            issue.issue_type,
+            str(issue.description),
+        )
+        for issue in importer.issues()
+    ]
+
+
+def database_counts():
+    return (
+        TrackedModel.objects.count(),
+        Transaction.objects.count(),
+        VersionGroup.objects.count(),
+    )
+
+
+@pytest.mark.importer_v2
+@pytest.mark.parametrize(
+    "file_names",
+    [
+        ["additional_code_CREATE.xml"],
+        ["additional_code_CREATE.xml", "additional_code_CREATE.xml"],
+        ["additional_code_CREATE.xml", "additional_code_UPDATE.xml"],
+        ["additional_code_CREATE.xml", "additional_code_DELETE.xml"],
+        ["additional_code_DELETE.xml"],
+        ["additional_code_UPDATE.xml"],
+        ["additional_code_description_CREATE.xml"],
+        ["additional_code_description_invalid_additional_code_CREATE.xml"],
+    ],
+)
+def test_dry_run_reports_the_issues_of_an_import(superuser, file_names):
+    for file_name in file_names[:-1]:
+        preload_import(file_name, ADDITIONAL_CODE_EXAMPLES, True)
+
+    counts = database_counts()
+    dry_run = TaricImportDryRun(
+        factories.ImportBatchFactory.create(),
+        TaricXMLFileSource(get_test_xml_file(file_names[-1], ADDITIONAL_CODE_EXAMPLES)),
+        # The examples are not complete enough to be valid against the schema.
+        validate_schema=False,
+    )
+    assert dry_run.process_and_save_if_valid(None) == dry_run.status
+    assert database_counts() == counts
+
+    with transaction.atomic():
+        importer = preload_import(file_names[-1], ADDITIONAL_CODE_EXAMPLES)
+        transaction.set_rollback(True)
+
+    assert issues_of(dry_run) == issues_of(importer)
+    assert dry_run.status == importer.status
+
+
+@pytest.mark.importer_v2
+def test_dry_run_reports_missing_links(superuser):
+    dry_run = TaricImportDryRun(
+        factories.ImportBatchFactory.create(),
+        TaricXMLFileSource(
+            get_test_xml_file(
+                "additional_code_invalid_type_CREATE.xml",
+                ADDITIONAL_CODE_EXAMPLES,
+            ),
+        ),
+        validate_schema=False,
+    )
+
+    assert dry_run.status == ImportStatus.FAILED
+    assert (
+        "additional.code.type",
+        "Missing expected linked object AdditionalCodeTypeParserV2",
+    ) in [(issue.related_object_type, issue.description) for issue in dry_run.issues()]
+
+
+@pytest.mark.importer_v2
+def test_dry_run_looks_up_existing_objects_in_batches(
+    superuser,
+    django_assert_max_num_queries,
+):
+    preload_import("additional_code_CREATE.xml", ADDITIONAL_CODE_EXAMPLES, True)
+    source = TaricXMLFileSource(
+        get_test_xml_file("additional_code_UPDATE.xml", ADDITIONAL_CODE_EXAMPLES),
+    )
+    import_batch = factories.ImportBatchFactory.create()
+
+    with django_assert_max_num_queries(4):
+        dry_run = TaricImportDryRun(import_batch, source, validate_schema=False)
+
+    assert dry_run.issues() == []
+
+
+@pytest.mark.importer_v2
+def test_dry_run_of_a_valid_envelope(tmp_path):
+    envelope = SyntheticTaricEnvelope(
+        SyntheticTaricCounts(commodities=3, measures_per_commodity=2, footnotes=2),
+        SyntheticTaricReferences(
+            footnote_type=factories.FootnoteTypeFactory.create(),
+            measure_type=factories.MeasureTypeFactory.create(),
+            geographical_area=factories.GeographicalAreaFactory.create(),
+            regulation=factories.RegulationFactory.create(),
+        ),
+    )
+    with open(tmp_path / "envelope.xml", "w") as output:
+        envelope.write(output)
+
+    dry_run = TaricImportDryRun(
+        factories.ImportBatchFactory.create(),
+        TaricXMLFileSource(str(tmp_path / "envelope.xml")),
+    )
+
+    assert dry_run.issues() == []
+    assert dry_run.status == ImportStatus.COMPLETED
+
+    counts = database_counts()
+    dry_run.commit_data()
+    assert database_counts() == counts
+
+
+@pytest.mark.importer_v2
+@pytest.mark.parametrize(
+    "xml, description",
+    [
+        ("<envelope>", "Premature end of data in tag envelope"),
+        (
+            '<?xml version="1.0" encoding="UTF-8"?>'
+            '<env:envelope xmlns:env="urn:publicid:-:DGTAXUD:GENERAL:ENVELOPE:1.0">'
+            "</env:envelope>",
+            "Line 1: Element '{urn:publicid:-:DGTAXUD:GENERAL:ENVELOPE:1.0}envelope'",
+        ),
+    ],
+)
+def test_dry_run_validates_schema(xml, description):
+    dry_run = TaricImportDryRun(
+        factories.ImportBatchFactory.create(),
+        TaricXMLStringSource(xml),
+    )
+
+    assert dry_run.status == ImportStatus.FAILED
+    assert dry_run.parsed_transactions == []
+    assert dry_run.issues()[0].object_type == "envelope"
+    assert dry_run.issues()[0].description.startswith(description)
+
+
+@pytest.mark.importer_v2
+def test_parse_and_import_skips_chunks_failing_a_dry_run(settings, valid_user):
+    settings.TARIC_IMPORTER_DRY_RUN = True
+    # The factory's chunk is an empty envelope, which the schema doesn't allow.
+    chunk = factories.ImporterXMLChunkFactory.create(batch__workbasket=None)
+    workbasket_count = WorkBasket.objects.count()
+
+    parse_and_import(chunk.pk, valid_user.username, "Dry run")
+
+    chunk.refresh_from_db()
+    assert chunk.status == ImporterChunkStatus.ERRORED
+    assert WorkBasket.objects.count() == workbasket_count
+    assert chunk.batch.issues.filter(object_type="envelope").exists()
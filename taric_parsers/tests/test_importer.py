@@ -0,0 +1,82 @@
+import pytest
+from bs4 import BeautifulSoup
+
+from common.tests import factories
+from common.tests.util import get_test_xml_file
+from taric_parsers.importer import TaricImporter
+from taric_parsers.importer import stream_xml_transactions
+from taric_parsers.taric_xml_source import TaricXMLFileSource
+
+pytestmark = pytest.mark.django_db
+
+
+def parsed_data(importer):
+    return [
+        (parsed_transaction.index, message.data)
+        for parsed_transaction in importer.parsed_transactions
+        for message in parsed_transaction.parsed_messages
+    ]
+
+
+@pytest.mark.importer_v2
+class TestStreamXMLTransactions:
+    def test_yields_each_transaction(self):
+        file_path = get_test_xml_file("additional_code_CREATE.xml", __file__)
+        with open(file_path) as file:
+            expected = BeautifulSoup(file.read(), "xml").find_all("env:transaction")
+
+        with open(file_path, "rb") as file:
+            transactions = list(stream_xml_transactions(file))
+
+        assert len(transactions) == len(expected)
+        for streamed, parsed in zip(transactions, expected):
+            assert [
+                message.text for message in streamed.find_all("env:app.message")
+            ] == [message.text for message in parsed.find_all("env:app.message")]
+
+
+@pytest.mark.importer_v2
+class TestTaricImporterStreaming:
+    @pytest.mark.parametrize(
+        "file_name",
+        ("additional_code_CREATE.xml", "additional_code_UPDATE.xml"),
+    )
+    def test_parses_the_same_messages_and_issues(self, file_name):
+        source = TaricXMLFileSource(get_test_xml_file(file_name, __file__))
+        import_batch = factories.ImportBatchFactory.create()
+
+        importer = TaricImporter(import_batch, source, streaming=False)
+        streaming_importer = TaricImporter(import_batch, source, streaming=True)
+
+        assert parsed_data(streaming_importer) == parsed_data(importer)
+        assert [str(issue) for issue in streaming_importer.issues()] == [
+            str(issue) for issue in importer.issues()
+        ]
+
+    def test_releases_xml_once_parsed(self):
+        source = TaricXMLFileSource(
+            get_test_xml_file("additional_code_CREATE.xml", __file__),
+        )
+        importer = TaricImporter(
+            factories.ImportBatchFactory.create(),
+            source,
+            streaming=True,
+        )
+
+        assert importer.raw_xml is None
+        assert importer.bs_taric3_file is None
+        for parsed_transaction in importer.parsed_transactions:
+            assert parsed_transaction.messages_xml_tags == []
+            for message in parsed_transaction.parsed_messages:
+                assert message.message is None
+
+    def test_defaults_to_setting(self, settings):
+        settings.TARIC_IMPORTER_STREAMING = True
+        source = TaricXMLFileSource(
+            get_test_xml_file("additional_code_CREATE.xml", __file__),
+        )
+
+        importer = TaricImporter(factories.ImportBatchFactory.create(), source)
+
+        assert importer.streaming
+        assert importer.raw_xml is None
@@ -0,0 +1,108 @@
+import pytest
+from bs4 import BeautifulSoup
+
+from common.tests.util import get_test_xml_file
+from taric_parsers.parser_index import ParserIndex
+from taric_parsers.parsers.additional_code_parsers import (
+    AdditionalCodeTypeDescriptionParserV2,
+)
+from taric_parsers.parsers.additional_code_parsers import AdditionalCodeTypeParserV2
+from taric_parsers.parsers.taric_parser import TransactionParser
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture
+def parsed_transactions():
+    """Returns the transaction in additional_code_CREATE.xml, parsed twice as
+    consecutive transactions."""
+    with open(get_test_xml_file("additional_code_CREATE.xml", __file__)) as file:
+        xml_transaction = BeautifulSoup(file.read(), "xml").find("env:transaction")
+
+    return [TransactionParser(xml_transaction, index) for index in range(2)]
+
+
+def taric_objects_of(parsed_transaction, parser_class):
+    return [
+        taric_object
+        for taric_object in parsed_transaction.taric_objects
+        if type(taric_object) is parser_class
+    ]
+
+
+@pytest.mark.importer_v2
+class TestParserIndex:
+    def test_parents_of(self, parsed_transactions):
+        index = ParserIndex(parsed_transactions)
+        description = taric_objects_of(
+            parsed_transactions[1],
+            AdditionalCodeTypeDescriptionParserV2,
+        )[0]
+
+        assert index.parents_of(description) == [
+            taric_objects_of(parsed_transaction, AdditionalCodeTypeParserV2)[0]
+            for parsed_transaction in parsed_transactions
+        ]
+
+    def test_parents_of_up_to_transaction(self, parsed_transactions):
+        index = ParserIndex(parsed_transactions)
+        first, second = parsed_transactions
+        description = taric_objects_of(second, AdditionalCodeTypeDescriptionParserV2)[0]
+
+        assert index.parents_of(description, up_to_transaction=first) == [
+            taric_objects_of(first, AdditionalCodeTypeParserV2)[0],
+        ]
+
+    def test_parents_of_matches_on_identity_fields(self, parsed_transactions):
+        description = taric_objects_of(
+            parsed_transactions[0],
+            AdditionalCodeTypeDescriptionParserV2,
+        )[0]
+        description.sid = "Z"
+
+        assert ParserIndex(parsed_transactions).parents_of(description) == []
+
+    def test_children_of(self, parsed_transactions):
+        index = ParserIndex(parsed_transactions)
+        additional_code_type = taric_objects_of(
+            parsed_transactions[0],
+            AdditionalCodeTypeParserV2,
+        )[0]
+        descriptions = [
+            taric_objects_of(
+                parsed_transaction,
+                AdditionalCodeTypeDescriptionParserV2,
+            )[0]
+            for parsed_transaction in parsed_transactions
+        ]
+
+        assert (
+            index.children_of(
+                additional_code_type,
+                AdditionalCodeTypeDescriptionParserV2,
+            )
+            == descriptions
+        )
+        assert (
+            index.children_of(descriptions[0], AdditionalCodeTypeDescriptionParserV2)
+            == []
+        )
+
+    def test_children_of_up_to_transaction(self, parsed_transactions):
+        index = ParserIndex(parsed_transactions)
+        first, second = parsed_transactions
+        additional_code_type = taric_objects_of(second, AdditionalCodeTypeParserV2)[0]
+
+        assert index.children_of(
+            additional_code_type,
+            AdditionalCodeTypeDescriptionParserV2,
+            up_to_transaction=first,
+        ) == [taric_objects_of(first, AdditionalCodeTypeDescriptionParserV2)[0]]
+
+    def test_messages_matching(self, parsed_transactions):
+        index = ParserIndex(parsed_transactions)
+        first, second = parsed_transactions
+
+        for earlier, later in zip(first.parsed_messages, second.parsed_messages):
+            assert index.messages_matching(later, second) == [earlier]
+            assert index.messages_matching(earlier, first) == []
@@ -31,6 +31,11 @@ class TestTaricXMLStringSource:
         target_inst = TaricXMLStringSource("xml")
         assert target_inst.get_xml_string() == "xml"
 
+    def test_open(self):
+        target_inst = TaricXMLStringSource("xml")
+        with target_inst.open() as file:
+            assert file.read() == b"xml"
+
 
 @pytest.mark.importer_v2
 class TestTaricXMLFileSource:
@@ -53,3 +58,8 @@ class TestTaricXMLFileSource:
     def test_get_xml_string(self):
         target_inst = TaricXMLFileSource(self.get_xml_file_path())
         assert "some description" in target_inst.get_xml_string()
+
+    def test_open(self):
+        target_inst = TaricXMLFileSource(self.get_xml_file_path())
+        with target_inst.open() as file:
+            assert file.read().decode("utf-8") == target_inst.get_xml_string()
@@ -1,10 +1,13 @@
 import logging
 from typing import Any
+from typing import List
 from typing import Optional
 
 from django.core.management import BaseCommand
+from django.core.management.base import CommandError
 from django.core.management.base import CommandParser
 
+from common.validators import UpdateType
 from measures.business_rules import ME32
 from measures.models import Measure
 from workbaskets.management.util import WorkBasketCommandMixin
@@ -18,11 +21,13 @@ class Command(WorkBasketCommandMixin, BaseCommand):
         "parameter is supplied then only the most recent (last) measure "
         "instance is checked for clashes. Supplying the --workbasket parameter "
         "ensures that all CREATE and UPDATE instances in the workbasket are "
-        "checked for clashes."
+        "checked for clashes. If MEASURE_SID is omitted then every CREATE and "
+        "UPDATE measure in the workbasket is checked, in one pass over the "
+        "whole workbasket where possible."
     )
 
     def add_arguments(self, parser: CommandParser) -> None:
-        parser.add_argument("MEASURE_SID", type=int)
+        parser.add_argument("MEASURE_SID", type=int, nargs="?")
         parser.add_argument(
             "--workbasket-pk",
             type=int,
@@ -30,6 +35,14 @@ class Command(WorkBasketCommandMixin, BaseCommand):
         )
 
     def handle(self, *args: Any, **options: Any) -> Optional[str]:
+        if options["MEASURE_SID"] is None:
+            if not options["workbasket_pk"]:
+                raise CommandError(
+                    "--workbasket-pk is required if MEASURE_SID is omitted.",
+                )
+
+            return self.handle_workbasket(int(options["workbasket_pk"]))
+
         sid = int(options["MEASURE_SID"])
         workbasket_info = ""
 
@@ -62,75 +75,101 @@ class Command(WorkBasketCommandMixin, BaseCommand):
         for measure in measures:
             me32 = ME32(measure.transaction)
             clashes = me32.clashing_measures(measure)
+            self.write_clashes(measure, clashes)
 
+    def handle_workbasket(self, workbasket_pk: int) -> None:
+        workbasket = self.get_workbasket_or_exit(workbasket_pk)
+        measures = (
+            Measure.objects.filter(transaction__workbasket=workbasket)
+            .select_related("transaction")
+            .exclude(update_type=UpdateType.DELETE)
+            .exclude(goods_nomenclature__isnull=True)
+            .order_by("transaction__partition", "transaction__order", "pk")
+        )
+
+        self.stdout.write(
+            f"Checking {measures.count()} measure instance(s) "
+            f"in workbasket.pk={workbasket.pk}.",
+        )
+
+        clashes = ME32.clashes_in_workbasket(workbasket)
+        for measure in measures:
+            if measure.pk in clashes:
+                measure_clashes = clashes[measure.pk]
+            else:
+                measure_clashes = ME32(measure.transaction).clashing_measures(measure)
+            self.write_clashes(measure, measure_clashes)
+
+    def write_clashes(self, measure: Measure, clashes: List[Measure]) -> None:
+        sid = measure.sid
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Measure:  "
+                f"sid={sid},  "
+                f"update_type={measure.get_update_type_display()},  "
+                f"effective_valid_between={measure.effective_valid_between}  "
+                f"transaction.id={measure.transaction.id}  "
+                f"workbasket.pk={measure.transaction.workbasket.pk}, ",
+            ),
+        )
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"  having the attached commodity:  "
+                f"item_id={measure.goods_nomenclature.item_id},  "
+                f"sid={measure.goods_nomenclature.sid},  "
+                f"valid_between={measure.goods_nomenclature.valid_between}, ",
+            ),
+        )
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"    with Indents:",
+            ),
+        )
+        for indent in measure.goods_nomenclature.indents.all():
             self.stdout.write(
                 self.style.SUCCESS(
-                    f"Measure:  "
-                    f"sid={sid},  "
-                    f"update_type={measure.get_update_type_display()},  "
-                    f"effective_valid_between={measure.effective_valid_between}  "
-                    f"transaction.id={measure.transaction.id}  "
-                    f"workbasket.pk={measure.transaction.workbasket.pk}, ",
-                ),
-            )
-            self.stdout.write(
-                self.style.SUCCESS(
-                    f"  having the attached commodity:  "
-                    f"item_id={measure.goods_nomenclature.item_id},  "
-                    f"sid={measure.goods_nomenclature.sid},  "
-                    f"valid_between={measure.goods_nomenclature.valid_between}, ",
-                ),
-            )
-            self.stdout.write(
-                self.style.SUCCESS(
-                    f"    with Indents:",
+                    f"      sid={indent.sid},  "
+                    f"indent={indent.indent},  "
+                    f"valid_start={indent.validity_start}, "
+                    f"version_group={indent.version_group.pk}, ",
                 ),
             )
-            for indent in measure.goods_nomenclature.indents.all():
+
+        if clashes:
+            self.stdout.write(f"{len(clashes)} ME32 rule clashe(s) found:")
+            for c in clashes:
                 self.stdout.write(
-                    self.style.SUCCESS(
-                        f"      sid={indent.sid},  "
-                        f"indent={indent.indent},  "
-                        f"valid_start={indent.validity_start}, "
-                        f"version_group={indent.version_group.pk}, ",
+                    self.style.ERROR(
+                        f"Measure:  "
+                        f"sid={c.sid},  "
+                        f"update_type={c.get_update_type_display()},  "
+                        f"effective_valid_between={c.effective_valid_between}  "
+                        f"transaction.id={c.transaction.id},  "
+                        f"workbasket.pk={c.transaction.workbasket.pk}, ",
                     ),
                 )
-
-            if clashes:
-                self.stdout.write(f"{clashes.count()} ME32 rule clashe(s) found:")
-                for c in clashes:
-                    self.stdout.write(
-                        self.style.ERROR(
-                            f"Measure:  "
-                            f"sid={c.sid},  "
-                            f"update_type={c.get_update_type_display()},  "
-                            f"effective_valid_between={c.effective_valid_between}  "
-                            f"transaction.id={c.transaction.id},  "
-                            f"workbasket.pk={c.transaction.workbasket.pk}, ",
-                        ),
-                    )
-                    # NOTE: Is this commodity the latest as at measure tranx?
-                    self.stdout.write(
-                        self.style.ERROR(
-                            f"  having the attached Commodity:  "
-                            f"item_id={c.goods_nomenclature.item_id},  "
-                            f"sid={c.goods_nomenclature.sid},  "
-                            f"valid_between={c.goods_nomenclature.valid_between}, ",
-                        ),
-                    )
+                # NOTE: Is this commodity the latest as at measure tranx?
+                self.stdout.write(
+                    self.style.ERROR(
+                        f"  having the attached Commodity:  "
+                        f"item_id={c.goods_nomenclature.item_id},  "
+                        f"sid={c.goods_nomenclature.sid},  "
+                        f"valid_between={c.goods_nomenclature.valid_between}, ",
+                    ),
+                )
+                self.stdout.write(
+                    self.style.ERROR(
+                        f"  with Indents:",
+                    ),
+                )
+                for indent in c.goods_nomenclature.indents.all():
                     self.stdout.write(
                         self.style.ERROR(
-                            f"  with Indents:",
+                            f"    sid={indent.sid},  "
+                            f"indent={indent.indent},  "
+                            f"validity_start={indent.validity_start}, "
+                            f"version_group={indent.version_group.pk}, ",
                         ),
                     )
-                    for indent in c.goods_nomenclature.indents.all():
-                        self.stdout.write(
-                            self.style.ERROR(
-                                f"    sid={indent.sid},  "
-                                f"indent={indent.indent},  "
-                                f"validity_start={indent.validity_start}, "
-                                f"version_group={indent.version_group.pk}, ",
-                            ),
-                        )
-
-                    self.stdout.write()
+
+                self.stdout.write()
@@ -1,8 +1,12 @@
+import logging
+
 from celery import group
 from celery import shared_task
 from celery.utils.log import get_task_logger
 from django.db.transaction import atomic
 
+from checks.checks import checker_registry
+from checks.checks import preload_rules
 from checks.tasks import check_transaction
 from checks.tasks import check_transaction_sync
 from common.celery import app
@@ -28,6 +32,23 @@ def transition(instance_id: int, state: str, *args):
     logger.info("Transitioned workbasket %s to state %s", instance_id, instance.status)
 
 
+def log_checker_lookups_avoided(workbasket: WorkBasket):
+    """
+    Log how many checker lookups the checker registry avoids when finding the
+    checks to run against the models in the workbasket.
+
+    Counting them takes a query, so this is only done when debug logging is
+    enabled.
+    """
+    if not logger.isEnabledFor(logging.DEBUG):
+        return
+    logger.debug(
+        "Checker registry avoids %s checker lookups per pass over workbasket %s",
+        checker_registry.lookups_avoided(workbasket.tracked_models),
+        workbasket.pk,
+    )
+
+
 @app.task(bind=True)
 def check_workbasket(self, workbasket_id: int):
     """Run and record transaction checks for the passed workbasket ID,
@@ -37,6 +58,7 @@ def check_workbasket(self, workbasket_id: int):
     transactions = workbasket.transactions.values_list("pk", flat=True)
 
     logger.debug("Setup task to check workbasket %s", workbasket_id)
+    log_checker_lookups_avoided(workbasket)
     return self.replace(group(check_transaction.si(id) for id in transactions))
 
 
@@ -46,7 +68,9 @@ def check_workbasket_sync(workbasket: WorkBasket):
     synchronously.
 
     This method will run all of the checks one after the other and won't return
-    until they are complete. This is useful for testing and debugging.
+    until they are complete. This is useful for testing and debugging. Business
+    rules that can be evaluated for the whole workbasket at once are given the
+    chance to do so before any checks run (see ``BusinessRule.preload``).
     """
     transactions = workbasket.transactions.all()
 
@@ -55,8 +79,10 @@ def check_workbasket_sync(workbasket: WorkBasket):
         workbasket.pk,
         transactions.count(),
     )
-    for transaction in transactions:
-        check_transaction_sync(transaction)
+    log_checker_lookups_avoided(workbasket)
+    with preload_rules(workbasket):
+        for transaction in transactions:
+            check_transaction_sync(transaction)
 
 
 @app.task(bind=True)
@@ -2,9 +2,11 @@ from io import StringIO
 
 import pytest
 from django.core.management import call_command
+from django.core.management.base import CommandError
 
 from checks.checks import INTERNAL_ERROR_MESSAGE
 from checks.tests.factories import TrackedModelCheckFactory
+from common.tests.factories import MeasureFactory
 from common.tests.factories import WorkBasketFactory
 
 pytestmark = pytest.mark.django_db
@@ -93,3 +95,35 @@ def test_override_check_tranx_check_not_completed():
         f"Related transaction check, {tranx_check.pk}, has not completed "
         in out.getvalue()
     )
+
+
+def test_me32_clashes_for_whole_workbasket(date_ranges):
+    measure = MeasureFactory.create(
+        goods_nomenclature__valid_between=date_ranges.big,
+        valid_between=date_ranges.normal,
+    )
+    workbasket = measure.transaction.workbasket
+    MeasureFactory.create(
+        transaction=workbasket.new_transaction(),
+        goods_nomenclature=measure.goods_nomenclature,
+        measure_type=measure.measure_type,
+        geographical_area=measure.geographical_area,
+        order_number=measure.order_number,
+        additional_code=measure.additional_code,
+        reduction=measure.reduction,
+        generating_regulation=measure.generating_regulation,
+        valid_between=measure.valid_between,
+    )
+
+    out = StringIO()
+    call_command("me32_clashes", "--workbasket-pk", f"{workbasket.pk}", stdout=out)
+
+    output = out.getvalue()
+    assert "Checking 2 measure instance(s)" in output
+    assert output.count("1 ME32 rule clashe(s) found:") == 1
+    assert f"sid={measure.sid}" in output
+
+
+def test_me32_clashes_requires_measure_sid_or_workbasket():
+    with pytest.raises(CommandError, match="--workbasket-pk is required"):
+        call_command("me32_clashes")